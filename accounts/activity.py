@@ -0,0 +1,307 @@
+import atexit
+import base64
+import json
+import logging
+import os
+import threading
+import time
+
+from django.conf import settings
+from django.db import OperationalError, connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import UserActivity
+from .utils import get_client_ip
+
+
+logger = logging.getLogger(__name__)
+
+# The writer thread wakes up this often, or as soon as this many records wait
+FLUSH_INTERVAL = 2.0
+FLUSH_SIZE = 200
+
+# Rows per INSERT statement
+BATCH_SIZE = 500
+
+# Spool files still being appended to by their worker are left alone
+SPOOL_MIN_AGE = 60
+
+# Activities per page of a user's timeline
+TIMELINE_PAGE_SIZE = 50
+
+
+def is_buffered():
+    return getattr(settings, 'ACTIVITY_LOG_BUFFERED', True)
+
+
+def get_spool_dir():
+    return getattr(settings, 'ACTIVITY_SPOOL_DIR', os.path.join(settings.BASE_DIR, 'activity_spool'))
+
+
+def build_activity(request, action, user=None):
+    return UserActivity(
+        user=user if user is not None else request.user,
+        action=action[:255],
+        ip_address=get_client_ip(request),
+        timestamp=timezone.now(),
+    )
+
+
+def log_activity(request, action, user=None):
+    """
+    Record an action of the current user (or of `user`, e.g. right after signing up).
+    Inside a request the record is only written after the response is built
+    (ActivityLogMiddleware); elsewhere it is written at once.
+    """
+    activity = build_activity(request, action, user)
+    pending = getattr(request, '_activity_log', None)
+    if pending is None:
+        write_activities([activity])
+    else:
+        pending.append(activity)
+
+
+def to_spool_line(activity):
+    return json.dumps({
+        'user_id': activity.user_id,
+        'action': activity.action,
+        'ip_address': activity.ip_address,
+        'timestamp': activity.timestamp.isoformat(),
+    }, ensure_ascii=False)
+
+
+def from_spool_line(line):
+    row = json.loads(line)
+    return UserActivity(
+        user_id=row['user_id'], action=row['action'], ip_address=row['ip_address'],
+        timestamp=parse_datetime(row['timestamp']),
+    )
+
+
+def append_lines(path, lines):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'a', encoding='utf-8') as file:
+        for line in lines:
+            file.write(line + '\n')
+
+
+def spool_activities(activities):
+    """Keep records the database refused in a JSON lines file, for replay_activity_spool"""
+    path = os.path.join(get_spool_dir(), f'activity-{os.getpid()}.jsonl')
+    append_lines(path, map(to_spool_line, activities))
+    logger.warning('Spooled %d activity records to %s', len(activities), path)
+
+
+def insert_activities(activities):
+    """
+    One bulk INSERT (per BATCH_SIZE rows); when it fails, the rows are inserted
+    one by one so a single bad row (e.g. of a deleted user) doesn't take the others down.
+    Returns the records that could not be written.
+    """
+    try:
+        UserActivity.objects.bulk_create(activities, batch_size=BATCH_SIZE)
+        return []
+    except OperationalError:
+        # The database is unavailable: no row would get in
+        logger.exception('Could not write %d activity records', len(activities))
+        return activities
+    except Exception:
+        logger.exception('Could not write %d activity records at once, writing them one by one', len(activities))
+
+    failed = []
+    for index, activity in enumerate(activities):
+        try:
+            with transaction.atomic():
+                activity.save(force_insert=True)
+        except OperationalError:
+            logger.exception('Could not write activity records')
+            failed.extend(activities[index:])
+            break
+        except Exception:
+            logger.exception('Could not write the activity record %s', to_spool_line(activity))
+            failed.append(activity)
+    return failed
+
+
+def write_activities(activities):
+    """Write records; the ones the database refuses are spooled to disk"""
+    if not activities:
+        return
+    failed = insert_activities(activities)
+    if failed:
+        spool_activities(failed)
+
+
+def get_rejected_dir():
+    return os.path.join(get_spool_dir(), 'rejected')
+
+
+def is_database_up():
+    try:
+        connection.ensure_connection()
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+        return True
+    except OperationalError:
+        return False
+
+
+def replay_spool(min_age=SPOOL_MIN_AGE):
+    """
+    Insert spooled records; returns (written, rejected).
+    Records the database still refuses while it is up (and unreadable lines) are
+    moved to the rejected folder, in the spool format, so they never block the others.
+    When the database is down the file is left in place for the next replay.
+    """
+    spool_dir = get_spool_dir()
+    if not os.path.isdir(spool_dir):
+        return 0, 0
+
+    written = rejected = 0
+    for name in sorted(os.listdir(spool_dir)):
+        path = os.path.join(spool_dir, name)
+        if not name.endswith('.jsonl') or time.time() - os.path.getmtime(path) < min_age:
+            continue
+        # Claim the file so two processes never replay it twice
+        claimed = f'{path}.{os.getpid()}.replaying'
+        try:
+            os.rename(path, claimed)
+        except OSError:
+            continue
+
+        activities, unreadable = [], []
+        with open(claimed, encoding='utf-8') as file:
+            for line in filter(None, (line.strip() for line in file)):
+                try:
+                    activities.append(from_spool_line(line))
+                except (ValueError, KeyError, TypeError):
+                    unreadable.append(line)
+
+        failed = insert_activities(activities) if activities else []
+        database_down = bool(failed) and not is_database_up()
+        if database_down:
+            # Not the rows' fault: they wait for the next replay
+            append_lines(path, map(to_spool_line, failed))
+            logger.warning('Database unavailable, %d records left in %s', len(failed), path)
+
+        lines = unreadable if database_down else unreadable + list(map(to_spool_line, failed))
+        if lines:
+            append_lines(os.path.join(get_rejected_dir(), name), lines)
+            logger.warning('Moved %d rejected activity records of %s to %s', len(lines), name, get_rejected_dir())
+        os.remove(claimed)
+        written += len(activities) - len(failed)
+        rejected += len(lines)
+        if database_down:
+            break
+    return written, rejected
+
+
+def encode_cursor(activity):
+    value = f'{activity.timestamp.isoformat()}|{activity.pk}'
+    return base64.urlsafe_b64encode(value.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """(timestamp, id) of an encoded cursor, or None when it is missing or malformed"""
+    if not cursor:
+        return None
+    try:
+        value = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        timestamp, pk = value.split('|')
+        timestamp = parse_datetime(timestamp)
+        return (timestamp, int(pk)) if timestamp else None
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+
+def get_user_timeline(user, cursor=None, limit=TIMELINE_PAGE_SIZE):
+    """
+    One page of a user's activities, newest first, and the cursor of the next page (None on the last).
+    Pages seek past the cursor on the (user, timestamp, id) index instead of counting
+    skipped rows, so old pages cost the same as the first one.
+    """
+    activities = UserActivity.objects.filter(user=user).order_by('-timestamp', '-id')
+    position = decode_cursor(cursor)
+    if position:
+        timestamp, pk = position
+        activities = activities.filter(Q(timestamp__lt=timestamp) | Q(timestamp=timestamp, id__lt=pk))
+
+    page = list(activities[:limit + 1])
+    next_cursor = encode_cursor(page[limit - 1]) if len(page) > limit else None
+    return page[:limit], next_cursor
+
+
+class ActivityWriter:
+    """
+    Collects the records of finished requests and writes them from a daemon
+    thread in bulk. Whatever is left is written (or spooled) when the process exits.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.pending = []
+        self.wake = threading.Event()
+        self.thread = None
+        self.pid = None
+
+    def add(self, activities):
+        with self.lock:
+            self.pending.extend(activities)
+            size = len(self.pending)
+        self.ensure_thread()
+        if size >= FLUSH_SIZE:
+            self.wake.set()
+
+    def ensure_thread(self):
+        # Workers forked from a preloaded master must start their own thread
+        if self.pid == os.getpid() and self.thread.is_alive():
+            return
+        with self.lock:
+            if self.pid == os.getpid() and self.thread.is_alive():
+                return
+            self.pid = os.getpid()
+            self.thread = threading.Thread(target=self.run, name='activity-writer', daemon=True)
+            self.thread.start()
+
+    def take(self):
+        with self.lock:
+            activities, self.pending = self.pending, []
+        return activities
+
+    def flush(self):
+        write_activities(self.take())
+
+    def run(self):
+        while True:
+            self.wake.wait(FLUSH_INTERVAL)
+            self.wake.clear()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception('Activity writer failed')
+            finally:
+                connection.close()
+
+
+writer = ActivityWriter()
+atexit.register(writer.flush)
+
+
+class ActivityLogMiddleware:
+    """Collects log_activity() records during a request and hands them over once it is done"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request._activity_log = []
+        response = self.get_response(request)
+        activities = request._activity_log
+        if activities:
+            if is_buffered():
+                writer.add(activities)
+            else:
+                write_activities(activities)
+        return response
@@ -0,0 +1,40 @@
+from django.contrib.auth.backends import ModelBackend
+from django.db.models import Q
+from django.db.models.functions import Lower
+from django.db.models.lookups import Exact
+
+from .models import User
+
+
+def find_login_user(identifier):
+    """
+    The user a login name refers to: an exact username, else the one account with
+    that email (case-insensitive, on the lower(email) index). One query.
+    An email shared by several accounts matches none of them.
+    """
+    candidates = list(User.objects.filter(
+        Q(username=identifier) | Q(Exact(Lower('email'), identifier.lower()))
+    )[:3])
+    for user in candidates:
+        if user.username == identifier:
+            return user
+    return candidates[0] if len(candidates) == 1 else None
+
+
+class UsernameOrEmailBackend(ModelBackend):
+    """Authenticate with a username or an email address, hashing the password once"""
+
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        if username is None:
+            username = kwargs.get(User.USERNAME_FIELD)
+        if not username or password is None:
+            return None
+
+        user = find_login_user(username)
+        if user is None:
+            # Hash anyway so unknown accounts take as long as wrong passwords
+            User().set_password(password)
+            return None
+        if user.check_password(password) and self.user_can_authenticate(user):
+            return user
+        return None
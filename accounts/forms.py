@@ -1,6 +1,7 @@
 from django import forms
 from django.contrib.auth.forms import UserCreationForm
 from .models import User
+from .utils import email_in_use
 
 
 class LoginForm(forms.Form):
@@ -43,6 +44,12 @@ class RegisterForm(UserCreationForm):
         for field in self.fields:
             self.fields[field].widget.attrs.update({'class': 'form-control'})
 
+    def clean_email(self):
+        email = self.cleaned_data.get('email')
+        if email and email_in_use(email):
+            raise forms.ValidationError('البريد الإلكتروني مستخدم في حساب آخر')
+        return email
+
 
 from django import forms
 from django.contrib.auth.forms import PasswordResetForm, SetPasswordForm
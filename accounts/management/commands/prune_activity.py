@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.models import UserActivity
+from accounts.retention import (PRUNE_BATCH_SIZE, get_archive_dir, get_cutoff, get_retention_days,
+                                is_archive_dir_ephemeral, prune_activity)
+
+
+class Command(BaseCommand):
+    help = ('Delete UserActivity rows older than the retention period (ACTIVITY_RETENTION_DAYS), '
+            'archiving them to gzip JSON lines first (run daily by the railway.prune-activity.json cron service)')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, help=f'Keep this many days instead of {get_retention_days()}')
+        parser.add_argument('--no-archive', action='store_true', help='Delete without writing an archive')
+        parser.add_argument('--batch-size', type=int, default=PRUNE_BATCH_SIZE)
+        parser.add_argument('--dry-run', action='store_true', help='Only count the rows that would go')
+
+    def handle(self, *args, **options):
+        cutoff = get_cutoff(options['days'])
+        if options['dry_run']:
+            count = UserActivity.objects.filter(timestamp__lt=cutoff).count()
+            self.stdout.write(f'{count} activities older than {cutoff:%Y-%m-%d %H:%M} would be deleted')
+            return
+
+        if not options['no_archive'] and is_archive_dir_ephemeral():
+            raise CommandError(
+                f'The archive would go to {get_archive_dir()}, which a redeploy wipes. Mount a volume or set '
+                f'ACTIVITY_ARCHIVE_DIR to persistent storage, or pass --no-archive.'
+            )
+        deleted, path = prune_activity(cutoff, archive=not options['no_archive'], batch_size=options['batch_size'])
+        message = f'Deleted {deleted} activities older than {cutoff:%Y-%m-%d %H:%M}'
+        if path:
+            message += f', archived to {path}'
+        self.stdout.write(self.style.SUCCESS(message))
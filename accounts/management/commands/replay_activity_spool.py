@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from accounts.activity import get_rejected_dir, get_spool_dir, replay_spool
+
+
+class Command(BaseCommand):
+    help = 'Write activity records that were spooled to disk while the database was unavailable'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--min-age', type=int, default=0,
+                            help='Skip spool files modified less than this many seconds ago')
+
+    def handle(self, *args, **options):
+        written, rejected = replay_spool(min_age=options['min_age'])
+        self.stdout.write(self.style.SUCCESS(f'{written} activity records written from {get_spool_dir()}'))
+        if rejected:
+            self.stdout.write(self.style.WARNING(f'{rejected} rejected records moved to {get_rejected_dir()}'))
@@ -1,5 +1,7 @@
 from django.contrib.auth.models import AbstractUser
 from django.db import models
+from django.db.models.functions import Lower
+from django.utils import timezone
 
 
 class User(AbstractUser):
@@ -31,6 +33,12 @@ class User(AbstractUser):
     date_joined = models.DateTimeField(auto_now_add=True)
     is_active = models.BooleanField(default=True)
 
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            # Login by email (accounts.backends) compares lower(email)
+            models.Index(Lower('email'), name='user_email_lower_idx'),
+        ]
+
     def __str__(self):
         return f"{self.username} - {self.get_role_display()}"
 
@@ -38,11 +46,18 @@ class User(AbstractUser):
 class UserActivity(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     action = models.CharField(max_length=255)
-    timestamp = models.DateTimeField(auto_now_add=True)
+    # Set when the action happens; the row itself may be written a moment later (see accounts.activity)
+    timestamp = models.DateTimeField(default=timezone.now, editable=False)
     ip_address = models.GenericIPAddressField(null=True, blank=True)
 
     class Meta:
         verbose_name_plural = "User Activities"
+        indexes = [
+            # Per-user timeline, newest first (keyset pagination on timestamp, id)
+            models.Index(fields=['user', '-timestamp', '-id'], name='activity_user_time_idx'),
+            # Latest activities on the dashboard, and the retention cutoff
+            models.Index(fields=['timestamp'], name='activity_time_idx'),
+        ]
 
     def __str__(self):
         return f"{self.user.username} - {self.action}"
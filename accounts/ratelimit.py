@@ -0,0 +1,46 @@
+from django.conf import settings
+from django.core.cache import cache
+
+from main.shared_cache import incr
+
+
+def get_max_attempts():
+    return getattr(settings, 'LOGIN_MAX_ATTEMPTS', 10)
+
+
+def get_max_attempts_per_ip():
+    return getattr(settings, 'LOGIN_MAX_ATTEMPTS_PER_IP', 50)
+
+
+def get_lockout_seconds():
+    return getattr(settings, 'LOGIN_LOCKOUT_SECONDS', 15 * 60)
+
+
+def get_attempt_limits(identifier, ip_address):
+    """
+    {cache key: allowed failures}. A login name is only throttled from the address
+    guessing its password, so nobody can lock someone else out of their account;
+    the address alone gets a larger allowance against spraying many names.
+    The counters live in the shared cache, so every worker counts towards the same limit.
+    """
+    name = identifier.strip().lower()
+    return {
+        f'login:failures:name:{ip_address}:{name}': get_max_attempts(),
+        f'login:failures:ip:{ip_address}': get_max_attempts_per_ip(),
+    }
+
+
+def is_login_blocked(identifier, ip_address):
+    limits = get_attempt_limits(identifier, ip_address)
+    counts = cache.get_many(list(limits))
+    return any(count >= limits[key] for key, count in counts.items())
+
+
+def record_login_failure(identifier, ip_address):
+    # Blocked until LOGIN_LOCKOUT_SECONDS after the last failure
+    for key in get_attempt_limits(identifier, ip_address):
+        incr(key, get_lockout_seconds())
+
+
+def reset_login_failures(identifier, ip_address):
+    cache.delete(next(iter(get_attempt_limits(identifier, ip_address))))
@@ -0,0 +1,84 @@
+import gzip
+import json
+import os
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import UserActivity
+
+
+# Rows archived and deleted per round trip
+PRUNE_BATCH_SIZE = 5000
+
+
+def get_retention_days():
+    return getattr(settings, 'ACTIVITY_RETENTION_DAYS', 365)
+
+
+def get_archive_dir():
+    return getattr(settings, 'ACTIVITY_ARCHIVE_DIR', os.path.join(settings.BASE_DIR, 'activity_archive'))
+
+
+def is_archive_dir_ephemeral():
+    """
+    True outside development when archives would be written inside the app's own
+    directory, which is the container's disk on Railway: every redeploy wipes it.
+    A mounted volume (RAILWAY_VOLUME_MOUNT_PATH) is persistent.
+    """
+    if settings.DEBUG:
+        return False
+    archive_dir = os.path.realpath(get_archive_dir())
+    volume = os.environ.get('RAILWAY_VOLUME_MOUNT_PATH')
+    if volume and is_inside(archive_dir, os.path.realpath(volume)):
+        return False
+    return is_inside(archive_dir, os.path.realpath(settings.BASE_DIR))
+
+
+def is_inside(path, folder):
+    return os.path.commonpath([path, folder]) == folder
+
+
+def get_cutoff(days=None):
+    return timezone.now() - timedelta(days=get_retention_days() if days is None else days)
+
+
+def prune_activity(cutoff, archive=True, batch_size=PRUNE_BATCH_SIZE):
+    """
+    Delete activities older than cutoff, oldest first, one batch at a time.
+    With archive set every batch is appended to a gzip JSON lines file before it
+    is deleted, so an interrupted run loses nothing (it may archive a batch twice).
+    Returns (deleted count, archive path or None).
+    """
+    old_rows = UserActivity.objects.filter(timestamp__lt=cutoff).order_by('timestamp', 'id')
+    path = None
+    archive_file = None
+    if archive:
+        archive_dir = get_archive_dir()
+        os.makedirs(archive_dir, exist_ok=True)
+        path = os.path.join(archive_dir, f'activity-{timezone.now():%Y%m%d-%H%M%S}.jsonl.gz')
+
+    deleted = 0
+    try:
+        while True:
+            batch = list(old_rows.values(
+                'id', 'user_id', 'user__username', 'action', 'ip_address', 'timestamp'
+            )[:batch_size])
+            if not batch:
+                break
+            if archive:
+                if archive_file is None:
+                    archive_file = gzip.open(path, 'at', encoding='utf-8')
+                for row in batch:
+                    row['username'] = row.pop('user__username')
+                    row['timestamp'] = row['timestamp'].isoformat()
+                    archive_file.write(json.dumps(row, ensure_ascii=False) + '\n')
+                archive_file.flush()
+            UserActivity.objects.filter(id__in=[row['id'] for row in batch]).delete()
+            deleted += len(batch)
+    finally:
+        if archive_file is not None:
+            archive_file.close()
+
+    return deleted, path if deleted else None
@@ -1,3 +1,204 @@
-from django.test import TestCase
+import gzip
+import json
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import OperationalError
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+
+from .activity import (FLUSH_SIZE, ActivityWriter, get_rejected_dir, get_spool_dir, replay_spool,
+                       write_activities)
+from .models import User, UserActivity
+from .ratelimit import is_login_blocked, record_login_failure, reset_login_failures
+from .retention import get_archive_dir, is_archive_dir_ephemeral
+from .utils import get_client_ip
+
+
+@contextmanager
+def database_down():
+    """Every INSERT of an activity fails as if the database were unreachable"""
+    error = OperationalError('could not connect to server')
+    with mock.patch.object(UserActivity, 'save', side_effect=error), \
+            mock.patch.object(UserActivity.objects, 'bulk_create', side_effect=error):
+        yield
+
+
+# Outside a transaction, so that foreign keys are checked on every INSERT as in production
+class ActivityLogTests(TransactionTestCase):
+    def setUp(self):
+        spool_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, spool_dir)
+        settings_override = override_settings(ACTIVITY_SPOOL_DIR=spool_dir)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.user = User.objects.create_user('student')
+        deleted = User.objects.create_user('deleted')
+        self.deleted_user_id = deleted.pk
+        deleted.delete()
+
+    def activity(self, action='-', user_id=None):
+        return UserActivity(user_id=user_id or self.user.pk, action=action, ip_address='10.0.0.1',
+                            timestamp=timezone.now())
+
+    def spool_file(self, name, lines):
+        path = os.path.join(get_spool_dir(), name)
+        os.makedirs(get_spool_dir(), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as file:
+            file.write('\n'.join(lines) + '\n')
+        return path
+
+    def read_spool(self, folder=None):
+        folder = folder or get_spool_dir()
+        lines = []
+        for name in sorted(os.listdir(folder)):
+            if name.endswith('.jsonl'):
+                with open(os.path.join(folder, name), encoding='utf-8') as file:
+                    lines += file.read().splitlines()
+        return lines
+
+    def test_writer_flushes_its_buffer(self):
+        writer = ActivityWriter()
+        with mock.patch.object(ActivityWriter, 'ensure_thread'):
+            writer.add([self.activity('first'), self.activity('second')])
+            self.assertFalse(writer.wake.is_set())
+            self.assertFalse(UserActivity.objects.exists())
+
+            writer.flush()
+            self.assertEqual(sorted(UserActivity.objects.values_list('action', flat=True)), ['first', 'second'])
+            self.assertEqual(writer.pending, [])
+
+            # A full buffer wakes the thread up before FLUSH_INTERVAL
+            writer.add([self.activity() for _ in range(FLUSH_SIZE)])
+            self.assertTrue(writer.wake.is_set())
+
+    def test_database_errors_spool_the_records(self):
+        with database_down():
+            write_activities([self.activity('first'), self.activity('second')])
+        self.assertFalse(UserActivity.objects.exists())
+        self.assertEqual([json.loads(line)['action'] for line in self.read_spool()], ['first', 'second'])
+
+    def test_only_the_bad_record_is_spooled(self):
+        write_activities([self.activity('first'), self.activity('orphan', self.deleted_user_id),
+                          self.activity('second')])
+        self.assertEqual(sorted(UserActivity.objects.values_list('action', flat=True)), ['first', 'second'])
+        self.assertEqual([json.loads(line)['action'] for line in self.read_spool()], ['orphan'])
+
+    def test_replay(self):
+        good = [json.dumps({'user_id': self.user.pk, 'action': f'action {i}', 'ip_address': None,
+                            'timestamp': timezone.now().isoformat()}) for i in range(3)]
+        orphan = json.dumps({'user_id': self.deleted_user_id, 'action': 'orphan', 'ip_address': None,
+                             'timestamp': timezone.now().isoformat()})
+        self.spool_file('activity-1.jsonl', good[:2])
+        self.spool_file('activity-2.jsonl', [good[2], orphan, '{"user_id": 1, "act'])
+
+        self.assertEqual(replay_spool(min_age=0), (3, 2))
+        self.assertEqual(UserActivity.objects.count(), 3)
+        # The poisoned rows are set aside instead of blocking every replay
+        self.assertEqual(self.read_spool(), [])
+        self.assertEqual(self.read_spool(get_rejected_dir()), ['{"user_id": 1, "act', orphan])
+        self.assertEqual(replay_spool(min_age=0), (0, 0))
+
+    def test_replay_waits_for_the_database(self):
+        line = json.dumps({'user_id': self.user.pk, 'action': '-', 'ip_address': None,
+                           'timestamp': timezone.now().isoformat()})
+        self.spool_file('activity-1.jsonl', [line])
+        with database_down(), mock.patch('accounts.activity.is_database_up', return_value=False):
+            self.assertEqual(replay_spool(min_age=0), (0, 0))
+        self.assertEqual(self.read_spool(), [line])
+        self.assertFalse(os.path.exists(get_rejected_dir()))
+
+        output = StringIO()
+        call_command('replay_activity_spool', stdout=output)
+        self.assertIn('1 activity records written', output.getvalue())
+        self.assertEqual(self.read_spool(), [])
+
+
+@override_settings(
+    CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'login-tests'}},
+    LOGIN_MAX_ATTEMPTS=3, LOGIN_MAX_ATTEMPTS_PER_IP=5, TRUSTED_PROXY_COUNT=1,
+)
+class LoginRateLimitTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def get_ip(self, forwarded_for=None, remote_addr='10.0.0.1'):
+        headers = {'HTTP_X_FORWARDED_FOR': forwarded_for} if forwarded_for else {}
+        return get_client_ip(RequestFactory().get('/', REMOTE_ADDR=remote_addr, **headers))
+
+    def fail(self, name, ip_address, times=1):
+        for _ in range(times):
+            record_login_failure(name, ip_address)
+
+    def test_client_ip_is_the_hop_added_by_the_proxy(self):
+        self.assertEqual(self.get_ip('203.0.113.9'), '203.0.113.9')
+        # Whatever the client put in the header itself is ignored
+        self.assertEqual(self.get_ip('1.2.3.4, 203.0.113.9'), '203.0.113.9')
+        self.assertEqual(self.get_ip('not-an-ip'), '10.0.0.1')
+        self.assertEqual(self.get_ip(), '10.0.0.1')
+        with self.settings(TRUSTED_PROXY_COUNT=2):
+            self.assertEqual(self.get_ip('1.2.3.4, 203.0.113.9, 10.0.0.2'), '203.0.113.9')
+        with self.settings(TRUSTED_PROXY_COUNT=0):
+            self.assertEqual(self.get_ip('1.2.3.4'), '10.0.0.1')
+
+    def test_forged_headers_share_one_limit(self):
+        for forged in ('1.1.1.1', '2.2.2.2', '3.3.3.3'):
+            self.fail('admin', self.get_ip(f'{forged}, 203.0.113.9'))
+        self.assertTrue(is_login_blocked('admin', self.get_ip('4.4.4.4, 203.0.113.9')))
+
+    def test_a_name_is_only_blocked_for_the_guessing_address(self):
+        self.fail('Admin ', '203.0.113.9', times=3)
+        self.assertTrue(is_login_blocked('admin', '203.0.113.9'))
+        # The owner of the account, elsewhere, can still sign in
+        self.assertFalse(is_login_blocked('admin', '198.51.100.1'))
+
+        reset_login_failures('admin', '203.0.113.9')
+        self.assertFalse(is_login_blocked('admin', '203.0.113.9'))
+
+    def test_an_address_spraying_names_is_blocked(self):
+        for name in ('a', 'b', 'c', 'd', 'e'):
+            self.fail(name, '203.0.113.9')
+        self.assertTrue(is_login_blocked('f', '203.0.113.9'))
+        self.assertFalse(is_login_blocked('f', '198.51.100.1'))
+
+
+class PruneActivityTests(TestCase):
+    def setUp(self):
+        archive_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, archive_dir)
+        settings_override = override_settings(ACTIVITY_ARCHIVE_DIR=archive_dir, ACTIVITY_RETENTION_DAYS=30)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        user = User.objects.create_user('student')
+        UserActivity.objects.create(user=user, action='old')
+        UserActivity.objects.create(user=user, action='recent')
+        UserActivity.objects.filter(action='old').update(timestamp=timezone.now() - timedelta(days=31))
+
+    def test_old_rows_are_archived_and_deleted(self):
+        call_command('prune_activity', stdout=StringIO())
+        self.assertEqual(list(UserActivity.objects.values_list('action', flat=True)), ['recent'])
+        [name] = os.listdir(get_archive_dir())
+        with gzip.open(os.path.join(get_archive_dir(), name), 'rt', encoding='utf-8') as file:
+            self.assertEqual([json.loads(line)['action'] for line in file], ['old'])
+
+    def test_archives_are_not_written_where_a_redeploy_wipes_them(self):
+        with self.settings(DEBUG=False, ACTIVITY_ARCHIVE_DIR=os.path.join(settings.BASE_DIR, 'activity_archive')), \
+                mock.patch.dict(os.environ, {'RAILWAY_VOLUME_MOUNT_PATH': ''}):
+            with self.assertRaisesMessage(CommandError, 'ACTIVITY_ARCHIVE_DIR'):
+                call_command('prune_activity', stdout=StringIO())
+            self.assertEqual(UserActivity.objects.count(), 2)
+
+            call_command('prune_activity', '--no-archive', stdout=StringIO())
+            self.assertEqual(UserActivity.objects.count(), 1)
+
+            # On a mounted volume
+            with mock.patch.dict(os.environ, {'RAILWAY_VOLUME_MOUNT_PATH': str(settings.BASE_DIR)}):
+                self.assertFalse(is_archive_dir_ephemeral())
@@ -1,7 +1,34 @@
+import ipaddress
+
+from django.conf import settings
+from django.db.models.functions import Lower
+from django.db.models.lookups import Exact
+
+
 def get_client_ip(request):
+    """
+    Address of the visitor. Each of the TRUSTED_PROXY_COUNT proxies in front of the
+    app appends the address it got the request from to X-Forwarded-For, so the visitor
+    is that many hops from the right; anything further left was sent by the client
+    and can't be trusted (it would let anyone pick the address the login limit counts).
+    """
+    proxy_count = getattr(settings, 'TRUSTED_PROXY_COUNT', 1)
     x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
-    if x_forwarded_for:
-        ip = x_forwarded_for.split(',')[0]
-    else:
-        ip = request.META.get('REMOTE_ADDR')
-    return ip
\ No newline at end of file
+    ip = request.META.get('REMOTE_ADDR')
+    if proxy_count and x_forwarded_for:
+        hops = [hop.strip() for hop in x_forwarded_for.split(',')]
+        ip = hops[max(len(hops) - proxy_count, 0)]
+    try:
+        return str(ipaddress.ip_address(ip))
+    except ValueError:
+        return request.META.get('REMOTE_ADDR')
+
+
+def email_in_use(email, exclude_pk=None):
+    """Whether another account already has this email, ignoring case"""
+    from .models import User
+
+    users = User.objects.filter(Exact(Lower('email'), email.lower()))
+    if exclude_pk is not None:
+        users = users.exclude(pk=exclude_pk)
+    return users.exists()
@@ -1,88 +1,57 @@
+import logging
+
 from django.shortcuts import render, redirect
 from django.contrib.auth import login, logout, authenticate
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from .models import User, UserActivity
+from .activity import log_activity
 from .forms import LoginForm, RegisterForm
+from .ratelimit import is_login_blocked, record_login_failure, reset_login_failures
+from .utils import get_client_ip
 
-def login_view(request):
-    print(f"=== LOGIN VIEW STARTED ===")
-    print(f"Request method: {request.method}")
+logger = logging.getLogger(__name__)
 
+
+def login_view(request):
     if request.method == 'POST':
-        print("POST request detected")
         form = LoginForm(request.POST)
-        print(f"Form created with POST data: {request.POST}")
 
         if form.is_valid():
-            print("Form is valid")
-            username_or_email = form.cleaned_data['username_or_email']  # Updated field name
+            username_or_email = form.cleaned_data['username_or_email']
             password = form.cleaned_data['password']
-            print(f"Attempting authentication for: {username_or_email}")
+            ip_address = get_client_ip(request)
 
-            # Try to authenticate with both username and email
-            user = None
+            if is_login_blocked(username_or_email, ip_address):
+                logger.warning('Login blocked after repeated failures: %r from %s', username_or_email, ip_address)
+                messages.error(request, 'تم تجاوز عدد محاولات تسجيل الدخول المسموح بها، يرجى المحاولة لاحقاً')
+                return render(request, 'accounts/login.html', {'form': form}, status=429)
 
-            # First, try to authenticate directly (will work for username)
+            # UsernameOrEmailBackend accepts either in one lookup
             user = authenticate(request, username=username_or_email, password=password)
-            print(f"Direct authentication result: {user}")
-
-            # If direct authentication failed, try with email
-            if user is None:
-                print("Direct authentication failed, trying with email...")
-                try:
-                    user_obj = User.objects.get(email=username_or_email)
-                    print(f"User found by email: {user_obj.username}")
-                    user = authenticate(request, username=user_obj.username, password=password)
-                    print(f"Email authentication result: {user}")
-                except User.DoesNotExist:
-                    user = None
-                    print("No user found with this email or username")
-
-            print(f"Final authentication result - User: {user}")
 
             if user is not None:
-                print(
-                    f"User authenticated successfully: {user.username}, Role: {getattr(user, 'role', 'No role attribute')}")
                 login(request, user)
-                print("User logged in successfully")
+                reset_login_failures(username_or_email, ip_address)
+                logger.info('Login succeeded: user=%s role=%s ip=%s', user.pk, user.role, ip_address)
 
                 # Log user activity
-                try:
-                    ip_address = get_client_ip(request)
-                    print(f"IP Address: {ip_address}")
-                    UserActivity.objects.create(
-                        user=user,
-                        action='تسجيل الدخول',
-                        ip_address=ip_address
-                    )
-                    print("User activity logged successfully")
-                except Exception as e:
-                    print(f"Error logging user activity: {e}")
+                log_activity(request, 'تسجيل الدخول', user=user)
 
                 messages.success(request, 'تم تسجيل الدخول بنجاح!')
-                print("Success message added")
 
                 # Redirect based on user role
-                print(f"Checking user role: {user.role}")
                 if user.role == 'program_manager':
-                    print("Redirecting to program manager dashboard")
                     return redirect('pm_dashboard')
                 else:
-                    print("Redirecting to regular dashboard")
                     return redirect('dashboard')
             else:
-                print("Authentication failed - user is None")
+                record_login_failure(username_or_email, ip_address)
+                logger.warning('Login failed: %r from %s', username_or_email, ip_address)
                 messages.error(request, 'اسم المستخدم/البريد الإلكتروني أو كلمة المرور غير صحيحة')
-                print("Error message added")
-        else:
-            print("Form is invalid")
-            print(f"Form errors: {form.errors}")
     else:
-        print("GET request detected - creating empty form")
         form = LoginForm()
 
-    print("Rendering login template")
     return render(request, 'accounts/login.html', {'form': form})
 
 
@@ -94,11 +63,7 @@ def register(request):
             user.set_password(form.cleaned_data['password1'])  # تم التصحيح هنا
             user.save()
 
-            UserActivity.objects.create(
-                user=user,
-                action='إنشاء حساب جديد',
-                ip_address=get_client_ip(request)
-            )
+            log_activity(request, 'إنشاء حساب جديد', user=user)
 
             messages.success(request, 'تم إنشاء الحساب بنجاح! يمكنك الآن تسجيل الدخول.')
             return redirect('login')
@@ -110,29 +75,16 @@ def register(request):
 
 def logout_view(request):
     if request.user.is_authenticated:
-        UserActivity.objects.create(
-            user=request.user,
-            action='تسجيل الخروج',
-            ip_address=get_client_ip(request)
-        )
+        log_activity(request, 'تسجيل الخروج')
     logout(request)
     messages.success(request, 'تم تسجيل الخروج بنجاح!')
     return redirect('home')
 
 
-def get_client_ip(request):
-    x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
-    if x_forwarded_for:
-        ip = x_forwarded_for.split(',')[0]
-    else:
-        ip = request.META.get('REMOTE_ADDR')
-    return ip
-
-
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.core.mail import send_mail
+from main.outbox import enqueue_email
 from django.template.loader import render_to_string
 from django.utils.html import strip_tags
 from django.conf import settings
@@ -148,7 +100,7 @@ def password_reset_request(request):
             reset_token = form.save()
 
             if reset_token:
-                # Send email
+                # Queue the email
                 subject = 'إعادة تعيين كلمة المرور - منصة التحفيظ'
                 reset_url = request.build_absolute_uri(
                     f'/accounts/password-reset-confirm/{reset_token.token}/'
@@ -163,35 +115,18 @@ def password_reset_request(request):
                 html_message = render_to_string('accounts/password_reset_email.html', context)
                 plain_message = strip_tags(html_message)
 
-                try:
-                    send_mail(
-                        subject=subject,
-                        message=plain_message,
-                        from_email=settings.DEFAULT_FROM_EMAIL,
-                        recipient_list=[reset_token.user.email],
-                        html_message=html_message,
-                        fail_silently=False,
-                    )
-
-                    messages.success(
-                        request,
-                        'تم إرسال رابط إعادة تعيين كلمة المرور إلى بريدك الإلكتروني. '
-                        'يرجى التحقق من صندوق الوارد.'
-                    )
-
-                    # Log activity
-                    if request.user.is_authenticated:
-                        UserActivity.objects.create(
-                            user=request.user,
-                            action='طلب إعادة تعيين كلمة المرور',
-                            ip_address=get_client_ip(request)
-                        )
-
-                except Exception as e:
-                    messages.error(
-                        request,
-                        'حدث خطأ أثناء إرسال البريد الإلكتروني. يرجى المحاولة مرة أخرى.'
-                    )
+                # Delivered by run_outbox_worker, never inside the request
+                enqueue_email(subject, plain_message, [reset_token.user.email], html_body=html_message)
+
+                messages.success(
+                    request,
+                    'تم إرسال رابط إعادة تعيين كلمة المرور إلى بريدك الإلكتروني. '
+                    'يرجى التحقق من صندوق الوارد.'
+                )
+
+                # Log activity
+                if request.user.is_authenticated:
+                    log_activity(request, 'طلب إعادة تعيين كلمة المرور')
             else:
                 messages.error(
                     request,
@@ -223,11 +158,7 @@ def password_reset_confirm(request, token):
                 reset_token.save()
 
                 # Log activity
-                UserActivity.objects.create(
-                    user=reset_token.user,
-                    action='إعادة تعيين كلمة المرور',
-                    ip_address=get_client_ip(request)
-                )
+                log_activity(request, 'إعادة تعيين كلمة المرور', user=reset_token.user)
 
                 messages.success(request, 'تم إعادة تعيين كلمة المرور بنجاح. يمكنك الآن تسجيل الدخول.')
                 return redirect('login')
@@ -256,11 +187,7 @@ def password_change(request):
             update_session_auth_hash(request, form.user)
 
             # Log activity
-            UserActivity.objects.create(
-                user=request.user,
-                action='تغيير كلمة المرور',
-                ip_address=get_client_ip(request)
-            )
+            log_activity(request, 'تغيير كلمة المرور')
 
             messages.success(request, 'تم تغيير كلمة المرور بنجاح.')
             return redirect('dashboard')
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class CulturalCommitteeDashboardConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'cultural_committee_dashboard'
+
+    def ready(self):
+        from . import signals  # noqa: F401
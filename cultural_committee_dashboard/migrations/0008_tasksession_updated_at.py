@@ -0,0 +1,27 @@
+# Generated by Django 5.2.6 on 2026-10-18 14:02
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def copy_created_at(apps, schema_editor):
+    """Best available guess for rows created before the field existed"""
+    Model = apps.get_model('cultural_committee_dashboard', 'tasksession')
+    Model.objects.update(updated_at=models.F('created_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cultural_committee_dashboard', '0007_culturaltask_created_by_culturaltask_is_recurring_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tasksession',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now, verbose_name='تاريخ التحديث'),
+            preserve_default=False,
+        ),
+        migrations.RunPython(copy_created_at, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.6 on 2026-10-18 13:49
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cultural_committee_dashboard', '0008_tasksession_updated_at'),
+        ('director_dashboard', '0005_exportjob'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='culturalnotification',
+            index=models.Index(fields=['user', '-created_at'], name='culnotif_user_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='culturalnotification',
+            index=models.Index(condition=models.Q(('is_read', False)), fields=['user'], name='culnotif_unread_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='culturaltask',
+            index=models.Index(fields=['committee', 'status', 'due_date'], name='cultask_comm_status_due_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='culturaltask',
+            index=models.Index(fields=['committee', '-created_at'], name='cultask_comm_created_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-18 14:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cultural_committee_dashboard', '0009_query_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='culturalnotification',
+            name='notification_type',
+            field=models.CharField(choices=[('task_added', 'إضافة مهمة'), ('task_updated', 'تعديل مهمة'), ('task_overdue', 'مهمة متأخرة'), ('file_uploaded', 'رفع ملف'), ('report_uploaded', 'رفع تقرير'), ('discussion_created', 'نقاش جديد')], max_length=50),
+        ),
+    ]
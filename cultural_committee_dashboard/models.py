@@ -1,12 +1,13 @@
+from django.contrib.contenttypes.fields import GenericRelation
 from django.db import models
 from accounts.models import User
 from director_dashboard.models import Program, Committee
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.utils.translation import gettext_lazy as _
-from datetime import timedelta
+from main.recurrence import RecurrenceMixin
 
 
-class CulturalTask(models.Model):
+class CulturalTask(RecurrenceMixin, models.Model):
     """Model representing a cultural committee task"""
 
     TASK_TYPE_CHOICES = [
@@ -117,6 +118,9 @@ class CulturalTask(models.Model):
         verbose_name=_('تاريخ انتهاء التكرار')
     )
 
+    # Pre-expanded calendar days, maintained by main.signals
+    occurrences = GenericRelation('main.TaskOccurrence')
+
     completion_percentage = models.IntegerField(
         default=0,
         validators=[MinValueValidator(0), MaxValueValidator(100)],
@@ -151,6 +155,10 @@ class CulturalTask(models.Model):
         verbose_name = _('مهمة ثقافية')
         verbose_name_plural = _('المهام الثقافية')
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['committee', 'status', 'due_date'], name='cultask_comm_status_due_idx'),
+            models.Index(fields=['committee', '-created_at'], name='cultask_comm_created_idx'),
+        ]
 
     def __str__(self):
         recurrence = " (متكررة)" if self.is_recurring else ""
@@ -167,92 +175,6 @@ class CulturalTask(models.Model):
         """Get the number of sessions associated with this task"""
         return self.sessions.count()
 
-    def get_occurrence_dates(self, start_date=None, end_date=None):
-        """
-        Get all dates when this task occurs within the given range.
-        Returns a list of date objects.
-        """
-        if not self.is_recurring:
-            return [self.start_date or self.due_date]
-
-        dates = []
-        current_date = start_date or self.start_date or self.due_date
-        end = end_date or self.recurrence_end_date or self.due_date
-
-        # Don't go before start_date
-        task_start = self.start_date or self.due_date
-        if current_date < task_start:
-            current_date = task_start
-
-        # Don't go past recurrence_end_date if set
-        if self.recurrence_end_date and end > self.recurrence_end_date:
-            end = self.recurrence_end_date
-
-        if self.recurrence_pattern == 'daily':
-            # Add every day from start to end
-            while current_date <= end:
-                dates.append(current_date)
-                current_date += timedelta(days=1)
-
-        elif self.recurrence_pattern == 'weekly':
-            # Add every 7 days
-            while current_date <= end:
-                dates.append(current_date)
-                current_date += timedelta(days=7)
-
-        elif self.recurrence_pattern == 'custom' and self.recurrence_days:
-            # Convert calendar weekdays to Python weekdays
-            # Calendar: Sunday=0, Monday=1, ..., Saturday=6
-            # Python: Monday=0, Tuesday=1, ..., Sunday=6
-            calendar_to_python = {
-                0: 6,  # Sunday
-                1: 0,  # Monday
-                2: 1,  # Tuesday
-                3: 2,  # Wednesday
-                4: 3,  # Thursday
-                5: 4,  # Friday
-                6: 5,  # Saturday
-            }
-
-            python_weekdays = [calendar_to_python[day] for day in self.recurrence_days if day in calendar_to_python]
-
-            # Add specific weekdays
-            while current_date <= end:
-                if current_date.weekday() in python_weekdays:
-                    dates.append(current_date)
-                current_date += timedelta(days=1)
-
-        return dates
-
-    def get_consecutive_day_groups(self, start_date=None, end_date=None):
-        """
-        Group consecutive days together for display as single badge.
-        Returns list of tuples: [(start_date, end_date), ...]
-        """
-        dates = self.get_occurrence_dates(start_date, end_date)
-        if not dates:
-            return []
-
-        dates = sorted(dates)
-        groups = []
-        group_start = dates[0]
-        group_end = dates[0]
-
-        for i in range(1, len(dates)):
-            if dates[i] == group_end + timedelta(days=1):
-                # Consecutive day, extend current group
-                group_end = dates[i]
-            else:
-                # Gap found, save current group and start new one
-                groups.append((group_start, group_end))
-                group_start = dates[i]
-                group_end = dates[i]
-
-        # Add the last group
-        groups.append((group_start, group_end))
-
-        return groups
-
 from django.utils import timezone
 from datetime import datetime
 class TaskSession(models.Model):
@@ -299,6 +221,11 @@ class TaskSession(models.Model):
         verbose_name=_('تاريخ الإنشاء')
     )
 
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        verbose_name=_('تاريخ التحديث')
+    )
+
     class Meta:
         verbose_name = _('جلسة')
         verbose_name_plural = _('الجلسات')
@@ -429,6 +356,7 @@ class CulturalNotification(models.Model):
     NOTIFICATION_TYPES = [
         ('task_added', 'إضافة مهمة'),
         ('task_updated', 'تعديل مهمة'),
+        ('task_overdue', 'مهمة متأخرة'),
         ('file_uploaded', 'رفع ملف'),
         ('report_uploaded', 'رفع تقرير'),
         ('discussion_created', 'نقاش جديد'),
@@ -451,6 +379,10 @@ class CulturalNotification(models.Model):
         ordering = ['-created_at']
         verbose_name = 'إشعار'
         verbose_name_plural = 'الإشعارات'
+        indexes = [
+            models.Index(fields=['user', '-created_at'], name='culnotif_user_created_idx'),
+            models.Index(fields=['user'], condition=models.Q(is_read=False), name='culnotif_unread_idx'),
+        ]
 
     def __str__(self):
         return self.title
@@ -471,6 +403,9 @@ class DailyPhrase(models.Model):
         ('friday', 'الجمعة'),
     ]
 
+    # date.weekday() (Monday = 0) -> day_of_week
+    WEEKDAY_CODES = ('monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday')
+
     committee = models.ForeignKey(Committee, on_delete=models.CASCADE, related_name='daily_phrases')
     phrase = models.TextField(verbose_name='العبارة')
     author = models.CharField(max_length=255, blank=True, verbose_name='المؤلف (اختياري)')
@@ -501,58 +436,12 @@ class DailyPhrase(models.Model):
         day_name = self.get_day_of_week_display()
         return f"عبارة {day_name}"
 
-    def get_today_phrase():
-        """Get today's phrase based on current day of week"""
-        from django.utils import timezone
-        import datetime
-
-        today = timezone.now().date()
-        # Get day name in Arabic matching our choices
-        day_mapping = {
-            5: 'saturday',  # Monday = 0, Saturday = 5
-            6: 'sunday',  # Sunday = 6
-            0: 'monday',  # Monday = 0
-            1: 'tuesday',  # Tuesday = 1
-            2: 'wednesday',  # Wednesday = 2
-            3: 'thursday',  # Thursday = 3
-            4: 'friday',  # Friday = 4
-        }
-
-        current_day = day_mapping.get(today.weekday(), 'all')
-
-        # First try to get phrase for specific day
-        phrase = DailyPhrase.objects.filter(
-            is_active=True,
-            day_of_week=current_day
-        ).first()
-
-        # If no specific day phrase, get the "all days" phrase
-        if not phrase:
-            phrase = DailyPhrase.objects.filter(
-                is_active=True,
-                day_of_week='all'
-            ).first()
-
-        return phrase
+    @classmethod
+    def get_day_code(cls, day):
+        """day_of_week value of a date"""
+        return cls.WEEKDAY_CODES[day.weekday()]
 
     @property
     def is_today_phrase(self):
         """Check if this phrase should be displayed today"""
-        from django.utils import timezone
-        import datetime
-
-        today = timezone.now().date()
-        day_mapping = {
-            5: 'saturday',
-            6: 'sunday',
-            0: 'monday',
-            1: 'tuesday',
-            2: 'wednesday',
-            3: 'thursday',
-            4: 'friday',
-        }
-
-        current_day = day_mapping.get(today.weekday(), 'all')
-
-        # If phrase is for all days or matches today's day
-        return self.day_of_week == 'all' or self.day_of_week == current_day
\ No newline at end of file
+        return self.day_of_week in ('all', self.get_day_code(timezone.localdate()))
\ No newline at end of file
@@ -0,0 +1,83 @@
+from datetime import datetime, time, timedelta
+
+from django.core.cache import cache
+from django.utils import timezone
+
+from director_dashboard.models import Committee, Program
+from main.shared_cache import bump_version, cap_timeout, get_version
+
+from .models import DailyPhrase
+
+
+VERSION_KEY = 'daily_phrase:version'
+
+
+def get_phrase_version():
+    """
+    Generation of the cached phrases; phrase, committee and supervisor changes bump it.
+    It lives in the shared cache, so an edit on one worker drops the phrase in all of them.
+    """
+    return get_version(VERSION_KEY)
+
+
+def invalidate_daily_phrases():
+    bump_version(VERSION_KEY)
+
+
+def get_seconds_until_midnight(now=None):
+    """Seconds left in the local day (TIME_ZONE, Asia/Riyadh), so a cached phrase never outlives its day"""
+    now = timezone.localtime(now)
+    midnight = timezone.make_aware(datetime.combine(now.date() + timedelta(days=1), time()), now.tzinfo)
+    return max(int((midnight - now).total_seconds()), 1)
+
+
+def get_cultural_committee_id(program_id=None):
+    """The cultural committee writing the phrases of a program (of the first program when None)"""
+    if program_id is None:
+        program_id = Program.objects.values_list('id', flat=True).first()
+        if program_id is None:
+            return None
+    return Committee.objects.filter(
+        program_id=program_id, supervisor__supervisor_type='cultural'
+    ).order_by('id').values_list('id', flat=True).first()
+
+
+def find_today_phrase(committee_id, day):
+    """The committee's active phrase for this weekday, else its phrase for every day"""
+    if committee_id is None:
+        return None
+    phrases = {
+        phrase.day_of_week: phrase
+        for phrase in DailyPhrase.objects.filter(
+            committee_id=committee_id, is_active=True, day_of_week__in=(DailyPhrase.get_day_code(day), 'all')
+        )
+    }
+    return phrases.get(DailyPhrase.get_day_code(day)) or phrases.get('all')
+
+
+def get_today_phrase(committee=None, program=None):
+    """
+    Today's phrase of a cultural committee, or of the cultural committee of a program
+    (of the first program when neither is given). Committees and programs may be given
+    as instances or ids. Cached until local midnight (LOCAL_CACHE_TIMEOUT at most
+    on a per-process cache, which other processes' edits can't reach).
+    """
+    committee_id = getattr(committee, 'pk', committee)
+    program_id = getattr(program, 'pk', program)
+    today = timezone.localdate()
+    if committee_id is not None:
+        scope = f'committee:{committee_id}'
+    else:
+        scope = f'program:{program_id or "default"}'
+
+    key = f'daily_phrase:v{get_phrase_version()}:{today}:{scope}'
+    cached = cache.get(key)
+    if cached is not None:
+        # Stored as (phrase,) so that "no phrase today" is cached too
+        return cached[0]
+
+    if committee_id is None:
+        committee_id = get_cultural_committee_id(program_id)
+    phrase = find_today_phrase(committee_id, today)
+    cache.set(key, (phrase,), cap_timeout(get_seconds_until_midnight()))
+    return phrase
@@ -0,0 +1,22 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from accounts.models import User
+from director_dashboard.models import Committee, Program
+
+from .models import DailyPhrase
+from .phrases import invalidate_daily_phrases
+
+
+@receiver([post_save, post_delete], sender=DailyPhrase, dispatch_uid='daily_phrase')
+@receiver([post_save, post_delete], sender=Committee, dispatch_uid='daily_phrase_committee')
+@receiver([post_save, post_delete], sender=Program, dispatch_uid='daily_phrase_program')
+def daily_phrase_changed(sender, instance, **kwargs):
+    invalidate_daily_phrases()
+
+
+@receiver(post_save, sender=User, dispatch_uid='daily_phrase_supervisor')
+def phrase_supervisor_changed(sender, instance, created, update_fields=None, **kwargs):
+    # A supervisor's type decides which committee writes the phrases; logins only touch last_login
+    if not created and instance.role == 'committee_supervisor' and update_fields != frozenset(['last_login']):
+        invalidate_daily_phrases()
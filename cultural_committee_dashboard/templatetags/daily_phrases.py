@@ -0,0 +1,15 @@
+from django import template
+
+from cultural_committee_dashboard.phrases import get_today_phrase
+
+register = template.Library()
+
+
+@register.simple_tag
+def today_phrase(committee=None, program=None):
+    """
+    Today's phrase, served from the cache:
+        {% today_phrase program=committee.program_id as daily_phrase %}
+    See cultural_committee_dashboard.phrases.get_today_phrase for the arguments.
+    """
+    return get_today_phrase(committee=committee, program=program)
@@ -6,33 +6,20 @@ from django.utils import timezone
 from datetime import timedelta
 from director_dashboard.models import Committee
 from accounts.models import User, UserActivity
+from accounts.activity import log_activity
+from main.notifications import dispatch as dispatch_notifications
+from main.rollups import get_committee_rollup
+from main.scope import committee_required, get_supervised_committee_or_404
 from .models import (CulturalTask, CommitteeMember, FileLibrary,
                      Discussion, DiscussionComment, CulturalReport, CulturalNotification,DailyPhrase)
 from .forms import (CulturalTaskForm, CommitteeMemberForm, FileLibraryForm,
                     DiscussionForm, DiscussionCommentForm, CulturalReportForm,DailyPhraseForm)
 
 
-def get_client_ip(request):
-    x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
-    if x_forwarded_for:
-        ip = x_forwarded_for.split(',')[0]
-    else:
-        ip = request.META.get('REMOTE_ADDR')
-    return ip
-
-
 @login_required
+@committee_required('cultural')
 def add_report(request):
-    if request.user.role != 'committee_supervisor' or request.user.supervisor_type != 'cultural':
-        messages.error(request, 'ليس لديك صلاحية للوصول إلى هذه الصفحة')
-        return redirect('home')
-
-    # Get user's committee
-    try:
-        committee = Committee.objects.get(supervisor=request.user)
-    except Committee.DoesNotExist:
-        messages.error(request, 'لم يتم تعيين لجنة لك بعد')
-        return redirect('home')
+    committee = request.committee
 
     if request.method == 'POST':
         form = CulturalReportForm(request.POST, request.FILES)
@@ -44,22 +31,18 @@ def add_report(request):
 
             # Notify members
             members = CommitteeMember.objects.filter(committee=committee, is_active=True)
-            for member in members:
-                CulturalNotification.objects.create(
-                    user=member.user,
-                    committee=committee,
-                    notification_type='report_uploaded',
-                    title='تقرير جديد',
-                    message=f'تم رفع تقرير جديد: {report.title}',
-                    related_report=report
-                )
-
-            UserActivity.objects.create(
-                user=request.user,
-                action=f'إضافة تقرير ثقافي: {report.title}',
-                ip_address=get_client_ip(request)
+            dispatch_notifications(
+                members.values_list('user_id', flat=True),
+                model=CulturalNotification,
+                committee=committee,
+                notification_type='report_uploaded',
+                title='تقرير جديد',
+                message=f'تم رفع تقرير جديد: {report.title}',
+                related_report=report
             )
 
+            log_activity(request, f'إضافة تقرير ثقافي: {report.title}')
+
             messages.success(request, 'تم إضافة التقرير بنجاح!')
             return redirect('cultural_reports')
     else:
@@ -74,16 +57,9 @@ def add_report(request):
 
 
 @login_required
+@committee_required('cultural')
 def notifications(request):
-    if request.user.role != 'committee_supervisor' or request.user.supervisor_type != 'cultural':
-        messages.error(request, 'ليس لديك صلاحية للوصول إلى هذه الصفحة')
-        return redirect('home')
-
-    try:
-        committee = Committee.objects.get(supervisor=request.user)
-    except Committee.DoesNotExist:
-        messages.error(request, 'لم يتم تعيين لجنة لك بعد')
-        return redirect('home')
+    committee = request.committee
 
     notifications = CulturalNotification.objects.filter(
         user=request.user
@@ -104,16 +80,9 @@ def notifications(request):
 
 
 @login_required
+@committee_required('cultural')
 def mark_all_read(request):
-    if request.user.role != 'committee_supervisor' or request.user.supervisor_type != 'cultural':
-        messages.error(request, 'ليس لديك صلاحية للوصول إلى هذه الصفحة')
-        return redirect('home')
-
-    try:
-        committee = Committee.objects.get(supervisor=request.user)
-    except Committee.DoesNotExist:
-        messages.error(request, 'لم يتم تعيين لجنة لك بعد')
-        return redirect('home')
+    committee = request.committee
 
     if request.method == 'POST':
         CulturalNotification.objects.filter(user=request.user, is_read=False).update(is_read=True)
@@ -126,16 +95,9 @@ def mark_all_read(request):
 
 
 @login_required
+@committee_required('cultural')
 def upload_file(request):
-    if request.user.role != 'committee_supervisor' or request.user.supervisor_type != 'cultural':
-        messages.error(request, 'ليس لديك صلاحية للوصول إلى هذه الصفحة')
-        return redirect('home')
-
-    try:
-        committee = Committee.objects.get(supervisor=request.user)
-    except Committee.DoesNotExist:
-        messages.error(request, 'لم يتم تعيين لجنة لك بعد')
-        return redirect('home')
+    committee = request.committee
 
     if request.method == 'POST':
         form = FileLibraryForm(request.POST, request.FILES)
@@ -147,22 +109,18 @@ def upload_file(request):
 
             # Notify all committee members
             members = CommitteeMember.objects.filter(committee=committee, is_active=True)
-            for member in members:
-                CulturalNotification.objects.create(
-                    user=member.user,
-                    committee=committee,
-                    notification_type='file_uploaded',
-                    title='ملف جديد',
-                    message=f'تم رفع ملف جديد: {file_obj.title}',
-                    related_file=file_obj
-                )
-
-            UserActivity.objects.create(
-                user=request.user,
-                action=f'رفع ملف ثقافي: {file_obj.title}',
-                ip_address=get_client_ip(request)
+            dispatch_notifications(
+                members.values_list('user_id', flat=True),
+                model=CulturalNotification,
+                committee=committee,
+                notification_type='file_uploaded',
+                title='ملف جديد',
+                message=f'تم رفع ملف جديد: {file_obj.title}',
+                related_file=file_obj
             )
 
+            log_activity(request, f'رفع ملف ثقافي: {file_obj.title}')
+
             messages.success(request, 'تم رفع الملف بنجاح!')
             return redirect('cultural_file_library')
     else:
@@ -177,16 +135,9 @@ def upload_file(request):
 
 
 @login_required
+@committee_required('cultural')
 def delete_file(request, file_id):
-    if request.user.role != 'committee_supervisor' or request.user.supervisor_type != 'cultural':
-        messages.error(request, 'ليس لديك صلاحية للوصول إلى هذه الصفحة')
-        return redirect('home')
-
-    try:
-        committee = Committee.objects.get(supervisor=request.user)
-    except Committee.DoesNotExist:
-        messages.error(request, 'لم يتم تعيين لجنة لك بعد')
-        return redirect('home')
+    committee = request.committee
 
     file_obj = get_object_or_404(FileLibrary, id=file_id, committee=committee)
 
@@ -207,16 +158,9 @@ def delete_file(request, file_id):
 
 
 @login_required
+@committee_required('cultural')
 def discussions(request):
-    if request.user.role != 'committee_supervisor' or request.user.supervisor_type != 'cultural':
-        messages.error(request, 'ليس لديك صلاحية للوصول إلى هذه الصفحة')
-        return redirect('home')
-
-    try:
-        committee = Committee.objects.get(supervisor=request.user)
-    except Committee.DoesNotExist:
-        messages.error(request, 'لم يتم تعيين لجنة لك بعد')
-        return redirect('home')
+    committee = request.committee
 
     discussions = Discussion.objects.filter(committee=committee).select_related('created_by')
 
@@ -227,23 +171,10 @@ def discussions(request):
     return render(request, 'cultural_committee/discussions.html', context)
 
 
-from sports_committee_dashboard.models import SportsNotification
-from director_dashboard.models import DirectorAlert
-from operations_committee_dashboard.models import OperationsNotification
-from pm_dashboard.models import Notification
-from scientific_committee_dashboard.models import ScientificNotification
-from sharia_committee_dashboard.models import ShariaNotification
 @login_required
+@committee_required('cultural')
 def add_discussion(request):
-    if request.user.role != 'committee_supervisor' or request.user.supervisor_type != 'cultural':
-        messages.error(request, 'ليس لديك صلاحية للوصول إلى هذه الصفحة')
-        return redirect('home')
-
-    try:
-        committee = Committee.objects.get(supervisor=request.user)
-    except Committee.DoesNotExist:
-        messages.error(request, 'لم يتم تعيين لجنة لك بعد')
-        return redirect('home')
+    committee = request.committee
 
     if request.method == 'POST':
         form = DiscussionForm(request.POST)
@@ -253,91 +184,46 @@ def add_discussion(request):
             discussion.created_by = request.user
             discussion.save()
 
+            # Directors share a single alert
+            director_alert = {
+                'title': 'نقاش جديد',
+                'message': f'تم إنشاء نقاش جديد في اللجنة الثقافية: {discussion.title}',
+                'alert_type': 'system_alert',
+                'priority': 'medium',
+                'related_user': request.user,
+                'related_committee': committee,
+                'related_discussion': discussion,
+                'action_url': f'/cultural/discussions/{discussion.id}/',
+            }
+
             # Notify members based on discussion type
             if discussion.is_public_to_all_supervisors:
-                # Send to all supervisors, program managers, and director
-                users_to_notify = User.objects.filter(
-                    Q(role='committee_supervisor') |
-                    Q(role='program_manager') |
-                    Q(role='director')
-                ).exclude(id=request.user.id)  # Exclude the creator
-            else:
-                # Send only to committee members (original behavior)
-                users_to_notify = User.objects.filter(
-                    id__in=CommitteeMember.objects.filter(
-                        committee=committee, is_active=True
-                    ).values_list('user', flat=True)
-                )
-
-            for user in users_to_notify:
-                CulturalNotification.objects.create(
-                    user=user,
-                    committee=committee,
-                    notification_type='discussion_created',
-                    title='نقاش جديد',
-                    message=f'نقاش جديد: {discussion.title}',
-                    related_discussion=discussion
-                )
-
-                # Sports Notification (for sports committee)
-                SportsNotification.objects.create(
-                    user=user,
-                    committee=committee,
-                    notification_type='discussion_created',
-                    title='نقاش جديد',
-                    message=f'تم إنشاء نقاش جديد: {discussion.title}',
-                    related_discussion=discussion
-                )
-
-                # Scientific Notification (for scientific committee)
-                ScientificNotification.objects.create(
-                    user=user,
+                # Supervisors and program managers each get it on their own dashboard
+                dispatch_notifications(
+                    User.objects.filter(
+                        Q(role='committee_supervisor') |
+                        Q(role='program_manager')
+                    ).exclude(id=request.user.id),  # Exclude the creator
                     committee=committee,
                     notification_type='discussion_created',
                     title='نقاش جديد',
                     message=f'تم إنشاء نقاش جديد: {discussion.title}',
-                    related_discussion=discussion
-                )
-
-                # Sharia Notification (for sharia committee)
-                ShariaNotification.objects.create(
-                    user=user,
-                    committee=committee,
-                    notification_type='discussion_created',
-                    title='نقاش جديد',
-                    message=f'تم إنشاء نقاش جديد: {discussion.title}',
-                    related_discussion=discussion
-                )
-
-                Notification.objects.create(
-                    user=user,
-                    related_committee=committee,
-                    notification_type='discussion_created',
-                    title='نقاش جديد',
-                    message=f'تم إنشاء نقاش جديد: {discussion.title}',
-                    related_discussion=discussion
-                )
-
-                # Director Alert (for director dashboard)
-                DirectorAlert.objects.create(
-                    title='نقاش جديد',
-                    message=f'تم إنشاء نقاش جديد في اللجنة الثقافية: {discussion.title}',
-                    alert_type='system_alert',
-                    priority='medium',
-                    related_user=request.user,
-                    related_committee=committee,
                     related_discussion=discussion,
-                    action_url=f'/cultural/discussions/{discussion.id}/'
+                    director_alert=director_alert,
                 )
-
-                # Operations Notification (for operations committee)
-                OperationsNotification.objects.create(
-                    user=user,
+            else:
+                # Send only to committee members (original behavior)
+                dispatch_notifications(
+                    CommitteeMember.objects.filter(
+                        committee=committee, is_active=True
+                    ).values_list('user_id', flat=True),
+                    model=CulturalNotification,
                     committee=committee,
                     notification_type='discussion_created',
                     title='نقاش جديد',
-                    message=f'تم إنشاء نقاش جديد: {discussion.title}',
-                    related_discussion=discussion
+                    message=f'نقاش جديد: {discussion.title}',
+                    related_discussion=discussion,
+                    director_alert=director_alert,
                 )
 
             messages.success(request, 'تم إضافة النقاش بنجاح!')
@@ -360,14 +246,11 @@ def discussion_detail(request, discussion_id):
         messages.error(request, 'ليس لديك صلاحية للوصول إلى هذه الصفحة')
         return redirect('home')
 
-    try:
-        committee = Committee.objects.get(supervisor=request.user)
-    except Committee.DoesNotExist:
-        # For program managers and director who don't have a committee, get the discussion's committee
-        discussion = get_object_or_404(Discussion, id=discussion_id)
-        committee = discussion.committee
-
     discussion = get_object_or_404(Discussion, id=discussion_id)
+    committee = request.scope.committee if request.user.role == 'committee_supervisor' else None
+    if committee is None:
+        # For program managers and director who don't have a committee, use the discussion's committee
+        committee = discussion.committee
 
     # Check if user has permission to view this discussion
     if discussion.is_public_to_all_supervisors:
@@ -410,16 +293,9 @@ def discussion_detail(request, discussion_id):
 
 
 @login_required
+@committee_required('cultural')
 def reports(request):
-    if request.user.role != 'committee_supervisor' or request.user.supervisor_type != 'cultural':
-        messages.error(request, 'ليس لديك صلاحية للوصول إلى هذه الصفحة')
-        return redirect('home')
-
-    try:
-        committee = Committee.objects.get(supervisor=request.user)
-    except Committee.DoesNotExist:
-        messages.error(request, 'لم يتم تعيين لجنة لك بعد')
-        return redirect('home')
+    committee = request.committee
 
     # Task completion stats
     total_tasks = CulturalTask.objects.filter(committee=committee).count()
@@ -454,38 +330,19 @@ def reports(request):
 
 
 @login_required
+@committee_required('cultural')
 def cultural_dashboard(request):
-    print("=== CULTURAL DASHBOARD ACCESSED ===")
-    print(f"User: {request.user}")
-    print(f"User role: {getattr(request.user, 'role', 'No role')}")
-    print(f"Supervisor type: {getattr(request.user, 'supervisor_type', 'No supervisor_type')}")
-
-    if request.user.role != 'committee_supervisor' or getattr(request.user, 'supervisor_type', None) != 'cultural':
-        print("Permission denied - not cultural supervisor")
-        messages.error(request, 'ليس لديك صلاحية للوصول إلى هذه الصفحة')
-        return redirect('home')
-
-    try:
-        print("Attempting to get committee...")
-        committee = Committee.objects.get(supervisor=request.user)
-        print(f"Committee found: {committee.name}")
-    except Committee.DoesNotExist:
-        print("Committee.DoesNotExist exception raised")
-        messages.error(request, 'لم يتم تعيين لجنة لك بعد')
-        return redirect('home')
-    except Exception as e:
-        print(f"Unexpected error getting committee: {e}")
-        messages.error(request, f'حدث خطأ: {e}')
-        return redirect('home')
+    committee = request.committee
 
     # Statistics
-    total_members = CommitteeMember.objects.filter(committee=committee, is_active=True).count()
-    total_tasks = CulturalTask.objects.filter(committee=committee).count()
-    completed_tasks = CulturalTask.objects.filter(committee=committee, status='completed').count()
-    pending_tasks = CulturalTask.objects.filter(committee=committee, status='pending').count()
+    rollup = get_committee_rollup(committee, 'cultural')
+    total_members = rollup.member_count
+    total_tasks = rollup.task_count
+    completed_tasks = rollup.completed_count
+    pending_tasks = rollup.pending_count
 
     # Completion rate
-    completion_rate = (completed_tasks / total_tasks * 100) if total_tasks > 0 else 0
+    completion_rate = rollup.completion_rate
 
     # Recent tasks
     recent_tasks = CulturalTask.objects.filter(committee=committee).order_by('-created_at')[:5]
@@ -507,13 +364,6 @@ def cultural_dashboard(request):
         count=Count('id')
     )
 
-    # Daily phrase for today
-    from django.utils import timezone
-    try:
-        daily_phrase = DailyPhrase.get_today_phrase()
-    except Exception as e:
-        daily_phrase = None
-
     context = {
         'committee': committee,
         'total_members': total_members,
@@ -525,22 +375,14 @@ def cultural_dashboard(request):
         'unread_notifications': unread_notifications,
         'top_members': top_members,
         'task_distribution': task_distribution,
-        'daily_phrase': daily_phrase,
     }
     return render(request, 'cultural_committee/dashboard.html', context)
 
 
 @login_required
+@committee_required('cultural')
 def committee_info(request):
-    if request.user.role != 'committee_supervisor' or request.user.supervisor_type != 'cultural':
-        messages.error(request, 'ليس لديك صلاحية للوصول إلى هذه الصفحة')
-        return redirect('home')
-
-    try:
-        committee = Committee.objects.get(supervisor=request.user)
-    except Committee.DoesNotExist:
-        messages.error(request, 'لم يتم تعيين لجنة لك بعد')
-        return redirect('home')
+    committee = request.committee
 
     members = CommitteeMember.objects.filter(committee=committee)
     active_members = members.filter(is_active=True).count()
@@ -559,7 +401,7 @@ def committee_info(request):
 def task_management(request):
     """View for displaying all tasks with filtering"""
 
-    committee = get_object_or_404(Committee, supervisor=request.user)
+    committee = get_supervised_committee_or_404(request)
 
     # Get filter parameter
     status_filter = request.GET.get('status')
@@ -632,7 +474,7 @@ from django.db import transaction
 
 @login_required
 def add_task(request):
-    committee = get_object_or_404(Committee, supervisor=request.user)
+    committee = get_supervised_committee_or_404(request)
 
     if request.method == 'POST':
         form = CulturalTaskForm(request.POST)
@@ -735,22 +577,18 @@ def edit_task(request, task_id):
 
                 # Create notification for task update
                 members = CommitteeMember.objects.filter(committee=task.committee, is_active=True)
-                for member in members:
-                    CulturalNotification.objects.create(
-                        user=member.user,
-                        committee=task.committee,
-                        notification_type='task_updated',
-                        title='تم تعديل المهمة',
-                        message=f'تم تعديل المهمة: {task.title}',
-                        related_task=task
-                    )
-
-                UserActivity.objects.create(
-                    user=request.user,
-                    action=f'تعديل مهمة ثقافية: {task.title}',
-                    ip_address=get_client_ip(request)
+                dispatch_notifications(
+                    members.values_list('user_id', flat=True),
+                    model=CulturalNotification,
+                    committee=task.committee,
+                    notification_type='task_updated',
+                    title='تم تعديل المهمة',
+                    message=f'تم تعديل المهمة: {task.title}',
+                    related_task=task
                 )
 
+                log_activity(request, f'تعديل مهمة ثقافية: {task.title}')
+
                 if task.is_recurring:
                     recurrence_info = f' ({task.get_recurrence_pattern_display()})'
                     if sessions:
@@ -823,22 +661,18 @@ def delete_task(request, task_id):
 
         # Create notification before deletion
         members = CommitteeMember.objects.filter(committee=task.committee, is_active=True)
-        for member in members:
-            CulturalNotification.objects.create(
-                user=member.user,
-                committee=task.committee,
-                notification_type='task_updated',
-                title='تم حذف المهمة',
-                message=f'تم حذف المهمة: {task_title}'
-            )
+        dispatch_notifications(
+            members.values_list('user_id', flat=True),
+            model=CulturalNotification,
+            committee=task.committee,
+            notification_type='task_updated',
+            title='تم حذف المهمة',
+            message=f'تم حذف المهمة: {task_title}'
+        )
 
         task.delete()  # This will also cascade delete all associated sessions
 
-        UserActivity.objects.create(
-            user=request.user,
-            action=f'حذف مهمة ثقافية: {task_title}' + (f' ({recurrence_pattern})' if is_recurring else ''),
-            ip_address=get_client_ip(request)
-        )
+        log_activity(request, f'حذف مهمة ثقافية: {task_title}' + (f' ({recurrence_pattern})' if is_recurring else ''))
 
         if is_recurring:
             messages.success(request, f'تم حذف المهمة المتكررة بنجاح! ({recurrence_pattern})')
@@ -857,16 +691,9 @@ def delete_task(request, task_id):
 from django.db import models
 
 @login_required
+@committee_required('cultural')
 def member_management(request):
-    if request.user.role != 'committee_supervisor' or request.user.supervisor_type != 'cultural':
-        messages.error(request, 'ليس لديك صلاحية للوصول إلى هذه الصفحة')
-        return redirect('home')
-
-    try:
-        committee = Committee.objects.get(supervisor=request.user)
-    except Committee.DoesNotExist:
-        messages.error(request, 'لم يتم تعيين لجنة لك بعد')
-        return redirect('home')
+    committee = request.committee
 
     members = CommitteeMember.objects.filter(committee=committee).select_related('user').order_by(
         '-participation_score')
@@ -896,16 +723,9 @@ def member_management(request):
 
 
 @login_required
+@committee_required('cultural')
 def add_member(request):
-    if request.user.role != 'committee_supervisor' or request.user.supervisor_type != 'cultural':
-        messages.error(request, 'ليس لديك صلاحية للوصول إلى هذه الصفحة')
-        return redirect('home')
-
-    try:
-        committee = Committee.objects.get(supervisor=request.user)
-    except Committee.DoesNotExist:
-        messages.error(request, 'لم يتم تعيين لجنة لك بعد')
-        return redirect('home')
+    committee = request.committee
 
     if request.method == 'POST':
         form = CommitteeMemberForm(request.POST, committee=committee)
@@ -928,30 +748,22 @@ def add_member(request):
 
 
 @login_required
+@committee_required('cultural')
 def file_library(request):
-    if request.user.role != 'committee_supervisor' or request.user.supervisor_type != 'cultural':
-        messages.error(request, 'ليس لديك صلاحية للوصول إلى هذه الصفحة')
-        return redirect('home')
-
-    try:
-        committee = Committee.objects.get(supervisor=request.user)
-        files = FileLibrary.objects.filter(committee=committee).order_by('-uploaded_at')
+    committee = request.committee
+    files = FileLibrary.objects.filter(committee=committee).order_by('-uploaded_at')
 
-        # Filter by type
-        file_type = request.GET.get('type')
-        if file_type:
-            files = files.filter(file_type=file_type)
+    # Filter by type
+    file_type = request.GET.get('type')
+    if file_type:
+        files = files.filter(file_type=file_type)
 
-        context = {
-            'committee': committee,
-            'files': files,
-            'file_type_filter': file_type,
-        }
-        return render(request, 'cultural_committee/file_library.html', context)
-
-    except Committee.DoesNotExist:
-        messages.error(request, 'لم يتم العثور على لجنة مرتبطة بحسابك')
-        return redirect('home')  # or wherever appropriate
+    context = {
+        'committee': committee,
+        'files': files,
+        'file_type_filter': file_type,
+    }
+    return render(request, 'cultural_committee/file_library.html', context)
 
 
 from .models import DailyPhrase
@@ -959,16 +771,9 @@ from .forms import DailyPhraseForm
 
 
 @login_required
+@committee_required('cultural')
 def daily_phrases(request):
-    if request.user.role != 'committee_supervisor' or request.user.supervisor_type != 'cultural':
-        messages.error(request, 'ليس لديك صلاحية للوصول إلى هذه الصفحة')
-        return redirect('home')
-
-    try:
-        committee = Committee.objects.get(supervisor=request.user)
-    except Committee.DoesNotExist:
-        messages.error(request, 'لم يتم تعيين لجنة لك بعد')
-        return redirect('home')
+    committee = request.committee
 
     # Get all phrases for this committee
     phrases = DailyPhrase.objects.filter(committee=committee).order_by('day_of_week')
@@ -1001,16 +806,9 @@ def daily_phrases(request):
 
 
 @login_required
+@committee_required('cultural')
 def add_daily_phrase(request):
-    if request.user.role != 'committee_supervisor' or request.user.supervisor_type != 'cultural':
-        messages.error(request, 'ليس لديك صلاحية للوصول إلى هذه الصفحة')
-        return redirect('home')
-
-    try:
-        committee = Committee.objects.get(supervisor=request.user)
-    except Committee.DoesNotExist:
-        messages.error(request, 'لم يتم تعيين لجنة لك بعد')
-        return redirect('home')
+    committee = request.committee
 
     # Check which days are already taken
     taken_days = DailyPhrase.objects.filter(
@@ -1036,22 +834,18 @@ def add_daily_phrase(request):
 
             # Notify members
             members = CommitteeMember.objects.filter(committee=committee, is_active=True)
-            for member in members:
-                CulturalNotification.objects.create(
-                    user=member.user,
-                    committee=committee,
-                    notification_type='daily_phrase_added',
-                    title='عبارة جديدة',
-                    message=f'تم إضافة عبارة ليوم {phrase.get_day_of_week_display()}',
-                    related_daily_phrase=phrase
-                )
-
-            UserActivity.objects.create(
-                user=request.user,
-                action=f'إضافة عبارة ليوم {phrase.get_day_of_week_display()}',
-                ip_address=get_client_ip(request)
+            dispatch_notifications(
+                members.values_list('user_id', flat=True),
+                model=CulturalNotification,
+                committee=committee,
+                notification_type='daily_phrase_added',
+                title='عبارة جديدة',
+                message=f'تم إضافة عبارة ليوم {phrase.get_day_of_week_display()}',
+                related_daily_phrase=phrase
             )
 
+            log_activity(request, f'إضافة عبارة ليوم {phrase.get_day_of_week_display()}')
+
             messages.success(request, 'تم إضافة العبارة بنجاح!')
             return redirect('cultural_daily_phrases')
     else:
@@ -1071,16 +865,9 @@ def add_daily_phrase(request):
 
 
 @login_required
+@committee_required('cultural')
 def edit_daily_phrase(request, phrase_id):
-    if request.user.role != 'committee_supervisor' or request.user.supervisor_type != 'cultural':
-        messages.error(request, 'ليس لديك صلاحية للوصول إلى هذه الصفحة')
-        return redirect('home')
-
-    try:
-        committee = Committee.objects.get(supervisor=request.user)
-    except Committee.DoesNotExist:
-        messages.error(request, 'لم يتم تعيين لجنة لك بعد')
-        return redirect('home')
+    committee = request.committee
 
     phrase = get_object_or_404(DailyPhrase, id=phrase_id, committee=committee)
 
@@ -1089,11 +876,7 @@ def edit_daily_phrase(request, phrase_id):
         if form.is_valid():
             form.save()
 
-            UserActivity.objects.create(
-                user=request.user,
-                action=f'تعديل عبارة ليوم {phrase.get_day_of_week_display()}',
-                ip_address=get_client_ip(request)
-            )
+            log_activity(request, f'تعديل عبارة ليوم {phrase.get_day_of_week_display()}')
 
             messages.success(request, 'تم تعديل العبارة بنجاح!')
             return redirect('cultural_daily_phrases')
@@ -1121,26 +904,16 @@ def edit_daily_phrase(request, phrase_id):
 
 
 @login_required
+@committee_required('cultural')
 def delete_daily_phrase(request, phrase_id):
-    if request.user.role != 'committee_supervisor' or request.user.supervisor_type != 'cultural':
-        messages.error(request, 'ليس لديك صلاحية للوصول إلى هذه الصفحة')
-        return redirect('home')
-
-    try:
-        committee = Committee.objects.get(supervisor=request.user)
-    except Committee.DoesNotExist:
-        messages.error(request, 'لم يتم تعيين لجنة لك بعد')
-        return redirect('home')
+    committee = request.committee
 
     phrase = get_object_or_404(DailyPhrase, id=phrase_id, committee=committee)
 
     if request.method == 'POST':
         phrase.delete()
 
-        UserActivity.objects.create(
-            user=request.user,
-            ip_address=get_client_ip(request)
-        )
+        log_activity(request, f'حذف عبارة ليوم {phrase.get_day_of_week_display()}')
 
         messages.success(request, 'تم حذف عبارة اليوم بنجاح!')
         return redirect('cultural_daily_phrases')
@@ -1154,16 +927,9 @@ def delete_daily_phrase(request, phrase_id):
 
 
 @login_required
+@committee_required('cultural')
 def toggle_daily_phrase(request, phrase_id):
-    if request.user.role != 'committee_supervisor' or request.user.supervisor_type != 'cultural':
-        messages.error(request, 'ليس لديك صلاحية للوصول إلى هذه الصفحة')
-        return redirect('home')
-
-    try:
-        committee = Committee.objects.get(supervisor=request.user)
-    except Committee.DoesNotExist:
-        messages.error(request, 'لم يتم تعيين لجنة لك بعد')
-        return redirect('home')
+    committee = request.committee
 
     phrase = get_object_or_404(DailyPhrase, id=phrase_id, committee=committee)
     phrase.is_active = not phrase.is_active
@@ -1,7 +1,30 @@
+from django.core.cache import cache
+
+from main.shared_cache import cap_timeout
+
 from .models import DirectorAlert
+
+
+UNREAD_ALERTS_KEY = 'director:unread_alerts'
+
+# Saving or deleting an alert drops the count; the timeout covers bulk updates elsewhere
+UNREAD_ALERTS_CACHE_TIMEOUT = 5 * 60
+
+
+def get_unread_alerts_count():
+    count = cache.get(UNREAD_ALERTS_KEY)
+    if count is None:
+        count = DirectorAlert.objects.filter(is_read=False).count()
+        cache.set(UNREAD_ALERTS_KEY, count, cap_timeout(UNREAD_ALERTS_CACHE_TIMEOUT))
+    return count
+
+
+def invalidate_unread_alerts_count():
+    cache.delete(UNREAD_ALERTS_KEY)
+
+
 def director_context(request):
     context = {}
     if request.user.is_authenticated and request.user.role == 'director':
-        unread_alerts_count = DirectorAlert.objects.filter(is_read=False).count()
-        context['unread_alerts_count'] = unread_alerts_count
-    return context
\ No newline at end of file
+        context['unread_alerts_count'] = get_unread_alerts_count()
+    return context
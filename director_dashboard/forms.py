@@ -1,6 +1,7 @@
 from django import forms
 from .models import Program
 from accounts.models import User
+from accounts.utils import email_in_use
 
 
 class ProgramForm(forms.ModelForm):
@@ -51,6 +52,12 @@ class UserForm(forms.ModelForm):
             'role': 'الدور',
         }
 
+    def clean_email(self):
+        email = self.cleaned_data.get('email')
+        if email and email_in_use(email, exclude_pk=self.instance.pk):
+            raise forms.ValidationError('البريد الإلكتروني مستخدم في حساب آخر')
+        return email
+
 
 from django import forms
 from .models import DirectorAlbum, AlbumPhoto, DirectorFileLibrary, DirectorAlert
@@ -200,6 +207,7 @@ class DirectorAlertForm(forms.ModelForm):
 
 from django import forms
 from .models import User
+from accounts.utils import email_in_use
 
 
 class UserCreateForm(forms.ModelForm):
@@ -257,6 +265,12 @@ class UserCreateForm(forms.ModelForm):
             raise forms.ValidationError('اسم المستخدم موجود مسبقاً')
         return username
 
+    def clean_email(self):
+        email = self.cleaned_data.get('email')
+        if email and email_in_use(email, exclude_pk=self.instance.pk):
+            raise forms.ValidationError('البريد الإلكتروني مستخدم في حساب آخر')
+        return email
+
 
 class UserEditForm(forms.ModelForm):
     class Meta:
@@ -285,4 +299,10 @@ class UserEditForm(forms.ModelForm):
         username = self.cleaned_data.get('username')
         if User.objects.filter(username=username).exclude(id=self.instance.id).exists():
             raise forms.ValidationError('اسم المستخدم موجود مسبقاً')
-        return username
\ No newline at end of file
+        return username
+
+    def clean_email(self):
+        email = self.cleaned_data.get('email')
+        if email and email_in_use(email, exclude_pk=self.instance.pk):
+            raise forms.ValidationError('البريد الإلكتروني مستخدم في حساب آخر')
+        return email
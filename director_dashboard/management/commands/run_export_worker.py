@@ -0,0 +1,58 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from director_dashboard.reports import (STALE_JOB_MINUTES, claim_next_job, purge_old_jobs,
+                                        requeue_stale_jobs, run_export_job)
+
+
+class Command(BaseCommand):
+    help = 'Render queued report exports (PDF/Excel) outside the web workers'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true',
+                            help='Process the jobs already queued, then exit')
+        parser.add_argument('--interval', type=float, default=2,
+                            help='Seconds to wait between polls of an empty queue')
+        parser.add_argument('--purge-days', type=int, default=30,
+                            help='Delete finished jobs (and unused files) older than this many days')
+        parser.add_argument('--housekeeping-interval', type=float, default=300,
+                            help='Seconds between requeues of stale jobs and purges of old ones')
+
+    def housekeeping(self, purge_days):
+        # Jobs left 'running' by another worker that died go back to the queue
+        requeued, failed = requeue_stale_jobs(STALE_JOB_MINUTES)
+        if requeued or failed:
+            self.stdout.write(f'Requeued {requeued} stale jobs, gave up on {failed}')
+        purged = purge_old_jobs(purge_days)
+        if purged:
+            self.stdout.write(f'Purged {purged} old jobs')
+
+    def handle(self, *args, **options):
+        self.housekeeping(options['purge_days'])
+        last_housekeeping = time.monotonic()
+
+        self.stdout.write('Export worker started')
+        try:
+            while True:
+                close_old_connections()
+                if time.monotonic() - last_housekeeping >= options['housekeeping_interval']:
+                    self.housekeeping(options['purge_days'])
+                    last_housekeeping = time.monotonic()
+
+                job = claim_next_job()
+                if job is None:
+                    if options['once']:
+                        break
+                    time.sleep(options['interval'])
+                    continue
+
+                job = run_export_job(job)
+                if job.status == 'done':
+                    self.stdout.write(self.style.SUCCESS(f'Job {job.pk} ({job.kind}) done: {job.file.name}'))
+                else:
+                    self.stdout.write(self.style.ERROR(f'Job {job.pk} ({job.kind}) failed: {job.error}'))
+        except KeyboardInterrupt:
+            pass
+        self.stdout.write('Export worker stopped')
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.6 on 2026-10-18 13:37
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('director_dashboard', '0004_pointscalculatorsettings_pointsresult'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExportJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('reports_pdf', 'تقرير PDF'), ('reports_excel', 'تقرير Excel')], max_length=30, verbose_name='نوع التصدير')),
+                ('status', models.CharField(choices=[('pending', 'في الانتظار'), ('running', 'جاري التجهيز'), ('done', 'جاهز'), ('failed', 'فشل')], default='pending', max_length=20, verbose_name='الحالة')),
+                ('progress', models.PositiveSmallIntegerField(default=0, verbose_name='نسبة الإنجاز')),
+                ('data_version', models.CharField(max_length=64, verbose_name='إصدار البيانات')),
+                ('file', models.FileField(blank=True, max_length=255, upload_to='exports/', verbose_name='الملف')),
+                ('error', models.TextField(blank=True, verbose_name='الخطأ')),
+                ('attempts', models.PositiveSmallIntegerField(default=0, verbose_name='عدد المحاولات')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('requested_by', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='export_jobs', to=settings.AUTH_USER_MODEL, verbose_name='طلب بواسطة')),
+            ],
+            options={
+                'verbose_name': 'مهمة تصدير',
+                'verbose_name_plural': 'مهام التصدير',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['status', 'created_at'], name='exportjob_queue_idx'), models.Index(fields=['kind', 'data_version'], name='exportjob_version_idx')],
+            },
+        ),
+    ]
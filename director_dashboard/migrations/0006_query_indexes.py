@@ -0,0 +1,20 @@
+# Generated by Django 5.2.6 on 2026-10-18 13:49
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cultural_committee_dashboard', '0009_query_indexes'),
+        ('director_dashboard', '0005_exportjob'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='directoralert',
+            index=models.Index(condition=models.Q(('is_read', False)), fields=['-created_at'], name='diralert_unread_idx'),
+        ),
+    ]
@@ -0,0 +1,95 @@
+# Generated by Django 5.2.6 on 2026-10-18 14:27
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+# Frozen copies of director_dashboard.points_parser.to_points/ranked_students as of
+# this migration, so later changes to the parser don't change the backfill
+def to_points(value):
+    try:
+        return int(round(float(value)))
+    except (TypeError, ValueError, OverflowError):
+        return 0
+
+
+def ranked_students(summary):
+    """(rank, student_name, group, points) of the named students, best first; ties keep the stored order"""
+    students = []
+    for item in (summary or {}).get('rankings') or []:
+        if not isinstance(item, dict):
+            continue
+        student_name = str(item.get('student_name') or '').strip()
+        if student_name:
+            students.append((student_name[:255], str(item.get('group') or '')[:100],
+                             to_points(item.get('total_points'))))
+    students.sort(key=lambda student: -student[2])
+    return [(rank, *student) for rank, student in enumerate(students, start=1)]
+
+
+def fill_entries(apps, schema_editor):
+    """One PointsEntry per named student of summary_data['rankings'], ranked as PointsResult.save() does"""
+    PointsResult = apps.get_model('director_dashboard', 'PointsResult')
+    PointsEntry = apps.get_model('director_dashboard', 'PointsEntry')
+    entries = []
+    for result in PointsResult.objects.iterator(chunk_size=200):
+        for rank, student_name, group, points in ranked_students(result.summary_data):
+            entries.append(PointsEntry(
+                result_id=result.pk, user_id=result.user_id, week_number=result.week_number, rank=rank,
+                student_name=student_name, group=group, points=points,
+            ))
+        if len(entries) >= 1000:
+            PointsEntry.objects.bulk_create(entries)
+            entries = []
+    PointsEntry.objects.bulk_create(entries)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('director_dashboard', '0006_query_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PointsEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('week_number', models.IntegerField(blank=True, null=True, verbose_name='رقم الأسبوع')),
+                ('rank', models.PositiveIntegerField(verbose_name='الترتيب')),
+                ('student_name', models.CharField(max_length=255, verbose_name='اسم الطالب')),
+                ('group', models.CharField(blank=True, max_length=100, verbose_name='المجموعة')),
+                ('points', models.IntegerField(default=0, verbose_name='النقاط')),
+            ],
+            options={
+                'verbose_name': 'نقاط طالب',
+                'verbose_name_plural': 'نقاط الطلاب',
+                'ordering': ['result', 'rank'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='pointsresult',
+            index=models.Index(fields=['user', 'week_number'], name='points_result_user_week_idx'),
+        ),
+        migrations.AddField(
+            model_name='pointsentry',
+            name='result',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='entries', to='director_dashboard.pointsresult', verbose_name='النتيجة'),
+        ),
+        migrations.AddField(
+            model_name='pointsentry',
+            name='user',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='points_entries', to=settings.AUTH_USER_MODEL, verbose_name='المستخدم'),
+        ),
+        migrations.AddIndex(
+            model_name='pointsentry',
+            index=models.Index(fields=['user', 'week_number'], name='points_entry_user_week_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pointsentry',
+            index=models.Index(fields=['user', 'student_name'], name='points_entry_user_student_idx'),
+        ),
+        migrations.RunPython(fill_entries, migrations.RunPython.noop),
+    ]
@@ -1,6 +1,8 @@
-from django.db import models
+from django.db import models, transaction
 from accounts.models import User
 
+from .points_parser import ranked_students
+
 
 class Program(models.Model):
     name = models.CharField(max_length=255)
@@ -172,6 +174,10 @@ class DirectorAlert(models.Model):
         ordering = ['-created_at']
         verbose_name = 'تنبيه'
         verbose_name_plural = 'التنبيهات'
+        indexes = [
+            models.Index(fields=['-created_at'], condition=models.Q(is_read=False),
+                         name='diralert_unread_idx'),
+        ]
 
     def __str__(self):
         return self.title
@@ -180,6 +186,56 @@ class DirectorAlert(models.Model):
         self.is_read = True
         self.save()
 
+class ExportJob(models.Model):
+    """A report export (PDF/Excel) queued for the run_export_worker process"""
+    KIND_CHOICES = [
+        ('reports_pdf', 'تقرير PDF'),
+        ('reports_excel', 'تقرير Excel'),
+    ]
+
+    STATUS_CHOICES = [
+        ('pending', 'في الانتظار'),
+        ('running', 'جاري التجهيز'),
+        ('done', 'جاهز'),
+        ('failed', 'فشل'),
+    ]
+
+    kind = models.CharField(max_length=30, choices=KIND_CHOICES, verbose_name='نوع التصدير')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending', verbose_name='الحالة')
+    progress = models.PositiveSmallIntegerField(default=0, verbose_name='نسبة الإنجاز')
+    # Fingerprint of the report's input data: an unchanged report reuses the stored file
+    data_version = models.CharField(max_length=64, verbose_name='إصدار البيانات')
+    file = models.FileField(upload_to='exports/', max_length=255, blank=True, verbose_name='الملف')
+    error = models.TextField(blank=True, verbose_name='الخطأ')
+    attempts = models.PositiveSmallIntegerField(default=0, verbose_name='عدد المحاولات')
+    requested_by = models.ForeignKey(User, on_delete=models.CASCADE, related_name='export_jobs',
+                                     verbose_name='طلب بواسطة')
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = 'مهمة تصدير'
+        verbose_name_plural = 'مهام التصدير'
+        indexes = [
+            models.Index(fields=['status', 'created_at'], name='exportjob_queue_idx'),
+            models.Index(fields=['kind', 'data_version'], name='exportjob_version_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()} - {self.get_status_display()}"
+
+    @property
+    def is_finished(self):
+        return self.status in ('done', 'failed')
+
+    def set_progress(self, progress):
+        """Store progress without touching the rest of the row (the worker holds a stale copy)"""
+        self.progress = progress
+        ExportJob.objects.filter(pk=self.pk).update(progress=progress)
+
+
 # ============================================
 # نماذج حاسبة النقاط - Points Calculator
 # ============================================
@@ -347,11 +403,63 @@ class PointsResult(models.Model):
         verbose_name = 'نتيجة حساب النقاط'
         verbose_name_plural = 'نتائج حساب النقاط'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', 'week_number'], name='points_result_user_week_idx'),
+        ]
 
     def __str__(self):
         return f"نتيجة {self.program_name} - الأسبوع {self.week_number or 'غير محدد'}"
 
+    # Fields copied to the PointsEntry rows
+    ENTRY_FIELDS = {'summary_data', 'user', 'week_number'}
+
     def save(self, *args, **kwargs):
         if not self.share_url:
             self.share_url = str(self.id)
-        super().save(*args, **kwargs)
\ No newline at end of file
+        update_fields = kwargs.get('update_fields')
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if update_fields is None or self.ENTRY_FIELDS.intersection(update_fields):
+                self.sync_entries()
+
+    def build_entries(self):
+        """PointsEntry rows of summary_data['rankings'], best first (see ranked_students)"""
+        return [
+            PointsEntry(result=self, user_id=self.user_id, week_number=self.week_number, rank=rank,
+                        student_name=student_name, group=group, points=points)
+            for rank, student_name, group, points in ranked_students(self.summary_data)
+        ]
+
+    def sync_entries(self):
+        """Rewrite the PointsEntry rows after summary_data (or the week) changed"""
+        self.entries.all().delete()
+        PointsEntry.objects.bulk_create(self.build_entries())
+
+
+class PointsEntry(models.Model):
+    """
+    نقاط طالب واحد في نتيجة محفوظة: نسخة من summary_data['rankings'] في جدول
+    حتى تُحسب الإحصائيات والترتيب في قاعدة البيانات (انظر director_dashboard.points)
+    """
+    result = models.ForeignKey(PointsResult, on_delete=models.CASCADE, related_name='entries',
+                               verbose_name='النتيجة')
+    # Copied from the result so history queries don't need to join it
+    user = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True,
+                             related_name='points_entries', verbose_name='المستخدم')
+    week_number = models.IntegerField(null=True, blank=True, verbose_name='رقم الأسبوع')
+    rank = models.PositiveIntegerField(verbose_name='الترتيب')
+    student_name = models.CharField(max_length=255, verbose_name='اسم الطالب')
+    group = models.CharField(max_length=100, blank=True, verbose_name='المجموعة')
+    points = models.IntegerField(default=0, verbose_name='النقاط')
+
+    class Meta:
+        ordering = ['result', 'rank']
+        verbose_name = 'نقاط طالب'
+        verbose_name_plural = 'نقاط الطلاب'
+        indexes = [
+            models.Index(fields=['user', 'week_number'], name='points_entry_user_week_idx'),
+            models.Index(fields=['user', 'student_name'], name='points_entry_user_student_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.student_name} - {self.points}"
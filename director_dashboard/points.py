@@ -0,0 +1,80 @@
+from django.db.models import Count, Sum
+from django.db.models.functions import Coalesce
+
+from .models import PointsEntry, PointsResult
+
+
+# Saved by the family calculator; the student history leaves them out
+FAMILY_PROGRAM_NAME = 'نقاط الإسري'
+
+UNKNOWN_WEEK = 'غير محدد'
+
+LEADERBOARD_SIZE = 10
+
+
+def get_student_results(user):
+    return PointsResult.objects.filter(user=user).exclude(program_name=FAMILY_PROGRAM_NAME)
+
+
+def get_student_entries(user):
+    return PointsEntry.objects.filter(user=user).exclude(result__program_name=FAMILY_PROGRAM_NAME)
+
+
+def get_weekly_results(user):
+    """
+    {week: latest result of that week}, newest first, each annotated with
+    student_count and total_points. The JSON blobs are not loaded.
+    """
+    latest_ids = {}
+    for result_id, week in get_student_results(user).order_by('-created_at').values_list('id', 'week_number'):
+        latest_ids.setdefault(week, result_id)
+
+    results = PointsResult.objects.filter(id__in=latest_ids.values()).defer(
+        'summary_data', 'student_images'
+    ).annotate(
+        student_count=Count('entries'),
+        total_points=Coalesce(Sum('entries__points'), 0),
+    ).order_by('-created_at')
+    return {result.week_number or UNKNOWN_WEEK: result for result in results}
+
+
+def get_points_summary(user, total_weeks):
+    """Totals over every saved result of the user"""
+    totals = get_student_entries(user).aggregate(
+        total_points=Coalesce(Sum('points'), 0),
+        unique_students=Count('student_name', distinct=True),
+    )
+    return {
+        'total_weeks': total_weeks,
+        'total_points_all_weeks': totals['total_points'],
+        'unique_students_count': totals['unique_students'],
+        'average_points_per_week': round(totals['total_points'] / total_weeks, 2) if total_weeks else 0,
+    }
+
+
+def get_leaderboard(user, limit=LEADERBOARD_SIZE):
+    """Students with the most points over all weeks: [{'student_name', 'total_points', 'weeks'}]"""
+    return list(
+        get_student_entries(user).values('student_name').annotate(
+            total_points=Sum('points'),
+            weeks=Count('week_number', distinct=True),
+        ).order_by('-total_points', 'student_name')[:limit]
+    )
+
+
+def get_weekly_trends(user):
+    """
+    Points and students of each numbered week, oldest first, with the change
+    from the week before: [{'week_number', 'total_points', 'students', 'change'}]
+    """
+    weeks = list(
+        get_student_entries(user).filter(week_number__isnull=False).values('week_number').annotate(
+            total_points=Sum('points'),
+            students=Count('student_name', distinct=True),
+        ).order_by('week_number')
+    )
+    previous = None
+    for week in weeks:
+        week['change'] = None if previous is None else week['total_points'] - previous
+        previous = week['total_points']
+    return weeks
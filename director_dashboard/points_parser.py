@@ -0,0 +1,131 @@
+import re
+
+
+# Arabic-Indic and Persian digits and the minus sign (\d matches them, int() wants ASCII signs)
+DIGITS = str.maketrans({
+    **{arabic: str(value) for value, arabic in enumerate('٠١٢٣٤٥٦٧٨٩')},
+    **{persian: str(value) for value, persian in enumerate('۰۱۲۳۴۵۶۷۸۹')},
+    '−': '-',
+})
+# Tatweel and invisible joiners/direction marks that make one name look like two
+NAME_NOISE = str.maketrans('', '', 'ـ\u200c\u200d\u200e\u200f')
+NAME_NOISE_PATTERN = re.compile('[ـ\u200c\u200d\u200e\u200f]')
+
+# One alternative per kind of line of generate_template_message; the rest
+# (separators, titles, blank lines) doesn't match and is skipped
+LINE_PATTERN = re.compile(r"""
+    ^[^\S\n]*(?:
+        ▫️?[^\S\n]*(?P<student>[^\n(]*[\w\]])[^\w\n(]*   # the name, then the batch emoji
+        \([^\S\n]*(?P<points>[-+−]?[^\S\n]*\d+)[^\S\n]*\)
+      | \S*[^\S\n]*دفعة[^\S\n]+(?P<batch>[^\n:]*?)[^\S\n]*:
+      | \S*[^\S\n]*اسم[^\S\n]+اللجنة[^\S\n]*:[^\S\n]*(?P<committee>[^\n]*?)
+      | \S*[^\S\n]*اسم[^\S\n]+البرنامج[^\S\n]*:[^\S\n]*(?P<program>[^\n]*?)
+      | [^\n]*?نقاط[^\S\n]+الأسبوع[^\n]*?\([^\S\n]*(?P<week>\d+)[^\S\n]*\)[^\n]*?
+    )[^\S\n]*$
+""", re.MULTILINE | re.VERBOSE)
+
+# Rows of a template nobody filled in: "▫ [اسم الطالب 1] 🎯 (0)"
+PLACEHOLDER_PREFIX = '['
+
+
+def to_english_digits(text):
+    return text.translate(DIGITS) if text else text
+
+
+def to_number(text):
+    if not text.isascii():
+        text = text.translate(DIGITS)
+    return int(text.replace(' ', ''))
+
+
+def to_points(value):
+    """Points of a stored rankings item; the JSON may hold numbers, numeric strings or nothing"""
+    try:
+        return int(round(float(value)))
+    except (TypeError, ValueError, OverflowError):
+        return 0
+
+
+def ranked_students(summary):
+    """
+    (rank, student_name, group, points) of the named students of summary['rankings'],
+    best first. Ranks follow the points rather than the order the list was stored in
+    (ties keep that order). Migration 0007 backfills PointsEntry with a frozen copy.
+    """
+    students = []
+    for item in (summary or {}).get('rankings') or []:
+        if not isinstance(item, dict):
+            continue
+        student_name = str(item.get('student_name') or '').strip()
+        if student_name:
+            students.append((student_name[:255], str(item.get('group') or '')[:100],
+                             to_points(item.get('total_points'))))
+    students.sort(key=lambda student: -student[2])
+    return [(rank, *student) for rank, student in enumerate(students, start=1)]
+
+
+def normalize_name(name):
+    """Key a student is recognised by across committees: no tatweel, single spaces"""
+    if NAME_NOISE_PATTERN.search(name):
+        name = name.translate(NAME_NOISE)
+    return ' '.join(name.split())
+
+
+def parse_points_messages(text):
+    """
+    Summary of pasted committee messages, in the shape the points pages store:
+        {'program_name', 'week_numbers', 'committees',
+         'rankings': [{'student_name', 'group', 'total_points', 'committees': {name: points}}],
+         'total_students', 'total_points', 'average_points'}
+    A student is counted once per committee: if a committee message is pasted
+    again (or a student appears twice in it), the last points win. Points from
+    different committees are added up; the group is the batch first seen.
+    """
+    program_name = ''
+    week_numbers = []
+    committees = []
+    committee = ''
+    batch = ''
+    students = {}
+
+    for match in LINE_PATTERN.finditer(text or ''):
+        # The group closed last tells which kind of line matched
+        kind = match.lastgroup
+        if kind == 'points':
+            name = normalize_name(match.group('student'))
+            if not name or name.startswith(PLACEHOLDER_PREFIX):
+                continue
+            student = students.get(name)
+            if student is None:
+                student = students[name] = {'student_name': name, 'group': batch, 'committees': {}}
+            student['committees'][committee] = to_number(match.group('points'))
+        elif kind == 'batch':
+            batch = match.group('batch').strip()
+        elif kind == 'committee':
+            committee = match.group('committee').strip()
+            batch = ''
+            if committee not in committees:
+                committees.append(committee)
+        elif kind == 'week':
+            week = to_number(match.group('week'))
+            if week not in week_numbers:
+                week_numbers.append(week)
+        elif kind == 'program':
+            program_name = program_name or match.group('program').strip()
+
+    rankings = []
+    for student in students.values():
+        student['total_points'] = sum(student['committees'].values())
+        rankings.append(student)
+    rankings.sort(key=lambda student: (-student['total_points'], student['student_name']))
+
+    total_points = sum(student['total_points'] for student in rankings)
+    return {
+        'program_name': program_name,
+        'week_numbers': week_numbers,
+        'committees': committees,
+        'rankings': rankings,
+        'total_students': len(rankings),
+        'total_points': total_points,
+        'average_points': round(total_points / len(rankings), 2) if rankings else 0,
+    }
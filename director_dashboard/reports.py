@@ -0,0 +1,239 @@
+import hashlib
+import logging
+import tempfile
+from datetime import datetime, timedelta
+
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db.models import Avg, Count, F
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from main.exports import EXPORT_CHUNK_SIZE, ExcelSheet, build_workbook
+
+from .models import Committee, ExportJob, Program, Student
+
+
+logger = logging.getLogger(__name__)
+
+# A job still 'running' after this long belongs to a worker that died
+STALE_JOB_MINUTES = 30
+MAX_ATTEMPTS = 3
+
+# values_list() columns behind every report; they are also hashed into the data version
+PROGRAM_COLUMNS = (
+    'name', 'manager_id', 'manager__first_name', 'manager__last_name', 'manager__username',
+    'student_count', 'avg_progress', 'start_date', 'end_date', 'is_active',
+)
+COMMITTEE_COLUMNS = (
+    'name', 'program__name', 'student_count', 'avg_progress',
+    'supervisor_id', 'supervisor__first_name', 'supervisor__last_name', 'supervisor__username',
+)
+STUDENT_COLUMNS = (
+    'user__first_name', 'user__last_name', 'user__username', 'program__name',
+    'committee__name', 'memorization_level', 'progress', 'joined_date',
+)
+
+
+def get_reports_querysets():
+    """Same data as the reports page: (programs, active_committees, best_students)"""
+    programs = Program.objects.select_related('manager').annotate(
+        student_count=Count('student'),
+        avg_progress=Avg('student__progress')
+    ).order_by('id')
+
+    active_committees = Committee.objects.select_related('program', 'supervisor').annotate(
+        student_count=Count('student'),
+        avg_progress=Avg('student__progress')
+    ).order_by('-student_count', '-avg_progress', 'id')[:5]
+
+    best_students = Student.objects.select_related('user', 'program', 'committee').order_by('-progress', 'id')[:10]
+
+    return programs, active_committees, best_students
+
+
+def get_reports_data_version():
+    """Fingerprint of everything the reports show; equal versions render identical reports"""
+    programs, active_committees, best_students = get_reports_querysets()
+    rows = [
+        list(programs.values_list(*PROGRAM_COLUMNS)),
+        list(active_committees.values_list(*COMMITTEE_COLUMNS)),
+        list(best_students.values_list(*STUDENT_COLUMNS)),
+    ]
+    return hashlib.sha256(repr(rows).encode('utf-8')).hexdigest()
+
+
+def full_name(first_name, last_name):
+    """Same result as User.get_full_name() from values_list() columns"""
+    return f'{first_name or ""} {last_name or ""}'.strip()
+
+
+def get_reports_sheets():
+    programs, active_committees, best_students = get_reports_querysets()
+
+    programs_rows = (
+        (
+            name,
+            full_name(first_name, last_name) if manager_id else 'غير معين',
+            student_count,
+            round(avg_progress or 0, 1),
+            start_date,
+            end_date,
+            'نشط' if is_active else 'منتهي',
+        )
+        for (name, manager_id, first_name, last_name, _username, student_count, avg_progress,
+             start_date, end_date, is_active)
+        in programs.values_list(*PROGRAM_COLUMNS).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    )
+    committees_rows = (
+        (
+            name,
+            program_name,
+            student_count,
+            round(avg_progress or 0, 1),
+            full_name(first_name, last_name) if supervisor_id else 'غير معين',
+        )
+        for (name, program_name, student_count, avg_progress,
+             supervisor_id, first_name, last_name, _username)
+        in active_committees.values_list(*COMMITTEE_COLUMNS)
+    )
+    students_rows = (
+        (
+            full_name(first_name, last_name) or username,
+            program_name,
+            committee_name or '-',
+            memorization_level or 'غير محدد',
+            progress,
+            joined_date,
+        )
+        for (first_name, last_name, username, program_name, committee_name,
+             memorization_level, progress, joined_date)
+        in best_students.values_list(*STUDENT_COLUMNS)
+    )
+
+    return [
+        ExcelSheet('البرامج', ['اسم البرنامج', 'مدير البرنامج', 'عدد الطلاب', 'متوسط التقدم %',
+                               'تاريخ البدء', 'تاريخ الانتهاء', 'الحالة'], programs_rows),
+        ExcelSheet('اللجان النشطة', ['اسم اللجنة', 'البرنامج', 'عدد الأعضاء', 'متوسط التقدم %',
+                                     'المشرف'], committees_rows),
+        ExcelSheet('أفضل الطلاب', ['اسم الطالب', 'البرنامج', 'اللجنة', 'مستوى الحفظ',
+                                   'نسبة التقدم %', 'تاريخ الانضمام'], students_rows),
+    ]
+
+
+def build_reports_pdf(output, set_progress):
+    # WeasyPrint is heavy and needs system libraries: only the worker imports it
+    from weasyprint import HTML
+
+    programs, active_committees, best_students = get_reports_querysets()
+    context = {
+        'programs': programs,
+        'active_committees': active_committees,
+        'best_students': best_students,
+        'export_date': datetime.now().strftime('%Y-%m-%d %H:%M'),
+    }
+    html_string = render_to_string('director_dashboard/reports_pdf.html', context)
+    set_progress(40)
+    HTML(string=html_string).write_pdf(output)
+
+
+def build_reports_excel(output, set_progress):
+    build_workbook(get_reports_sheets()).save(output)
+
+
+class ReportExport:
+    """How one ExportJob kind is rendered"""
+
+    def __init__(self, extension, content_type, build, data_version):
+        self.extension = extension
+        self.content_type = content_type
+        self.build = build  # build(output_file, set_progress)
+        self.data_version = data_version
+
+
+EXPORT_KINDS = {
+    'reports_pdf': ReportExport('pdf', 'application/pdf', build_reports_pdf, get_reports_data_version),
+    'reports_excel': ReportExport(
+        'xlsx', 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+        build_reports_excel, get_reports_data_version,
+    ),
+}
+
+
+def get_artifact_path(kind, data_version):
+    return f'exports/{kind}/{data_version}.{EXPORT_KINDS[kind].extension}'
+
+
+def enqueue_export(kind, user):
+    """
+    Queue an export for the worker.
+    Returns the already finished (or still queued) job of an identical report
+    when there is one, so unchanged reports are never rendered twice.
+    """
+    data_version = EXPORT_KINDS[kind].data_version()
+    existing = ExportJob.objects.filter(
+        kind=kind, data_version=data_version
+    ).exclude(status='failed').order_by('-created_at').first()
+
+    if existing is not None:
+        if existing.status != 'done' or default_storage.exists(existing.file.name):
+            return existing
+
+    return ExportJob.objects.create(kind=kind, data_version=data_version, requested_by=user)
+
+
+def claim_next_job():
+    """Take the oldest pending job; the conditional UPDATE keeps two workers off the same job"""
+    for job_id in ExportJob.objects.filter(status='pending').order_by('created_at').values_list('id', flat=True)[:10]:
+        claimed = ExportJob.objects.filter(id=job_id, status='pending').update(
+            status='running', started_at=timezone.now(), attempts=F('attempts') + 1
+        )
+        if claimed:
+            return ExportJob.objects.get(id=job_id)
+    return None
+
+
+def run_export_job(job):
+    export = EXPORT_KINDS[job.kind]
+    path = get_artifact_path(job.kind, job.data_version)
+    try:
+        if not default_storage.exists(path):
+            job.set_progress(10)
+            # Spooled to a temporary file that is removed as soon as it is stored
+            with tempfile.TemporaryFile() as output:
+                export.build(output, job.set_progress)
+                job.set_progress(90)
+                output.seek(0)
+                path = default_storage.save(path, File(output))
+    except Exception as e:
+        logger.exception('Export job %s failed', job.pk)
+        job.status = 'failed'
+        job.error = str(e)
+    else:
+        job.status = 'done'
+        job.file.name = path
+        job.progress = 100
+    job.finished_at = timezone.now()
+    job.save(update_fields=['status', 'error', 'file', 'progress', 'finished_at'])
+    return job
+
+
+def requeue_stale_jobs(minutes=STALE_JOB_MINUTES):
+    """Give jobs of a crashed worker back to the queue (or fail them after MAX_ATTEMPTS)"""
+    stale = ExportJob.objects.filter(status='running', started_at__lt=timezone.now() - timedelta(minutes=minutes))
+    failed = stale.filter(attempts__gte=MAX_ATTEMPTS).update(
+        status='failed', error='توقف التصدير عدة مرات', finished_at=timezone.now()
+    )
+    requeued = stale.filter(attempts__lt=MAX_ATTEMPTS).update(status='pending', progress=0)
+    return requeued, failed
+
+
+def purge_old_jobs(days):
+    """Delete finished jobs older than `days`, and their files once no job points at them"""
+    old_jobs = ExportJob.objects.filter(finished_at__lt=timezone.now() - timedelta(days=days))
+    files = set(old_jobs.exclude(file='').values_list('file', flat=True))
+    deleted, _ = old_jobs.delete()
+    still_used = set(ExportJob.objects.filter(file__in=files).values_list('file', flat=True))
+    for name in files - still_used:
+        default_storage.delete(name)
+    return deleted
@@ -0,0 +1,10 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .context_processors import invalidate_unread_alerts_count
+from .models import DirectorAlert
+
+
+@receiver([post_save, post_delete], sender=DirectorAlert, dispatch_uid='unread_alerts_count')
+def director_alert_changed(sender, instance, **kwargs):
+    invalidate_unread_alerts_count()
@@ -1,3 +1,124 @@
-from django.test import TestCase
+import os
+import time
+from importlib import import_module
+from unittest import skipUnless
 
-# Create your tests here.
+from django.apps import apps
+from django.test import SimpleTestCase, TestCase
+
+from .models import PointsCalculatorSettings, PointsEntry, PointsResult
+from .points_parser import parse_points_messages
+from .views import generate_template_message
+
+
+def committee_message(committee, points):
+    """The calculator's template as a committee fills it in: points[i] for the i-th student"""
+    settings = PointsCalculatorSettings.get_default_settings()
+    settings['default_committee_name'] = committee
+    lines = generate_template_message(settings).split('\n')
+    students = iter(points)
+    return '\n'.join(
+        line.replace('(0)', f'({next(students, 0)})') if line.startswith('▫') else line
+        for line in lines
+    )
+
+
+class PointsParserTests(SimpleTestCase):
+    def test_template_message(self):
+        summary = parse_points_messages(committee_message('الثقافية', [5, 3]))
+        self.assertEqual(summary['committees'], ['الثقافية'])
+        self.assertEqual(summary['week_numbers'], [1])
+        self.assertEqual(summary['rankings'][0], {
+            'student_name': 'أحمد محمد', 'group': 'ثالث', 'committees': {'الثقافية': 5}, 'total_points': 5,
+        })
+        self.assertEqual(summary['total_points'], 8)
+
+    def test_arabic_digits_and_deductions(self):
+        summary = parse_points_messages('📋 اسم اللجنة: العلمية\n👨‍🎓 دفعة أول:\n▫ أحمد 🎯 (١٢)\n▫ خالد (−٣)')
+        points = {student['student_name']: student['total_points'] for student in summary['rankings']}
+        self.assertEqual(points, {'أحمد': 12, 'خالد': -3})
+
+    def test_students_are_merged_across_committees(self):
+        text = '\n'.join([
+            committee_message('الثقافية', [5]),
+            committee_message('الرياضية', [2]),
+            committee_message('الثقافية', [7]),  # pasted again, corrected
+        ])
+        summary = parse_points_messages(text)
+        first = summary['rankings'][0]
+        self.assertEqual(first['student_name'], 'أحمد محمد')
+        self.assertEqual(first['committees'], {'الثقافية': 7, 'الرياضية': 2})
+        self.assertEqual(first['total_points'], 9)
+        # Names listed in two batches of the template are still one student
+        names = [student['student_name'] for student in summary['rankings']]
+        self.assertEqual(len(names), len(set(names)))
+
+    def test_placeholders_and_noise_are_skipped(self):
+        text = '⸻\n▫ [اسم الطالب 1] 🎯 (0)\nنص عشوائي\n▫ محمـد  علي 🌟 (4)'
+        summary = parse_points_messages(text)
+        self.assertEqual([student['student_name'] for student in summary['rankings']], ['محمد علي'])
+
+    def large_paste(self):
+        lines = []
+        for committee in range(6):
+            lines += [f'📋 اسم اللجنة: لجنة {committee}', '🗓 نقاط الأسبوع الـ(٣)']
+            for batch in range(3):
+                lines.append(f'👨‍🎓 دفعة {batch}:')
+                lines += [f'▫ طالب {batch}-{i} 🎯 ({i % 23})' for i in range(300)]
+        return '\n'.join(lines)
+
+    def test_large_paste(self):
+        summary = parse_points_messages(self.large_paste())
+        self.assertEqual(summary['total_students'], 900)
+        self.assertEqual(summary['committees'], [f'لجنة {committee}' for committee in range(6)])
+        self.assertEqual(summary['week_numbers'], [3])
+
+    # Wall-clock timing depends on the machine: only run on demand, RUN_BENCHMARKS=1 python manage.py test
+    @skipUnless(os.environ.get('RUN_BENCHMARKS'), 'set RUN_BENCHMARKS=1 to run the benchmarks')
+    def test_benchmark(self):
+        text = self.large_paste()
+        timings = []
+        for _ in range(5):
+            start = time.perf_counter()
+            parse_points_messages(text)
+            timings.append(time.perf_counter() - start)
+        self.assertLess(min(timings), 0.05, f'{text.count(chr(10)) + 1} lines took {min(timings) * 1000:.1f} ms')
+
+
+class PointsEntryBackfillTests(TestCase):
+    """The migration's backfill builds the same PointsEntry rows as PointsResult.save()"""
+
+    SUMMARY = {'rankings': [
+        {'student_name': 'خالد', 'group': 'أول', 'total_points': '7'},
+        {'student_name': '  ', 'group': 'أول', 'total_points': 50},
+        {'student_name': 'أحمد', 'group': 'ثاني', 'total_points': 12.6},
+        {'student_name': 'سعد', 'total_points': 'غير معروف'},
+        {'student_name': None, 'total_points': 3},
+        {'student_name': 'عمر', 'group': None, 'total_points': '7'},
+        {'student_name': 'ياسر', 'group': 'ثالث'},
+    ]}
+
+    def get_entries(self, result):
+        return list(result.entries.order_by('rank').values_list('rank', 'student_name', 'group', 'points',
+                                                                'week_number', 'user_id'))
+
+    def test_backfill_matches_save(self):
+        result = PointsResult.objects.create(summary_data=self.SUMMARY, week_number=4)
+        saved = self.get_entries(result)
+        self.assertEqual(saved, [
+            (1, 'أحمد', 'ثاني', 13, 4, None),
+            # Ties keep the stored order
+            (2, 'خالد', 'أول', 7, 4, None),
+            (3, 'عمر', '', 7, 4, None),
+            (4, 'سعد', '', 0, 4, None),
+            (5, 'ياسر', 'ثالث', 0, 4, None),
+        ])
+
+        PointsEntry.objects.all().delete()
+        import_module('director_dashboard.migrations.0007_pointsentry').fill_entries(apps, None)
+        self.assertEqual(self.get_entries(result), saved)
+
+    def test_results_without_rankings(self):
+        for summary in ({}, {'rankings': None}, {'rankings': ['not a student']}):
+            with self.subTest(summary=summary):
+                self.assertEqual(self.get_entries(PointsResult.objects.create(summary_data=summary)), [])
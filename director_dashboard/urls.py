@@ -40,6 +40,8 @@ urlpatterns = [
 
     path('reports/export-pdf/', views.export_reports_pdf, name='export_reports_pdf'),
     path('reports/export-excel/', views.export_reports_excel, name='export_reports_excel'),
+    path('reports/exports/<int:job_id>/', views.export_job_status, name='export_job_status'),
+    path('reports/exports/<int:job_id>/download/', views.download_export_job, name='download_export_job'),
 
     # Points URLs
     path('points/', views.points_main, name='points_main'),
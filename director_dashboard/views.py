@@ -4,10 +4,10 @@ from django.contrib import messages
 from django.db.models import Count, Avg
 from .models import Program, Committee, Student
 from accounts.models import User, UserActivity
+from accounts.activity import get_user_timeline, log_activity
 from .forms import ProgramForm, UserForm
 
 
-from cultural_committee_dashboard.models import DailyPhrase
 @login_required
 def dashboard(request):
     if request.user.role != 'director':
@@ -29,22 +29,6 @@ def dashboard(request):
     # Recent activities
     recent_activities = UserActivity.objects.select_related('user').order_by('-timestamp')[:5]
 
-    # Get daily phrase from cultural committee of the first program
-    daily_phrase = None
-    try:
-        first_program = Program.objects.first()
-        if first_program:
-            cultural_committee = Committee.objects.filter(
-                program=first_program,
-            ).first()
-
-            if cultural_committee:
-                from datetime import date
-                daily_phrase = DailyPhrase.get_today_phrase()
-    except Exception as e:
-        # Log the error but don't break the dashboard
-        print(f"Error fetching daily phrase: {e}")
-
     context = {
         'total_programs': total_programs,
         'total_committees': total_committees,
@@ -52,7 +36,6 @@ def dashboard(request):
         'total_users': total_users,
         'overall_completion': round(overall_completion, 1),
         'recent_activities': recent_activities,
-        'daily_phrase': daily_phrase,
     }
     return render(request, 'director_dashboard/dashboard.html', context)
 
@@ -77,11 +60,7 @@ def add_program(request):
         form = ProgramForm(request.POST)
         if form.is_valid():
             program = form.save()
-            UserActivity.objects.create(
-                user=request.user,
-                action=f'إضافة برنامج جديد: {program.name}',
-                ip_address=get_client_ip(request)
-            )
+            log_activity(request, f'إضافة برنامج جديد: {program.name}')
             messages.success(request, 'تم إضافة البرنامج بنجاح!')
             return redirect('program_management')
     else:
@@ -102,11 +81,7 @@ def edit_program(request, program_id):
         form = ProgramForm(request.POST, instance=program)
         if form.is_valid():
             program = form.save()
-            UserActivity.objects.create(
-                user=request.user,
-                action=f'تعديل البرنامج: {program.name}',
-                ip_address=get_client_ip(request)
-            )
+            log_activity(request, f'تعديل البرنامج: {program.name}')
             messages.success(request, 'تم تعديل البرنامج بنجاح!')
             return redirect('program_management')
     else:
@@ -126,11 +101,7 @@ def delete_program(request, program_id):
     if request.method == 'POST':
         program_name = program.name
         program.delete()
-        UserActivity.objects.create(
-            user=request.user,
-            action=f'حذف البرنامج: {program_name}',
-            ip_address=get_client_ip(request)
-        )
+        log_activity(request, f'حذف البرنامج: {program_name}')
         messages.success(request, 'تم حذف البرنامج بنجاح!')
         return redirect('program_management')
 
@@ -186,11 +157,7 @@ def add_user(request):
             user.save()
 
             # Log activity
-            UserActivity.objects.create(
-                user=request.user,
-                action=f'إضافة مستخدم جديد: {user.username}',
-                ip_address=get_client_ip(request)
-            )
+            log_activity(request, f'إضافة مستخدم جديد: {user.username}')
 
             messages.success(request, f'تم إضافة المستخدم {user.username} بنجاح!')
             return redirect('user_management')
@@ -220,11 +187,7 @@ def edit_user(request, user_id):
             user = form.save()
 
             # Log activity
-            UserActivity.objects.create(
-                user=request.user,
-                action=f'تعديل بيانات المستخدم: {user.username}',
-                ip_address=get_client_ip(request)
-            )
+            log_activity(request, f'تعديل بيانات المستخدم: {user.username}')
 
             messages.success(request, f'تم تحديث بيانات المستخدم {user.username} بنجاح!')
             return redirect('user_management')
@@ -260,11 +223,7 @@ def toggle_user_status(request, user_id):
     action = 'تفعيل' if user.is_active else 'تعطيل'
 
     # Log activity
-    UserActivity.objects.create(
-        user=request.user,
-        action=f'{action} المستخدم: {user.username}',
-        ip_address=get_client_ip(request)
-    )
+    log_activity(request, f'{action} المستخدم: {user.username}')
 
     messages.success(request, f'تم {action} حساب المستخدم {user.username} بنجاح!')
     return redirect('user_management')
@@ -278,11 +237,20 @@ def user_activity_log(request, user_id):
         return redirect('dashboard')
 
     user = get_object_or_404(User, id=user_id)
-    activities = UserActivity.objects.filter(user=user).order_by('-timestamp')[:50]
+    cursor = request.GET.get('before')
+    activities, next_cursor = get_user_timeline(user, cursor)
+    if cursor:
+        latest_activity = UserActivity.objects.filter(user=user).order_by('-timestamp', '-id').first()
+    else:
+        latest_activity = activities[0] if activities else None
 
     context = {
         'target_user': user,
-        'activities': activities
+        'activities': activities,
+        'total_activities': UserActivity.objects.filter(user=user).count(),
+        'latest_activity': latest_activity,
+        'next_cursor': next_cursor,
+        'is_first_page': not cursor,
     }
 
     return render(request, 'director_dashboard/user_activity.html', context)
@@ -317,19 +285,11 @@ def reports(request):
     return render(request, 'director_dashboard/reports.html', context)
 
 
-def get_client_ip(request):
-    x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
-    if x_forwarded_for:
-        ip = x_forwarded_for.split(',')[0]
-    else:
-        ip = request.META.get('REMOTE_ADDR')
-    return ip
-
-
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
 from django.db.models import Count, Q
 from .models import DirectorAlbum, AlbumPhoto, DirectorFileLibrary, DirectorAlert
+from .context_processors import invalidate_unread_alerts_count
 from .forms import DirectorAlbumForm, AlbumPhotoForm, DirectorFileLibraryForm, DirectorAlertForm
 
 # Albums Management
@@ -362,11 +322,7 @@ def add_album(request):
             album.created_by = request.user
             album.save()
 
-            UserActivity.objects.create(
-                user=request.user,
-                action=f'إضافة ألبوم: {album.title}',
-                ip_address=get_client_ip(request)
-            )
+            log_activity(request, f'إضافة ألبوم: {album.title}')
 
             messages.success(request, 'تم إضافة الألبوم بنجاح!')
             return redirect('album_management')
@@ -393,11 +349,7 @@ def edit_album(request, album_id):
         if form.is_valid():
             album = form.save()
 
-            UserActivity.objects.create(
-                user=request.user,
-                action=f'تعديل الألبوم: {album.title}',
-                ip_address=get_client_ip(request)
-            )
+            log_activity(request, f'تعديل الألبوم: {album.title}')
 
             messages.success(request, 'تم تعديل الألبوم بنجاح!')
             return redirect('album_management')
@@ -443,11 +395,7 @@ def add_photo(request, album_id):
             photo.album = album
             photo.save()
 
-            UserActivity.objects.create(
-                user=request.user,
-                action=f'إضافة صورة للألبوم: {album.title}',
-                ip_address=get_client_ip(request)
-            )
+            log_activity(request, f'إضافة صورة للألبوم: {album.title}')
 
             messages.success(request, 'تم إضافة الصورة بنجاح!')
             return redirect('album_detail', album_id=album.id)
@@ -474,11 +422,7 @@ def delete_album(request, album_id):
         album_title = album.title
         album.delete()
 
-        UserActivity.objects.create(
-            user=request.user,
-            action=f'حذف الألبوم: {album_title}',
-            ip_address=get_client_ip(request)
-        )
+        log_activity(request, f'حذف الألبوم: {album_title}')
 
         messages.success(request, 'تم حذف الألبوم بنجاح!')
         return redirect('album_management')
@@ -503,11 +447,7 @@ def delete_photo(request, photo_id):
         photo_title = photo.title
         photo.delete()
 
-        UserActivity.objects.create(
-            user=request.user,
-            action=f'حذف صورة: {photo_title}',
-            ip_address=get_client_ip(request)
-        )
+        log_activity(request, f'حذف صورة: {photo_title}')
 
         messages.success(request, 'تم حذف الصورة بنجاح!')
         return redirect('album_detail', album_id=album_id)
@@ -552,11 +492,7 @@ def upload_file(request):
             file_obj.uploaded_by = request.user
             file_obj.save()
 
-            UserActivity.objects.create(
-                user=request.user,
-                action=f'رفع ملف: {file_obj.title}',
-                ip_address=get_client_ip(request)
-            )
+            log_activity(request, f'رفع ملف: {file_obj.title}')
 
             messages.success(request, 'تم رفع الملف بنجاح!')
             return redirect('file_library')
@@ -583,11 +519,7 @@ def edit_file(request, file_id):
         if form.is_valid():
             file_obj = form.save()
 
-            UserActivity.objects.create(
-                user=request.user,
-                action=f'تعديل الملف: {file_obj.title}',
-                ip_address=get_client_ip(request)
-            )
+            log_activity(request, f'تعديل الملف: {file_obj.title}')
 
             messages.success(request, 'تم تعديل الملف بنجاح!')
             return redirect('file_library')
@@ -617,11 +549,7 @@ def delete_file(request, file_id):
             file_obj.thumbnail.delete()
         file_obj.delete()
 
-        UserActivity.objects.create(
-            user=request.user,
-            action=f'حذف الملف: {file_title}',
-            ip_address=get_client_ip(request)
-        )
+        log_activity(request, f'حذف الملف: {file_title}')
 
         messages.success(request, 'تم حذف الملف بنجاح!')
         return redirect('file_library')
@@ -632,7 +560,9 @@ def delete_file(request, file_id):
     }
     return render(request, 'director_dashboard/confirm_delete.html', context)
 
+import os
 from django.http import FileResponse
+from main.media import serve_field_file
 @login_required
 def download_file(request, file_id):
     if request.user.role != 'director':
@@ -640,10 +570,12 @@ def download_file(request, file_id):
         return redirect('home')
 
     file_obj = get_object_or_404(DirectorFileLibrary, id=file_id)
-    file_obj.increment_download_count()
+    # Resumed downloads ask for the rest of the file; count only the first request
+    if request.META.get('HTTP_RANGE', 'bytes=0-').startswith('bytes=0-'):
+        file_obj.increment_download_count()
 
-    response = FileResponse(file_obj.file.open(), as_attachment=True, filename=file_obj.file.name)
-    return response
+    return serve_field_file(request, file_obj.file, as_attachment=True,
+                            filename=os.path.basename(file_obj.file.name))
 
 
 # Alerts Management
@@ -687,11 +619,7 @@ def add_alert(request):
         if form.is_valid():
             alert = form.save()
 
-            UserActivity.objects.create(
-                user=request.user,
-                action=f'إضافة تنبيه: {alert.title}',
-                ip_address=get_client_ip(request)
-            )
+            log_activity(request, f'إضافة تنبيه: {alert.title}')
 
             messages.success(request, 'تم إضافة التنبيه بنجاح!')
             return redirect('alerts_management')
@@ -726,12 +654,9 @@ def mark_all_alerts_read(request):
 
     if request.method == 'POST':
         DirectorAlert.objects.filter(is_read=False).update(is_read=True)
+        invalidate_unread_alerts_count()
 
-        UserActivity.objects.create(
-            user=request.user,
-            action='تحديد جميع التنبيهات كمقروءة',
-            ip_address=get_client_ip(request)
-        )
+        log_activity(request, 'تحديد جميع التنبيهات كمقروءة')
 
         messages.success(request, 'تم تحديد جميع التنبيهات كمقروءة!')
 
@@ -750,11 +675,7 @@ def delete_alert(request, alert_id):
         alert_title = alert.title
         alert.delete()
 
-        UserActivity.objects.create(
-            user=request.user,
-            action=f'حذف تنبيه: {alert_title}',
-            ip_address=get_client_ip(request)
-        )
+        log_activity(request, f'حذف تنبيه: {alert_title}')
 
         messages.success(request, 'تم حذف التنبيه بنجاح!')
         return redirect('alerts_management')
@@ -783,196 +704,85 @@ def create_director_alert(title, message, alert_type, priority='medium',
     return alert
 
 
-from django.http import HttpResponse
-from django.template.loader import render_to_string
-import pandas as pd
-from datetime import datetime
-import tempfile
-from django.db.models import Count, Avg
+from django.http import FileResponse, Http404, JsonResponse
+from django.urls import reverse
+from django.utils import timezone
+from .models import ExportJob
+from .reports import EXPORT_KINDS, enqueue_export
 
 
-@login_required
-def export_reports_pdf(request):
-    try:
-        # Import only when function is called
-        from weasyprint import HTML
-        # Use HTML here
-    except ImportError:
-        messages.error(request, 'WeasyPrint غير متوفر')
-        return redirect('reports')
-    """Export reports as PDF"""
+def queue_report_export(request, kind, action):
+    """Hand a report to the export worker instead of rendering it inside the web worker"""
     if request.user.role != 'director':
         messages.error(request, 'ليس لديك صلاحية للوصول إلى هذه الصفحة')
         return redirect('home')
 
-    try:
-        # Get the same data as reports view
-        programs = Program.objects.annotate(
-            student_count=Count('student'),
-            avg_progress=Avg('student__progress')
-        )
-
-        active_committees = Committee.objects.annotate(
-            student_count=Count('student'),
-            avg_progress=Avg('student__progress')
-        ).order_by('-student_count', '-avg_progress')[:5]
-
-        best_students = Student.objects.select_related('user', 'program').order_by('-progress')[:10]
+    job = enqueue_export(kind, request.user)
 
-        context = {
-            'programs': programs,
-            'active_committees': active_committees,
-            'best_students': best_students,
-            'export_date': datetime.now().strftime('%Y-%m-%d %H:%M'),
-        }
-
-        # Render HTML template
-        html_string = render_to_string('director_dashboard/reports_pdf.html', context)
+    # Log activity
+    log_activity(request, action)
 
-        # Create PDF
-        html = HTML(string=html_string, base_url=request.build_absolute_uri())
-        pdf_file = html.write_pdf()
+    if job.status == 'done':
+        # Nothing changed since the last export: serve the stored file
+        return redirect('download_export_job', job_id=job.id)
+    return redirect('export_job_status', job_id=job.id)
 
-        # Create response
-        response = HttpResponse(pdf_file, content_type='application/pdf')
-        filename = f'reports_export_{datetime.now().strftime("%Y%m%d_%H%M")}.pdf'
-        response['Content-Disposition'] = f'attachment; filename="{filename}"'
 
-        # Log activity
-        UserActivity.objects.create(
-            user=request.user,
-            action='تصدير تقارير PDF',
-            ip_address=get_client_ip(request)
-        )
-
-        return response
-
-    except Exception as e:
-        messages.error(request, f'حدث خطأ أثناء تصدير PDF: {str(e)}')
-        return redirect('reports')
+@login_required
+def export_reports_pdf(request):
+    """Export reports as PDF"""
+    return queue_report_export(request, 'reports_pdf', 'تصدير تقارير PDF')
 
 
 @login_required
 def export_reports_excel(request):
     """Export reports as Excel"""
+    return queue_report_export(request, 'reports_excel', 'تصدير تقارير Excel')
+
+
+@login_required
+def export_job_status(request, job_id):
+    """Progress page of an export; polled with ?format=json until the file is ready"""
     if request.user.role != 'director':
         messages.error(request, 'ليس لديك صلاحية للوصول إلى هذه الصفحة')
         return redirect('home')
 
-    try:
-        # Get data
-        programs = Program.objects.annotate(
-            student_count=Count('student'),
-            avg_progress=Avg('student__progress')
-        )
-
-        active_committees = Committee.objects.annotate(
-            student_count=Count('student'),
-            avg_progress=Avg('student__progress')
-        ).order_by('-student_count', '-avg_progress')[:5]
-
-        best_students = Student.objects.select_related('user', 'program').order_by('-progress')[:10]
-
-        # Create Excel file with multiple sheets
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.xlsx') as tmp_file:
-            with pd.ExcelWriter(tmp_file.name, engine='openpyxl') as writer:
-
-                # Programs Sheet
-                programs_data = []
-                for program in programs:
-                    programs_data.append({
-                        'اسم البرنامج': program.name,
-                        'مدير البرنامج': program.manager.get_full_name() if program.manager else 'غير معين',
-                        'عدد الطلاب': program.student_count,
-                        'متوسط التقدم %': round(program.avg_progress or 0, 1),
-                        'تاريخ البدء': program.start_date,
-                        'تاريخ الانتهاء': program.end_date,
-                        'الحالة': 'نشط' if program.is_active else 'منتهي'
-                    })
+    job = get_object_or_404(ExportJob, id=job_id)
 
-                if programs_data:
-                    df_programs = pd.DataFrame(programs_data)
-                    df_programs.to_excel(writer, sheet_name='البرامج', index=False)
-
-                # Active Committees Sheet
-                committees_data = []
-                for committee in active_committees:
-                    committees_data.append({
-                        'اسم اللجنة': committee.name,
-                        'البرنامج': committee.program.name,
-                        'عدد الأعضاء': committee.student_count,
-                        'متوسط التقدم %': round(committee.avg_progress or 0, 1),
-                        'المشرف': committee.supervisor.get_full_name() if committee.supervisor else 'غير معين'
-                    })
-
-                if committees_data:
-                    df_committees = pd.DataFrame(committees_data)
-                    df_committees.to_excel(writer, sheet_name='اللجان النشطة', index=False)
-
-                # Best Students Sheet
-                students_data = []
-                for student in best_students:
-                    students_data.append({
-                        'اسم الطالب': student.user.get_full_name() or student.user.username,
-                        'البرنامج': student.program.name,
-                        'اللجنة': student.committee.name if student.committee else '-',
-                        'مستوى الحفظ': student.memorization_level or 'غير محدد',
-                        'نسبة التقدم %': student.progress,
-                        'تاريخ الانضمام': student.joined_date
-                    })
-
-                if students_data:
-                    df_students = pd.DataFrame(students_data)
-                    df_students.to_excel(writer, sheet_name='أفضل الطلاب', index=False)
-
-            # Read the file and create response
-            with open(tmp_file.name, 'rb') as f:
-                excel_data = f.read()
+    if request.GET.get('format') == 'json':
+        return JsonResponse({
+            'status': job.status,
+            'status_display': job.get_status_display(),
+            'progress': job.progress,
+            'error': job.error,
+            'download_url': reverse('download_export_job', args=[job.id]) if job.status == 'done' else None,
+        })
 
-        # Create response
-        response = HttpResponse(excel_data,
-                                content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
-        filename = f'reports_export_{datetime.now().strftime("%Y%m%d_%H%M")}.xlsx'
-        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return render(request, 'director_dashboard/export_job.html', {'job': job})
 
-        # Log activity
-        UserActivity.objects.create(
-            user=request.user,
-            action='تصدير تقارير Excel',
-            ip_address=get_client_ip(request)
-        )
 
-        return response
+@login_required
+def download_export_job(request, job_id):
+    if request.user.role != 'director':
+        messages.error(request, 'ليس لديك صلاحية للوصول إلى هذه الصفحة')
+        return redirect('home')
 
-    except Exception as e:
-        messages.error(request, f'حدث خطأ أثناء تصدير Excel: {str(e)}')
-        return redirect('reports')
+    job = get_object_or_404(ExportJob, id=job_id, status='done')
+    export = EXPORT_KINDS[job.kind]
+    filename = f'reports_export_{timezone.localtime(job.finished_at).strftime("%Y%m%d_%H%M")}.{export.extension}'
+    return serve_field_file(request, job.file, as_attachment=True, filename=filename,
+                            content_type=export.content_type)
 
 
 # ============================================
 # حاسبة النقاط - Points Calculator
 # ============================================
 from .models import PointsCalculatorSettings,PointsResult
+from .points import get_leaderboard, get_points_summary, get_weekly_results, get_weekly_trends
+from .points_parser import parse_points_messages, to_english_digits
 def convert_arabic_to_english_number(text):
     """تحويل الأرقام العربية إلى إنجليزية"""
-    if not text:
-        return text
-
-    arabic_to_english = {
-        '٠': '0', '١': '1', '٢': '2', '٣': '3', '٤': '4',
-        '٥': '5', '٦': '6', '٧': '7', '٨': '8', '٩': '9',
-        '۰': '0', '۱': '1', '۲': '2', '۳': '3', '۴': '4',
-        '۵': '5', '۶': '6', '۷': '7', '۸': '8', '۹': '9',
-    }
-
-    result = ''
-    for char in text:
-        if char in arabic_to_english:
-            result += arabic_to_english[char]
-        else:
-            result += char
-
-    return result
+    return to_english_digits(text)
 
 
 def normalize_week_number(week_number_str):
@@ -1112,12 +922,21 @@ def process_points(request):
                 "combined_messages": combined_messages
             })
 
-        # هنا تحتاج لمكتبة parse_report_text من main app
-        # يمكنك نسخها أو استيرادها
-
         try:
-            # مؤقتاً - يمكنك إضافة المنطق هنا لاحقاً
-            summary = {'rankings': [], 'total_students': 0, 'total_points': 0}
+            summary = parse_points_messages(combined_messages)
+            if not summary['rankings']:
+                return render(request, "director_dashboard/points/points_calculator.html", {
+                    "error": "لم يتم العثور على نقاط طلاب في الرسائل، تأكد من استخدام القالب",
+                    "template_message": request.POST.get("template_message", ""),
+                    "combined_messages": combined_messages
+                })
+
+            # save_points_result stores it once the director confirms
+            request.session['pending_points_result'] = {
+                'summary_data': summary,
+                'week_number': week_number,
+                'program_name': summary['program_name'] or get_user_settings(request.user)['program_name'],
+            }
 
             return render(request, "director_dashboard/points/points_result.html", {
                 "summary": summary,
@@ -1196,11 +1015,7 @@ def points_settings(request):
         settings_obj.batches = batches
         settings_obj.save()
 
-        UserActivity.objects.create(
-            user=request.user,
-            action='تحديث إعدادات حاسبة النقاط',
-            ip_address=get_client_ip(request)
-        )
+        log_activity(request, 'تحديث إعدادات حاسبة النقاط')
 
         return render(request, "director_dashboard/points/points_settings.html", {
             "settings": settings_obj,
@@ -1237,51 +1052,13 @@ def points_history(request):
         messages.error(request, 'ليس لديك صلاحية للوصول إلى هذه الصفحة')
         return redirect('dashboard')
 
-    all_results = PointsResult.objects.filter(
-        user=request.user
-    ).exclude(program_name="نقاط الإسري").order_by('-created_at')
-
-    weeks_data = {}
-    for result in all_results:
-        week = result.week_number or 'غير محدد'
-        if week not in weeks_data:
-            weeks_data[week] = result
-
-    dashboard_stats = {
-        'total_weeks': len(weeks_data),
-        'total_points_all_weeks': 0,
-        'unique_students_count': 0,
-        'average_points_per_week': 0,
-        'students_summary': {}
-    }
-
-    for result in all_results:
-        summary = result.summary_data
-        if summary and summary.get('total_points'):
-            dashboard_stats['total_points_all_weeks'] += summary.get('total_points', 0)
-
-        if summary and summary.get('rankings'):
-            for student in summary['rankings']:
-                student_name = student.get('student_name', '')
-                student_points = student.get('total_points', 0)
-
-                if student_name:
-                    if student_name not in dashboard_stats['students_summary']:
-                        dashboard_stats['students_summary'][student_name] = 0
-                    dashboard_stats['students_summary'][student_name] += student_points
-
-    dashboard_stats['unique_students_count'] = len(dashboard_stats['students_summary'])
-
-    if dashboard_stats['total_weeks'] > 0:
-        dashboard_stats['average_points_per_week'] = round(
-            dashboard_stats['total_points_all_weeks'] / dashboard_stats['total_weeks'],
-            2
-        )
+    weeks_data = get_weekly_results(request.user)
 
     return render(request, "director_dashboard/points/points_history.html", {
         "weeks_data": weeks_data,
-        "results": all_results,
-        "dashboard_stats": dashboard_stats
+        "dashboard_stats": get_points_summary(request.user, len(weeks_data)),
+        "leaderboard": get_leaderboard(request.user),
+        "weekly_trends": get_weekly_trends(request.user),
     })
 
 
@@ -1536,11 +1313,7 @@ def delete_points_result(request, result_id):
             result = PointsResult.objects.get(id=result_id, user=request.user)
             result.delete()
 
-            UserActivity.objects.create(
-                user=request.user,
-                action=f'حذف نتيجة نقاط: الأسبوع {result.week_number or "غير محدد"}',
-                ip_address=get_client_ip(request)
-            )
+            log_activity(request, f'حذف نتيجة نقاط: الأسبوع {result.week_number or "غير محدد"}')
 
             return JsonResponse({'success': True, 'message': 'تم حذف النتيجة بنجاح'})
         except PointsResult.DoesNotExist:
@@ -58,6 +58,8 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'accounts.activity.ActivityLogMiddleware',
+    'main.scope.ScopeMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -112,6 +114,89 @@ else:
     print("⚠️  DATABASE_URL not found. Using SQLite for local development.")
 
 
+# Cache
+# One cache shared by every process of a deployment: the gunicorn workers and the
+# background commands (sweep_overdue, the workers) invalidate calendars, public pages,
+# user scopes, progress and phrases for each other, and count login failures together.
+#   file (default): files under CACHE_LOCATION, shared by the processes of one machine
+#   database: the django_cache table (python manage.py createcachetable), shared by every machine
+#   locmem: private to each process, only for a single process (runserver, one worker);
+#           entries other processes may invalidate are then kept LOCAL_CACHE_TIMEOUT seconds at most
+CACHE_BACKEND = config('CACHE_BACKEND', default='file')
+CACHE_MAX_ENTRIES = config('CACHE_MAX_ENTRIES', default=10000, cast=int)
+LOCAL_CACHE_TIMEOUT = config('LOCAL_CACHE_TIMEOUT', default=60, cast=int)
+
+if CACHE_BACKEND == 'locmem':
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'islamic-learning',
+        }
+    }
+elif CACHE_BACKEND == 'database':
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+            'LOCATION': 'django_cache',
+            'OPTIONS': {'MAX_ENTRIES': CACHE_MAX_ENTRIES},
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': config('CACHE_LOCATION', default=os.path.join(BASE_DIR, '.django_cache')),
+            'OPTIONS': {'MAX_ENTRIES': CACHE_MAX_ENTRIES},
+        }
+    }
+
+# Seconds a computed calendar month/week stays cached (changes invalidate it earlier)
+CALENDAR_CACHE_TIMEOUT = config('CALENDAR_CACHE_TIMEOUT', default=3600, cast=int)
+
+# Seconds anonymous visitors get the cached home and album pages and landing counters
+# (album and photo changes invalidate the pages earlier)
+PUBLIC_CACHE_TIMEOUT = config('PUBLIC_CACHE_TIMEOUT', default=300, cast=int)
+
+# Seconds the program/committee of a user stays cached (assignment changes invalidate it earlier)
+SCOPE_CACHE_TIMEOUT = config('SCOPE_CACHE_TIMEOUT', default=300, cast=int)
+
+# UserActivity rows are written in bulk by a background thread; False writes them at the end of each request
+ACTIVITY_LOG_BUFFERED = config('ACTIVITY_LOG_BUFFERED', default=True, cast=bool)
+# Where records go when the database can't take them (replayed by replay_activity_spool)
+ACTIVITY_SPOOL_DIR = config('ACTIVITY_SPOOL_DIR', default=os.path.join(BASE_DIR, 'activity_spool'))
+# prune_activity (a daily Railway cron service, railway.prune-activity.json) keeps this many
+# days of UserActivity and archives older rows first. The archive needs persistent storage:
+# the service's volume when one is mounted, else set ACTIVITY_ARCHIVE_DIR (outside DEBUG the
+# command refuses to archive into BASE_DIR, which every redeploy wipes)
+ACTIVITY_RETENTION_DAYS = config('ACTIVITY_RETENTION_DAYS', default=365, cast=int)
+ACTIVITY_ARCHIVE_DIR = config('ACTIVITY_ARCHIVE_DIR', default=os.path.join(
+    config('RAILWAY_VOLUME_MOUNT_PATH', default=BASE_DIR), 'activity_archive'
+))
+
+
+# Proxies in front of the app that append to X-Forwarded-For (the Railway edge);
+# the visitor's address is the hop they added, see accounts.utils.get_client_ip
+TRUSTED_PROXY_COUNT = config('TRUSTED_PROXY_COUNT', default=1, cast=int)
+
+# Sign in with a username or an email address (one lookup, see accounts.backends)
+AUTHENTICATION_BACKENDS = ['accounts.backends.UsernameOrEmailBackend']
+# Failed logins allowed for a login name from one address, and from one address in all,
+# before that address is turned away for a while
+LOGIN_MAX_ATTEMPTS = config('LOGIN_MAX_ATTEMPTS', default=10, cast=int)
+LOGIN_MAX_ATTEMPTS_PER_IP = config('LOGIN_MAX_ATTEMPTS_PER_IP', default=50, cast=int)
+LOGIN_LOCKOUT_SECONDS = config('LOGIN_LOCKOUT_SECONDS', default=15 * 60, cast=int)
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'accounts': {'handlers': ['console'], 'level': config('ACCOUNTS_LOG_LEVEL', default='INFO')},
+    },
+}
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -151,6 +236,12 @@ STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 os.makedirs(MEDIA_ROOT, exist_ok=True)
+
+# Who sends protected media once Django has checked permissions:
+# 'nginx' (X-Accel-Redirect to an `internal` location aliased to MEDIA_ROOT),
+# 'apache' (mod_xsendfile) or '' to stream from Django with Range support
+PROTECTED_MEDIA_ACCEL = config('PROTECTED_MEDIA_ACCEL', default='')
+PROTECTED_MEDIA_ACCEL_PREFIX = config('PROTECTED_MEDIA_ACCEL_PREFIX', default='/protected-media/')
 STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 
 CSRF_TRUSTED_ORIGINS = [
@@ -167,7 +258,13 @@ AUTH_USER_MODEL = 'accounts.User'
 
 
 # Email settings (for notifications)
-EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
+# Emails are queued in main.OutboxMessage and sent by run_outbox_worker;
+# 'django.core.mail.backends.locmem.EmailBackend' or '.filebased.EmailBackend' work offline
+EMAIL_BACKEND = config('EMAIL_BACKEND', default='django.core.mail.backends.smtp.EmailBackend')
+EMAIL_FILE_PATH = config('EMAIL_FILE_PATH', default=os.path.join(BASE_DIR, 'sent_emails'))
+# Seconds the worker waits on the mail server before retrying later
+EMAIL_TIMEOUT = config('EMAIL_TIMEOUT', default=30, cast=int)
+OUTBOX_MAX_ATTEMPTS = config('OUTBOX_MAX_ATTEMPTS', default=6, cast=int)
 EMAIL_HOST = 'smtp.gmail.com'  # Or use another email service
 EMAIL_PORT = 587
 EMAIL_USE_TLS = True
@@ -18,8 +18,8 @@ from django.contrib import admin
 from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
-from django.views.static import serve
 from django.urls import re_path
+from main.media import serve_media
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -33,12 +33,8 @@ urlpatterns = [
     path('scientific/', include('scientific_committee_dashboard.urls')),
     path('operations/', include('operations_committee_dashboard.urls')),
     path('takwin/', include('takwin.urls')),
-] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
-if not settings.DEBUG:
-    urlpatterns += [
-        re_path(r'^media/(?P<path>.*)$', serve, {
-            'document_root': settings.MEDIA_ROOT,
-        }),
-    ]
+    # Uploads go through Django for the permission check, then to the proxy (see main/media.py)
+    re_path(r'^media/(?P<path>.*)$', serve_media, name='serve_media'),
+]
 if settings.DEBUG:
     urlpatterns += static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)
@@ -0,0 +1,78 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .shared_cache import bump_version, cap_timeout, get_version, incr
+
+
+# Hit/miss counters live in the cache itself so every worker process sees the same totals
+HITS_KEY = 'calendar:stats:hits'
+MISSES_KEY = 'calendar:stats:misses'
+
+# GET parameters that change what the calendar shows
+FILTER_PARAMS = ('event_type', 'status', 'priority', 'committee')
+
+
+def get_cache_timeout():
+    return cap_timeout(getattr(settings, 'CALENDAR_CACHE_TIMEOUT', 3600))
+
+
+def get_program_version(program_id):
+    """
+    Generation number of a program's calendar.
+    Every cached entry embeds it in its key, so bumping it drops them all at once
+    without having to enumerate keys (which the file cache can't do). The version
+    lives in the shared cache, so a change saved by one process (a gunicorn worker,
+    sweep_overdue) is seen by all of them.
+    """
+    return get_version(f'calendar:version:{program_id}')
+
+
+def invalidate_program_calendar(program_id):
+    """Drop every cached calendar grid of a program"""
+    if program_id:
+        bump_version(f'calendar:version:{program_id}')
+
+
+def get_filters_hash(filters):
+    values = '|'.join(f'{name}={filters.get(name) or ""}' for name in FILTER_PARAMS)
+    return hashlib.md5(values.encode('utf-8')).hexdigest()[:12]
+
+
+def get_calendar_cache_key(program_id, period, scope, filters):
+    """
+    Key for one computed calendar grid.
+    period: '2025-01' for a month or '2025-W02' for an ISO week
+    scope: 'all' for directors and program managers, 'committee-<id>' for supervisors
+    """
+    version = get_program_version(program_id)
+    return f'calendar:{program_id}:v{version}:{period}:{scope}:{get_filters_hash(filters)}'
+
+
+def get_cached_calendar(key, build):
+    """Return the cached value for key, computing and storing it with build() on a miss"""
+    value = cache.get(key)
+    if value is not None:
+        incr(HITS_KEY, None)
+        return value
+
+    incr(MISSES_KEY, None)
+    value = build()
+    cache.set(key, value, get_cache_timeout())
+    return value
+
+
+def get_calendar_cache_stats():
+    hits = cache.get(HITS_KEY) or 0
+    misses = cache.get(MISSES_KEY) or 0
+    total = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_ratio': hits / total if total else 0.0,
+    }
+
+
+def reset_calendar_cache_stats():
+    cache.delete_many([HITS_KEY, MISSES_KEY])
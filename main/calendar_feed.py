@@ -0,0 +1,358 @@
+from collections import defaultdict
+from datetime import time, timedelta
+from functools import lru_cache
+
+from django.db.models import BooleanField, CharField, DateField, F, Q, TextField, TimeField, Value
+from django.db.models.functions import Coalesce
+
+from pm_dashboard.models import Task, Activity
+from cultural_committee_dashboard.models import CulturalTask, TaskSession
+from operations_committee_dashboard.models import OperationsTask
+from scientific_committee_dashboard.models import ScientificTask, Lecture
+from sharia_committee_dashboard.models import ShariaTask, FamilyCompetition
+from sports_committee_dashboard.models import SportsTask, Match
+
+from .calendar_cache import get_cached_calendar, get_calendar_cache_key
+from .models import ScheduleEvent
+from .scope import get_user_scope
+
+
+class CalendarSource:
+    """
+    How one model is projected into the calendar feed.
+    Every source yields the same columns (see CalendarItem.FIELDS) so the
+    projections can be combined with UNION ALL.
+    """
+
+    def __init__(self, kind, model, label, program='committee__program', committee='committee',
+                 date='date', end_date=None, spans=False, title='title', time=None, location=None,
+                 description='description', status=True, priority=False, subtype=None,
+                 recurring=False, shared=False, related=('committee',)):
+        self.kind = kind
+        self.model = model
+        self.label = label
+        self.program = program
+        self.committee = committee
+        self.date = date
+        self.end_date = end_date
+        self.spans = spans  # shown on every day between date and end_date
+        self.title = title
+        self.time = time
+        self.location = location
+        self.description = description
+        self.status = status
+        self.priority = priority
+        self.subtype = subtype
+        self.recurring = recurring  # days come from the pre-expanded TaskOccurrence rows
+        self.shared = shared  # rows without a committee are visible to every supervisor
+        self.related = related
+
+    def columns(self, with_description=False):
+        if self.recurring:
+            day = F('occurrences__date')
+            span_start = F('occurrences__group_start')
+            span_end = F('occurrences__group_end')
+            is_recurring = F('is_recurring')
+            recurrence_pattern = Coalesce('recurrence_pattern', Value(''), output_field=CharField())
+        else:
+            day = span_start = F(self.date)
+            span_end = Coalesce(self.end_date, self.date, output_field=DateField()) if self.end_date else F(self.date)
+            is_recurring = Value(False, output_field=BooleanField())
+            recurrence_pattern = Value('', output_field=CharField())
+
+        columns = [
+            Value(self.kind, output_field=CharField()),
+            F('pk'),
+            F(self.title),
+            F(self.subtype) if self.subtype else Value('', output_field=CharField()),
+            day,
+            span_start,
+            span_end,
+            F(self.time) if self.time else Value(None, output_field=TimeField()),
+            F(self.committee),
+            F(f'{self.committee}__name'),
+            F('status') if self.status else Value('', output_field=CharField()),
+            F('priority') if self.priority else Value('', output_field=CharField()),
+            Coalesce(self.location, Value(''), output_field=CharField()) if self.location
+            else Value('', output_field=CharField()),
+            is_recurring,
+            recurrence_pattern,
+        ]
+        if with_description:
+            columns.append(
+                Coalesce(self.description, Value(''), output_field=TextField()) if self.description
+                else Value('', output_field=TextField())
+            )
+        return columns
+
+    def filtered(self, feed, expand=True):
+        """
+        The source's rows visible in the feed.
+        With expand=False recurring tasks yield one row per task (whatever its dates)
+        instead of one row per occurrence day inside the range.
+        """
+        if self.recurring and expand:
+            # A single filter() call so every condition applies to the same occurrence row
+            queryset = self.model._default_manager.filter(
+                occurrences__program=feed.program,
+                occurrences__date__gte=feed.start_date,
+                occurrences__date__lte=feed.end_date,
+            )
+        elif self.recurring:
+            queryset = self.model._default_manager.filter(**{self.program: feed.program})
+        elif self.spans:
+            queryset = self.model._default_manager.filter(**{
+                self.program: feed.program,
+                f'{self.date}__lte': feed.end_date,
+                f'{self.end_date}__gte': feed.start_date,
+            })
+        else:
+            queryset = self.model._default_manager.filter(**{
+                self.program: feed.program,
+                f'{self.date}__gte': feed.start_date,
+                f'{self.date}__lte': feed.end_date,
+            })
+
+        if feed.status and self.status:
+            queryset = queryset.filter(status=feed.status)
+        if feed.priority and self.priority:
+            queryset = queryset.filter(priority=feed.priority)
+        if feed.committee_id:
+            queryset = queryset.filter(**{self.committee: feed.committee_id})
+        if feed.scope is not None:
+            scope = Q(**{self.committee: feed.scope})
+            if self.shared:
+                scope |= Q(**{f'{self.committee}__isnull': True})
+            queryset = queryset.filter(scope)
+        return queryset
+
+    def queryset(self, feed):
+        # Named columns (feed_date, ...) so the combined query can be ordered in SQL
+        columns = {f'feed_{field}': column
+                   for field, column in zip(CalendarItem.FIELDS, self.columns(feed.with_description))}
+        return self.filtered(feed).order_by().annotate(**columns).values_list(*columns)
+
+
+# Feed sources, in the order items of the same day are shown
+CALENDAR_SOURCES = {source.kind: source for source in [
+    CalendarSource('schedule_event', ScheduleEvent, 'حدث', program='program', date='start_date',
+                   end_date='end_date', time='start_time', location='location', priority=True,
+                   subtype='event_type', shared=True, related=('committee', 'created_by')),
+    CalendarSource('regular_task', Task, 'مهمة', program='program', priority=True, recurring=True,
+                   shared=True),
+    CalendarSource('cultural_task', CulturalTask, 'مهمة ثقافية', priority=True, recurring=True),
+    CalendarSource('operations_task', OperationsTask, 'مهمة تشغيلية', priority=True, recurring=True),
+    CalendarSource('scientific_task', ScientificTask, 'مهمة علمية', priority=True, recurring=True),
+    CalendarSource('sharia_task', ShariaTask, 'مهمة شرعية', priority=True, recurring=True),
+    CalendarSource('sports_task', SportsTask, 'مهمة رياضية', priority=True, recurring=True),
+    CalendarSource('activity', Activity, 'نشاط', program='program', title='name', time='time',
+                   location='location', status=False, shared=True, related=('committee', 'created_by')),
+    CalendarSource('task_session', TaskSession, 'جلسة مهمة', program='task__committee__program',
+                   committee='task__committee', title='name', time='time', description='notes',
+                   status=False, related=('task', 'task__committee')),
+    CalendarSource('lecture', Lecture, 'محاضرة', time='time', location='location',
+                   subtype='lecture_type', related=('committee', 'created_by')),
+    CalendarSource('family_competition', FamilyCompetition, 'مسابقة أسرية', date='start_date',
+                   end_date='end_date', spans=True),
+    CalendarSource('match', Match, 'مباراة', time='time', location='location', description=None,
+                   subtype='match_type', related=('committee', 'created_by')),
+]}
+
+KIND_ORDER = {kind: order for order, kind in enumerate(CALENDAR_SOURCES)}
+
+# The calendar filter calls program tasks 'task'
+EVENT_TYPE_ALIASES = {'task': 'regular_task'}
+
+
+@lru_cache(maxsize=None)
+def field_choices(model, field_name):
+    return dict(model._meta.get_field(field_name).flatchoices)
+
+
+class CalendarItem:
+    """A slim calendar record: one row of the feed's UNION ALL"""
+
+    FIELDS = (
+        'type', 'id', 'title', 'subtype', 'date', 'span_start', 'span_end', 'time',
+        'committee_id', 'committee_name', 'status', 'priority', 'location',
+        'is_recurring', 'recurrence_pattern', 'description',
+    )
+    __slots__ = FIELDS
+
+    def __init__(self, row):
+        for field, value in zip(self.FIELDS, row):
+            setattr(self, field, value)
+        if len(row) < len(self.FIELDS):
+            self.description = ''
+
+    def __repr__(self):
+        return f'<CalendarItem {self.type} {self.id} {self.date}>'
+
+    @property
+    def source(self):
+        return CALENDAR_SOURCES[self.type]
+
+    @property
+    def is_start(self):
+        return self.date == self.span_start
+
+    @property
+    def is_end(self):
+        return self.date == self.span_end
+
+    @property
+    def span_days(self):
+        return (self.span_end - self.span_start).days + 1
+
+    def _display(self, field_name, value):
+        return field_choices(self.source.model, field_name).get(value, value)
+
+    def get_type_display(self):
+        if self.subtype:
+            return self._display(self.source.subtype, self.subtype)
+        return self.source.label
+
+    def get_status_display(self):
+        return self._display('status', self.status) if self.status else ''
+
+    def get_priority_display(self):
+        return self._display('priority', self.priority) if self.priority else ''
+
+    def get_recurrence_pattern_display(self):
+        return self._display('recurrence_pattern', self.recurrence_pattern) if self.recurrence_pattern else ''
+
+
+class CalendarFeed:
+    """
+    Everything shown on a program's calendar between two dates, as one
+    sorted list of CalendarItem built from a single UNION ALL query.
+
+    filters: any mapping with the calendar's GET parameters
+             (event_type, status, priority, committee).
+    user: committee supervisors only see their own committee; pass
+          `committee` when the caller already loaded it.
+    period: month ('2025-01') or ISO week ('2025-W02') the range covers;
+            when given the items are cached until the program's calendar changes.
+    """
+
+    def __init__(self, program, start_date, end_date, filters=None, user=None, committee=None,
+                 with_description=False, period=None):
+        filters = filters or {}
+        self.program = program
+        self.filters = filters
+        self.period = period
+        self.start_date = start_date
+        self.end_date = end_date
+        self.with_description = with_description
+
+        event_type = filters.get('event_type') or ''
+        self.kinds = [EVENT_TYPE_ALIASES.get(event_type, event_type)] if event_type else list(CALENDAR_SOURCES)
+        self.status = filters.get('status') or ''
+        self.priority = filters.get('priority') or ''
+        self.committee_id = filters.get('committee') or None
+
+        self.scope = None
+        self.is_empty = False
+        if user is not None and user.role == 'committee_supervisor':
+            self.scope = committee or get_user_scope(user).committee
+            self.is_empty = self.scope is None
+
+        self._items = None
+        self._instances = None
+
+    def queryset(self, kinds=None):
+        """The combined UNION ALL queryset (rows are tuples in CalendarItem.FIELDS order)"""
+        querysets = [
+            CALENDAR_SOURCES[kind].queryset(self)
+            for kind in (self.kinds if kinds is None else kinds) if kind in CALENDAR_SOURCES
+        ]
+        if not querysets:
+            return None
+        if len(querysets) == 1:
+            return querysets[0]
+        return querysets[0].union(*querysets[1:], all=True)
+
+    def cache_key(self):
+        scope = f'committee-{self.scope.pk}' if self.scope is not None else 'all'
+        period = self.period + ('-desc' if self.with_description else '')
+        return get_calendar_cache_key(self.program.pk, period, scope, self.filters)
+
+    def build_items(self):
+        queryset = None if self.is_empty else self.queryset()
+        items = [CalendarItem(row) for row in queryset] if queryset is not None else []
+        items.sort(key=lambda item: (item.date, KIND_ORDER[item.type], item.time or time.min, item.title))
+        return items
+
+    def items(self):
+        if self._items is None:
+            if self.period and not self.is_empty:
+                self._items = get_cached_calendar(self.cache_key(), self.build_items)
+            else:
+                self._items = self.build_items()
+        return self._items
+
+    def iterator(self, chunk_size=2000):
+        """
+        Items ordered by date, time and title, read in chunks instead of all at
+        once (for exports of long ranges). Not cached.
+        """
+        queryset = None if self.is_empty else self.queryset()
+        if queryset is None:
+            return
+        ordering = (F('feed_date').asc(), F('feed_time').asc(nulls_first=True), F('feed_title').asc())
+        for row in queryset.order_by(*ordering).iterator(chunk_size=chunk_size):
+            yield CalendarItem(row)
+
+    def by_day(self):
+        """
+        Items grouped per day inside the requested range.
+        Items that span several days (family competitions) appear on each of them.
+        Returns dict: {date: [CalendarItem, ...]}
+        """
+        days = defaultdict(list)
+        for item in self.items():
+            if item.source.spans:
+                current = max(item.span_start, self.start_date)
+                last = min(item.span_end, self.end_date)
+                while current <= last:
+                    days[current].append(item)
+                    current += timedelta(days=1)
+            else:
+                days[item.date].append(item)
+        for day_items in days.values():
+            day_items.sort(key=lambda item: (KIND_ORDER[item.type], item.time or time.min, item.title))
+        return dict(days)
+
+    def instances(self):
+        """
+        Full model instances behind the feed's items, for pages that render details.
+        One in_bulk query per source that has items.
+        Returns dict: {type: {id: instance}}
+        """
+        if self._instances is None:
+            ids = defaultdict(set)
+            for item in self.items():
+                ids[item.type].add(item.id)
+
+            self._instances = {}
+            for kind, kind_ids in ids.items():
+                source = CALENDAR_SOURCES[kind]
+                manager = source.model._default_manager
+                self._instances[kind] = manager.select_related(*source.related).in_bulk(kind_ids)
+        return self._instances
+
+    def instances_by_type(self):
+        """
+        Distinct instances per type, in feed order.
+        Returns dict: {type: [instance, ...]}
+        """
+        loaded = self.instances()
+        seen = set()
+        grouped = defaultdict(list)
+        for item in self.items():
+            key = (item.type, item.id)
+            if key in seen or item.id not in loaded.get(item.type, {}):
+                continue
+            seen.add(key)
+            grouped[item.type].append(loaded[item.type][item.id])
+        return grouped
@@ -0,0 +1,17 @@
+from django.conf import settings
+from django.core.checks import Tags, Warning, register
+
+from .shared_cache import is_cache_shared
+
+
+@register(Tags.caches)
+def check_shared_cache(app_configs, **kwargs):
+    """Outside development several processes run (gunicorn workers, sweep_overdue) and must share the cache"""
+    if settings.DEBUG or is_cache_shared():
+        return []
+    return [Warning(
+        'The default cache is local to each process.',
+        hint='Invalidations made by one gunicorn worker or background command are not seen by the others; '
+             'set CACHE_BACKEND to file or database.',
+        id='main.W001',
+    )]
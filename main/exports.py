@@ -0,0 +1,193 @@
+import io
+import os
+import queue
+import threading
+from datetime import date
+
+from django.http import StreamingHttpResponse
+
+try:
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Alignment, Border, Font, NamedStyle, PatternFill, Side
+    from openpyxl.utils import get_column_letter
+
+    OPENPYXL_AVAILABLE = True
+except ImportError:
+    OPENPYXL_AVAILABLE = False
+
+
+XLSX_CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+# Rows fetched per database round trip
+EXPORT_CHUNK_SIZE = 2000
+
+# Bytes handed to the client at a time, and how many such chunks may wait in memory
+STREAM_CHUNK_SIZE = 64 * 1024
+STREAM_QUEUE_SIZE = 8
+
+HEADER_STYLE = 'export_header'
+CELL_STYLE = 'export_cell'
+DATE_STYLE = 'export_date'
+
+
+class ExcelSheet:
+    """
+    One worksheet of an export.
+    rows: any iterable of value tuples - pass a generator over
+          `.values_list(...).iterator(chunk_size=EXPORT_CHUNK_SIZE)` so it is
+          consumed while the sheet is written.
+    """
+
+    def __init__(self, title, headers, rows, width=20):
+        self.title = title
+        self.headers = headers
+        self.rows = rows
+        self.width = width
+
+
+def _named_styles():
+    # Registered once per workbook; every cell then just points at the style
+    thin = Side(style='thin')
+    border = Border(left=thin, right=thin, top=thin, bottom=thin)
+    header = NamedStyle(
+        name=HEADER_STYLE,
+        font=Font(bold=True, color='FFFFFF', size=12),
+        fill=PatternFill(start_color='0084AB', end_color='0084AB', fill_type='solid'),
+        alignment=Alignment(horizontal='center', vertical='center'),
+        border=border,
+    )
+    cell = NamedStyle(name=CELL_STYLE, border=border)
+    date_cell = NamedStyle(name=DATE_STYLE, border=border, number_format='yyyy-mm-dd')
+    return header, cell, date_cell
+
+
+def build_workbook(sheets):
+    """Write-only workbook: rows are serialized as they are appended, never kept in memory"""
+    workbook = Workbook(write_only=True)
+    for style in _named_styles():
+        workbook.add_named_style(style)
+
+    for sheet in sheets:
+        ws = workbook.create_sheet(sheet.title)
+        ws.sheet_view.rightToLeft = True
+        # Column sizes must be set before the first row in write-only mode
+        for col in range(1, len(sheet.headers) + 1):
+            ws.column_dimensions[get_column_letter(col)].width = sheet.width
+
+        ws.append([_styled(ws, header, HEADER_STYLE) for header in sheet.headers])
+        for row in sheet.rows:
+            ws.append([_styled(ws, value, DATE_STYLE if isinstance(value, date) else CELL_STYLE)
+                       for value in row])
+    return workbook
+
+
+def _styled(ws, value, style):
+    cell = WriteOnlyCell(ws, value=value)
+    cell.style = style
+    return cell
+
+
+def _discard_sheets(workbook):
+    """
+    Finish the sheets a cancelled save left open and remove their temporary files,
+    so neither their row streams (closed later by the garbage collector, writing to
+    files already gone) nor the files themselves outlive the download.
+    """
+    for ws in workbook.worksheets:
+        if not ws.closed:
+            ws.close()
+        if ws._writer is not None and os.path.exists(ws._writer.out):
+            ws._writer.cleanup()
+
+
+class _ExportCancelled(Exception):
+    pass
+
+
+class _QueueWriter(io.RawIOBase):
+    """Unseekable file handing what the zip writer produces to the response, chunk by chunk"""
+
+    def __init__(self, chunks, cancelled):
+        self.chunks = chunks
+        self.cancelled = cancelled
+        self.aborted = False
+        self.buffer = bytearray()
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        if self.aborted:
+            # The save was already stopped: what the half-closed zip file still writes
+            # (again from its __del__) is dropped instead of raising once more
+            return len(data)
+        self.buffer += data
+        if len(self.buffer) >= STREAM_CHUNK_SIZE:
+            self.send(bytes(self.buffer))
+            self.buffer.clear()
+        return len(data)
+
+    def send(self, item):
+        while True:
+            if self.cancelled.is_set():
+                self.aborted = True
+                raise _ExportCancelled
+            try:
+                self.chunks.put(item, timeout=1)
+                return
+            except queue.Full:
+                continue
+
+    def finish(self, error=None):
+        if self.buffer and error is None:
+            self.send(bytes(self.buffer))
+        self.send(error)
+
+
+def stream_workbook(sheets):
+    """
+    Yield the .xlsx bytes of `sheets`.
+    The rows are read and written first (openpyxl spools each sheet to its own
+    temporary file), then the zip is produced by a helper thread and passed on
+    through a small queue, so memory stays bounded whatever the export size.
+    """
+    workbook = build_workbook(sheets)
+
+    chunks = queue.Queue(maxsize=STREAM_QUEUE_SIZE)
+    cancelled = threading.Event()
+    writer = _QueueWriter(chunks, cancelled)
+
+    def save():
+        error = None
+        try:
+            workbook.save(writer)
+        except _ExportCancelled:
+            _discard_sheets(workbook)
+            return
+        except Exception as exc:
+            error = exc
+        try:
+            writer.finish(error)
+        except _ExportCancelled:
+            pass
+
+    thread = threading.Thread(target=save, name='excel-export', daemon=True)
+    thread.start()
+    try:
+        while True:
+            item = chunks.get()
+            if item is None:
+                break
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        # The client went away (or we are done): let the writer thread stop
+        cancelled.set()
+
+
+def excel_response(filename, sheets):
+    response = StreamingHttpResponse(stream_workbook(sheets), content_type=XLSX_CONTENT_TYPE)
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
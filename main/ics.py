@@ -0,0 +1,292 @@
+import hashlib
+from datetime import timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.core import signing
+from django.db.models import CharField, Count, Max, TextField, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from django.utils.crypto import constant_time_compare, salted_hmac
+
+from accounts.models import User
+
+from .calendar_cache import get_filters_hash
+from .calendar_feed import CALENDAR_SOURCES, CalendarFeed, CalendarItem
+from .occurrences import occurrence_horizon
+from .recurrence import CALENDAR_TO_PYTHON_WEEKDAY, occurrence_groups
+
+
+CRLF = '\r\n'
+
+# Stored calendar weekdays (Sunday=0 ... Saturday=6) -> iCalendar BYDAY codes
+BYDAY_CODES = ('SU', 'MO', 'TU', 'WE', 'TH', 'FR', 'SA')
+
+# Columns of the recurring task rows (one row per task, see task_rows)
+TASK_FIELDS = (
+    'type', 'id', 'title', 'description', 'start_date', 'due_date', 'is_recurring',
+    'recurrence_pattern', 'recurrence_days', 'recurrence_end_date', 'updated_at',
+)
+
+FEED_TOKEN_SALT = 'main.ics.feed'
+
+
+# ---------------------------------------------------------------------------
+# Content lines
+# ---------------------------------------------------------------------------
+
+def escape_text(value):
+    """Escape a TEXT value (RFC 5545 section 3.3.11)"""
+    return (
+        str(value or '')
+        .replace('\\', '\\\\')
+        .replace(';', '\\;')
+        .replace(',', '\\,')
+        .replace('\r\n', '\\n')
+        .replace('\n', '\\n')
+    )
+
+
+def fold(line):
+    """Fold a content line at 75 octets without splitting a UTF-8 character"""
+    if len(line.encode('utf-8')) <= 75:
+        return line
+    parts = []
+    current, size, limit = [], 0, 75
+    for char in line:
+        char_size = len(char.encode('utf-8'))
+        if size + char_size > limit:
+            parts.append(''.join(current))
+            # Continuation lines start with a space, which counts towards the limit
+            current, size, limit = [], 0, 74
+        current.append(char)
+        size += char_size
+    parts.append(''.join(current))
+    return '\r\n '.join(parts)
+
+
+def content_lines(*lines):
+    return ''.join(fold(line) + CRLF for line in lines if line)
+
+
+def format_date(value):
+    return value.strftime('%Y%m%d')
+
+
+def format_datetime(day, time):
+    # Floating local time, interpreted in the calendar's X-WR-TIMEZONE
+    return f"{format_date(day)}T{time.strftime('%H%M%S')}"
+
+
+def format_utc(value):
+    return value.astimezone(dt_timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+
+
+def date_span(start, end, time=None):
+    """DTSTART/DTEND lines: all-day events end (exclusively) the day after `end`"""
+    if time:
+        lines = [f'DTSTART:{format_datetime(start, time)}']
+        if end and end != start:
+            lines.append(f'DTEND:{format_datetime(end, time)}')
+        return lines
+    return [
+        f'DTSTART;VALUE=DATE:{format_date(start)}',
+        f'DTEND;VALUE=DATE:{format_date((end or start) + timedelta(days=1))}',
+    ]
+
+
+def calendar_header(name):
+    return content_lines(
+        'BEGIN:VCALENDAR',
+        'VERSION:2.0',
+        f'PRODID:-//{escape_text(name)}//Calendar//AR',
+        'CALSCALE:GREGORIAN',
+        'METHOD:PUBLISH',
+        f'X-WR-CALNAME:{escape_text(name)}',
+        f'X-WR-TIMEZONE:{settings.TIME_ZONE}',
+    )
+
+
+def stream_calendar(name, events):
+    """Yield a VCALENDAR piece by piece; `events` is an iterable of VEVENT strings"""
+    yield calendar_header(name)
+    yield from events
+    yield content_lines('END:VCALENDAR')
+
+
+# ---------------------------------------------------------------------------
+# Events
+# ---------------------------------------------------------------------------
+
+def item_event(item, uid, dtstamp, span=True):
+    """VEVENT of one CalendarItem; span=False keeps it on its own day"""
+    end = item.span_end if span and not item.source.recurring else item.date
+    return content_lines(
+        'BEGIN:VEVENT',
+        f'UID:{uid}',
+        f'DTSTAMP:{dtstamp}',
+        *date_span(item.date, end, item.time),
+        f'SUMMARY:{escape_text(item.title)}',
+        f'DESCRIPTION:{escape_text(item.description)}' if item.description else '',
+        f'LOCATION:{escape_text(item.location)}' if item.location else '',
+        f'CATEGORIES:{escape_text(item.get_type_display())}',
+        'END:VEVENT',
+    )
+
+
+def recurrence_rule(pattern, recurrence_days, until):
+    """RRULE value matching the shared recurrence engine, or None for a pattern without days"""
+    if pattern == 'daily':
+        rule = 'FREQ=DAILY'
+    elif pattern == 'weekly':
+        # Repeats on DTSTART's weekday
+        rule = 'FREQ=WEEKLY'
+    elif pattern == 'custom':
+        days = sorted({day for day in (recurrence_days or []) if day in CALENDAR_TO_PYTHON_WEEKDAY})
+        if not days:
+            return None
+        if len(days) == 7:
+            rule = 'FREQ=DAILY'
+        else:
+            rule = 'FREQ=WEEKLY;BYDAY=' + ','.join(BYDAY_CODES[day] for day in days)
+    else:
+        return None
+    return f'{rule};UNTIL={format_date(until)}'
+
+
+def task_event(row, program_end, host, dtstamp):
+    """
+    VEVENT of one task row: recurring tasks become a single event with an RRULE
+    instead of one event per day. Returns '' for tasks that never occur.
+    """
+    task = dict(zip(TASK_FIELDS, row))
+    task_start = task['start_date'] or task['due_date']
+    lines = []
+
+    if task['is_recurring']:
+        until = occurrence_horizon(task['due_date'], task['recurrence_end_date'], program_end)
+        rule = recurrence_rule(task['recurrence_pattern'], task['recurrence_days'], until)
+        # DTSTART always counts as an occurrence, so it must be the first real one
+        first_week = occurrence_groups(
+            task['recurrence_pattern'], task_start, task_start,
+            min(until, task_start + timedelta(days=6)), task['recurrence_days'],
+        )
+        if rule is None or not first_week:
+            return ''
+        first = first_week[0][0]
+        lines += date_span(first, first)
+        lines.append(f'RRULE:{rule}')
+    else:
+        # Non-recurring tasks are shown on their due date
+        lines += date_span(task['due_date'], task['due_date'])
+
+    label = CALENDAR_SOURCES[task['type']].label
+    return content_lines(
+        'BEGIN:VEVENT',
+        f"UID:{task['type']}-{task['id']}@{host}",
+        f'DTSTAMP:{dtstamp}',
+        f"LAST-MODIFIED:{format_utc(task['updated_at'])}" if task['updated_at'] else '',
+        *lines,
+        f"SUMMARY:{escape_text(task['title'])}",
+        f"DESCRIPTION:{escape_text(task['description'])}" if task['description'] else '',
+        f'CATEGORIES:{escape_text(label)}',
+        'END:VEVENT',
+    )
+
+
+# ---------------------------------------------------------------------------
+# Program subscription feed
+# ---------------------------------------------------------------------------
+
+def get_subscription_feed(program, user, filters=None):
+    """The whole program's calendar, as served to subscribed calendar apps"""
+    return CalendarFeed(program, program.start_date, program.end_date, filters=filters, user=user,
+                        with_description=True)
+
+
+def task_rows(feed):
+    """One row per task of the feed (TASK_FIELDS order) from a single UNION ALL, or None"""
+    querysets = [
+        CALENDAR_SOURCES[kind].filtered(feed, expand=False).order_by().values_list(
+            Value(kind, output_field=CharField()), 'pk', 'title',
+            Coalesce('description', Value(''), output_field=TextField()),
+            'start_date', 'due_date', 'is_recurring', 'recurrence_pattern', 'recurrence_days',
+            'recurrence_end_date', 'updated_at',
+        )
+        for kind in feed.kinds if kind in CALENDAR_SOURCES and CALENDAR_SOURCES[kind].recurring
+    ]
+    if not querysets:
+        return None
+    return querysets[0].union(*querysets[1:], all=True)
+
+
+def get_feed_state(feed):
+    """
+    Validators of a subscription feed: (etag, last_modified).
+    Newest updated_at and row count of every source in one UNION ALL - the
+    counts catch deletions, which leave no timestamp behind.
+    """
+    state = []
+    if not feed.is_empty:
+        querysets = [
+            CALENDAR_SOURCES[kind].filtered(feed, expand=False).order_by()
+            # A constant grouping key: one aggregate row per source
+            .values(source=Value(kind, output_field=CharField()))
+            .annotate(last_modified=Max('updated_at'), count=Count('pk'))
+            .values_list('source', 'last_modified', 'count')
+            for kind in feed.kinds if kind in CALENDAR_SOURCES
+        ]
+        if querysets:
+            state = sorted(querysets[0].union(*querysets[1:], all=True), key=lambda row: row[0])
+
+    last_modified = max((row[1] for row in state if row[1]), default=None)
+    scope = feed.scope.pk if feed.scope is not None else 'all'
+    key = '|'.join([
+        str(feed.program.pk), str(feed.program.end_date), str(scope), get_filters_hash(feed.filters),
+        *(f'{kind}:{modified}:{count}' for kind, modified, count in state),
+    ])
+    return hashlib.md5(key.encode('utf-8')).hexdigest(), last_modified
+
+
+def feed_events(feed, host):
+    """Yield the VEVENTs of a subscription feed while reading the rows from the database"""
+    if feed.is_empty:
+        return
+    dtstamp = format_utc(timezone.now())
+
+    tasks = task_rows(feed)
+    if tasks is not None:
+        for row in tasks.iterator():
+            event = task_event(row, feed.program.end_date, host, dtstamp)
+            if event:
+                yield event
+
+    items = feed.queryset(kinds=[kind for kind in feed.kinds
+                                 if kind in CALENDAR_SOURCES and not CALENDAR_SOURCES[kind].recurring])
+    if items is not None:
+        for row in items.iterator():
+            item = CalendarItem(row)
+            yield item_event(item, f'{item.type}-{item.id}@{host}', dtstamp)
+
+
+def _password_fingerprint(user):
+    # Changing the password revokes every feed link handed out before
+    return salted_hmac(FEED_TOKEN_SALT, user.password).hexdigest()[:12]
+
+
+def get_feed_token(user, program):
+    """Signed token that lets calendar apps read a program's feed as `user` without a session"""
+    return signing.dumps([user.pk, program.pk, _password_fingerprint(user)], salt=FEED_TOKEN_SALT)
+
+
+def get_feed_user(token, program):
+    """The user a feed token was issued to, or None when it is invalid for this program"""
+    try:
+        user_id, program_id, fingerprint = signing.loads(token, salt=FEED_TOKEN_SALT)
+    except (signing.BadSignature, ValueError, TypeError):
+        return None
+    if program_id != program.pk:
+        return None
+    user = User.objects.filter(pk=user_id, is_active=True).first()
+    if user is None or not constant_time_compare(fingerprint, _password_fingerprint(user)):
+        return None
+    return user
@@ -0,0 +1,169 @@
+import hashlib
+import io
+import logging
+import os
+
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import IntegrityError, transaction
+
+from .models import ImageRendition
+
+try:
+    from PIL import Image, ImageOps
+
+    PIL_AVAILABLE = True
+except ImportError:
+    PIL_AVAILABLE = False
+
+
+logger = logging.getLogger(__name__)
+
+# Widths listed in srcset; pictures narrower than a width are not upscaled
+RENDITION_WIDTHS = (320, 640, 1280)
+
+# Browsers that can't read WebP get this single JPEG through `src`
+FALLBACK_WIDTH = 640
+
+# format -> (Pillow format, file extension, widths)
+RENDITION_FORMATS = {
+    'webp': ('WEBP', 'webp', RENDITION_WIDTHS),
+    'jpeg': ('JPEG', 'jpg', (FALLBACK_WIDTH,)),
+}
+
+QUALITY = 80
+
+# Renditions of an image are looked up from the cache first; sources that
+# can't be resized are remembered for a while so pages don't retry on each view
+CACHE_TIMEOUT = 24 * 60 * 60
+FAILED_CACHE_TIMEOUT = 60 * 60
+
+# (app_label.Model, field) of every picture that gets renditions
+IMAGE_FIELDS = (
+    ('director_dashboard.DirectorAlbum', 'cover_image'),
+    ('director_dashboard.AlbumPhoto', 'image'),
+    ('director_dashboard.DirectorFileLibrary', 'thumbnail'),
+    ('takwin.Takwin', 'image'),
+)
+
+
+def get_cache_key(source):
+    return f'image_renditions:{hashlib.md5(source.encode("utf-8")).hexdigest()}'
+
+
+def get_content_hash(data):
+    return hashlib.sha256(data).hexdigest()[:12]
+
+
+def get_rendition_name(source, content_hash, width, extension):
+    """photos/2025/01/pic.jpg -> photos/2025/01/pic.<hash>.640w.webp"""
+    root, _ = os.path.splitext(source)
+    return f'{root}.{content_hash}.{width}w.{extension}'
+
+
+def resize(image, width):
+    if image.width <= width:
+        return image
+    height = max(round(image.height * width / image.width), 1)
+    return image.resize((width, height), Image.LANCZOS)
+
+
+def generate_renditions(source, storage=default_storage):
+    """
+    Write the renditions of one stored picture and record them.
+    Files already on disk under the same content hash are reused.
+    Returns the ImageRendition rows ([] when the source is missing or not a picture).
+    """
+    if not PIL_AVAILABLE or not source:
+        return []
+    try:
+        with storage.open(source, 'rb') as file:
+            data = file.read()
+        image = Image.open(io.BytesIO(data))
+        image = ImageOps.exif_transpose(image)
+        image.load()
+    except Exception as e:
+        logger.warning('Could not read image %s: %s', source, e)
+        return []
+
+    content_hash = get_content_hash(data)
+    renditions = []
+    for format, (pillow_format, extension, widths) in RENDITION_FORMATS.items():
+        # Pictures narrower than every width still get one copy at their own width
+        widths = sorted({min(width, image.width) for width in widths})
+        for width in widths:
+            resized = resize(image, width)
+            if pillow_format == 'JPEG' and resized.mode != 'RGB':
+                resized = resized.convert('RGB')
+            elif resized.mode not in ('RGB', 'RGBA'):
+                resized = resized.convert('RGBA')
+
+            name = get_rendition_name(source, content_hash, width, extension)
+            if not storage.exists(name):
+                buffer = io.BytesIO()
+                resized.save(buffer, pillow_format, quality=QUALITY, optimize=True)
+                name = storage.save(name, ContentFile(buffer.getvalue()))
+            renditions.append(ImageRendition(
+                source=source, content_hash=content_hash, format=format,
+                width=width, height=resized.height, name=name,
+            ))
+
+    try:
+        with transaction.atomic():
+            ImageRendition.objects.filter(source=source).delete()
+            ImageRendition.objects.bulk_create(renditions)
+    except IntegrityError:
+        # Generated concurrently by another request: theirs are as good
+        pass
+    cache.delete(get_cache_key(source))
+    return renditions
+
+
+def delete_renditions(source, storage=default_storage):
+    """Remove the rendition files and rows of a deleted picture"""
+    if not source:
+        return
+    for name in ImageRendition.objects.filter(source=source).values_list('name', flat=True):
+        storage.delete(name)
+    ImageRendition.objects.filter(source=source).delete()
+    cache.delete(get_cache_key(source))
+
+
+def get_renditions(source, generate=True):
+    """
+    {'webp': [(width, url), ...], 'jpeg': [...]} of a stored picture, widest last.
+    Missing renditions are generated on first use when generate is set
+    (uploads and the backfill command normally create them beforehand).
+    """
+    if not source:
+        return {}
+    key = get_cache_key(source)
+    renditions = cache.get(key)
+    if renditions is not None:
+        return renditions
+
+    rows = list(ImageRendition.objects.filter(source=source))
+    if not rows and generate:
+        rows = generate_renditions(source)
+
+    renditions = {}
+    for row in sorted(rows, key=lambda row: row.width):
+        renditions.setdefault(row.format, []).append((row.width, default_storage.url(row.name)))
+    cache.set(key, renditions, CACHE_TIMEOUT if renditions else FAILED_CACHE_TIMEOUT)
+    return renditions
+
+
+def get_srcset(renditions, format='webp'):
+    return ', '.join(f'{url} {width}w' for width, url in renditions.get(format, ()))
+
+
+def get_rendition_url(renditions, width, format='webp'):
+    """URL of the narrowest rendition at least `width` wide (the widest one otherwise)"""
+    candidates = renditions.get(format)
+    if not candidates:
+        return None
+    for candidate_width, url in candidates:
+        if candidate_width >= width:
+            return url
+    return candidates[-1][1]
@@ -0,0 +1,41 @@
+from django.apps import apps
+from django.core.management.base import BaseCommand
+
+from main.images import IMAGE_FIELDS, PIL_AVAILABLE, generate_renditions
+from main.models import ImageRendition
+
+
+class Command(BaseCommand):
+    help = 'Generate the srcset renditions (WebP and JPEG) of album, takwin and file library pictures'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true',
+                            help='Regenerate renditions of pictures that already have them')
+
+    def handle(self, *args, **options):
+        if not PIL_AVAILABLE:
+            self.stderr.write(self.style.ERROR('Pillow is not installed'))
+            return
+
+        done = set(ImageRendition.objects.values_list('source', flat=True).distinct())
+        generated = skipped = failed = 0
+
+        for model_label, field in IMAGE_FIELDS:
+            model = apps.get_model(model_label)
+            sources = model.objects.exclude(**{field: ''}).exclude(**{f'{field}__isnull': True}).values_list(
+                field, flat=True
+            ).distinct()
+            for source in sources.iterator():
+                if source in done and not options['force']:
+                    skipped += 1
+                    continue
+                if generate_renditions(source):
+                    generated += 1
+                    done.add(source)
+                else:
+                    failed += 1
+                    self.stdout.write(self.style.WARNING(f'{model_label}.{field}: could not resize {source}'))
+
+        self.stdout.write(self.style.SUCCESS(
+            f'{generated} pictures resized, {skipped} already done, {failed} failed'
+        ))
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from main.calendar_cache import get_calendar_cache_stats, invalidate_program_calendar, reset_calendar_cache_stats
+
+
+class Command(BaseCommand):
+    help = 'Show hit/miss counters of the calendar cache'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reset', action='store_true', help='Reset the counters after printing them')
+        parser.add_argument('--invalidate', type=int, metavar='PROGRAM_ID',
+                            help='Drop the cached calendar of one program')
+
+    def handle(self, *args, **options):
+        stats = get_calendar_cache_stats()
+        self.stdout.write(
+            f"hits: {stats['hits']}  misses: {stats['misses']}  hit ratio: {stats['hit_ratio']:.1%}"
+        )
+
+        if options.get('invalidate'):
+            invalidate_program_calendar(options['invalidate'])
+            self.stdout.write(self.style.SUCCESS(f"Invalidated calendar cache of program {options['invalidate']}"))
+
+        if options['reset']:
+            reset_calendar_cache_stats()
+            self.stdout.write(self.style.SUCCESS('Counters reset'))
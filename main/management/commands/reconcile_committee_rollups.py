@@ -0,0 +1,59 @@
+from django.core.management.base import BaseCommand
+
+from main.models import CommitteeRollup
+from main.rollups import COUNTER_FIELDS, ROLLUP_SOURCES, compute_rollups
+
+
+class Command(BaseCommand):
+    help = ('Recompute the CommitteeRollup counters from the task and member tables and report drift '
+            '(meant to run nightly)')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--verify', action='store_true',
+                            help='Only report drifted counters, without writing')
+
+    def handle(self, *args, **options):
+        verify_only = options['verify']
+        drifted = 0
+        checked = 0
+
+        for kind in ROLLUP_SOURCES:
+            expected = compute_rollups(kind)
+            stored = {rollup.committee_id: rollup for rollup in CommitteeRollup.objects.filter(kind=kind)}
+            # Committees that have a row but no tasks or members left must drop back to zero
+            zero = dict.fromkeys(COUNTER_FIELDS, 0)
+            kind_drift = 0
+
+            for committee_id in sorted(set(expected) | set(stored)):
+                checked += 1
+                values = expected.get(committee_id, zero)
+                rollup = stored.get(committee_id)
+                if rollup is None:
+                    # Rows are created on demand; a missing one is not drift
+                    if not verify_only:
+                        CommitteeRollup.objects.create(committee_id=committee_id, kind=kind, **values)
+                    continue
+
+                differences = {
+                    field: (getattr(rollup, field), value)
+                    for field, value in values.items() if getattr(rollup, field) != value
+                }
+                if not differences:
+                    continue
+
+                kind_drift += 1
+                details = ', '.join(f'{field} {old} -> {new}' for field, (old, new) in differences.items())
+                self.stdout.write(self.style.WARNING(f'{kind} committee {committee_id}: {details}'))
+                if not verify_only:
+                    for field, value in values.items():
+                        setattr(rollup, field, value)
+                    rollup.save(update_fields=[*COUNTER_FIELDS, 'updated_at'])
+
+            drifted += kind_drift
+            self.stdout.write(f'{kind}: {kind_drift} drifted')
+
+        message = f'Checked {checked} committee counters, {drifted} drifted'
+        if verify_only or not drifted:
+            self.stdout.write(self.style.WARNING(message) if drifted else self.style.SUCCESS(message))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'{message}, all fixed'))
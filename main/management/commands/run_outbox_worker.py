@@ -0,0 +1,55 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from main.outbox import (BATCH_SIZE, STALE_MINUTES, deliver_pending, purge_sent_messages,
+                         requeue_stale_messages)
+
+
+class Command(BaseCommand):
+    help = 'Send queued outbox emails outside the web workers, with retries and backoff'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true',
+                            help='Send the messages already due, then exit')
+        parser.add_argument('--interval', type=float, default=2,
+                            help='Seconds to wait between polls of an empty queue')
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE,
+                            help='Messages sent over one mail server connection')
+        parser.add_argument('--purge-days', type=int, default=30,
+                            help='Delete sent messages older than this many days')
+        parser.add_argument('--housekeeping-interval', type=float, default=300,
+                            help='Seconds between requeues of stale messages and purges of sent ones')
+
+    def housekeeping(self, purge_days):
+        # Messages left 'sending' by another worker that died go back to the queue
+        requeued, failed = requeue_stale_messages(STALE_MINUTES)
+        if requeued or failed:
+            self.stdout.write(f'Requeued {requeued} stale messages, gave up on {failed}')
+        purged = purge_sent_messages(purge_days)
+        if purged:
+            self.stdout.write(f'Purged {purged} sent messages')
+
+    def handle(self, *args, **options):
+        self.housekeeping(options['purge_days'])
+        last_housekeeping = time.monotonic()
+
+        self.stdout.write('Outbox worker started')
+        try:
+            while True:
+                close_old_connections()
+                if time.monotonic() - last_housekeeping >= options['housekeeping_interval']:
+                    self.housekeeping(options['purge_days'])
+                    last_housekeeping = time.monotonic()
+
+                sent, retried, failed = deliver_pending(options['batch_size'])
+                if sent or retried or failed:
+                    self.stdout.write(f'Sent {sent}, retrying {retried}, failed {failed}')
+                    continue
+                if options['once']:
+                    break
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            pass
+        self.stdout.write('Outbox worker stopped')
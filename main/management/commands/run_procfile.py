@@ -0,0 +1,120 @@
+import signal
+import subprocess
+import sys
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+# A process that stayed up this long is restarted right away; one that keeps crashing
+# waits twice as long each time, up to MAX_RESTART_DELAY seconds
+STABLE_SECONDS = 60
+MAX_RESTART_DELAY = 60
+# Seconds the processes get to finish after SIGTERM before they are killed
+STOP_TIMEOUT = 20
+
+
+def read_procfile(path):
+    """[(name, command)] of the `name: command` lines of a Procfile"""
+    processes = []
+    with open(path, encoding='utf-8') as file:
+        for line in file:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            name, _, command = line.partition(':')
+            if not name.strip() or not command.strip():
+                raise CommandError(f'{path}: "{line}" is not a "name: command" line')
+            processes.append((name.strip(), command.strip()))
+    return processes
+
+
+class Process:
+    def __init__(self, name, command):
+        self.name = name
+        self.command = command
+        self.popen = None
+        self.started_at = None
+        self.crashes = 0
+        self.restart_at = 0
+
+    def start(self):
+        # exec: signals reach the command itself rather than the shell expanding $PORT
+        self.popen = subprocess.Popen(f'exec {self.command}', shell=True)
+        self.started_at = time.monotonic()
+
+    def schedule_restart(self):
+        """Seconds until the process that just exited is started again"""
+        if time.monotonic() - self.started_at >= STABLE_SECONDS:
+            self.crashes = 0
+        self.crashes += 1
+        delay = min(2 ** (self.crashes - 1), MAX_RESTART_DELAY)
+        self.popen = None
+        self.restart_at = time.monotonic() + delay
+        return delay
+
+
+class Command(BaseCommand):
+    help = ('Run the processes of the Procfile (the web server and the background workers), '
+            'restarting a worker that exits; exits when the web process does')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--procfile', default=str(settings.BASE_DIR / 'Procfile'))
+        parser.add_argument('--main', default='web',
+                            help='Process whose exit stops the others and this command')
+
+    def handle(self, *args, **options):
+        processes = [Process(name, command) for name, command in read_procfile(options['procfile'])]
+        if options['main'] not in [process.name for process in processes]:
+            raise CommandError(f'No "{options["main"]}" process in {options["procfile"]}')
+
+        stopping = []
+        previous_handlers = {
+            signum: signal.signal(signum, lambda signum, frame: stopping.append(signum))
+            for signum in (signal.SIGTERM, signal.SIGINT)
+        }
+        exit_code = 0
+        try:
+            for process in processes:
+                process.start()
+                self.stdout.write(f'Started {process.name} (pid {process.popen.pid})')
+
+            while not stopping:
+                for process in processes:
+                    if process.popen is None:
+                        if time.monotonic() >= process.restart_at:
+                            process.start()
+                            self.stdout.write(f'Restarted {process.name} (pid {process.popen.pid})')
+                        continue
+                    code = process.popen.poll()
+                    if code is None:
+                        continue
+                    if process.name == options['main']:
+                        self.stderr.write(f'{process.name} exited with {code}, stopping the other processes')
+                        exit_code = code
+                        stopping.append(None)
+                        break
+                    delay = process.schedule_restart()
+                    self.stderr.write(self.style.ERROR(
+                        f'{process.name} exited with {code}, restarting it in {delay}s'
+                    ))
+                time.sleep(0.5)
+        finally:
+            self.stop(processes)
+            for signum, handler in previous_handlers.items():
+                signal.signal(signum, handler)
+        if exit_code:
+            sys.exit(exit_code)
+
+    def stop(self, processes):
+        running = [process for process in processes if process.popen is not None and process.popen.poll() is None]
+        for process in running:
+            process.popen.terminate()
+        deadline = time.monotonic() + STOP_TIMEOUT
+        for process in running:
+            try:
+                process.popen.wait(max(deadline - time.monotonic(), 0))
+            except subprocess.TimeoutExpired:
+                process.popen.kill()
+                process.popen.wait()
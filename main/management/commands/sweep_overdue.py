@@ -0,0 +1,41 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from main.overdue import sweep_overdue
+from main.shared_cache import is_cache_shared
+
+
+class Command(BaseCommand):
+    help = 'Switch late tasks to overdue and notify their supervisors, once or on a schedule'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true',
+                            help='Sweep once, then exit')
+        parser.add_argument('--interval', type=float, default=600,
+                            help='Seconds to wait between sweeps')
+
+    def handle(self, *args, **options):
+        if not is_cache_shared():
+            # The calendars it invalidates are cached by the web workers
+            self.stderr.write(self.style.WARNING(
+                'The cache is local to this process: the web workers will show tasks marked overdue '
+                'only once their cached calendars expire. Set CACHE_BACKEND to file or database.'
+            ))
+        self.stdout.write('Overdue sweeper started')
+        try:
+            while True:
+                close_old_connections()
+                sweep = sweep_overdue()
+                if sweep is not None:
+                    self.stdout.write(
+                        f'Swept until {sweep.swept_until}: marked {sum(sweep.marked.values())}, '
+                        f'notified {sum(sweep.notified.values())}'
+                    )
+                if options['once']:
+                    break
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            pass
+        self.stdout.write('Overdue sweeper stopped')
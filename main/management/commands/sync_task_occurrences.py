@@ -0,0 +1,69 @@
+from collections import defaultdict
+
+from django.contrib.contenttypes.models import ContentType
+from django.core.management.base import BaseCommand
+
+from main.models import TaskOccurrence
+from main.occurrences import TASK_OCCURRENCE_MODELS, build_task_occurrences, sync_task_occurrences
+
+
+OCCURRENCE_FIELDS = ('date', 'program_id', 'committee_id', 'group_id', 'group_start', 'group_end', 'is_start', 'is_end')
+
+
+class Command(BaseCommand):
+    help = 'Backfill the TaskOccurrence table from the six task models and verify it is in sync'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--verify', action='store_true',
+                            help='Only report tasks whose stored occurrences differ, without writing')
+        parser.add_argument('--program', type=int, help='Limit to one program id')
+
+    def handle(self, *args, **options):
+        verify_only = options['verify']
+        program_id = options.get('program')
+
+        total_tasks = 0
+        drifted = 0
+        for task_type, model in TASK_OCCURRENCE_MODELS.items():
+            content_type = ContentType.objects.get_for_model(model)
+            tasks = model.objects.select_related('committee')
+            if program_id:
+                if task_type == 'regular_task':
+                    tasks = tasks.filter(program_id=program_id)
+                else:
+                    tasks = tasks.filter(committee__program_id=program_id)
+
+            stored = defaultdict(set)
+            stored_rows = TaskOccurrence.objects.filter(content_type=content_type)
+            if program_id:
+                stored_rows = stored_rows.filter(program_id=program_id)
+            for row in stored_rows.values_list('object_id', *OCCURRENCE_FIELDS).iterator(chunk_size=2000):
+                stored[row[0]].add(row[1:])
+
+            model_drift = 0
+            for task in tasks.iterator(chunk_size=500):
+                total_tasks += 1
+                expected = {
+                    tuple(getattr(occurrence, field) for field in OCCURRENCE_FIELDS)
+                    for occurrence in build_task_occurrences(task)
+                }
+                if stored.pop(task.pk, set()) != expected:
+                    model_drift += 1
+                    if not verify_only:
+                        sync_task_occurrences(task)
+
+            # Whatever is left belongs to tasks that no longer exist
+            orphans = list(stored)
+            if orphans and not verify_only:
+                TaskOccurrence.objects.filter(content_type=content_type, object_id__in=orphans).delete()
+
+            drifted += model_drift + len(orphans)
+            self.stdout.write(
+                f'{model.__name__}: {model_drift} out of sync, {len(orphans)} orphaned'
+            )
+
+        if verify_only:
+            message = f'Checked {total_tasks} tasks, {drifted} need syncing'
+            self.stdout.write(self.style.WARNING(message) if drifted else self.style.SUCCESS(message))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'Synced {drifted} of {total_tasks} tasks'))
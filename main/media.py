@@ -0,0 +1,185 @@
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.contrib.auth.views import redirect_to_login
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import (
+    Http404, HttpResponse, HttpResponseForbidden, HttpResponseNotModified, StreamingHttpResponse,
+)
+from django.utils._os import safe_join
+from django.utils.http import http_date, parse_http_date_safe, content_disposition_header
+
+
+# Bytes read from disk per chunk when Django streams a file itself
+CHUNK_SIZE = 64 * 1024
+
+# Media folders anyone may load (shown on the public pages)
+PUBLIC_MEDIA_PREFIXES = ('albums/',)
+
+# Media folders only directors may load directly
+DIRECTOR_MEDIA_PREFIXES = ('director_files/', 'exports/')
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def get_accel_mode():
+    """'nginx' (X-Accel-Redirect), 'apache' (X-Sendfile) or '' (Django sends the bytes)"""
+    return getattr(settings, 'PROTECTED_MEDIA_ACCEL', '') or ''
+
+
+def get_file_etag(stat):
+    return f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+
+
+def parse_range(header, size):
+    """
+    (start, end) inclusive byte positions of a single-range `Range` header,
+    None to send the whole file (no header, another unit or several ranges),
+    or False when the byte range is malformed or lies outside the file (416).
+    """
+    if not header or not header.strip().startswith('bytes=') or ',' in header:
+        return None
+    match = RANGE_RE.match(header.strip())
+    if match is None:
+        return False
+    first, last = match.groups()
+    if not first and not last:
+        return False
+    if not first:
+        # Suffix range: the last N bytes
+        length = int(last)
+        if not length or not size:
+            return False
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = int(last) if last else size - 1
+    if start >= size or start > end:
+        return False
+    return start, min(end, size - 1)
+
+
+def if_range_matches(request, etag, mtime):
+    """Whether a Range request may be answered partially (RFC 9110 If-Range)"""
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if not if_range:
+        return True
+    if if_range.startswith(('"', 'W/')):
+        return if_range == etag
+    return parse_http_date_safe(if_range) == int(mtime)
+
+
+def not_modified(request, etag, mtime):
+    if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+    if if_none_match is not None:
+        return if_none_match.strip() == '*' or etag in [tag.strip() for tag in if_none_match.split(',')]
+    modified_since = parse_http_date_safe(request.META.get('HTTP_IF_MODIFIED_SINCE', ''))
+    return modified_since is not None and int(mtime) <= modified_since
+
+
+def iter_file(path, start, length):
+    with open(path, 'rb') as file:
+        file.seek(start)
+        while length > 0:
+            chunk = file.read(min(CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+
+
+def serve_file(request, path, content_type=None, as_attachment=False, filename=None):
+    """
+    Response sending a file under MEDIA_ROOT once the caller has checked permissions.
+
+    With PROTECTED_MEDIA_ACCEL set the front proxy sends the bytes (and handles
+    Range itself); otherwise they are streamed from here with Range, If-Range,
+    ETag and Last-Modified support.
+    """
+    media_root = os.path.realpath(settings.MEDIA_ROOT)
+    path = os.path.realpath(path)
+    if os.path.commonpath([media_root, path]) != media_root or not os.path.isfile(path):
+        raise Http404('الملف غير موجود')
+
+    if content_type is None:
+        content_type, _ = mimetypes.guess_type(path)
+        content_type = content_type or 'application/octet-stream'
+    disposition = content_disposition_header(as_attachment, filename or os.path.basename(path))
+
+    mode = get_accel_mode()
+    if mode:
+        response = HttpResponse(content_type=content_type)
+        if mode == 'nginx':
+            relative = os.path.relpath(path, media_root).replace(os.sep, '/')
+            prefix = getattr(settings, 'PROTECTED_MEDIA_ACCEL_PREFIX', '/protected-media/')
+            response['X-Accel-Redirect'] = prefix + quote(relative)
+        else:
+            response['X-Sendfile'] = path
+        response['Content-Disposition'] = disposition
+        return response
+
+    stat = os.stat(path)
+    etag = get_file_etag(stat)
+    validators = {'ETag': etag, 'Last-Modified': http_date(stat.st_mtime)}
+    if not_modified(request, etag, stat.st_mtime):
+        response = HttpResponseNotModified()
+        for header, value in validators.items():
+            response[header] = value
+        return response
+
+    size = stat.st_size
+    byte_range = None
+    if 'HTTP_RANGE' in request.META and if_range_matches(request, etag, stat.st_mtime):
+        byte_range = parse_range(request.META['HTTP_RANGE'], size)
+        if byte_range is False:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            return response
+
+    start, end = byte_range or (0, size - 1)
+    length = max(end - start + 1, 0)
+    if request.method == 'HEAD':
+        response = HttpResponse(content_type=content_type)
+    else:
+        response = StreamingHttpResponse(iter_file(path, start, length), content_type=content_type)
+    if byte_range:
+        response.status_code = 206
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    response['Content-Length'] = str(length)
+    response['Accept-Ranges'] = 'bytes'
+    response['Content-Disposition'] = disposition
+    for header, value in validators.items():
+        response[header] = value
+    return response
+
+
+def serve_field_file(request, field_file, **kwargs):
+    """serve_file for a FileField value"""
+    if not field_file:
+        raise Http404('الملف غير موجود')
+    return serve_file(request, field_file.path, **kwargs)
+
+
+def can_view_media(user, path):
+    if path.startswith(PUBLIC_MEDIA_PREFIXES):
+        return True
+    if not user.is_authenticated:
+        return False
+    if path.startswith(DIRECTOR_MEDIA_PREFIXES):
+        return user.role == 'director' or user.is_superuser
+    return True
+
+
+def serve_media(request, path):
+    """/media/<path>: album pictures are public, other uploads need a login"""
+    if not can_view_media(request.user, path):
+        if not request.user.is_authenticated:
+            return redirect_to_login(request.get_full_path())
+        return HttpResponseForbidden()
+    try:
+        full_path = safe_join(settings.MEDIA_ROOT, path)
+    except SuspiciousFileOperation:
+        raise Http404('الملف غير موجود')
+    return serve_file(request, full_path)
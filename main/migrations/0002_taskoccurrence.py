@@ -0,0 +1,39 @@
+# Generated by Django 5.2.6 on 2026-10-18 13:15
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('director_dashboard', '0004_pointscalculatorsettings_pointsresult'),
+        ('main', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskOccurrence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('object_id', models.PositiveBigIntegerField()),
+                ('date', models.DateField(verbose_name='التاريخ')),
+                ('group_id', models.CharField(max_length=100)),
+                ('group_start', models.DateField()),
+                ('group_end', models.DateField()),
+                ('is_start', models.BooleanField(default=False)),
+                ('is_end', models.BooleanField(default=False)),
+                ('committee', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='task_occurrences', to='director_dashboard.committee')),
+                ('content_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='contenttypes.contenttype')),
+                ('program', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='task_occurrences', to='director_dashboard.program')),
+            ],
+            options={
+                'verbose_name': 'تكرار مهمة',
+                'verbose_name_plural': 'تكرارات المهام',
+                'ordering': ['date', 'group_start'],
+                'indexes': [models.Index(fields=['program', 'date'], name='task_occ_program_date_idx'), models.Index(fields=['committee', 'date'], name='task_occ_committee_date_idx')],
+                'constraints': [models.UniqueConstraint(fields=('content_type', 'object_id', 'date'), name='unique_task_occurrence_per_day')],
+            },
+        ),
+    ]
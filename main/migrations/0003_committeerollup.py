@@ -0,0 +1,34 @@
+# Generated by Django 5.2.6 on 2026-10-18 13:43
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('director_dashboard', '0005_exportjob'),
+        ('main', '0002_taskoccurrence'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CommitteeRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('cultural', 'اللجنة الثقافية'), ('sports', 'اللجنة الرياضية'), ('sharia', 'اللجنة الشرعية'), ('scientific', 'اللجنة العلمية'), ('operations', 'اللجنة التشغيلية')], max_length=20, verbose_name='نوع اللجنة')),
+                ('member_count', models.IntegerField(default=0, verbose_name='الأعضاء النشطون')),
+                ('task_count', models.IntegerField(default=0, verbose_name='المهام')),
+                ('completed_count', models.IntegerField(default=0, verbose_name='المهام المكتملة')),
+                ('pending_count', models.IntegerField(default=0, verbose_name='المهام قيد التنفيذ')),
+                ('overdue_count', models.IntegerField(default=0, verbose_name='المهام المتأخرة')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('committee', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rollups', to='director_dashboard.committee')),
+            ],
+            options={
+                'verbose_name': 'إحصائيات لجنة',
+                'verbose_name_plural': 'إحصائيات اللجان',
+                'constraints': [models.UniqueConstraint(fields=('committee', 'kind'), name='unique_committee_rollup_kind')],
+            },
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.6 on 2026-10-18 13:49
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('director_dashboard', '0006_query_indexes'),
+        ('main', '0003_committeerollup'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='scheduleevent',
+            index=models.Index(fields=['program', 'start_date'], name='schedevent_prog_start_idx'),
+        ),
+    ]
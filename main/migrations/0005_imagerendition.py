@@ -0,0 +1,32 @@
+# Generated by Django 5.2.6 on 2026-10-18 13:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0004_query_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImageRendition',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(max_length=255, verbose_name='الصورة الأصلية')),
+                ('content_hash', models.CharField(max_length=16, verbose_name='بصمة المحتوى')),
+                ('format', models.CharField(choices=[('webp', 'WebP'), ('jpeg', 'JPEG')], max_length=10, verbose_name='الصيغة')),
+                ('width', models.PositiveIntegerField(verbose_name='العرض')),
+                ('height', models.PositiveIntegerField(verbose_name='الارتفاع')),
+                ('name', models.CharField(max_length=255, verbose_name='الملف')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'نسخة مصغرة',
+                'verbose_name_plural': 'النسخ المصغرة',
+                'ordering': ['source', 'format', 'width'],
+                'constraints': [models.UniqueConstraint(fields=('source', 'format', 'width'), name='unique_image_rendition')],
+            },
+        ),
+    ]
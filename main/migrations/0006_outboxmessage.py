@@ -0,0 +1,38 @@
+# Generated by Django 5.2.6 on 2026-10-18 14:08
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0005_imagerendition'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OutboxMessage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('subject', models.CharField(max_length=255, verbose_name='الموضوع')),
+                ('body', models.TextField(verbose_name='النص')),
+                ('html_body', models.TextField(blank=True, verbose_name='نص HTML')),
+                ('from_email', models.CharField(blank=True, max_length=255, verbose_name='المرسل')),
+                ('recipients', models.JSONField(default=list, verbose_name='المستلمون')),
+                ('status', models.CharField(choices=[('pending', 'في الانتظار'), ('sending', 'جاري الإرسال'), ('sent', 'أُرسل'), ('failed', 'فشل')], default='pending', max_length=20, verbose_name='الحالة')),
+                ('attempts', models.PositiveSmallIntegerField(default=0, verbose_name='عدد المحاولات')),
+                ('next_attempt_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='المحاولة التالية')),
+                ('last_error', models.TextField(blank=True, verbose_name='آخر خطأ')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('locked_at', models.DateTimeField(blank=True, null=True)),
+                ('sent_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'رسالة بريد صادرة',
+                'verbose_name_plural': 'صندوق البريد الصادر',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['status', 'next_attempt_at'], name='outbox_queue_idx')],
+            },
+        ),
+    ]
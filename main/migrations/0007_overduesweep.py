@@ -0,0 +1,30 @@
+# Generated by Django 5.2.6 on 2026-10-18 14:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0006_outboxmessage'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OverdueSweep',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('started_at', models.DateTimeField(verbose_name='بداية التشغيل')),
+                ('finished_at', models.DateTimeField(verbose_name='نهاية التشغيل')),
+                ('swept_until', models.DateField(verbose_name='حتى تاريخ')),
+                ('marked', models.JSONField(default=dict, verbose_name='المهام المعلّمة')),
+                ('notified', models.JSONField(default=dict, verbose_name='المهام المبلّغ عنها')),
+            ],
+            options={
+                'verbose_name': 'فحص المهام المتأخرة',
+                'verbose_name_plural': 'فحوصات المهام المتأخرة',
+                'ordering': ['-started_at'],
+                'indexes': [models.Index(fields=['-swept_until'], name='overdue_sweep_until_idx')],
+            },
+        ),
+    ]
@@ -3,8 +3,10 @@ from accounts.models import User
 from director_dashboard.models import Program, Committee
 from django.utils import timezone
 
-from django.db.models.signals import post_save
-from django.dispatch import receiver
+from django.contrib.contenttypes.fields import GenericForeignKey
+from django.contrib.contenttypes.models import ContentType
+
+
 class ScheduleEvent(models.Model):
     """Combined model for tasks and activities in the schedule"""
     EVENT_TYPES = [
@@ -70,6 +72,9 @@ class ScheduleEvent(models.Model):
         ordering = ['start_date', 'start_time']
         verbose_name = 'حدث جدولة'
         verbose_name_plural = 'أحداث الجدولة'
+        indexes = [
+            models.Index(fields=['program', 'start_date'], name='schedevent_prog_start_idx'),
+        ]
 
     def __str__(self):
         return f"{self.title} - {self.start_date}"
@@ -108,4 +113,163 @@ class EventAttendance(models.Model):
         verbose_name_plural = 'حضور الأحداث'
 
     def __str__(self):
-        return f"{self.user} - {self.event.title}"
\ No newline at end of file
+        return f"{self.user} - {self.event.title}"
+
+class TaskOccurrence(models.Model):
+    """Pre-expanded calendar day of a task from any of the six task models"""
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
+    object_id = models.PositiveBigIntegerField()
+    task = GenericForeignKey('content_type', 'object_id')
+
+    program = models.ForeignKey(Program, on_delete=models.CASCADE, related_name='task_occurrences')
+    committee = models.ForeignKey(Committee, on_delete=models.CASCADE, null=True, blank=True,
+                                  related_name='task_occurrences')
+
+    date = models.DateField(verbose_name='التاريخ')
+    group_id = models.CharField(max_length=100)
+    group_start = models.DateField()
+    group_end = models.DateField()
+    is_start = models.BooleanField(default=False)
+    is_end = models.BooleanField(default=False)
+
+    class Meta:
+        ordering = ['date', 'group_start']
+        verbose_name = 'تكرار مهمة'
+        verbose_name_plural = 'تكرارات المهام'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['content_type', 'object_id', 'date'],
+                name='unique_task_occurrence_per_day'
+            )
+        ]
+        indexes = [
+            models.Index(fields=['program', 'date'], name='task_occ_program_date_idx'),
+            models.Index(fields=['committee', 'date'], name='task_occ_committee_date_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.group_id} - {self.date}"
+
+    @property
+    def span_days(self):
+        return (self.group_end - self.group_start).days + 1
+
+
+class CommitteeRollup(models.Model):
+    """Running task and member counters behind a committee dashboard, kept current by main.signals"""
+    KIND_CHOICES = [
+        ('cultural', 'اللجنة الثقافية'),
+        ('sports', 'اللجنة الرياضية'),
+        ('sharia', 'اللجنة الشرعية'),
+        ('scientific', 'اللجنة العلمية'),
+        ('operations', 'اللجنة التشغيلية'),
+    ]
+
+    committee = models.ForeignKey(Committee, on_delete=models.CASCADE, related_name='rollups')
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES, verbose_name='نوع اللجنة')
+
+    member_count = models.IntegerField(default=0, verbose_name='الأعضاء النشطون')
+    task_count = models.IntegerField(default=0, verbose_name='المهام')
+    completed_count = models.IntegerField(default=0, verbose_name='المهام المكتملة')
+    pending_count = models.IntegerField(default=0, verbose_name='المهام قيد التنفيذ')
+    overdue_count = models.IntegerField(default=0, verbose_name='المهام المتأخرة')
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = 'إحصائيات لجنة'
+        verbose_name_plural = 'إحصائيات اللجان'
+        constraints = [
+            models.UniqueConstraint(fields=['committee', 'kind'], name='unique_committee_rollup_kind')
+        ]
+
+    def __str__(self):
+        return f"{self.committee} - {self.get_kind_display()}"
+
+    @property
+    def completion_rate(self):
+        return (self.completed_count / self.task_count * 100) if self.task_count > 0 else 0
+
+
+class ImageRendition(models.Model):
+    """Resized copy of an uploaded picture, stored next to it and listed in srcset (see main.images)"""
+    FORMAT_CHOICES = [
+        ('webp', 'WebP'),
+        ('jpeg', 'JPEG'),
+    ]
+
+    source = models.CharField(max_length=255, verbose_name='الصورة الأصلية')
+    content_hash = models.CharField(max_length=16, verbose_name='بصمة المحتوى')
+    format = models.CharField(max_length=10, choices=FORMAT_CHOICES, verbose_name='الصيغة')
+    width = models.PositiveIntegerField(verbose_name='العرض')
+    height = models.PositiveIntegerField(verbose_name='الارتفاع')
+    name = models.CharField(max_length=255, verbose_name='الملف')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['source', 'format', 'width']
+        verbose_name = 'نسخة مصغرة'
+        verbose_name_plural = 'النسخ المصغرة'
+        constraints = [
+            models.UniqueConstraint(fields=['source', 'format', 'width'], name='unique_image_rendition')
+        ]
+
+    def __str__(self):
+        return f"{self.source} ({self.format} {self.width}w)"
+
+
+class OutboxMessage(models.Model):
+    """An email waiting for the run_outbox_worker process (see main.outbox)"""
+    STATUS_CHOICES = [
+        ('pending', 'في الانتظار'),
+        ('sending', 'جاري الإرسال'),
+        ('sent', 'أُرسل'),
+        ('failed', 'فشل'),
+    ]
+
+    subject = models.CharField(max_length=255, verbose_name='الموضوع')
+    body = models.TextField(verbose_name='النص')
+    html_body = models.TextField(blank=True, verbose_name='نص HTML')
+    from_email = models.CharField(max_length=255, blank=True, verbose_name='المرسل')
+    recipients = models.JSONField(default=list, verbose_name='المستلمون')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending', verbose_name='الحالة')
+    attempts = models.PositiveSmallIntegerField(default=0, verbose_name='عدد المحاولات')
+    # Failed deliveries wait until then before the next try
+    next_attempt_at = models.DateTimeField(default=timezone.now, verbose_name='المحاولة التالية')
+    last_error = models.TextField(blank=True, verbose_name='آخر خطأ')
+    created_at = models.DateTimeField(auto_now_add=True)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = 'رسالة بريد صادرة'
+        verbose_name_plural = 'صندوق البريد الصادر'
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='outbox_queue_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} - {self.get_status_display()}"
+
+
+class OverdueSweep(models.Model):
+    """One run of the sweep_overdue command that changed something (see main.overdue)"""
+    started_at = models.DateTimeField(verbose_name='بداية التشغيل')
+    finished_at = models.DateTimeField(verbose_name='نهاية التشغيل')
+    # Tasks due before this day were looked at; the next sweep notifies from here on
+    swept_until = models.DateField(verbose_name='حتى تاريخ')
+    # kind -> tasks switched to the overdue status / tasks notified as overdue
+    marked = models.JSONField(default=dict, verbose_name='المهام المعلّمة')
+    notified = models.JSONField(default=dict, verbose_name='المهام المبلّغ عنها')
+
+    class Meta:
+        ordering = ['-started_at']
+        verbose_name = 'فحص المهام المتأخرة'
+        verbose_name_plural = 'فحوصات المهام المتأخرة'
+        indexes = [
+            models.Index(fields=['-swept_until'], name='overdue_sweep_until_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.started_at:%Y-%m-%d %H:%M} - {self.swept_until}"
@@ -0,0 +1,101 @@
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import QuerySet
+
+from accounts.models import User
+from cultural_committee_dashboard.models import CulturalNotification
+from director_dashboard.models import DirectorAlert
+from operations_committee_dashboard.models import OperationsNotification
+from pm_dashboard.models import Notification
+from scientific_committee_dashboard.models import ScientificNotification
+from sharia_committee_dashboard.models import ShariaNotification
+from sports_committee_dashboard.models import SportsNotification
+
+
+# Rows per INSERT statement
+BATCH_SIZE = 500
+
+# Notification model read by each supervisor type's dashboard
+SUPERVISOR_NOTIFICATION_MODELS = {
+    'cultural': CulturalNotification,
+    'sports': SportsNotification,
+    'scientific': ScientificNotification,
+    'sharia': ShariaNotification,
+    'operations': OperationsNotification,
+}
+
+# The program manager's Notification names its committee field differently
+COMMITTEE_FIELDS = {Notification: 'related_committee'}
+
+
+def get_notification_model(role, supervisor_type):
+    """Notification model shown on the dashboard of a user, or None (directors read DirectorAlert)"""
+    if role == 'committee_supervisor':
+        return SUPERVISOR_NOTIFICATION_MODELS.get(supervisor_type)
+    if role == 'program_manager':
+        return Notification
+    return None
+
+
+def resolve_recipients(recipients, with_roles):
+    """
+    [(user_id, role, supervisor_type)] of recipients, each user once.
+    recipients: a User queryset, User instances or user ids (e.g. a values_list of member user ids).
+    Roles are only looked up when with_roles is set; it costs one query for ids.
+    """
+    if isinstance(recipients, QuerySet) and recipients.model is User and not recipients._fields:
+        if not with_roles:
+            return [(user_id, None, None) for user_id in recipients.values_list('id', flat=True).distinct()]
+        return list(recipients.values_list('id', 'role', 'supervisor_type').distinct())
+
+    rows = {}
+    missing = []
+    for recipient in recipients:
+        if recipient is None:
+            continue
+        if isinstance(recipient, User):
+            rows[recipient.pk] = (recipient.pk, recipient.role, recipient.supervisor_type)
+        elif recipient not in rows:
+            rows[recipient] = (recipient, None, None)
+            missing.append(recipient)
+
+    if with_roles and missing:
+        for row in User.objects.filter(id__in=missing).values_list('id', 'role', 'supervisor_type'):
+            rows[row[0]] = row
+    return list(rows.values())
+
+
+def dispatch(recipients, model=None, director_alert=None, batch_size=BATCH_SIZE, **fields):
+    """
+    Notify many users with a few bulk INSERTs in one transaction.
+
+    model: notification model every recipient gets; None sends each recipient
+           the model of their own dashboard (see get_notification_model).
+    director_alert: fields of a single DirectorAlert to add (directors share alerts).
+    fields: notification_type, title, message, committee, related_*...
+            `committee` is renamed for models that call it differently.
+
+    Returns the number of rows written per model name.
+    """
+    groups = defaultdict(list)
+    for user_id, role, supervisor_type in resolve_recipients(recipients, with_roles=model is None):
+        target = model or get_notification_model(role, supervisor_type)
+        if target is not None:
+            groups[target].append(user_id)
+
+    written = {}
+    with transaction.atomic():
+        for target, user_ids in groups.items():
+            values = dict(fields)
+            if 'committee' in values and target in COMMITTEE_FIELDS:
+                values[COMMITTEE_FIELDS[target]] = values.pop('committee')
+            target.objects.bulk_create(
+                [target(user_id=user_id, **values) for user_id in user_ids], batch_size=batch_size
+            )
+            written[target.__name__] = len(user_ids)
+
+        if director_alert is not None:
+            DirectorAlert.objects.create(**director_alert)
+            written[DirectorAlert.__name__] = 1
+    return written
@@ -0,0 +1,109 @@
+from datetime import timedelta
+
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+
+from director_dashboard.models import Program
+from pm_dashboard.models import Task
+from cultural_committee_dashboard.models import CulturalTask
+from operations_committee_dashboard.models import OperationsTask
+from scientific_committee_dashboard.models import ScientificTask
+from sharia_committee_dashboard.models import ShariaTask
+from sports_committee_dashboard.models import SportsTask
+
+from .models import TaskOccurrence
+
+
+# Calendar type key -> task model
+TASK_OCCURRENCE_MODELS = {
+    'regular_task': Task,
+    'cultural_task': CulturalTask,
+    'operations_task': OperationsTask,
+    'scientific_task': ScientificTask,
+    'sharia_task': ShariaTask,
+    'sports_task': SportsTask,
+}
+
+
+def get_task_type(task):
+    """Return the calendar type key ('cultural_task', ...) of a task instance"""
+    for task_type, model in TASK_OCCURRENCE_MODELS.items():
+        if isinstance(task, model):
+            return task_type
+    return None
+
+
+def get_task_program_id(task):
+    """Program tasks carry their program, committee tasks inherit it from the committee"""
+    if isinstance(task, Task):
+        return task.program_id
+    return task.committee.program_id
+
+
+def occurrence_horizon(due_date, recurrence_end_date, program_end):
+    """Last day of a recurring task: its own end date, else the end of its program"""
+    if recurrence_end_date:
+        return recurrence_end_date
+    return max(program_end or due_date, due_date)
+
+
+def get_occurrence_horizon(task, program_id):
+    """
+    Last day to materialize for a task.
+    Open-ended recurring tasks are expanded until the end of their program.
+    """
+    if not task.is_recurring:
+        return task.due_date
+    if task.recurrence_end_date:
+        return task.recurrence_end_date
+    program_end = Program.objects.filter(id=program_id).values_list('end_date', flat=True).first()
+    return occurrence_horizon(task.due_date, None, program_end)
+
+
+def build_task_occurrences(task):
+    """Build (unsaved) TaskOccurrence rows for every day the task occurs on"""
+    task_type = get_task_type(task)
+    content_type = ContentType.objects.get_for_model(task)
+    program_id = get_task_program_id(task)
+
+    if task.is_recurring:
+        groups = task.get_consecutive_day_groups(None, get_occurrence_horizon(task, program_id))
+    else:
+        # Non-recurring tasks are shown on their due date
+        groups = [(task.due_date, task.due_date)]
+
+    rows = []
+    for group_idx, (group_start, group_end) in enumerate(groups):
+        if task.is_recurring:
+            group_id = f"{task_type}_{task.pk}_group_{group_idx}"
+        else:
+            group_id = f"{task_type}_{task.pk}_single"
+
+        for offset in range((group_end - group_start).days + 1):
+            current = group_start + timedelta(days=offset)
+            rows.append(TaskOccurrence(
+                content_type=content_type,
+                object_id=task.pk,
+                program_id=program_id,
+                committee_id=task.committee_id,
+                date=current,
+                group_id=group_id,
+                group_start=group_start,
+                group_end=group_end,
+                is_start=current == group_start,
+                is_end=current == group_end,
+            ))
+    return rows
+
+
+def sync_task_occurrences(task):
+    """Replace the stored occurrences of a task with freshly computed ones"""
+    content_type = ContentType.objects.get_for_model(task)
+    with transaction.atomic():
+        TaskOccurrence.objects.filter(content_type=content_type, object_id=task.pk).delete()
+        TaskOccurrence.objects.bulk_create(build_task_occurrences(task), batch_size=500)
+
+
+def delete_task_occurrences(task):
+    content_type = ContentType.objects.get_for_model(task)
+    TaskOccurrence.objects.filter(content_type=content_type, object_id=task.pk).delete()
@@ -0,0 +1,148 @@
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db.models import F
+from django.utils import timezone
+
+from .models import OutboxMessage
+
+
+logger = logging.getLogger(__name__)
+
+# A message still 'sending' after this long belongs to a worker that died
+STALE_MINUTES = 10
+
+# Retry delays double from BACKOFF_BASE seconds up to BACKOFF_MAX
+BACKOFF_BASE = 60
+BACKOFF_MAX = 60 * 60
+
+# Messages claimed (and sent over one connection) per round
+BATCH_SIZE = 50
+
+
+def get_max_attempts():
+    return getattr(settings, 'OUTBOX_MAX_ATTEMPTS', 6)
+
+
+def get_backoff(attempts):
+    """Seconds to wait after the given number of failed attempts"""
+    return min(BACKOFF_BASE * 2 ** max(attempts - 1, 0), BACKOFF_MAX)
+
+
+def enqueue_email(subject, body, recipients, html_body='', from_email=None):
+    """
+    Queue an email for run_outbox_worker instead of talking to the mail server
+    inside the request. Returns the OutboxMessage.
+    """
+    if isinstance(recipients, str):
+        recipients = [recipients]
+    return OutboxMessage.objects.create(
+        subject=subject[:255],
+        body=body,
+        html_body=html_body or '',
+        from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+        recipients=list(recipients),
+    )
+
+
+def claim_message(message_id, now):
+    """
+    Mark one message as being sent by this worker. The UPDATE only matches while
+    the message is still pending, so of two workers racing for it exactly one wins.
+    """
+    return bool(OutboxMessage.objects.filter(id=message_id, status='pending').update(
+        status='sending', locked_at=now, attempts=F('attempts') + 1
+    ))
+
+
+def claim_messages(limit=BATCH_SIZE):
+    """Take due messages, oldest first, skipping those another worker claimed meanwhile"""
+    now = timezone.now()
+    due = OutboxMessage.objects.filter(status='pending', next_attempt_at__lte=now).order_by('next_attempt_at', 'id')
+    claimed = [message_id for message_id in due.values_list('id', flat=True)[:limit] if claim_message(message_id, now)]
+    return list(OutboxMessage.objects.filter(id__in=claimed).order_by('next_attempt_at', 'id'))
+
+
+def build_email(message, connection):
+    email = EmailMultiAlternatives(
+        subject=message.subject,
+        body=message.body,
+        from_email=message.from_email or settings.DEFAULT_FROM_EMAIL,
+        to=message.recipients,
+        connection=connection,
+    )
+    if message.html_body:
+        email.attach_alternative(message.html_body, 'text/html')
+    return email
+
+
+def mark_failed(message, error):
+    """Schedule another try with backoff, or give up after get_max_attempts()"""
+    now = timezone.now()
+    if message.attempts >= get_max_attempts():
+        OutboxMessage.objects.filter(id=message.id).update(
+            status='failed', last_error=error, locked_at=None
+        )
+        return False
+    OutboxMessage.objects.filter(id=message.id).update(
+        status='pending', last_error=error, locked_at=None,
+        next_attempt_at=now + timedelta(seconds=get_backoff(message.attempts)),
+    )
+    return True
+
+
+def deliver_messages(messages, connection=None):
+    """
+    Send claimed messages over one mail server connection.
+    A failure closes the connection (the next message opens a fresh one) and
+    reschedules only that message. Returns (sent, retried, failed) counts.
+    """
+    connection = connection or get_connection()
+    sent = retried = failed = 0
+    try:
+        for message in messages:
+            try:
+                build_email(message, connection).send()
+            except Exception as e:
+                logger.warning('Outbox message %s failed (attempt %s): %s', message.pk, message.attempts, e)
+                connection.close()
+                if mark_failed(message, str(e)):
+                    retried += 1
+                else:
+                    failed += 1
+            else:
+                OutboxMessage.objects.filter(id=message.id).update(
+                    status='sent', sent_at=timezone.now(), locked_at=None, last_error=''
+                )
+                sent += 1
+    finally:
+        connection.close()
+    return sent, retried, failed
+
+
+def deliver_pending(limit=BATCH_SIZE, connection=None):
+    """Claim and send one batch of due messages"""
+    messages = claim_messages(limit)
+    if not messages:
+        return 0, 0, 0
+    return deliver_messages(messages, connection)
+
+
+def requeue_stale_messages(minutes=STALE_MINUTES):
+    """Give messages of a crashed worker back to the queue (or fail them once out of attempts)"""
+    stale = OutboxMessage.objects.filter(status='sending', locked_at__lt=timezone.now() - timedelta(minutes=minutes))
+    failed = stale.filter(attempts__gte=get_max_attempts()).update(
+        status='failed', last_error='توقف الإرسال عدة مرات', locked_at=None
+    )
+    requeued = stale.filter(attempts__lt=get_max_attempts()).update(status='pending', locked_at=None)
+    return requeued, failed
+
+
+def purge_sent_messages(days):
+    """Delete sent messages older than `days`; failed ones are kept for inspection"""
+    deleted, _ = OutboxMessage.objects.filter(
+        status='sent', sent_at__lt=timezone.now() - timedelta(days=days)
+    ).delete()
+    return deleted
@@ -0,0 +1,151 @@
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+from cultural_committee_dashboard.models import CulturalNotification, CulturalTask
+from operations_committee_dashboard.models import OperationsNotification, OperationsTask
+from pm_dashboard.models import Notification, Task
+from scientific_committee_dashboard.models import ScientificNotification, ScientificTask
+from sharia_committee_dashboard.models import ShariaNotification, ShariaTask
+from sports_committee_dashboard.models import SportsNotification, SportsTask
+
+from .calendar_cache import invalidate_program_calendar
+from .models import OverdueSweep
+from .notifications import BATCH_SIZE
+from .rollups import ROLLUP_SOURCES, refresh_committee_rollup
+
+
+NOTIFICATION_TITLE = 'مهمة متأخرة'
+
+
+class OverdueSource:
+    """
+    A task model and how it goes overdue.
+    open_statuses: statuses of tasks still being worked on; past their due date they are late.
+    overdue_status: status late tasks are switched to, for models that have one
+                    (the others only show it from the due date, see their is_overdue).
+    recipient: path of the user told about a late task.
+    """
+
+    def __init__(self, task_model, notification_model, open_statuses, recipient,
+                 overdue_status=None, program_path='committee__program_id'):
+        self.task_model = task_model
+        self.notification_model = notification_model
+        self.open_statuses = open_statuses
+        self.recipient = recipient
+        self.overdue_status = overdue_status
+        self.program_path = program_path
+
+    @property
+    def late_statuses(self):
+        if self.overdue_status:
+            return self.open_statuses + (self.overdue_status,)
+        return self.open_statuses
+
+    def build_notification(self, task_id, title, due_date, committee_id, user_id):
+        committee_field = 'related_committee_id' if self.notification_model is Notification else 'committee_id'
+        return self.notification_model(
+            user_id=user_id,
+            notification_type='task_overdue',
+            title=NOTIFICATION_TITLE,
+            message=f'تجاوزت المهمة "{title}" موعدها النهائي ({due_date:%Y-%m-%d}) ولم تكتمل بعد',
+            related_task_id=task_id,
+            **{committee_field: committee_id},
+        )
+
+
+# Committee tasks go to the committee supervisor, program tasks to the program manager
+OVERDUE_SOURCES = {
+    'cultural': OverdueSource(CulturalTask, CulturalNotification, ('pending', 'in_progress'),
+                              recipient='committee__supervisor_id'),
+    'sports': OverdueSource(SportsTask, SportsNotification, ('pending', 'in_progress'),
+                            recipient='committee__supervisor_id'),
+    'sharia': OverdueSource(ShariaTask, ShariaNotification, ('pending', 'in_progress'),
+                            recipient='committee__supervisor_id'),
+    'scientific': OverdueSource(ScientificTask, ScientificNotification, ('pending', 'in_progress'),
+                                recipient='committee__supervisor_id'),
+    'operations': OverdueSource(OperationsTask, OperationsNotification, ('not_started', 'in_progress'),
+                                recipient='committee__supervisor_id', overdue_status='overdue'),
+    'program': OverdueSource(Task, Notification, ('pending',), recipient='program__manager_id',
+                             overdue_status='overdue', program_path='program_id'),
+}
+
+
+def mark_overdue(kind, today):
+    """
+    Switch every open task of this kind due before today to the overdue status in one UPDATE,
+    then drop the cached calendars and rollups it touched (bulk updates skip post_save).
+    Returns the number of tasks changed.
+    """
+    source = OVERDUE_SOURCES[kind]
+    if not source.overdue_status:
+        return 0
+    late = source.task_model.objects.filter(status__in=source.open_statuses, due_date__lt=today)
+    with transaction.atomic():
+        touched = set(late.order_by().values_list('committee_id', source.program_path).distinct())
+        if not touched:
+            return 0
+        updated = late.update(status=source.overdue_status, updated_at=timezone.now())
+
+    for program_id in {program_id for _, program_id in touched}:
+        invalidate_program_calendar(program_id)
+    if kind in ROLLUP_SOURCES:
+        for committee_id in {committee_id for committee_id, _ in touched}:
+            refresh_committee_rollup(committee_id, kind)
+    return updated
+
+
+def notify_overdue(kind, since, today):
+    """
+    Tell the supervisor (or program manager) about every unfinished task of this kind
+    that went overdue between since and today, i.e. was due on one of those days.
+    One bulk INSERT per BATCH_SIZE notifications; returns the number of tasks reported.
+    """
+    source = OVERDUE_SOURCES[kind]
+    rows = source.task_model.objects.filter(
+        status__in=source.late_statuses, due_date__gte=since, due_date__lt=today
+    ).order_by().values_list('id', 'title', 'due_date', 'committee_id', source.recipient)
+
+    notifications = [source.build_notification(*row) for row in rows if row[-1] is not None]
+    source.notification_model.objects.bulk_create(notifications, batch_size=BATCH_SIZE)
+    return len(notifications)
+
+
+def get_last_swept_until():
+    return OverdueSweep.objects.order_by('-swept_until').values_list('swept_until', flat=True).first()
+
+
+def sweep_overdue(today=None):
+    """
+    Mark and report the tasks that went overdue since the last sweep, for every task model.
+    Tasks are only reported once: each sweep starts where the previous one stopped
+    (the first one only reports the last day). Runs that change nothing are not recorded,
+    except the first one of a day. Returns the OverdueSweep row, or None.
+    """
+    started_at = timezone.now()
+    today = today or timezone.localdate()
+    since = get_last_swept_until() or today - timedelta(days=1)
+
+    marked = {}
+    for kind in OVERDUE_SOURCES:
+        count = mark_overdue(kind, today)
+        if count:
+            marked[kind] = count
+
+    if not marked and since >= today:
+        return None
+
+    # The notifications and the new starting point are saved together, so
+    # a sweep that fails halfway is simply done again
+    notified = {}
+    with transaction.atomic():
+        if since < today:
+            for kind in OVERDUE_SOURCES:
+                count = notify_overdue(kind, since, today)
+                if count:
+                    notified[kind] = count
+        return OverdueSweep.objects.create(
+            started_at=started_at, finished_at=timezone.now(), swept_until=max(since, today),
+            marked=marked, notified=notified,
+        )
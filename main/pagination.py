@@ -0,0 +1,59 @@
+import base64
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+
+# Rows per page of a keyset-paginated list
+PAGE_SIZE = 20
+
+
+def encode_cursor(values):
+    values = [value.isoformat() if hasattr(value, 'isoformat') else value for value in values]
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor, model, names):
+    """Values of the ordering fields stored in a cursor, or None when it is missing or malformed"""
+    if not cursor:
+        return None
+    try:
+        raw = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        if not isinstance(raw, list) or len(raw) != len(names):
+            return None
+        return [model._meta.get_field(name).to_python(value) for name, value in zip(names, raw)]
+    except (ValueError, TypeError, UnicodeDecodeError, ValidationError):
+        return None
+
+
+def seek_filter(ordering, values):
+    """Rows strictly after `values` in `ordering`: (a > x) or (a = x and b > y) or ..."""
+    condition = Q()
+    for i, field in enumerate(ordering):
+        name = field.lstrip('-')
+        lookup = 'lt' if field.startswith('-') else 'gt'
+        equal = {prior.lstrip('-'): value for prior, value in zip(ordering[:i], values)}
+        condition |= Q(**equal, **{f'{name}__{lookup}': values[i]})
+    return condition
+
+
+def keyset_page(queryset, ordering, cursor=None, limit=PAGE_SIZE):
+    """
+    One page of queryset in `ordering` and the cursor of the next page (None on the last).
+    The last ordering field must be unique (usually 'id') and none may be NULL.
+    Pages seek past the previous one instead of skipping rows with OFFSET,
+    so a late page costs the same as the first.
+    """
+    names = [field.lstrip('-') for field in ordering]
+    queryset = queryset.order_by(*ordering)
+    values = decode_cursor(cursor, queryset.model, names)
+    if values is not None:
+        queryset = queryset.filter(seek_filter(ordering, values))
+
+    page = list(queryset[:limit + 1])
+    next_cursor = None
+    if len(page) > limit:
+        page = page[:limit]
+        next_cursor = encode_cursor([getattr(page[-1], name) for name in names])
+    return page, next_cursor
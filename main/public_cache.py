@@ -0,0 +1,78 @@
+import hashlib
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+
+from accounts.models import User
+from director_dashboard.models import Committee, Program, Student
+
+from .shared_cache import bump_version, cap_timeout, get_version
+
+
+VERSION_KEY = 'public:version'
+COUNTERS_KEY = 'public:counters'
+
+# Fragments are dropped by bumping the version, so they can live long
+FRAGMENT_CACHE_TIMEOUT = 24 * 60 * 60
+
+
+def get_public_cache_timeout():
+    return cap_timeout(getattr(settings, 'PUBLIC_CACHE_TIMEOUT', 300))
+
+
+def get_fragment_cache_timeout():
+    return cap_timeout(FRAGMENT_CACHE_TIMEOUT)
+
+
+def get_public_version():
+    """
+    Generation of the cached public pages; album and photo changes bump it.
+    It lives in the shared cache, so a publish on one worker drops the pages of all of them.
+    """
+    return get_version(VERSION_KEY)
+
+
+def invalidate_public_pages():
+    bump_version(VERSION_KEY)
+
+
+def get_public_counters():
+    """Landing page totals; they only expire, a few minutes of lag is fine there"""
+    counters = cache.get(COUNTERS_KEY)
+    if counters is None:
+        counters = {
+            'total_programs': Program.objects.count(),
+            'total_committees': Committee.objects.count(),
+            'total_students': Student.objects.count(),
+            'total_users': User.objects.count(),
+        }
+        cache.set(COUNTERS_KEY, counters, get_public_cache_timeout())
+    return counters
+
+
+def get_page_cache_key(request):
+    path = hashlib.md5(request.get_full_path().encode('utf-8')).hexdigest()
+    return f'public:page:v{get_public_version()}:{path}'
+
+
+def cache_public_page(view):
+    """
+    Serve anonymous GET requests of a public page from the cache.
+    Signed-in users (who may see their own menu) always get a fresh page.
+    """
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if request.method != 'GET' or request.user.is_authenticated:
+            return view(request, *args, **kwargs)
+
+        key = get_page_cache_key(request)
+        response = cache.get(key)
+        if response is None:
+            response = view(request, *args, **kwargs)
+            if response.status_code == 200 and not response.streaming:
+                if hasattr(response, 'render'):
+                    response.render()
+                cache.set(key, response, get_public_cache_timeout())
+        return response
+    return wrapper
@@ -0,0 +1,163 @@
+from datetime import timedelta
+
+
+# Calendar weekdays (as stored in recurrence_days): Sunday=0, Monday=1, ..., Saturday=6
+# Python weekdays: Monday=0, Tuesday=1, ..., Sunday=6
+CALENDAR_TO_PYTHON_WEEKDAY = {
+    0: 6,  # Sunday
+    1: 0,  # Monday
+    2: 1,  # Tuesday
+    3: 2,  # Wednesday
+    4: 3,  # Thursday
+    5: 4,  # Friday
+    6: 5,  # Saturday
+}
+
+ONE_DAY = timedelta(days=1)
+ONE_WEEK = timedelta(days=7)
+
+
+def python_weekdays(recurrence_days):
+    """
+    Convert stored calendar weekdays to a set of Python weekdays.
+    Unknown values are ignored, like the original per-model loops did.
+    """
+    return {
+        CALENDAR_TO_PYTHON_WEEKDAY[day]
+        for day in (recurrence_days or [])
+        if day in CALENDAR_TO_PYTHON_WEEKDAY
+    }
+
+
+def weekday_runs(weekdays):
+    """
+    Split a set of Python weekdays into cyclic runs of consecutive days.
+    Returns list of tuples: [(first_weekday, length), ...] sorted by first_weekday.
+    A run may wrap around the end of the week (e.g. Sat, Sun, Mon).
+    """
+    if len(weekdays) == 7:
+        return [(0, 7)]
+
+    runs = []
+    for day in sorted(weekdays):
+        if (day - 1) % 7 in weekdays:
+            continue  # Not the beginning of a run
+        length = 1
+        while (day + length) % 7 in weekdays:
+            length += 1
+        runs.append((day, length))
+    return runs
+
+
+def first_on_or_after(date, weekday):
+    """Return the first date on or after `date` that falls on `weekday`."""
+    return date + timedelta(days=(weekday - date.weekday()) % 7)
+
+
+def occurrence_window(task_start, recurrence_end_date, due_date, start_date=None, end_date=None):
+    """
+    Clip a requested window to the task's own recurrence bounds.
+    Returns tuple: (first, last) - the window is empty when first > last.
+    """
+    first = start_date or task_start
+    last = end_date or recurrence_end_date or due_date
+
+    # Don't go before the task starts
+    if first < task_start:
+        first = task_start
+
+    # Don't go past recurrence_end_date if set
+    if recurrence_end_date and last > recurrence_end_date:
+        last = recurrence_end_date
+
+    return first, last
+
+
+def occurrence_groups(pattern, task_start, first, last, recurrence_days=None):
+    """
+    Compute runs of consecutive occurrence days inside [first, last] without
+    walking the window day by day.
+    Returns list of tuples: [(group_start, group_end), ...] sorted by date.
+    """
+    if first > last:
+        return []
+
+    if pattern == 'daily':
+        return [(first, last)]
+
+    if pattern == 'weekly':
+        # Weekly tasks repeat on the weekday the task started on
+        current = first_on_or_after(first, task_start.weekday())
+        count = (last - current).days // 7 + 1 if current <= last else 0
+        return [(current + ONE_WEEK * i, current + ONE_WEEK * i) for i in range(count)]
+
+    if pattern == 'custom':
+        weekdays = python_weekdays(recurrence_days)
+        if not weekdays:
+            return []
+        if len(weekdays) == 7:
+            return [(first, last)]
+
+        runs = weekday_runs(weekdays)
+        groups = []
+        # Start one week early so a run that began before the window
+        # (and wraps into it) is still picked up, then clipped.
+        week_start = first - timedelta(days=first.weekday()) - ONE_WEEK
+        while week_start <= last:
+            for weekday, length in runs:
+                group_start = week_start + timedelta(days=weekday)
+                if group_start > last:
+                    break
+                group_end = group_start + timedelta(days=length - 1)
+                if group_end < first:
+                    continue
+                groups.append((max(group_start, first), min(group_end, last)))
+            week_start += ONE_WEEK
+        return groups
+
+    return []
+
+
+def expand_groups(groups):
+    """Expand [(group_start, group_end), ...] into a flat list of dates."""
+    dates = []
+    for group_start, group_end in groups:
+        dates.extend(group_start + timedelta(days=i) for i in range((group_end - group_start).days + 1))
+    return dates
+
+
+class RecurrenceMixin:
+    """
+    Shared recurrence logic for every committee task model.
+    Expects the model to define: start_date, due_date, is_recurring,
+    recurrence_pattern, recurrence_days and recurrence_end_date.
+    """
+
+    @property
+    def occurrence_start(self):
+        return self.start_date or self.due_date
+
+    def get_consecutive_day_groups(self, start_date=None, end_date=None):
+        """
+        Group consecutive days together for display as single badge.
+        Returns list of tuples: [(start_date, end_date), ...]
+        """
+        if not self.is_recurring:
+            single = self.occurrence_start
+            return [(single, single)]
+
+        first, last = occurrence_window(
+            self.occurrence_start, self.recurrence_end_date, self.due_date, start_date, end_date
+        )
+        return occurrence_groups(
+            self.recurrence_pattern, self.occurrence_start, first, last, self.recurrence_days
+        )
+
+    def get_occurrence_dates(self, start_date=None, end_date=None):
+        """
+        Get all dates when this task occurs within the given range.
+        Returns a list of date objects.
+        """
+        if not self.is_recurring:
+            return [self.occurrence_start]
+        return expand_groups(self.get_consecutive_day_groups(start_date, end_date))
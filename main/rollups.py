@@ -0,0 +1,153 @@
+from collections import defaultdict
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q
+from django.utils import timezone
+
+from cultural_committee_dashboard.models import CulturalTask, CommitteeMember
+from operations_committee_dashboard.models import OperationsTask, OperationsTeamMember
+from scientific_committee_dashboard.models import ScientificTask, ScientificMember
+from sharia_committee_dashboard.models import ShariaTask, ShariaMember
+from sports_committee_dashboard.models import SportsTask, SportsMember
+
+from .models import CommitteeRollup
+
+
+COUNTER_FIELDS = ('member_count', 'task_count', 'completed_count', 'pending_count', 'overdue_count')
+
+
+class RollupSource:
+    """Task and member models of one committee dashboard, and which statuses it counts as what"""
+
+    def __init__(self, task_model, member_model, pending, overdue=()):
+        self.task_model = task_model
+        self.member_model = member_model
+        self.pending = pending
+        self.overdue = overdue
+
+    def status_field(self, status):
+        """Counter a task with this status adds to, besides task_count"""
+        if status == 'completed':
+            return 'completed_count'
+        if status in self.pending:
+            return 'pending_count'
+        if status in self.overdue:
+            return 'overdue_count'
+        return None
+
+
+# CommitteeRollup.kind (the supervisor type of the dashboard) -> its models
+ROLLUP_SOURCES = {
+    'cultural': RollupSource(CulturalTask, CommitteeMember, pending=('pending',)),
+    'sports': RollupSource(SportsTask, SportsMember, pending=('pending',)),
+    'sharia': RollupSource(ShariaTask, ShariaMember, pending=('pending',)),
+    'scientific': RollupSource(ScientificTask, ScientificMember, pending=('pending',)),
+    'operations': RollupSource(OperationsTask, OperationsTeamMember,
+                               pending=('not_started', 'in_progress'), overdue=('overdue',)),
+}
+
+ROLLUP_KINDS_BY_TASK_MODEL = {source.task_model: kind for kind, source in ROLLUP_SOURCES.items()}
+ROLLUP_KINDS_BY_MEMBER_MODEL = {source.member_model: kind for kind, source in ROLLUP_SOURCES.items()}
+
+
+def compute_rollups(kind, committee_ids=None):
+    """
+    Counters of every committee (or of committee_ids) from scratch:
+    {committee_id: {field: value}}, one grouped query per model.
+    Committees without any task or member are left out.
+    """
+    source = ROLLUP_SOURCES[kind]
+    counters = defaultdict(lambda: dict.fromkeys(COUNTER_FIELDS, 0))
+
+    members = source.member_model.objects.filter(is_active=True)
+    tasks = source.task_model.objects.all()
+    if committee_ids is not None:
+        members = members.filter(committee__in=committee_ids)
+        tasks = tasks.filter(committee__in=committee_ids)
+
+    for committee_id, count in members.order_by().values('committee').annotate(
+        count=Count('id')
+    ).values_list('committee', 'count'):
+        counters[committee_id]['member_count'] = count
+
+    task_counts = {
+        'task_count': Count('id'),
+        'completed_count': Count('id', filter=Q(status='completed')),
+        'pending_count': Count('id', filter=Q(status__in=source.pending)),
+    }
+    if source.overdue:
+        task_counts['overdue_count'] = Count('id', filter=Q(status__in=source.overdue))
+    for row in tasks.order_by().values('committee').annotate(**task_counts):
+        committee_id = row.pop('committee')
+        counters[committee_id].update(row)
+
+    return dict(counters)
+
+
+def refresh_committee_rollup(committee_id, kind):
+    """Recompute one committee's counters and store them"""
+    values = compute_rollups(kind, [committee_id]).get(committee_id, dict.fromkeys(COUNTER_FIELDS, 0))
+    try:
+        with transaction.atomic():
+            rollup, _ = CommitteeRollup.objects.update_or_create(
+                committee_id=committee_id, kind=kind, defaults=values
+            )
+    except IntegrityError:
+        # Another request created the row in the meantime
+        rollup = CommitteeRollup.objects.get(committee_id=committee_id, kind=kind)
+    return rollup
+
+
+def get_committee_rollup(committee, kind):
+    """The dashboard counters of a committee: a single row lookup once the row exists"""
+    rollup = CommitteeRollup.objects.filter(committee=committee, kind=kind).first()
+    if rollup is None:
+        rollup = refresh_committee_rollup(committee.pk, kind)
+    return rollup
+
+
+def apply_rollup_deltas(kind, committee_id, deltas, create=True):
+    """
+    Add deltas ({field: +n/-n}) to a committee's counters in place.
+    A missing row is built from scratch instead (it then already includes the
+    change), unless create=False - deletions may be part of deleting the committee.
+    """
+    deltas = {field: delta for field, delta in deltas.items() if delta}
+    if committee_id is None or not deltas:
+        return
+    updated = CommitteeRollup.objects.filter(committee_id=committee_id, kind=kind).update(
+        updated_at=timezone.now(),
+        **{field: F(field) + delta for field, delta in deltas.items()}
+    )
+    if not updated and create:
+        refresh_committee_rollup(committee_id, kind)
+
+
+def task_deltas(kind, state, sign):
+    """Counter changes of adding (sign=1) or removing (sign=-1) a task in state (committee_id, status)"""
+    committee_id, status = state
+    deltas = {'task_count': sign}
+    field = ROLLUP_SOURCES[kind].status_field(status)
+    if field:
+        deltas[field] = sign
+    return committee_id, deltas
+
+
+def member_deltas(kind, state, sign):
+    """Counter changes of adding/removing a member in state (committee_id, is_active)"""
+    committee_id, is_active = state
+    return committee_id, {'member_count': sign if is_active else 0}
+
+
+def apply_state_change(kind, old_state, new_state, to_deltas, create=True):
+    """Move one row's contribution from old_state to new_state (either may be None)"""
+    if old_state == new_state:
+        return
+    changes = defaultdict(lambda: defaultdict(int))
+    for state, sign in ((old_state, -1), (new_state, 1)):
+        if state is not None:
+            committee_id, deltas = to_deltas(kind, state, sign)
+            for field, delta in deltas.items():
+                changes[committee_id][field] += delta
+    for committee_id, deltas in changes.items():
+        apply_rollup_deltas(kind, committee_id, deltas, create=create)
@@ -0,0 +1,149 @@
+from functools import wraps
+
+from django.conf import settings
+from django.contrib import messages
+from django.core.cache import cache
+from django.http import Http404
+from django.shortcuts import redirect
+from django.utils.functional import SimpleLazyObject
+
+from director_dashboard.models import Committee, Program, Student
+
+from .shared_cache import bump_version, get_version, is_cache_shared
+
+
+VERSION_KEY = 'scope:version'
+
+NO_PERMISSION_MESSAGE = 'ليس لديك صلاحية للوصول إلى هذه الصفحة'
+NO_COMMITTEE_MESSAGE = 'لم يتم تعيين لجنة لك بعد'
+NO_PROGRAM_MESSAGE = 'لم يتم تعيين برنامج لك بعد'
+
+
+def get_scope_cache_timeout():
+    return getattr(settings, 'SCOPE_CACHE_TIMEOUT', 300)
+
+
+def get_scope_version():
+    """
+    Generation of every cached scope: programs and committees change rarely and
+    editing one may move several users, so any change drops all scopes at once.
+    """
+    return get_version(VERSION_KEY)
+
+
+def invalidate_all_scopes():
+    bump_version(VERSION_KEY)
+
+
+def get_scope_cache_key(user_id):
+    return f'scope:{user_id}:v{get_scope_version()}'
+
+
+def invalidate_user_scope(user_id):
+    cache.delete(get_scope_cache_key(user_id))
+
+
+class UserScope:
+    """The program and committee a user works in (either may be None, e.g. for directors)"""
+
+    def __init__(self, program=None, committee=None):
+        self.program = program
+        self.committee = committee
+
+    @classmethod
+    def resolve(cls, user):
+        if user.role == 'program_manager':
+            return cls(program=Program.objects.filter(manager=user).order_by('id').first())
+        if user.role == 'committee_supervisor':
+            committee = Committee.objects.select_related('program').filter(supervisor=user).order_by('id').first()
+            return cls(program=committee.program if committee else None, committee=committee)
+        if user.role == 'student':
+            student = Student.objects.select_related('program', 'committee').filter(user=user).first()
+            if student:
+                return cls(program=student.program, committee=student.committee)
+        return cls()
+
+
+def get_user_scope(user):
+    """
+    Scope of a user: memoized on the user object, backed by a short-lived cache entry.
+    It decides what the user may see, so it is only cached when the cache is shared by
+    every process: a per-process cache would keep granting a reassigned user their old
+    program or committee in the processes that didn't see the change.
+    """
+    if not user.is_authenticated:
+        return UserScope()
+    scope = getattr(user, '_scope', None)
+    if scope is None:
+        if is_cache_shared():
+            key = get_scope_cache_key(user.pk)
+            scope = cache.get(key)
+            if scope is None:
+                scope = UserScope.resolve(user)
+                cache.set(key, scope, get_scope_cache_timeout())
+        else:
+            scope = UserScope.resolve(user)
+        user._scope = scope
+    return scope
+
+
+def get_request_scope(request):
+    scope = getattr(request, 'scope', None)
+    return scope if scope is not None else get_user_scope(request.user)
+
+
+class ScopeMiddleware:
+    """Adds request.scope, resolved on first use and then reused for the rest of the request"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.scope = SimpleLazyObject(lambda: get_user_scope(request.user))
+        return self.get_response(request)
+
+
+def committee_required(supervisor_type):
+    """
+    Only lets the supervisor of a committee of this type in; the view finds the
+    committee in request.committee (and its program in request.program).
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            user = request.user
+            if user.role != 'committee_supervisor' or user.supervisor_type != supervisor_type:
+                messages.error(request, NO_PERMISSION_MESSAGE)
+                return redirect('home')
+            committee = get_request_scope(request).committee
+            if committee is None:
+                messages.error(request, NO_COMMITTEE_MESSAGE)
+                return redirect('home')
+            request.committee = committee
+            request.program = committee.program
+            return view(request, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def program_required(view):
+    """Only lets program managers with a program in; the view finds it in request.program"""
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if request.user.role != 'program_manager':
+            messages.error(request, NO_PERMISSION_MESSAGE)
+            return redirect('home')
+        program = get_request_scope(request).program
+        if program is None:
+            messages.error(request, NO_PROGRAM_MESSAGE)
+            return redirect('home')
+        request.program = program
+        return view(request, *args, **kwargs)
+    return wrapper
+
+
+def get_supervised_committee_or_404(request):
+    committee = get_request_scope(request).committee if request.user.role == 'committee_supervisor' else None
+    if committee is None:
+        raise Http404('No committee')
+    return committee
@@ -0,0 +1,59 @@
+import time
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.locmem import LocMemCache
+
+
+def is_cache_shared():
+    """
+    False when every process has a cache of its own (locmem): what one gunicorn worker
+    or background command invalidates there is still served by the others.
+    """
+    return not isinstance(caches['default'], LocMemCache)
+
+
+def cap_timeout(timeout):
+    """
+    Timeout of a cache entry that other processes may invalidate: unchanged on a
+    shared cache, at most LOCAL_CACHE_TIMEOUT on a per-process one.
+    """
+    if is_cache_shared():
+        return timeout
+    local_timeout = getattr(settings, 'LOCAL_CACHE_TIMEOUT', 60)
+    return local_timeout if timeout is None else min(timeout, local_timeout)
+
+
+def new_version():
+    # From the clock rather than from 1: a version lost to eviction (the file cache
+    # culls entries at random once full) can't come back to a number old entries still use
+    return int(time.time() * 1000)
+
+
+def get_version(key):
+    """Current generation stored under key; cached entries embed it in their keys"""
+    version = cache.get(key)
+    if version is None:
+        version = new_version()
+        if not cache.add(key, version, None):
+            version = cache.get(key, version)
+    return version
+
+
+def bump_version(key):
+    """Move to a new generation, dropping every entry stored under the previous one"""
+    version = cache.get(key)
+    cache.set(key, (version or new_version()) + 1, None)
+
+
+def incr(key, timeout, delta=1):
+    """
+    Add delta to a counter, creating it when missing; the counter expires timeout
+    seconds after its last change. (cache.incr() of the file and database caches
+    resets the entry to the default timeout.)
+    """
+    if cache.add(key, delta, timeout):
+        return delta
+    value = cache.get(key, 0) + delta
+    cache.set(key, value, timeout)
+    return value
@@ -0,0 +1,243 @@
+from django.apps import apps
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from accounts.models import User
+from director_dashboard.models import AlbumPhoto, DirectorAlbum, Program, Committee, Student
+from pm_dashboard.models import Task
+
+from .calendar_cache import invalidate_program_calendar
+from .calendar_feed import CALENDAR_SOURCES
+from .images import IMAGE_FIELDS, delete_renditions, generate_renditions
+from .models import ImageRendition, TaskOccurrence
+from .public_cache import invalidate_public_pages
+from .scope import invalidate_all_scopes, invalidate_user_scope
+from .occurrences import TASK_OCCURRENCE_MODELS, sync_task_occurrences, delete_task_occurrences
+from .rollups import (ROLLUP_KINDS_BY_MEMBER_MODEL, ROLLUP_KINDS_BY_TASK_MODEL, apply_state_change,
+                      member_deltas, task_deltas)
+
+
+def task_saved(sender, instance, raw=False, **kwargs):
+    if raw:
+        return  # loaddata: the backfill command rebuilds occurrences afterwards
+    sync_task_occurrences(instance)
+
+
+def task_deleted(sender, instance, **kwargs):
+    delete_task_occurrences(instance)
+
+
+for task_model in TASK_OCCURRENCE_MODELS.values():
+    post_save.connect(task_saved, sender=task_model, dispatch_uid=f'task_occurrences_save_{task_model.__name__}')
+    post_delete.connect(task_deleted, sender=task_model, dispatch_uid=f'task_occurrences_delete_{task_model.__name__}')
+
+
+def get_calendar_program_id(instance, source):
+    """Follow the source's program lookup ('task__committee__program') on an instance"""
+    *path, field = source.program.split('__')
+    obj = instance
+    for name in path:
+        obj = getattr(obj, name, None)
+        if obj is None:
+            return None
+    return getattr(obj, f'{field}_id', None)
+
+
+def calendar_source_saving(sender, instance, raw=False, **kwargs):
+    """Remember the stored program so moving a row to another program refreshes both calendars"""
+    if raw or instance.pk is None:
+        return
+    source = CALENDAR_SOURCES_BY_MODEL[sender]
+    instance._calendar_program_id = sender._default_manager.filter(pk=instance.pk).values_list(
+        source.program, flat=True
+    ).first()
+
+
+def calendar_source_changed(sender, instance, **kwargs):
+    source = CALENDAR_SOURCES_BY_MODEL[sender]
+    program_id = get_calendar_program_id(instance, source)
+    invalidate_program_calendar(program_id)
+    previous_program_id = getattr(instance, '_calendar_program_id', None)
+    if previous_program_id != program_id:
+        invalidate_program_calendar(previous_program_id)
+
+
+CALENDAR_SOURCES_BY_MODEL = {source.model: source for source in CALENDAR_SOURCES.values()}
+
+for source_model in CALENDAR_SOURCES_BY_MODEL:
+    name = source_model.__name__
+    pre_save.connect(calendar_source_saving, sender=source_model, dispatch_uid=f'calendar_cache_pre_save_{name}')
+    post_save.connect(calendar_source_changed, sender=source_model, dispatch_uid=f'calendar_cache_save_{name}')
+    post_delete.connect(calendar_source_changed, sender=source_model, dispatch_uid=f'calendar_cache_delete_{name}')
+
+
+@receiver(pre_save, sender=Program)
+def program_saving(sender, instance, raw=False, **kwargs):
+    """Remember the stored end date: only a new one changes the occurrences"""
+    if raw or instance.pk is None:
+        return
+    instance._occurrences_end_date = Program.objects.filter(pk=instance.pk).values_list(
+        'end_date', flat=True
+    ).first()
+
+
+@receiver(post_save, sender=Program)
+def program_saved(sender, instance, created, raw=False, **kwargs):
+    """Open-ended recurring tasks are expanded up to the program end date"""
+    if created or raw:
+        return
+    invalidate_program_calendar(instance.pk)
+    if getattr(instance, '_occurrences_end_date', None) == instance.end_date:
+        return
+    for task_model in TASK_OCCURRENCE_MODELS.values():
+        if task_model is Task:
+            tasks = task_model.objects.filter(program=instance)
+        else:
+            tasks = task_model.objects.filter(committee__program=instance)
+        for task in tasks.filter(is_recurring=True, recurrence_end_date__isnull=True):
+            sync_task_occurrences(task)
+
+
+@receiver(post_save, sender=Committee)
+def committee_saved(sender, instance, created, raw=False, **kwargs):
+    """Keep occurrences of committee tasks attached to the committee's current program"""
+    if created or raw:
+        return
+    # Committee names are part of the cached calendar items
+    invalidate_program_calendar(instance.program_id)
+    for program_id in TaskOccurrence.objects.filter(committee=instance).exclude(
+        program_id=instance.program_id
+    ).values_list('program_id', flat=True).distinct():
+        invalidate_program_calendar(program_id)
+    TaskOccurrence.objects.filter(committee=instance).exclude(
+        program_id=instance.program_id
+    ).exclude(
+        content_type=ContentType.objects.get_for_model(Task)  # Program tasks carry their own program
+    ).update(program_id=instance.program_id)
+
+
+def rollup_task_saving(sender, instance, raw=False, **kwargs):
+    """Remember the stored committee and status; the post_save handler moves the counts"""
+    if raw or instance.pk is None:
+        return
+    instance._rollup_state = sender._default_manager.filter(pk=instance.pk).values_list(
+        'committee_id', 'status'
+    ).first()
+
+
+def rollup_task_saved(sender, instance, raw=False, **kwargs):
+    if raw:
+        return  # loaddata: reconcile_committee_rollups rebuilds the counters afterwards
+    apply_state_change(
+        ROLLUP_KINDS_BY_TASK_MODEL[sender], getattr(instance, '_rollup_state', None),
+        (instance.committee_id, instance.status), task_deltas,
+    )
+
+
+def rollup_task_deleted(sender, instance, **kwargs):
+    apply_state_change(
+        ROLLUP_KINDS_BY_TASK_MODEL[sender], (instance.committee_id, instance.status), None,
+        task_deltas, create=False,
+    )
+
+
+def rollup_member_saving(sender, instance, raw=False, **kwargs):
+    if raw or instance.pk is None:
+        return
+    instance._rollup_state = sender._default_manager.filter(pk=instance.pk).values_list(
+        'committee_id', 'is_active'
+    ).first()
+
+
+def rollup_member_saved(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    apply_state_change(
+        ROLLUP_KINDS_BY_MEMBER_MODEL[sender], getattr(instance, '_rollup_state', None),
+        (instance.committee_id, instance.is_active), member_deltas,
+    )
+
+
+def rollup_member_deleted(sender, instance, **kwargs):
+    apply_state_change(
+        ROLLUP_KINDS_BY_MEMBER_MODEL[sender], (instance.committee_id, instance.is_active), None,
+        member_deltas, create=False,
+    )
+
+
+for task_model in ROLLUP_KINDS_BY_TASK_MODEL:
+    name = task_model.__name__
+    pre_save.connect(rollup_task_saving, sender=task_model, dispatch_uid=f'committee_rollup_pre_save_{name}')
+    post_save.connect(rollup_task_saved, sender=task_model, dispatch_uid=f'committee_rollup_save_{name}')
+    post_delete.connect(rollup_task_deleted, sender=task_model, dispatch_uid=f'committee_rollup_delete_{name}')
+
+for member_model in ROLLUP_KINDS_BY_MEMBER_MODEL:
+    name = member_model.__name__
+    pre_save.connect(rollup_member_saving, sender=member_model, dispatch_uid=f'committee_rollup_pre_save_{name}')
+    post_save.connect(rollup_member_saved, sender=member_model, dispatch_uid=f'committee_rollup_save_{name}')
+    post_delete.connect(rollup_member_deleted, sender=member_model,
+                        dispatch_uid=f'committee_rollup_delete_{name}')
+
+
+IMAGE_FIELDS_BY_MODEL = {apps.get_model(model_label): field for model_label, field in IMAGE_FIELDS}
+
+
+def image_saving(sender, instance, raw=False, **kwargs):
+    if raw or instance.pk is None:
+        return
+    field = IMAGE_FIELDS_BY_MODEL[sender]
+    instance._previous_image = sender._default_manager.filter(pk=instance.pk).values_list(field, flat=True).first()
+
+
+def image_saved(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    source = getattr(instance, IMAGE_FIELDS_BY_MODEL[sender]).name
+    previous = getattr(instance, '_previous_image', None)
+    if previous and previous != source:
+        transaction.on_commit(lambda: delete_renditions(previous))
+    if source and not ImageRendition.objects.filter(source=source).exists():
+        transaction.on_commit(lambda: generate_renditions(source))
+
+
+def image_deleted(sender, instance, **kwargs):
+    source = getattr(instance, IMAGE_FIELDS_BY_MODEL[sender]).name
+    if source:
+        transaction.on_commit(lambda: delete_renditions(source))
+
+
+for image_model in IMAGE_FIELDS_BY_MODEL:
+    name = image_model.__name__
+    pre_save.connect(image_saving, sender=image_model, dispatch_uid=f'image_renditions_pre_save_{name}')
+    post_save.connect(image_saved, sender=image_model, dispatch_uid=f'image_renditions_save_{name}')
+    post_delete.connect(image_deleted, sender=image_model, dispatch_uid=f'image_renditions_delete_{name}')
+
+
+@receiver([post_save, post_delete], sender=DirectorAlbum, dispatch_uid='public_pages_album')
+@receiver([post_save, post_delete], sender=AlbumPhoto, dispatch_uid='public_pages_photo')
+def album_changed(sender, instance, **kwargs):
+    invalidate_public_pages()
+
+
+@receiver([post_save, post_delete], sender=Program, dispatch_uid='scope_program')
+@receiver([post_save, post_delete], sender=Committee, dispatch_uid='scope_committee')
+def scope_assignment_changed(sender, instance, **kwargs):
+    # Again after the commit: a request may have cached the old assignment in between
+    invalidate_all_scopes()
+    transaction.on_commit(invalidate_all_scopes)
+
+
+@receiver([post_save, post_delete], sender=Student, dispatch_uid='scope_student')
+def student_scope_changed(sender, instance, **kwargs):
+    invalidate_user_scope(instance.user_id)
+    transaction.on_commit(lambda: invalidate_user_scope(instance.user_id))
+
+
+@receiver(post_save, sender=User, dispatch_uid='scope_user')
+def user_scope_changed(sender, instance, created, **kwargs):
+    # The scope follows the role
+    if not created:
+        invalidate_user_scope(instance.pk)
+        transaction.on_commit(lambda: invalidate_user_scope(instance.pk))
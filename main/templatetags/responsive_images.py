@@ -0,0 +1,40 @@
+from django import template
+from django.utils.html import format_html
+
+from main.images import FALLBACK_WIDTH, get_rendition_url, get_renditions, get_srcset
+
+register = template.Library()
+
+
+def get_source(image):
+    """Storage name of an ImageField value ('' when empty)"""
+    return getattr(image, 'name', None) or ''
+
+
+@register.simple_tag
+def image_attrs(image, sizes='100vw', fallback=''):
+    """
+    src, srcset and sizes attributes of an <img> showing an ImageField value:
+        <img {% image_attrs photo.image sizes="(max-width: 768px) 100vw, 33vw" %} alt="...">
+    srcset lists the WebP renditions and src the JPEG one, or the original upload
+    (or `fallback` when there is no upload) if no rendition could be made.
+    """
+    source = get_source(image)
+    if not source:
+        return format_html('src="{}"', fallback)
+
+    renditions = get_renditions(source)
+    src = get_rendition_url(renditions, FALLBACK_WIDTH, 'jpeg') or image.url
+    srcset = get_srcset(renditions)
+    if not srcset:
+        return format_html('src="{}"', src)
+    return format_html('src="{}" srcset="{}" sizes="{}"', src, srcset, sizes)
+
+
+@register.simple_tag
+def image_url(image, width=FALLBACK_WIDTH, format='webp'):
+    """URL of a rendition at least `width` wide, for CSS backgrounds; the original when there is none"""
+    source = get_source(image)
+    if not source:
+        return ''
+    return get_rendition_url(get_renditions(source), int(width), format) or image.url
@@ -1,3 +1,1073 @@
-from django.test import TestCase
+import gc
+import os
+import random
+import shutil
+import sys
+import tempfile
+import threading
+from datetime import date, datetime, timedelta
+from io import BytesIO, StringIO
+from smtplib import SMTPException
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.core import mail
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import Q
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.http import http_date
+
+from accounts.activity import get_user_timeline
+from accounts.models import User, UserActivity
+from cultural_committee_dashboard.models import CommitteeMember, CulturalNotification, CulturalTask
+from director_dashboard import reports
+from director_dashboard.models import Committee, DirectorAlert, ExportJob, Program
+from main.exports import OPENPYXL_AVAILABLE, ExcelSheet, stream_workbook
+from main.ics import get_feed_token, recurrence_rule
+from main import outbox
+from main.calendar_cache import get_program_version
+from main.models import CommitteeRollup, OutboxMessage, OverdueSweep, ScheduleEvent, TaskOccurrence
+from main.overdue import sweep_overdue
+from main.recurrence import RecurrenceMixin, occurrence_groups, weekday_runs
+from main.rollups import COUNTER_FIELDS, compute_rollups, get_committee_rollup
+from main.scope import get_user_scope
+from operations_committee_dashboard.models import OperationsNotification, OperationsTask
+from pm_dashboard.models import Activity, Notification, Task
+from scientific_committee_dashboard.models import ScientificNotification, ScientificTask
+from sharia_committee_dashboard.models import ShariaNotification, ShariaTask
+from sports_committee_dashboard.models import SportsNotification, SportsTask
+from takwin.models import ASPECT_CHOICES, Takwin, UserTakwin
+
+if OPENPYXL_AVAILABLE:
+    from openpyxl import load_workbook
+    from openpyxl.worksheet._writer import ALL_TEMP_FILES
+
+
+def legacy_occurrence_dates(task, start_date=None, end_date=None):
+    """Day-by-day implementation that used to be copied into every task model"""
+    if not task.is_recurring:
+        return [task.start_date or task.due_date]
+
+    dates = []
+    current_date = start_date or task.start_date or task.due_date
+    end = end_date or task.recurrence_end_date or task.due_date
+
+    task_start = task.start_date or task.due_date
+    if current_date < task_start:
+        current_date = task_start
+
+    if task.recurrence_end_date and end > task.recurrence_end_date:
+        end = task.recurrence_end_date
+
+    if task.recurrence_pattern == 'daily':
+        while current_date <= end:
+            dates.append(current_date)
+            current_date += timedelta(days=1)
+    elif task.recurrence_pattern == 'weekly':
+        while current_date <= end:
+            dates.append(current_date)
+            current_date += timedelta(days=7)
+    elif task.recurrence_pattern == 'custom' and task.recurrence_days:
+        calendar_to_python = {0: 6, 1: 0, 2: 1, 3: 2, 4: 3, 5: 4, 6: 5}
+        python_weekdays = [calendar_to_python[day] for day in task.recurrence_days if day in calendar_to_python]
+        while current_date <= end:
+            if current_date.weekday() in python_weekdays:
+                dates.append(current_date)
+            current_date += timedelta(days=1)
+
+    return dates
+
+
+def legacy_groups(dates):
+    if not dates:
+        return []
+    dates = sorted(dates)
+    groups = []
+    group_start = group_end = dates[0]
+    for current in dates[1:]:
+        if current == group_end + timedelta(days=1):
+            group_end = current
+        else:
+            groups.append((group_start, group_end))
+            group_start = group_end = current
+    groups.append((group_start, group_end))
+    return groups
+
+
+class FakeTask(RecurrenceMixin):
+    def __init__(self, **fields):
+        self.__dict__.update(fields)
+
+
+def random_task(rng):
+    base = date(2025, 1, 1) + timedelta(days=rng.randint(0, 400))
+    start_date = base if rng.random() < 0.8 else None
+    due_date = base + timedelta(days=rng.randint(0, 120))
+    return FakeTask(
+        is_recurring=rng.random() < 0.9,
+        recurrence_pattern=rng.choice(['daily', 'weekly', 'custom', 'custom', None]),
+        recurrence_days=rng.sample(range(7), rng.randint(0, 7)) if rng.random() < 0.95 else None,
+        recurrence_end_date=due_date + timedelta(days=rng.randint(-30, 200)) if rng.random() < 0.7 else None,
+        start_date=start_date,
+        due_date=due_date,
+    )
+
+
+def random_window(rng, task):
+    anchor = task.start_date or task.due_date
+    start = anchor + timedelta(days=rng.randint(-60, 200)) if rng.random() < 0.85 else None
+    end = (start or anchor) + timedelta(days=rng.randint(-5, 60)) if rng.random() < 0.85 else None
+    return start, end
+
+
+class RecurrenceEngineTests(SimpleTestCase):
+    """Randomized property checks of the shared engine against the legacy loops"""
+
+    EXAMPLES = 3000
+
+    def setUp(self):
+        self.rng = random.Random(20250101)
+
+    def test_matches_legacy_for_daily_and_custom(self):
+        for _ in range(self.EXAMPLES):
+            task = random_task(self.rng)
+            if task.recurrence_pattern == 'weekly':
+                task.recurrence_pattern = 'daily'
+            start, end = random_window(self.rng, task)
+            expected = legacy_occurrence_dates(task, start, end)
+            self.assertEqual(task.get_occurrence_dates(start, end), expected)
+            self.assertEqual(task.get_consecutive_day_groups(start, end), legacy_groups(expected))
+
+    def test_weekly_matches_legacy_when_window_starts_with_task(self):
+        for _ in range(self.EXAMPLES):
+            task = random_task(self.rng)
+            task.recurrence_pattern = 'weekly'
+            _, end = random_window(self.rng, task)
+            expected = legacy_occurrence_dates(task, None, end)
+            self.assertEqual(task.get_occurrence_dates(None, end), expected)
+
+    def test_weekly_is_anchored_to_task_weekday(self):
+        for _ in range(self.EXAMPLES):
+            task = random_task(self.rng)
+            task.is_recurring = True
+            task.recurrence_pattern = 'weekly'
+            start, end = random_window(self.rng, task)
+            dates = task.get_occurrence_dates(start, end)
+            anchor = task.start_date or task.due_date
+            for current in dates:
+                self.assertEqual(current.weekday(), anchor.weekday())
+            # Every matching weekday inside the clipped window is present
+            full = task.get_occurrence_dates(None, end)
+            self.assertEqual(dates, [d for d in full if start is None or d >= start])
+
+    def test_groups_are_sorted_disjoint_and_clipped(self):
+        for _ in range(self.EXAMPLES):
+            first = date(2025, 1, 1) + timedelta(days=self.rng.randint(0, 365))
+            last = first + timedelta(days=self.rng.randint(-3, 120))
+            days = self.rng.sample(range(7), self.rng.randint(1, 7))
+            groups = occurrence_groups('custom', first, first, last, days)
+            previous_end = None
+            for group_start, group_end in groups:
+                self.assertLessEqual(first, group_start)
+                self.assertLessEqual(group_start, group_end)
+                self.assertLessEqual(group_end, last)
+                if previous_end is not None:
+                    self.assertGreater(group_start, previous_end + timedelta(days=1))
+                previous_end = group_end
+
+    def test_weekday_runs_wrap_around_the_week(self):
+        # Saturday, Sunday, Monday form one run starting on Saturday
+        self.assertEqual(weekday_runs({5, 6, 0}), [(5, 3)])
+        self.assertEqual(weekday_runs({0, 2, 3}), [(0, 1), (2, 2)])
+        self.assertEqual(weekday_runs(set(range(7))), [(0, 7)])
+
+
+COMMITTEE_TASK_MODELS = (CulturalTask, SportsTask, ShariaTask, ScientificTask, OperationsTask)
+NOTIFICATION_MODELS = (CulturalNotification, SportsNotification, ShariaNotification, ScientificNotification,
+                       OperationsNotification, Notification)
+TASK_STATUSES = {
+    CulturalTask: ('pending', 'in_progress', 'completed', 'cancelled'),
+    SportsTask: ('pending', 'in_progress', 'completed', 'cancelled'),
+    ShariaTask: ('pending', 'in_progress', 'completed', 'cancelled'),
+    ScientificTask: ('pending', 'in_progress', 'completed', 'cancelled'),
+    OperationsTask: ('not_started', 'in_progress', 'completed', 'overdue'),
+}
+
+
+class QueryPlanTests(TestCase):
+    """
+    EXPLAIN the hottest dashboard queries on a seeded dataset and fail when one
+    of them falls back to a full table scan (SQLite) or a sequential scan (Postgres).
+    """
+
+    COMMITTEES = 8
+    ROWS_PER_COMMITTEE = 60
+    USERS = 40
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.today = date(2025, 6, 1)
+        programs = [
+            Program.objects.create(name=f'برنامج {i}', description='-', start_date=date(2025, 1, 1),
+                                   end_date=date(2025, 12, 31), target_students=100)
+            for i in range(2)
+        ]
+        cls.program = programs[0]
+        committees = [
+            Committee.objects.create(name=f'لجنة {i}', program=programs[i % 2]) for i in range(cls.COMMITTEES)
+        ]
+        cls.committee = committees[0]
+        users = User.objects.bulk_create([
+            User(username=f'user{i}', role='committee_supervisor') for i in range(cls.USERS)
+        ])
+        cls.user = users[0]
+
+        # bulk_create skips the signals: this is only about the tables and their indexes
+        rng = random.Random(11)
+        for model, statuses in TASK_STATUSES.items():
+            model.objects.bulk_create([
+                model(committee=committee, task_type='other', title='-', description='-',
+                      status=rng.choice(statuses), due_date=cls.today + timedelta(days=rng.randint(-90, 90)))
+                for committee in committees for _ in range(cls.ROWS_PER_COMMITTEE)
+            ])
+        Task.objects.bulk_create([
+            Task(program=rng.choice(programs), committee=committee, title='-', description='-',
+                 status=rng.choice(('pending', 'completed', 'overdue')),
+                 due_date=cls.today + timedelta(days=rng.randint(-90, 90)))
+            for committee in committees for _ in range(cls.ROWS_PER_COMMITTEE)
+        ])
+        for model in NOTIFICATION_MODELS:
+            extra = {} if model is Notification else {'committee': cls.committee}
+            model.objects.bulk_create([
+                model(user=user, notification_type='task_added', title='-', message='-',
+                      is_read=rng.random() < 0.8, **extra)
+                for user in users for _ in range(10)
+            ])
+        DirectorAlert.objects.bulk_create([
+            DirectorAlert(title='-', message='-', alert_type='system_alert', is_read=rng.random() < 0.8)
+            for _ in range(300)
+        ])
+        ScheduleEvent.objects.bulk_create([
+            ScheduleEvent(title='-', description='-', event_type='other', program=rng.choice(programs),
+                          start_date=cls.today + timedelta(days=rng.randint(-150, 150)))
+            for _ in range(500)
+        ])
+        Activity.objects.bulk_create([
+            Activity(name='-', description='-', program=rng.choice(programs),
+                     date=cls.today + timedelta(days=rng.randint(-150, 150)))
+            for _ in range(500)
+        ])
+        takwins = Takwin.objects.bulk_create([
+            Takwin(aspect=ASPECT_CHOICES[i % len(ASPECT_CHOICES)][0], title='-', description='-')
+            for i in range(200)
+        ])
+        UserTakwin.objects.bulk_create([
+            UserTakwin(user=user, takwin=takwin, is_done=rng.random() < 0.5)
+            for user in users for takwin in takwins[:20]
+        ])
+        UserActivity.objects.bulk_create([
+            UserActivity(user=user, action='-', timestamp=timezone.now() - timedelta(minutes=rng.randint(0, 10 ** 6)))
+            for user in users for _ in range(50)
+        ])
+
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+    def setUp(self):
+        if connection.vendor == 'postgresql':
+            # On a small table a sequential scan is legitimately cheaper; what
+            # matters here is that an index able to serve the query exists
+            with connection.cursor() as cursor:
+                cursor.execute('SET LOCAL enable_seqscan = off')
+
+    def get_full_scans(self, plan):
+        if connection.vendor == 'postgresql':
+            return [line.strip() for line in plan.splitlines() if 'Seq Scan' in line]
+        if connection.vendor == 'sqlite':
+            return [
+                line.strip() for line in plan.splitlines()
+                if 'SCAN ' in line and 'USING' not in line and 'CONSTANT ROW' not in line
+            ]
+        self.skipTest(f'No query plan checks for {connection.vendor}')
+
+    def assertUsesIndex(self, queryset):
+        plan = queryset.explain()
+        full_scans = self.get_full_scans(plan)
+        self.assertFalse(full_scans, f'Full scan in the plan of:\n{queryset.query}\n\n{plan}')
+
+    def test_committee_task_counts(self):
+        for model in COMMITTEE_TASK_MODELS:
+            with self.subTest(model=model.__name__):
+                self.assertUsesIndex(model.objects.filter(committee=self.committee, status='completed').order_by())
+
+    def test_recent_committee_tasks(self):
+        for model in COMMITTEE_TASK_MODELS:
+            with self.subTest(model=model.__name__):
+                self.assertUsesIndex(model.objects.filter(committee=self.committee).order_by('-created_at')[:5])
+
+    def test_overdue_counts(self):
+        self.assertUsesIndex(Task.objects.filter(
+            Q(status='overdue') | Q(status='pending', due_date__lt=self.today), program=self.program
+        ))
+        self.assertUsesIndex(Task.objects.filter(program=self.program, due_date__lt=self.today, status='pending'))
+
+    def test_unread_notifications(self):
+        for model in NOTIFICATION_MODELS:
+            with self.subTest(model=model.__name__):
+                self.assertUsesIndex(model.objects.filter(user=self.user, is_read=False).order_by())
+        self.assertUsesIndex(DirectorAlert.objects.filter(is_read=False).order_by())
+
+    def test_notification_lists(self):
+        for model in NOTIFICATION_MODELS:
+            with self.subTest(model=model.__name__):
+                self.assertUsesIndex(model.objects.filter(user=self.user).order_by('-created_at')[:20])
+
+    def test_program_calendar_ranges(self):
+        start, end = self.today, self.today + timedelta(days=30)
+        self.assertUsesIndex(ScheduleEvent.objects.filter(program=self.program, start_date__range=(start, end)))
+        self.assertUsesIndex(Activity.objects.filter(program=self.program, date__gte=start))
+
+    def test_takwin_aspects(self):
+        self.assertUsesIndex(Takwin.objects.filter(aspect='tarbawiu').order_by('-created_at'))
+        self.assertUsesIndex(UserTakwin.objects.filter(user=self.user, takwin__aspect='tarbawiu', is_done=True))
+
+    def test_activity_timeline(self):
+        first_page, cursor = get_user_timeline(self.user, limit=10)
+        self.assertIsNotNone(cursor)
+        self.assertUsesIndex(UserActivity.objects.filter(user=self.user).order_by('-timestamp', '-id')[:11])
+        last = first_page[-1]
+        self.assertUsesIndex(UserActivity.objects.filter(user=self.user).filter(
+            Q(timestamp__lt=last.timestamp) | Q(timestamp=last.timestamp, id__lt=last.pk)
+        ).order_by('-timestamp', '-id')[:11])
+        self.assertUsesIndex(UserActivity.objects.filter(timestamp__lt=timezone.now() - timedelta(days=365)).order_by(
+            'timestamp', 'id'
+        )[:5000])
+
+
+class CalendarFeedTests(TestCase):
+    """RRULEs of the subscription feed, its conditional GET and its tokens"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.program = Program.objects.create(name='برنامج', description='-', start_date=date(2025, 1, 1),
+                                             end_date=date(2025, 12, 31), target_students=10)
+        cls.other_program = Program.objects.create(name='آخر', description='-', start_date=date(2025, 1, 1),
+                                                   end_date=date(2025, 12, 31), target_students=10)
+        committee = Committee.objects.create(name='الثقافية', program=cls.program, description='-')
+        cls.director = User.objects.create_user('director', password='secret-1', role='director')
+        # 2025-06-01 is a Sunday
+        task = dict(committee=committee, task_type='other', description='-', is_recurring=True,
+                    start_date=date(2025, 6, 1), due_date=date(2025, 6, 1))
+        CulturalTask.objects.create(title='يومية', recurrence_pattern='daily', **task)
+        CulturalTask.objects.create(title='أسبوعية', recurrence_pattern='weekly',
+                                    recurrence_end_date=date(2025, 8, 31), **task)
+        # Monday and Wednesday: the first occurrence is the day after the start date
+        CulturalTask.objects.create(title='مخصصة', recurrence_pattern='custom', recurrence_days=[1, 3],
+                                    recurrence_end_date=date(2025, 7, 15), **task)
+
+    def get_feed(self, token=None, program=None, **headers):
+        program = program or self.program
+        token = token or get_feed_token(self.director, program)
+        return self.client.get(reverse('calendar_feed_ics', args=[program.pk]), {'token': token}, headers=headers)
+
+    def get_events(self, response):
+        body = b''.join(response.streaming_content).decode('utf-8').replace('\r\n ', '')
+        events = {}
+        for block in body.split('BEGIN:VEVENT')[1:]:
+            lines = dict(line.split(':', 1) for line in block.split('\r\n') if ':' in line)
+            events[lines['SUMMARY']] = lines
+        return events
+
+    def test_recurrence_rules(self):
+        until = date(2025, 12, 31)
+        self.assertEqual(recurrence_rule('daily', None, until), 'FREQ=DAILY;UNTIL=20251231')
+        self.assertEqual(recurrence_rule('weekly', None, until), 'FREQ=WEEKLY;UNTIL=20251231')
+        self.assertEqual(recurrence_rule('custom', [4, 0, 2], until), 'FREQ=WEEKLY;BYDAY=SU,TU,TH;UNTIL=20251231')
+        self.assertEqual(recurrence_rule('custom', list(range(7)), until), 'FREQ=DAILY;UNTIL=20251231')
+        self.assertIsNone(recurrence_rule('custom', [], until))
+        self.assertIsNone(recurrence_rule(None, [1], until))
+
+    def test_recurring_tasks_become_rrules(self):
+        response = self.get_feed()
+        self.assertEqual(response.status_code, 200)
+        events = self.get_events(response)
+
+        # Without an end date of its own a task repeats until the end of the program
+        daily = events['يومية']
+        self.assertEqual(daily['RRULE'], 'FREQ=DAILY;UNTIL=20251231')
+        self.assertEqual(daily['DTSTART;VALUE=DATE'], '20250601')
+
+        self.assertEqual(events['أسبوعية']['RRULE'], 'FREQ=WEEKLY;UNTIL=20250831')
+
+        custom = events['مخصصة']
+        self.assertEqual(custom['RRULE'], 'FREQ=WEEKLY;BYDAY=MO,WE;UNTIL=20250715')
+        self.assertEqual(custom['DTSTART;VALUE=DATE'], '20250602')
+
+    def test_program_end_date_moves_open_ended_occurrences(self):
+        daily = TaskOccurrence.objects.filter(object_id=CulturalTask.objects.get(title='يومية').pk,
+                                              content_type__model='culturaltask')
+        self.assertEqual(daily.latest('date').date, date(2025, 12, 31))
+
+        self.program.description = 'وصف جديد'
+        with mock.patch('main.signals.sync_task_occurrences') as sync:
+            self.program.save()
+        sync.assert_not_called()
+
+        self.program.end_date = date(2025, 10, 31)
+        self.program.save()
+        self.assertEqual(daily.latest('date').date, date(2025, 10, 31))
+
+    def test_unchanged_feed_is_not_modified(self):
+        response = self.get_feed()
+        etag = response['ETag']
+        b''.join(response.streaming_content)
+
+        response = self.get_feed(if_none_match=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+        CulturalTask.objects.filter(title='يومية').update(title='يومية معدلة', updated_at=timezone.now())
+        self.assertEqual(self.get_feed(if_none_match=etag).status_code, 200)
+
+    def test_invalid_tokens_are_rejected(self):
+        token = get_feed_token(self.director, self.program)
+        self.assertEqual(self.get_feed(token=token + 'x').status_code, 403)
+        self.assertEqual(self.get_feed(token='not-a-token').status_code, 403)
+        # Issued for another program
+        self.assertEqual(self.get_feed(token=get_feed_token(self.director, self.other_program)).status_code, 403)
+
+        # A new password revokes the links handed out before
+        self.director.set_password('secret-2')
+        self.director.save()
+        self.assertEqual(self.get_feed(token=token).status_code, 403)
+        self.assertEqual(self.get_feed().status_code, 200)
+
+        self.director.is_active = False
+        self.director.save()
+        self.assertEqual(self.get_feed().status_code, 403)
+
+
+class CommitteeRollupTests(TestCase):
+    """The counters kept up to date with F() deltas always equal a fresh aggregate"""
+
+    @classmethod
+    def setUpTestData(cls):
+        program = Program.objects.create(name='برنامج', description='-', start_date=date(2025, 1, 1),
+                                         end_date=date(2025, 12, 31), target_students=10)
+        cls.committees = [
+            Committee.objects.create(name=f'لجنة {i}', program=program, description='-') for i in range(2)
+        ]
+        cls.users = [User.objects.create_user(f'member{i}') for i in range(3)]
+
+    def setUp(self):
+        for committee in self.committees:
+            for kind in ('operations', 'cultural'):
+                get_committee_rollup(committee, kind)
+
+    def create_task(self, model, committee, status):
+        return model.objects.create(committee=committee, task_type='other', title='-', description='-',
+                                    status=status, due_date=date(2025, 6, 1))
+
+    def assertRollupsFresh(self, kind):
+        expected = compute_rollups(kind)
+        for committee in self.committees:
+            rollup = CommitteeRollup.objects.get(committee=committee, kind=kind)
+            values = expected.get(committee.pk, dict.fromkeys(COUNTER_FIELDS, 0))
+            self.assertEqual({field: getattr(rollup, field) for field in COUNTER_FIELDS}, values,
+                             f'{kind} committee {committee.pk}')
+
+    def test_status_changes(self):
+        tasks = [self.create_task(OperationsTask, self.committees[0], 'not_started') for _ in range(3)]
+        self.assertRollupsFresh('operations')
+        for task, statuses in zip(tasks, [('in_progress', 'completed'), ('overdue', 'in_progress'),
+                                          ('completed', 'overdue')]):
+            for status in statuses:
+                task.status = status
+                task.save()
+                self.assertRollupsFresh('operations')
+
+        task = self.create_task(CulturalTask, self.committees[0], 'pending')
+        for status in ('in_progress', 'completed', 'cancelled', 'pending'):
+            task.status = status
+            task.save()
+            self.assertRollupsFresh('cultural')
+
+    def test_moving_tasks_between_committees(self):
+        first, second = self.committees
+        task = self.create_task(OperationsTask, first, 'overdue')
+        self.create_task(OperationsTask, second, 'completed')
+
+        task.committee = second
+        task.save()
+        self.assertRollupsFresh('operations')
+
+        # Moved and changed at once
+        task.committee = first
+        task.status = 'completed'
+        task.save()
+        self.assertRollupsFresh('operations')
+
+        member = CommitteeMember.objects.create(committee=first, user=self.users[0])
+        member.committee = second
+        member.save()
+        self.assertRollupsFresh('cultural')
+        member.is_active = False
+        member.save()
+        self.assertRollupsFresh('cultural')
+
+    def test_deleting_tasks(self):
+        tasks = [self.create_task(CulturalTask, committee, status)
+                 for committee in self.committees for status in ('pending', 'completed', 'in_progress')]
+        CommitteeMember.objects.create(committee=self.committees[0], user=self.users[1])
+        for task in tasks[::2]:
+            task.delete()
+            self.assertRollupsFresh('cultural')
+        # A queryset delete still sends post_delete for every row
+        CulturalTask.objects.filter(committee=self.committees[1]).delete()
+        CommitteeMember.objects.all().delete()
+        self.assertRollupsFresh('cultural')
+
+    def test_reconcile_repairs_drift(self):
+        first, second = self.committees
+        self.create_task(OperationsTask, first, 'not_started')
+        self.create_task(OperationsTask, second, 'overdue')
+        CommitteeMember.objects.create(committee=second, user=self.users[2])
+        # Bulk updates skip the signals, so the counters drift
+        OperationsTask.objects.update(status='completed')
+        CommitteeRollup.objects.filter(committee=second, kind='cultural').update(member_count=7, task_count=-2)
+
+        output = StringIO()
+        call_command('reconcile_committee_rollups', '--verify', stdout=output)
+        self.assertIn(f'operations committee {first.pk}: completed_count 0 -> 1, pending_count 1 -> 0',
+                      output.getvalue())
+        self.assertIn(f'cultural committee {second.pk}: member_count 7 -> 1, task_count -2 -> 0', output.getvalue())
+        self.assertEqual(CommitteeRollup.objects.get(committee=second, kind='cultural').member_count, 7)
+
+        call_command('reconcile_committee_rollups', stdout=StringIO())
+        self.assertRollupsFresh('operations')
+        self.assertRollupsFresh('cultural')
+
+
+class ProtectedMediaTests(TestCase):
+    """Permissions, Range, If-Range and conditional requests of /media/"""
+
+    CONTENT = bytes(range(100))
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.director = User.objects.create_user('director', role='director')
+        cls.supervisor = User.objects.create_user('supervisor', role='committee_supervisor')
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings_override = override_settings(MEDIA_ROOT=media_root, PROTECTED_MEDIA_ACCEL='')
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        for folder in ('albums', 'director_files', 'exports', 'uploads'):
+            os.makedirs(os.path.join(media_root, folder))
+            with open(os.path.join(media_root, folder, 'file.bin'), 'wb') as file:
+                file.write(self.CONTENT)
+        self.mtime = int(os.stat(os.path.join(media_root, 'uploads', 'file.bin')).st_mtime)
+        self.client.force_login(self.supervisor)
+
+    def get(self, path='uploads/file.bin', **headers):
+        return self.client.get(f'/media/{path}', headers=headers)
+
+    def get_content(self, response):
+        return b''.join(response.streaming_content)
+
+    def test_whole_file(self):
+        response = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.get_content(response), self.CONTENT)
+        self.assertEqual(response['Content-Length'], '100')
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+
+    def test_ranges(self):
+        for header, start, end in [
+            ('bytes=10-19', 10, 19),
+            ('bytes=-5', 95, 99),  # suffix
+            ('bytes=90-', 90, 99),  # open-ended
+            ('bytes=95-500', 95, 99),  # clipped to the file
+            ('bytes=-500', 0, 99),
+        ]:
+            with self.subTest(header=header):
+                response = self.get(range=header)
+                self.assertEqual(response.status_code, 206)
+                self.assertEqual(response['Content-Range'], f'bytes {start}-{end}/100')
+                self.assertEqual(response['Content-Length'], str(end - start + 1))
+                self.assertEqual(self.get_content(response), self.CONTENT[start:end + 1])
+
+    def test_unsatisfiable_ranges(self):
+        for header in ('bytes=100-', 'bytes=100-200', 'bytes=-0', 'bytes=20-10', 'bytes=-', 'bytes=abc'):
+            with self.subTest(header=header):
+                response = self.get(range=header)
+                self.assertEqual(response.status_code, 416)
+                self.assertEqual(response['Content-Range'], 'bytes */100')
+
+    def test_ranges_that_are_ignored(self):
+        # Another unit, or several ranges (no multipart responses): the whole file
+        for header in ('items=0-5', 'bytes=0-5,10-15'):
+            with self.subTest(header=header):
+                response = self.get(range=header)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(self.get_content(response), self.CONTENT)
+
+    def test_if_range(self):
+        etag = self.get()['ETag']
+        self.assertEqual(self.get(range='bytes=0-9', if_range=etag).status_code, 206)
+        self.assertEqual(self.get(range='bytes=0-9', if_range=http_date(self.mtime)).status_code, 206)
+
+        # The file changed since the client got its first part: start over
+        for if_range in ('"stale"', http_date(self.mtime - 60)):
+            with self.subTest(if_range=if_range):
+                response = self.get(range='bytes=0-9', if_range=if_range)
+                self.assertEqual(response.status_code, 200)
+                self.assertNotIn('Content-Range', response)
+                self.assertEqual(self.get_content(response), self.CONTENT)
+
+    def test_not_modified(self):
+        etag = self.get()['ETag']
+        response = self.get(if_none_match=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+        self.assertEqual(self.get(if_none_match=f'"other", {etag}').status_code, 304)
+        self.assertEqual(self.get(if_none_match='"other"').status_code, 200)
+
+        self.assertEqual(self.get(if_modified_since=http_date(self.mtime)).status_code, 304)
+        self.assertEqual(self.get(if_modified_since=http_date(self.mtime - 60)).status_code, 200)
+        # If-None-Match wins over If-Modified-Since
+        self.assertEqual(self.get(if_none_match='"other"', if_modified_since=http_date(self.mtime)).status_code, 200)
+
+    def test_proxy_sends_the_file(self):
+        with override_settings(PROTECTED_MEDIA_ACCEL='nginx', PROTECTED_MEDIA_ACCEL_PREFIX='/protected-media/'):
+            response = self.get('uploads/file.bin')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['X-Accel-Redirect'], '/protected-media/uploads/file.bin')
+        self.assertEqual(response.content, b'')
+
+        with override_settings(PROTECTED_MEDIA_ACCEL='apache'):
+            response = self.get('uploads/file.bin')
+        self.assertTrue(response['X-Sendfile'].endswith(os.path.join('uploads', 'file.bin')))
+
+    def test_director_folders(self):
+        for path in ('director_files/file.bin', 'exports/file.bin'):
+            with self.subTest(path=path):
+                self.assertEqual(self.get(path).status_code, 403)
+                self.client.force_login(self.director)
+                self.assertEqual(self.get(path).status_code, 200)
+                self.client.logout()
+                response = self.get(path)
+                self.assertEqual(response.status_code, 302)
+                self.assertIn('login', response['Location'])
+                self.client.force_login(self.supervisor)
+
+        # Album pictures are public, other uploads need a login
+        self.client.logout()
+        self.assertEqual(self.get('albums/file.bin').status_code, 200)
+        self.assertEqual(self.get('uploads/file.bin').status_code, 302)
+        self.client.force_login(self.director)
+        self.assertEqual(self.get('../manage.py').status_code, 404)
+
+
+@override_settings(EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend', OUTBOX_MAX_ATTEMPTS=3)
+class OutboxTests(TestCase):
+    """The outbox and its worker, offline with the locmem email backend"""
+
+    def enqueue(self, subject='رسالة', **kwargs):
+        return outbox.enqueue_email(subject, 'النص', 'student@example.com', **kwargs)
+
+    def failing_connection(self):
+        return mock.Mock(send_messages=mock.Mock(side_effect=SMTPException('server unavailable')))
+
+    def deliver_failing(self):
+        with self.assertLogs('main.outbox', 'WARNING'):
+            return outbox.deliver_messages(outbox.claim_messages(), self.failing_connection())
+
+    def make_due(self):
+        OutboxMessage.objects.filter(status='pending').update(next_attempt_at=timezone.now())
+
+    def test_enqueue_and_deliver(self):
+        message = self.enqueue(html_body='<p>النص</p>')
+        self.assertEqual(message.status, 'pending')
+        self.assertEqual(message.recipients, ['student@example.com'])
+        self.assertEqual(mail.outbox, [])
+
+        self.assertEqual(outbox.deliver_pending(), (1, 0, 0))
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['student@example.com'])
+        self.assertEqual(mail.outbox[0].alternatives[0][1], 'text/html')
+
+        message.refresh_from_db()
+        self.assertEqual((message.status, message.attempts), ('sent', 1))
+        self.assertIsNotNone(message.sent_at)
+        self.assertEqual(outbox.deliver_pending(), (0, 0, 0))
+
+    def test_a_message_is_claimed_once(self):
+        messages = [self.enqueue() for _ in range(3)]
+        claim_message = outbox.claim_message
+        competitor = []
+
+        def racing_claim(message_id, now):
+            # Another worker claims everything between this worker's SELECT and its UPDATEs
+            if not competitor:
+                competitor.append(None)
+                competitor[:] = outbox.claim_messages()
+            return claim_message(message_id, now)
+
+        with mock.patch.object(outbox, 'claim_message', racing_claim):
+            self.assertEqual(outbox.claim_messages(), [])
+        self.assertEqual([message.pk for message in competitor], [message.pk for message in messages])
+        self.assertEqual(set(OutboxMessage.objects.values_list('status', 'attempts')), {('sending', 1)})
+        self.assertEqual(outbox.claim_messages(), [])
+
+    def test_failures_back_off_exponentially(self):
+        message = self.enqueue()
+        for attempt, delay in ((1, 60), (2, 120)):
+            before = timezone.now()
+            self.assertEqual(self.deliver_failing(), (0, 1, 0))
+            message.refresh_from_db()
+            self.assertEqual((message.status, message.attempts), ('pending', attempt))
+            self.assertEqual(message.last_error, 'server unavailable')
+            self.assertGreaterEqual(message.next_attempt_at, before + timedelta(seconds=delay))
+            self.assertLessEqual(message.next_attempt_at, timezone.now() + timedelta(seconds=delay))
+            # Not due before the delay is over
+            self.assertEqual(outbox.claim_messages(), [])
+            self.make_due()
+
+        self.assertEqual(outbox.get_backoff(10), outbox.BACKOFF_MAX)
+        self.assertEqual(outbox.deliver_pending(), (1, 0, 0))
+        message.refresh_from_db()
+        self.assertEqual((message.status, message.attempts, message.last_error), ('sent', 3, ''))
+
+    def test_gives_up_after_max_attempts(self):
+        message = self.enqueue()
+        results = []
+        for _ in range(3):
+            results.append(self.deliver_failing())
+            self.make_due()
+        self.assertEqual(results, [(0, 1, 0), (0, 1, 0), (0, 0, 1)])
+        message.refresh_from_db()
+        self.assertEqual((message.status, message.attempts), ('failed', 3))
+        self.assertEqual(outbox.deliver_pending(), (0, 0, 0))
+        self.assertEqual(mail.outbox, [])
+
+    def test_worker_requeues_stale_messages_and_sends(self):
+        stale = self.enqueue('متوقفة')
+        OutboxMessage.objects.filter(pk=stale.pk).update(
+            status='sending', attempts=1, locked_at=timezone.now() - timedelta(minutes=outbox.STALE_MINUTES + 1)
+        )
+        self.enqueue('جديدة')
+        output = StringIO()
+        call_command('run_outbox_worker', '--once', stdout=output)
+        self.assertIn('Requeued 1 stale messages', output.getvalue())
+        self.assertEqual(sorted(email.subject for email in mail.outbox), ['جديدة', 'متوقفة'])
+
+    def test_worker_requeues_stale_messages_while_it_runs(self):
+        self.enqueue()
+        with mock.patch('main.management.commands.run_outbox_worker.requeue_stale_messages',
+                        return_value=(0, 0)) as requeue:
+            call_command('run_outbox_worker', '--once', stdout=StringIO())
+            self.assertEqual(requeue.call_count, 1)
+            self.enqueue()
+            # At start, then before each of the two polls
+            call_command('run_outbox_worker', '--once', '--housekeeping-interval=0', stdout=StringIO())
+            self.assertEqual(requeue.call_count, 4)
+
+
+class ExportQueueTests(TestCase):
+    """The report export queue and its worker, same claim/retry/purge pattern as the outbox"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.director = User.objects.create_user('director', role='director')
+        Program.objects.create(name='برنامج', description='-', start_date=date(2025, 1, 1),
+                               end_date=date(2025, 12, 31), target_students=10)
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def create_job(self, **fields):
+        return ExportJob.objects.create(kind='reports_excel', data_version='v1', requested_by=self.director,
+                                        **fields)
+
+    @skipUnless(OPENPYXL_AVAILABLE, 'openpyxl is not installed')
+    def test_unchanged_reports_reuse_the_job(self):
+        job = reports.enqueue_export('reports_excel', self.director)
+        self.assertEqual(reports.enqueue_export('reports_excel', self.director), job)
+
+        job = reports.run_export_job(reports.claim_next_job())
+        self.assertEqual(job.status, 'done')
+        self.assertTrue(default_storage.exists(job.file.name))
+        self.assertEqual(reports.enqueue_export('reports_excel', self.director), job)
+
+        # The stored file is gone: render it again
+        default_storage.delete(job.file.name)
+        self.assertNotEqual(reports.enqueue_export('reports_excel', self.director), job)
+
+        # Other data, other report
+        Program.objects.update(name='برنامج معدل')
+        new_job = reports.enqueue_export('reports_excel', self.director)
+        self.assertNotEqual(new_job.data_version, job.data_version)
+
+    def test_a_job_is_claimed_once(self):
+        job = self.create_job()
+        now = timezone.now
+        competitor = []
+
+        def racing_now():
+            # Another worker claims the job between this worker's SELECT and its UPDATE
+            if not competitor:
+                competitor.append(None)
+                competitor[:] = [reports.claim_next_job()]
+            return now()
+
+        with mock.patch.object(reports.timezone, 'now', racing_now):
+            self.assertIsNone(reports.claim_next_job())
+        self.assertEqual(competitor, [job])
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ('running', 1))
+        self.assertIsNone(reports.claim_next_job())
+
+    def test_stale_jobs_are_requeued_until_max_attempts(self):
+        started_at = timezone.now() - timedelta(minutes=reports.STALE_JOB_MINUTES + 1)
+        retried = self.create_job(status='running', started_at=started_at, attempts=1)
+        given_up = self.create_job(status='running', started_at=started_at, attempts=reports.MAX_ATTEMPTS)
+        running = self.create_job(status='running', started_at=timezone.now(), attempts=1)
+
+        self.assertEqual(reports.requeue_stale_jobs(), (1, 1))
+        for job, status in ((retried, 'pending'), (given_up, 'failed'), (running, 'running')):
+            job.refresh_from_db()
+            self.assertEqual(job.status, status)
+        self.assertEqual(reports.claim_next_job(), retried)
+
+    def test_purge_keeps_files_still_in_use(self):
+        name = default_storage.save('exports/reports_excel/v1.xlsx', ContentFile(b'xlsx'))
+        finished_at = timezone.now() - timedelta(days=31)
+        old = self.create_job(status='done', file=name, finished_at=finished_at)
+        recent = self.create_job(status='done', file=name, finished_at=timezone.now())
+
+        self.assertEqual(reports.purge_old_jobs(30), 1)
+        self.assertFalse(ExportJob.objects.filter(pk=old.pk).exists())
+        self.assertTrue(default_storage.exists(name))
+
+        ExportJob.objects.filter(pk=recent.pk).update(finished_at=finished_at)
+        self.assertEqual(reports.purge_old_jobs(30), 1)
+        self.assertFalse(default_storage.exists(name))
+
+    def test_worker_requeues_stale_jobs_while_it_runs(self):
+        self.create_job(status='failed')
+        with mock.patch('director_dashboard.management.commands.run_export_worker.requeue_stale_jobs',
+                        return_value=(0, 0)) as requeue:
+            call_command('run_export_worker', '--once', stdout=StringIO())
+            self.assertEqual(requeue.call_count, 1)
+            call_command('run_export_worker', '--once', '--housekeeping-interval=0', stdout=StringIO())
+            self.assertEqual(requeue.call_count, 3)
+
+
+class UserScopeTests(TestCase):
+    """The cached program/committee of a user never outlives a reassignment"""
+
+    @classmethod
+    def setUpTestData(cls):
+        program = Program.objects.create(name='برنامج', description='-', start_date=date(2025, 1, 1),
+                                         end_date=date(2025, 12, 31), target_students=10)
+        cls.supervisor = User.objects.create_user('supervisor', role='committee_supervisor')
+        cls.other = User.objects.create_user('other', role='committee_supervisor')
+        cls.committee = Committee.objects.create(name='لجنة', program=program, supervisor=cls.supervisor,
+                                                 description='-')
+
+    def setUp(self):
+        cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cache_dir)
+        settings_override = override_settings(CACHES={'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': cache_dir,
+        }})
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def get_committee(self, user):
+        # A fresh instance, as in a new request
+        return get_user_scope(User.objects.get(pk=user.pk)).committee
+
+    def test_reassignment_drops_the_cached_scope(self):
+        self.assertEqual(self.get_committee(self.supervisor), self.committee)
+        with self.assertNumQueries(1):
+            self.assertEqual(self.get_committee(self.supervisor), self.committee)
+
+        self.committee.supervisor = self.other
+        self.committee.save()
+        self.assertIsNone(self.get_committee(self.supervisor))
+        self.assertEqual(self.get_committee(self.other), self.committee)
+
+    def test_scopes_are_not_cached_per_process(self):
+        with self.settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}):
+            self.assertEqual(self.get_committee(self.supervisor), self.committee)
+            # Even a change no signal reports here (made by another process) is seen at once
+            Committee.objects.filter(pk=self.committee.pk).update(supervisor=self.other)
+            self.assertIsNone(self.get_committee(self.supervisor))
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class OverdueSweepTests(TestCase):
+    today = date(2025, 6, 10)
+
+    @classmethod
+    def setUpTestData(cls):
+        manager = User.objects.create_user('manager', role='program_manager')
+        cls.supervisor = User.objects.create_user('supervisor', role='committee_supervisor')
+        cls.program = Program.objects.create(name='برنامج', description='-', start_date=date(2025, 1, 1),
+                                             end_date=date(2025, 12, 31), target_students=10, manager=manager)
+        committee = Committee.objects.create(name='لجنة', program=cls.program, supervisor=cls.supervisor,
+                                             description='-')
+        yesterday = cls.today - timedelta(days=1)
+        cls.expected = {}
+        for title, status, due_date, expected in [
+            ('late', 'not_started', yesterday, 'overdue'),
+            ('late in progress', 'in_progress', cls.today - timedelta(days=5), 'overdue'),
+            ('done', 'completed', yesterday, 'completed'),
+            ('due today', 'not_started', cls.today, 'not_started'),
+            ('due later', 'in_progress', cls.today + timedelta(days=3), 'in_progress'),
+        ]:
+            task = OperationsTask.objects.create(committee=committee, task_type='other', title=title,
+                                                 description='-', status=status, due_date=due_date)
+            cls.expected[task] = expected
+        for title, status, due_date, expected in [
+            ('late', 'pending', yesterday, 'overdue'),
+            ('done', 'completed', yesterday, 'completed'),
+            ('due later', 'pending', cls.today + timedelta(days=1), 'pending'),
+        ]:
+            task = Task.objects.create(program=cls.program, committee=committee, title=title, description='-',
+                                       status=status, due_date=due_date)
+            cls.expected[task] = expected
+        # Without an overdue status: only reported
+        task = CulturalTask.objects.create(committee=committee, task_type='other', title='late', description='-',
+                                           status='pending', due_date=yesterday)
+        cls.expected[task] = 'pending'
+
+    def get_state(self):
+        tasks = {}
+        for task in self.expected:
+            task.refresh_from_db()
+            tasks[task] = (task.status, task.updated_at)
+        notifications = sorted(
+            (model.__name__, notification.user.username, notification.related_task_id)
+            for model in NOTIFICATION_MODELS
+            for notification in model.objects.filter(notification_type='task_overdue').select_related('user')
+        )
+        return tasks, notifications
+
+    def test_sweep(self):
+        version = get_program_version(self.program.pk)
+        sweep = sweep_overdue(today=self.today)
+
+        for task, (status, _) in self.get_state()[0].items():
+            self.assertEqual(status, self.expected[task], f'{type(task).__name__} {task.title}')
+        self.assertEqual(sweep.marked, {'operations': 2, 'program': 1})
+        self.assertEqual(sweep.swept_until, self.today)
+        # The calendars show the new statuses at once
+        self.assertGreater(get_program_version(self.program.pk), version)
+
+        # The first sweep reports what went overdue on the last day
+        self.assertEqual(self.get_state()[1], sorted([
+            ('CulturalNotification', 'supervisor', CulturalTask.objects.get().pk),
+            ('Notification', 'manager', Task.objects.get(title='late').pk),
+            ('OperationsNotification', 'supervisor', OperationsTask.objects.get(title='late').pk),
+        ]))
+
+    def test_sweeping_again_changes_nothing(self):
+        sweep_overdue(today=self.today)
+        tasks, notifications = self.get_state()
+        self.assertIsNone(sweep_overdue(today=self.today))
+        self.assertEqual(self.get_state(), (tasks, notifications))
+        self.assertEqual(OverdueSweep.objects.count(), 1)
+
+        # The next day only what was due today goes overdue and is reported
+        due_today = OperationsTask.objects.get(title='due today')
+        sweep = sweep_overdue(today=self.today + timedelta(days=1))
+        self.assertEqual((sweep.marked, sweep.notified), ({'operations': 1}, {'operations': 1}))
+        due_today.refresh_from_db()
+        self.assertEqual(due_today.status, 'overdue')
+        self.assertEqual(self.get_state()[1], sorted(
+            notifications + [('OperationsNotification', 'supervisor', due_today.pk)]
+        ))
+
+
+class RunProcfileTests(SimpleTestCase):
+    def test_workers_are_restarted_until_the_web_process_exits(self):
+        folder = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, folder)
+        starts = os.path.join(folder, 'starts')
+        procfile = os.path.join(folder, 'Procfile')
+        with open(procfile, 'w', encoding='utf-8') as file:
+            file.write(f'web: {sys.executable} -c "import time; time.sleep(2.5); exit(3)"\n'
+                       f"worker: {sys.executable} -c \"open('{starts}', 'a').write('.'); exit(1)\"\n")
+
+        output, errors = StringIO(), StringIO()
+        with self.assertRaises(SystemExit) as exit_:
+            call_command('run_procfile', procfile=procfile, stdout=output, stderr=errors)
+        self.assertEqual(exit_.exception.code, 3)
+        # Started, then restarted after 1s and 2s
+        with open(starts, encoding='utf-8') as file:
+            self.assertEqual(file.read(), '..')
+        self.assertIn('worker exited with 1, restarting it in 1s', errors.getvalue())
+        self.assertIn('web exited with 3', errors.getvalue())
+
+
+@skipUnless(OPENPYXL_AVAILABLE, 'openpyxl is not installed')
+class ExcelExportTests(SimpleTestCase):
+    """The workbook streamed to the client by a helper thread"""
+
+    def get_sheets(self, rows=3000):
+        rng = random.Random(20250101)
+        return [
+            ExcelSheet('الأولى', ['الاسم', 'الرقم', 'التاريخ'],
+                       ((f'{rng.getrandbits(64):016x}', i, date(2025, 1, 1) + timedelta(days=i % 365))
+                        for i in range(rows))),
+            ExcelSheet('الثانية', ['البرنامج'], [('برنامج',), ('آخر',)]),
+        ]
+
+    def get_export_threads(self):
+        return [thread for thread in threading.enumerate() if thread.name == 'excel-export']
+
+    def test_round_trip(self):
+        # Small chunks and a short queue: the producer has to wait for the consumer
+        with mock.patch('main.exports.STREAM_CHUNK_SIZE', 1024), mock.patch('main.exports.STREAM_QUEUE_SIZE', 1):
+            chunks = list(stream_workbook(self.get_sheets()))
+        self.assertGreater(len(chunks), 1)
+
+        workbook = load_workbook(BytesIO(b''.join(chunks)), read_only=True)
+        self.assertEqual(workbook.sheetnames, ['الأولى', 'الثانية'])
+        rows = list(workbook['الأولى'].values)
+        self.assertEqual(len(rows), 3001)
+        self.assertEqual(rows[0], ('الاسم', 'الرقم', 'التاريخ'))
+        self.assertEqual(rows[-1][1:], (2999, datetime(2025, 3, 21)))
+        self.assertEqual(list(workbook['الثانية'].values), [('البرنامج',), ('برنامج',), ('آخر',)])
+        workbook.close()
+
+    def test_closing_early_stops_the_thread(self):
+        unraisable = mock.Mock()
+        with mock.patch('main.exports.STREAM_CHUNK_SIZE', 1024), mock.patch('main.exports.STREAM_QUEUE_SIZE', 1), \
+                mock.patch.object(sys, 'unraisablehook', unraisable):
+            temp_files = len(ALL_TEMP_FILES)
+            stream = stream_workbook(self.get_sheets())
+            next(stream)
+            threads = self.get_export_threads()
+            self.assertEqual(len(threads), 1)
+            # What the server does when the client disconnects
+            stream.close()
+            threads[0].join(5)
+            self.assertFalse(threads[0].is_alive())
+            self.assertEqual(len(ALL_TEMP_FILES), temp_files)
+            gc.collect()
+        # The abandoned zip file and sheets are closed quietly
+        unraisable.assert_not_called()
@@ -23,6 +23,7 @@ urlpatterns = [
 
     path('schedule/export/ics/', views.export_calendar_ics, name='export_calendar_ics'),
     path('schedule/export/excel/', views.export_calendar_excel, name='export_calendar_excel'),
+    path('calendar/<int:program_id>/feed.ics', views.calendar_feed_ics, name='calendar_feed_ics'),
 
     path('list/', views.calendar_list_view, name='calendar_list'),
 
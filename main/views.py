@@ -1,12 +1,15 @@
 from django.shortcuts import render
 from director_dashboard.models import Program, Committee, Student
 from accounts.models import User
+from accounts.activity import log_activity
 
 from django.shortcuts import render, redirect
 from director_dashboard.models import Program, Committee, Student
 from accounts.models import User
 from director_dashboard.models import AlbumPhoto
+from .public_cache import cache_public_page, get_fragment_cache_timeout, get_public_counters, get_public_version
 
+@cache_public_page
 def home(request):
     # Check if user is authenticated
     if request.user.is_authenticated:
@@ -30,6 +33,7 @@ def home(request):
             else:
                 return redirect('home')
 
+    # Only evaluated when the template's photo fragment isn't cached
     recent_photos = AlbumPhoto.objects.select_related('album').filter(
         album__is_active=True
     ).order_by('-created_at')[:10]
@@ -37,11 +41,10 @@ def home(request):
 
     # If not authenticated, show the public homepage
     context = {
-        'total_programs': Program.objects.count(),
-        'total_committees': Committee.objects.count(),
-        'total_students': Student.objects.count(),
-        'total_users': User.objects.count(),
+        **get_public_counters(),
         'recent_photos': recent_photos,
+        'public_version': get_public_version(),
+        'fragment_timeout': get_fragment_cache_timeout(),
     }
     return render(request, 'main/home.html', context)
 
@@ -63,6 +66,7 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.db.models import Q
+from django.urls import reverse
 from django.utils import timezone
 from datetime import datetime, timedelta
 from calendar import monthrange
@@ -71,6 +75,10 @@ from accounts.models import User, UserActivity
 from director_dashboard.models import Program, Committee
 from .models import ScheduleEvent, EventAttendance
 from .forms import ScheduleEventForm, EventAttendanceForm, ProgramSelectionForm
+from .calendar_feed import CalendarFeed
+from .scope import get_user_scope
+from .ics import (feed_events, format_utc, get_feed_state, get_feed_token, get_feed_user,
+                  get_subscription_feed, item_event, stream_calendar)
 from pm_dashboard.models import Task, Activity, StudentAttendance
 from cultural_committee_dashboard.models import CulturalTask, CulturalReport,TaskSession
 from operations_committee_dashboard.models import OperationsTask
@@ -79,18 +87,31 @@ from sharia_committee_dashboard.models import ShariaTask, FamilyCompetition
 from sports_committee_dashboard.models import SportsTask, Match
 
 
-def get_client_ip(request):
-    x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
-    if x_forwarded_for:
-        ip = x_forwarded_for.split(',')[0]
-    else:
-        ip = request.META.get('REMOTE_ADDR')
-    return ip
-
-
-def is_task_of_type(occ, task_type):
-    """Safely check if occurrence is of specific type"""
-    return 'type' in occ and occ['type'] == task_type
+# Calendar cell lists, keyed by feed item type; every task type shares one list
+CALENDAR_DAY_BUCKETS = {
+    'schedule_event': 'events',
+    'activity': 'activities',
+    'task_session': 'task_sessions',
+    'lecture': 'lectures',
+    'family_competition': 'family_competitions',
+    'match': 'matches',
+}
+
+
+def build_calendar_day(day_date, items, **extra):
+    """Split one day's feed items into the lists templates/schedule/calendar.html reads"""
+    day_data = {bucket: [] for bucket in CALENDAR_DAY_BUCKETS.values()}
+    day_data['task_occurrences'] = []
+    for item in items:
+        day_data[CALENDAR_DAY_BUCKETS.get(item.type, 'task_occurrences')].append(item)
+
+    day_data.update({
+        'date': day_date,
+        'day': day_date.day,
+        'total_events': len(items),
+    })
+    day_data.update(extra)
+    return day_data
 
 
 @login_required
@@ -119,20 +140,18 @@ def schedule_calendar(request, program_id=None):
 
     # Program Manager
     elif user.role == 'program_manager':
-        try:
-            program = Program.objects.get(manager=user)
-        except Program.DoesNotExist:
+        program = get_user_scope(user).program
+        if program is None:
             messages.error(request, 'لم يتم تعيين برنامج لك بعد')
             return redirect('home')
 
     # Committee Supervisor
     elif user.role == 'committee_supervisor':
-        try:
-            committee = Committee.objects.get(supervisor=user)
-            program = committee.program
-        except Committee.DoesNotExist:
+        committee = get_user_scope(user).committee
+        if committee is None:
             messages.error(request, 'لم يتم تعيين لجنة لك بعد')
             return redirect('home')
+        program = committee.program
 
     else:
         messages.error(request, 'ليس لديك صلاحية للوصول إلى هذه الصفحة')
@@ -215,895 +234,44 @@ def schedule_calendar(request, program_id=None):
 
         start_date = week_start
         end_date = week_end
+        period = f'{year}-W{week_number:02d}'
 
     else:
         # Monthly view logic
         start_date = datetime(year, month, 1).date()
         end_date = datetime(year, month, monthrange(year, month)[1]).date()
+        period = f'{year}-{month:02d}'
+
+    # One UNION ALL query for every source shown on the calendar,
+    # cached per period until something on the program's calendar changes
+    feed = CalendarFeed(
+        program, start_date, end_date,
+        filters=request.GET,
+        user=user,
+        committee=committee if user.role == 'committee_supervisor' else None,
+        period=period,
+    )
+    items_by_day = feed.by_day()
 
-    event_type_filter = request.GET.get('event_type', '')  # Now this is the unified filter
-    status_filter = request.GET.get('status', '')
-    priority_filter = request.GET.get('priority', '')
-    committee_filter = request.GET.get('committee', '')
-
-    # Get all events and tasks for the period
-    events = ScheduleEvent.objects.filter(
-        program=program,
-        start_date__gte=start_date,
-        start_date__lte=end_date
-    ).select_related('committee', 'created_by').order_by('start_date', 'start_time')
-
-    if status_filter:
-        events = events.filter(status=status_filter)
-    if priority_filter:
-        events = events.filter(priority=priority_filter)
-    if committee_filter:
-        events = events.filter(committee_id=committee_filter)
-
-    # Get regular tasks - now handling recurring tasks
-    tasks = Task.objects.filter(
-        program=program
-    ).select_related('committee')
-
-    if committee_filter:
-        tasks = tasks.filter(committee_id=committee_filter)
-
-    # Process recurring tasks
-    task_occurrences = {}  # {date: [(task, is_start, is_end, group_id), ...]}
-
-    for task in tasks:
-        if task.is_recurring:
-            # IMPORTANT: Only get occurrences within the view's date range
-            # Don't process if task hasn't started yet
-            task_start = task.start_date or task.due_date
-            if task_start > end_date:
-                continue
-
-            # Don't process if task has ended
-            if task.recurrence_end_date and task.recurrence_end_date < start_date:
-                continue
-
-            # Get consecutive day groups for this task within the view range
-            groups = task.get_consecutive_day_groups(start_date, end_date)
-            for group_idx, (group_start, group_end) in enumerate(groups):
-                group_id = f"task_{task.id}_group_{group_idx}"
-
-                # Add all dates in this group
-                current = group_start
-                while current <= group_end:
-                    if start_date <= current <= end_date:
-                        if current not in task_occurrences:
-                            task_occurrences[current] = []
-
-                        task_occurrences[current].append({
-                            'task': task,
-                            'is_start': current == group_start,
-                            'is_end': current == group_end,
-                            'group_id': group_id,
-                            'group_start': group_start,
-                            'group_end': group_end,
-                            'span_days': (group_end - group_start).days + 1
-                        })
-                    current += timedelta(days=1)
-        else:
-            # Non-recurring task
-            if start_date <= task.due_date <= end_date:
-                if task.due_date not in task_occurrences:
-                    task_occurrences[task.due_date] = []
-                task_occurrences[task.due_date].append({
-                    'task': task,
-                    'is_start': True,
-                    'is_end': True,
-                    'group_id': f"task_{task.id}_single",
-                    'group_start': task.due_date,
-                    'group_end': task.due_date,
-                    'span_days': 1
-                })
-
-    cultural_tasks = CulturalTask.objects.filter(
-        committee__program=program
-    ).select_related('committee')
-
-    if committee_filter:
-        cultural_tasks = cultural_tasks.filter(committee_id=committee_filter)
-
-    # Process recurring cultural tasks
-    cultural_task_occurrences = {}  # {date: [(cultural_task, is_start, is_end, group_id), ...]}
-
-    for cultural_task in cultural_tasks:
-        if cultural_task.is_recurring:
-            # IMPORTANT: Only get occurrences within the view's date range
-            # Don't process if task hasn't started yet
-            cultural_task_start = cultural_task.start_date or cultural_task.due_date
-            if cultural_task_start > end_date:
-                continue
-
-            # Don't process if task has ended
-            if cultural_task.recurrence_end_date and cultural_task.recurrence_end_date < start_date:
-                continue
-
-            # Get consecutive day groups for this task within the view range
-            groups = cultural_task.get_consecutive_day_groups(start_date, end_date)
-            for group_idx, (group_start, group_end) in enumerate(groups):
-                group_id = f"cultural_task_{cultural_task.id}_group_{group_idx}"
-
-                # Add all dates in this group
-                current = group_start
-                while current <= group_end:
-                    if start_date <= current <= end_date:
-                        if current not in cultural_task_occurrences:
-                            cultural_task_occurrences[current] = []
-
-                        cultural_task_occurrences[current].append({
-                            'task': cultural_task,
-                            'is_start': current == group_start,
-                            'is_end': current == group_end,
-                            'group_id': group_id,
-                            'group_start': group_start,
-                            'group_end': group_end,
-                            'span_days': (group_end - group_start).days + 1,
-                            'type': 'cultural_task'  # Add type identifier
-                        })
-                    current += timedelta(days=1)
-        else:
-            # Non-recurring cultural task
-            if start_date <= cultural_task.due_date <= end_date:
-                if cultural_task.due_date not in cultural_task_occurrences:
-                    cultural_task_occurrences[cultural_task.due_date] = []
-                cultural_task_occurrences[cultural_task.due_date].append({
-                    'task': cultural_task,
-                    'is_start': True,
-                    'is_end': True,
-                    'group_id': f"cultural_task_{cultural_task.id}_single",
-                    'group_start': cultural_task.due_date,
-                    'group_end': cultural_task.due_date,
-                    'span_days': 1,
-                    'type': 'cultural_task'  # Add type identifier
-                })
-
-    # Combine all task occurrences
-    all_task_occurrences = {}
-    for date, occurrences in task_occurrences.items():
-        if date not in all_task_occurrences:
-            all_task_occurrences[date] = []
-        all_task_occurrences[date].extend(occurrences)
-
-    for date, occurrences in cultural_task_occurrences.items():
-        if date not in all_task_occurrences:
-            all_task_occurrences[date] = []
-        all_task_occurrences[date].extend(occurrences)
-
-    activities = Activity.objects.filter(
-        program=program,
-        date__lte=end_date,
-        date__gte=start_date
-    ).select_related('committee', 'created_by')
-
-    cultural_tasks_non_recurring = CulturalTask.objects.filter(
-        committee__program=program,
-        is_recurring=False,
-        due_date__lte=end_date,
-        due_date__gte=start_date
-    ).select_related('committee')
-
-    task_sessions = TaskSession.objects.filter(
-        task__committee__program=program,
-        date__lte=end_date,
-        date__gte=start_date
-    ).select_related('task', 'task__committee')
-
-    operations_tasks_all = OperationsTask.objects.filter(
-        committee__program=program
-    ).select_related('committee')
-
-    if committee_filter:
-        operations_tasks_all = operations_tasks_all.filter(committee_id=committee_filter)
-
-    # Process recurring operations tasks
-    operations_task_occurrences = {}
-
-    for operations_task in operations_tasks_all:
-        if operations_task.is_recurring:
-            operations_task_start = operations_task.start_date or operations_task.due_date
-            if operations_task_start > end_date:
-                continue
-
-            if operations_task.recurrence_end_date and operations_task.recurrence_end_date < start_date:
-                continue
-
-            groups = operations_task.get_consecutive_day_groups(start_date, end_date)
-            for group_idx, (group_start, group_end) in enumerate(groups):
-                group_id = f"operations_task_{operations_task.id}_group_{group_idx}"
-
-                current = group_start
-                while current <= group_end:
-                    if start_date <= current <= end_date:
-                        if current not in operations_task_occurrences:
-                            operations_task_occurrences[current] = []
-
-                        operations_task_occurrences[current].append({
-                            'task': operations_task,
-                            'is_start': current == group_start,
-                            'is_end': current == group_end,
-                            'group_id': group_id,
-                            'group_start': group_start,
-                            'group_end': group_end,
-                            'span_days': (group_end - group_start).days + 1,
-                            'type': 'operations_task'
-                        })
-                    current += timedelta(days=1)
-        else:
-            if start_date <= operations_task.due_date <= end_date:
-                if operations_task.due_date not in operations_task_occurrences:
-                    operations_task_occurrences[operations_task.due_date] = []
-                operations_task_occurrences[operations_task.due_date].append({
-                    'task': operations_task,
-                    'is_start': True,
-                    'is_end': True,
-                    'group_id': f"operations_task_{operations_task.id}_single",
-                    'group_start': operations_task.due_date,
-                    'group_end': operations_task.due_date,
-                    'span_days': 1,
-                    'type': 'operations_task'
-                })
-
-    # Add operations task occurrences to all_task_occurrences
-    for date, occurrences in operations_task_occurrences.items():
-        if date not in all_task_occurrences:
-            all_task_occurrences[date] = []
-        all_task_occurrences[date].extend(occurrences)
-
-    # Non-recurring operations tasks for display
-    operations_tasks = OperationsTask.objects.filter(
-        committee__program=program,
-        is_recurring=False,
-        due_date__lte=end_date,
-        due_date__gte=start_date
-    ).select_related('committee')
-
-    scientific_tasks_all = ScientificTask.objects.filter(
-        committee__program=program
-    ).select_related('committee')
-
-    if committee_filter:
-        scientific_tasks_all = scientific_tasks_all.filter(committee_id=committee_filter)
-
-    # Process recurring scientific tasks
-    scientific_task_occurrences = {}  # {date: [(scientific_task, is_start, is_end, group_id), ...]}
-
-    for scientific_task in scientific_tasks_all:
-        if scientific_task.is_recurring:
-            # IMPORTANT: Only get occurrences within the view's date range
-            # Don't process if task hasn't started yet
-            scientific_task_start = scientific_task.start_date or scientific_task.due_date
-            if scientific_task_start > end_date:
-                continue
-
-            # Don't process if task has ended
-            if scientific_task.recurrence_end_date and scientific_task.recurrence_end_date < start_date:
-                continue
-
-            # Get consecutive day groups for this task within the view range
-            groups = scientific_task.get_consecutive_day_groups(start_date, end_date)
-            for group_idx, (group_start, group_end) in enumerate(groups):
-                group_id = f"scientific_task_{scientific_task.id}_group_{group_idx}"
-
-                # Add all dates in this group
-                current = group_start
-                while current <= group_end:
-                    if start_date <= current <= end_date:
-                        if current not in scientific_task_occurrences:
-                            scientific_task_occurrences[current] = []
-
-                        scientific_task_occurrences[current].append({
-                            'task': scientific_task,
-                            'is_start': current == group_start,
-                            'is_end': current == group_end,
-                            'group_id': group_id,
-                            'group_start': group_start,
-                            'group_end': group_end,
-                            'span_days': (group_end - group_start).days + 1,
-                            'type': 'scientific_task'  # Add type identifier
-                        })
-                    current += timedelta(days=1)
-        else:
-            # Non-recurring scientific task
-            if start_date <= scientific_task.due_date <= end_date:
-                if scientific_task.due_date not in scientific_task_occurrences:
-                    scientific_task_occurrences[scientific_task.due_date] = []
-                scientific_task_occurrences[scientific_task.due_date].append({
-                    'task': scientific_task,
-                    'is_start': True,
-                    'is_end': True,
-                    'group_id': f"scientific_task_{scientific_task.id}_single",
-                    'group_start': scientific_task.due_date,
-                    'group_end': scientific_task.due_date,
-                    'span_days': 1,
-                    'type': 'scientific_task'  # Add type identifier
-                })
-
-    # Add scientific task occurrences to all_task_occurrences
-    for date, occurrences in scientific_task_occurrences.items():
-        if date not in all_task_occurrences:
-            all_task_occurrences[date] = []
-        all_task_occurrences[date].extend(occurrences)
-
-    # Update the scientific_tasks queryset to only get non-recurring tasks for display
-    scientific_tasks = ScientificTask.objects.filter(
-        committee__program=program,
-        is_recurring=False,  # Only non-recurring tasks
-        due_date__lte=end_date,
-        due_date__gte=start_date
-    ).select_related('committee')
-
-    lectures = Lecture.objects.filter(
-        committee__program=program,
-        date__lte=end_date,
-        date__gte=start_date
-    ).select_related('committee', 'created_by')
-
-    sharia_tasks_all = ShariaTask.objects.filter(
-        committee__program=program
-    ).select_related('committee')
-
-    if committee_filter:
-        sharia_tasks_all = sharia_tasks_all.filter(committee_id=committee_filter)
-
-    # Process recurring sharia tasks
-    sharia_task_occurrences = {}  # {date: [(sharia_task, is_start, is_end, group_id), ...]}
-
-    for sharia_task in sharia_tasks_all:
-        if sharia_task.is_recurring:
-            # IMPORTANT: Only get occurrences within the view's date range
-            # Don't process if task hasn't started yet
-            sharia_task_start = sharia_task.start_date or sharia_task.due_date
-            if sharia_task_start > end_date:
-                continue
-
-            # Don't process if task has ended
-            if sharia_task.recurrence_end_date and sharia_task.recurrence_end_date < start_date:
-                continue
-
-            # Get consecutive day groups for this task within the view range
-            groups = sharia_task.get_consecutive_day_groups(start_date, end_date)
-            for group_idx, (group_start, group_end) in enumerate(groups):
-                group_id = f"sharia_task_{sharia_task.id}_group_{group_idx}"
-
-                # Add all dates in this group
-                current = group_start
-                while current <= group_end:
-                    if start_date <= current <= end_date:
-                        if current not in sharia_task_occurrences:
-                            sharia_task_occurrences[current] = []
-
-                        sharia_task_occurrences[current].append({
-                            'task': sharia_task,
-                            'is_start': current == group_start,
-                            'is_end': current == group_end,
-                            'group_id': group_id,
-                            'group_start': group_start,
-                            'group_end': group_end,
-                            'span_days': (group_end - group_start).days + 1,
-                            'type': 'sharia_task'  # Add type identifier
-                        })
-                    current += timedelta(days=1)
-        else:
-            # Non-recurring sharia task
-            if start_date <= sharia_task.due_date <= end_date:
-                if sharia_task.due_date not in sharia_task_occurrences:
-                    sharia_task_occurrences[sharia_task.due_date] = []
-                sharia_task_occurrences[sharia_task.due_date].append({
-                    'task': sharia_task,
-                    'is_start': True,
-                    'is_end': True,
-                    'group_id': f"sharia_task_{sharia_task.id}_single",
-                    'group_start': sharia_task.due_date,
-                    'group_end': sharia_task.due_date,
-                    'span_days': 1,
-                    'type': 'sharia_task'  # Add type identifier
-                })
-
-    for date, occurrences in sharia_task_occurrences.items():
-        if date not in all_task_occurrences:
-            all_task_occurrences[date] = []
-        all_task_occurrences[date].extend(occurrences)
-
-    sharia_tasks_non_recurring = ShariaTask.objects.filter(
-        committee__program=program,
-        is_recurring=False,
-        due_date__lte=end_date,
-        due_date__gte=start_date
-    ).select_related('committee')
-
-    family_competitions = FamilyCompetition.objects.filter(
-        committee__program=program,
-        start_date__lte=end_date,
-        end_date__gte=start_date
-    ).select_related('committee')
-
-    sports_tasks = SportsTask.objects.filter(
-        committee__program=program
-    ).select_related('committee')
-
-    if committee_filter:
-        sports_tasks = sports_tasks.filter(committee_id=committee_filter)
-
-    # Process recurring sports tasks
-    sports_task_occurrences = {}  # {date: [(sports_task, is_start, is_end, group_id), ...]}
-
-    for sports_task in sports_tasks:
-        if sports_task.is_recurring:
-            # IMPORTANT: Only get occurrences within the view's date range
-            # Don't process if task hasn't started yet
-            sports_task_start = sports_task.start_date or sports_task.due_date
-            if sports_task_start > end_date:
-                continue
-
-            # Don't process if task has ended
-            if sports_task.recurrence_end_date and sports_task.recurrence_end_date < start_date:
-                continue
-
-            # Get consecutive day groups for this task within the view range
-            groups = sports_task.get_consecutive_day_groups(start_date, end_date)
-            for group_idx, (group_start, group_end) in enumerate(groups):
-                group_id = f"sports_task_{sports_task.id}_group_{group_idx}"
-
-                # Add all dates in this group
-                current = group_start
-                while current <= group_end:
-                    if start_date <= current <= end_date:
-                        if current not in sports_task_occurrences:
-                            sports_task_occurrences[current] = []
-
-                        sports_task_occurrences[current].append({
-                            'task': sports_task,
-                            'is_start': current == group_start,
-                            'is_end': current == group_end,
-                            'group_id': group_id,
-                            'group_start': group_start,
-                            'group_end': group_end,
-                            'span_days': (group_end - group_start).days + 1,
-                            'type': 'sports_task'  # Add type identifier
-                        })
-                    current += timedelta(days=1)
-        else:
-            # Non-recurring sports task
-            if start_date <= sports_task.due_date <= end_date:
-                if sports_task.due_date not in sports_task_occurrences:
-                    sports_task_occurrences[sports_task.due_date] = []
-                sports_task_occurrences[sports_task.due_date].append({
-                    'task': sports_task,
-                    'is_start': True,
-                    'is_end': True,
-                    'group_id': f"sports_task_{sports_task.id}_single",
-                    'group_start': sports_task.due_date,
-                    'group_end': sports_task.due_date,
-                    'span_days': 1,
-                    'type': 'sports_task'  # Add type identifier
-                })
-
-    for date, occurrences in sports_task_occurrences.items():
-        if date not in all_task_occurrences:
-            all_task_occurrences[date] = []
-        all_task_occurrences[date].extend(occurrences)
-
-    matches = Match.objects.filter(
-        committee__program=program,
-        date__lte=end_date,
-        date__gte=start_date
-    ).select_related('committee', 'created_by')
-
-    # ========== APPLY STATUS FILTER TO ALL TYPES THAT HAVE STATUS FIELD ==========
-    if status_filter:
-        # Models with status field: ScheduleEvent, Task, CulturalTask, OperationsTask,
-        # ScientificTask, ShariaTask, SportsTask, Lecture, Match, FamilyCompetition
-        events = events.filter(status=status_filter)
-        tasks = tasks.filter(status=status_filter)
-        cultural_tasks = cultural_tasks.filter(status=status_filter)
-        operations_tasks_all = operations_tasks_all.filter(status=status_filter)
-        scientific_tasks_all = scientific_tasks_all.filter(status=status_filter)
-        sharia_tasks_all = sharia_tasks_all.filter(status=status_filter)
-        sports_tasks = sports_tasks.filter(status=status_filter)
-        lectures = lectures.filter(status=status_filter)
-        matches = matches.filter(status=status_filter)
-        family_competitions = family_competitions.filter(status=status_filter)
-
-        for date in list(all_task_occurrences.keys()):
-            filtered_occurrences = []
-            for occ in all_task_occurrences[date]:
-                # FIX: Add safety check for 'type' key
-                task_type = occ.get('type', '')
-
-                if task_type == 'regular_task' and occ['task'].status == status_filter:
-                    filtered_occurrences.append(occ)
-                elif task_type == 'cultural_task' and occ['task'].status == status_filter:
-                    filtered_occurrences.append(occ)
-                elif task_type == 'scientific_task' and occ['task'].status == status_filter:
-                    filtered_occurrences.append(occ)
-                elif task_type == 'sharia_task' and occ['task'].status == status_filter:
-                    filtered_occurrences.append(occ)
-                elif task_type == 'sports_task' and occ['task'].status == status_filter:
-                    filtered_occurrences.append(occ)
-                elif task_type == 'operations_task' and occ['task'].status == status_filter:
-                    filtered_occurrences.append(occ)
-            if filtered_occurrences:
-                all_task_occurrences[date] = filtered_occurrences
-            else:
-                del all_task_occurrences[date]
-
-    # ========== APPLY PRIORITY FILTER TO ALL TYPES THAT HAVE PRIORITY FIELD ==========
-    if priority_filter:
-        # Models with priority field: ScheduleEvent, Task, OperationsTask
-        events = events.filter(priority=priority_filter)
-        tasks = tasks.filter(priority=priority_filter)
-        cultural_tasks_non_recurring = cultural_tasks_non_recurring.filter(priority=priority_filter)
-        operations_tasks_all = operations_tasks_all.filter(priority=priority_filter)
-        scientific_tasks_all = scientific_tasks_all.filter(priority=priority_filter)
-
-        for date in list(all_task_occurrences.keys()):
-            filtered_occurrences = []
-            for occ in all_task_occurrences[date]:
-                # FIX: Use .get() method for safe access
-                task_type = occ.get('type', '')
-
-                if task_type == 'regular_task' and occ['task'].priority == priority_filter:
-                    filtered_occurrences.append(occ)
-                elif task_type == 'cultural_task' and occ['task'].priority == priority_filter:
-                    filtered_occurrences.append(occ)
-                elif task_type == 'sharia_task' and occ['task'].priority == priority_filter:
-                    filtered_occurrences.append(occ)
-                elif task_type == 'scientific_task' and occ['task'].priority == priority_filter:
-                    filtered_occurrences.append(occ)
-                elif task_type == 'sports_task' and occ['task'].priority == priority_filter:
-                    filtered_occurrences.append(occ)
-                elif task_type == 'operations_task' and occ['task'].priority == priority_filter:
-                    filtered_occurrences.append(occ)
-            if filtered_occurrences:
-                all_task_occurrences[date] = filtered_occurrences
-            else:
-                del all_task_occurrences[date]
-
-    # ========== APPLY COMMITTEE FILTER TO ALL EVENT TYPES ==========
-    if committee_filter:
-        events = events.filter(committee_id=committee_filter)
-        tasks = tasks.filter(committee_id=committee_filter)
-        activities = activities.filter(committee_id=committee_filter)
-        cultural_tasks = cultural_tasks.filter(committee_id=committee_filter)
-        task_sessions = task_sessions.filter(task__committee_id=committee_filter)
-        operations_tasks_all = operations_tasks_all.filter(committee_id=committee_filter)
-        scientific_tasks_all = scientific_tasks_all.filter(committee_id=committee_filter)
-        lectures = lectures.filter(committee_id=committee_filter)
-        sharia_tasks_all = sharia_tasks_all.filter(committee_id=committee_filter)
-        family_competitions = family_competitions.filter(committee_id=committee_filter)
-        sports_tasks = sports_tasks.filter(committee_id=committee_filter)
-        matches = matches.filter(committee_id=committee_filter)
-
-        for date in list(all_task_occurrences.keys()):
-            filtered_occurrences = []
-            for occ in all_task_occurrences[date]:
-                # FIX: Use .get() method for safe access
-                task_type = occ.get('type', '')
-
-                if task_type == 'regular_task' and occ['task'].committee_id == int(committee_filter):
-                    filtered_occurrences.append(occ)
-                elif task_type == 'cultural_task' and occ['task'].committee_id == int(committee_filter):
-                    filtered_occurrences.append(occ)
-                elif task_type == 'sharia_task' and occ['task'].committee_id == int(committee_filter):
-                    filtered_occurrences.append(occ)
-                elif task_type == 'scientific_task' and occ['task'].committee_id == int(committee_filter):
-                    filtered_occurrences.append(occ)
-                elif task_type == 'sports_task' and occ['task'].committee_id == int(committee_filter):
-                    filtered_occurrences.append(occ)
-                elif task_type == 'operations_task' and occ['task'].committee_id == int(committee_filter):
-                    filtered_occurrences.append(occ)
-            if filtered_occurrences:
-                all_task_occurrences[date] = filtered_occurrences
-            else:
-                del all_task_occurrences[date]
-
-    if event_type_filter:
-        if event_type_filter == 'schedule_event':
-            # Keep only ScheduleEvents, clear all others
-            activities = activities.none()
-            cultural_tasks = cultural_tasks.none()
-            task_sessions = task_sessions.none()
-            operations_tasks = operations_tasks.none()
-            scientific_tasks = scientific_tasks.none()
-            lectures = lectures.none()
-            sharia_tasks_all = sharia_tasks_all.none()
-            family_competitions = family_competitions.none()
-            sports_tasks = sports_tasks.none()
-            matches = matches.none()
-            task_occurrences = {}
-        elif event_type_filter == 'task':
-            # Keep only Tasks
-            events = events.none()
-            activities = activities.none()
-            cultural_tasks = cultural_tasks.none()
-            task_sessions = task_sessions.none()
-            operations_tasks = operations_tasks.none()
-            scientific_tasks = scientific_tasks.none()
-            lectures = lectures.none()
-            sharia_tasks_all = sharia_tasks_all.none()
-            family_competitions = family_competitions.none()
-            sports_tasks = sports_tasks.none()
-            matches = matches.none()
-            for date in list(all_task_occurrences.keys()):
-                filtered_occurrences = []
-                for occ in all_task_occurrences[date]:
-                    # FIX: Use is_task_of_type function
-                    if is_task_of_type(occ, 'regular_task'):
-                        filtered_occurrences.append(occ)
-                if filtered_occurrences:
-                    all_task_occurrences[date] = filtered_occurrences
-                else:
-                    del all_task_occurrences[date]
-        elif event_type_filter == 'activity':
-            # Keep only Activities
-            events = events.none()
-            cultural_tasks = cultural_tasks.none()
-            task_sessions = task_sessions.none()
-            operations_tasks = operations_tasks.none()
-            scientific_tasks = scientific_tasks.none()
-            lectures = lectures.none()
-            sharia_tasks_all = sharia_tasks_all.none()
-            family_competitions = family_competitions.none()
-            sports_tasks = sports_tasks.none()
-            matches = matches.none()
-            task_occurrences = {}
-        elif event_type_filter == 'cultural_task':
-            # Keep only Cultural Tasks
-            events = events.none()
-            activities = activities.none()
-            task_sessions = task_sessions.none()
-            operations_tasks = operations_tasks.none()
-            scientific_tasks = scientific_tasks.none()
-            lectures = lectures.none()
-            sharia_tasks_all = sharia_tasks_all.none()
-            family_competitions = family_competitions.none()
-            sports_tasks = sports_tasks.none()
-            matches = matches.none()
-            for date in list(all_task_occurrences.keys()):
-                filtered_occurrences = []
-                for occ in all_task_occurrences[date]:
-                    if is_task_of_type(occ, 'cultural_task'):
-                        filtered_occurrences.append(occ)
-                if filtered_occurrences:
-                    all_task_occurrences[date] = filtered_occurrences
-                else:
-                    del all_task_occurrences[date]
-        elif event_type_filter == 'task_session':
-            # Keep only Task Sessions
-            events = events.none()
-            activities = activities.none()
-            cultural_tasks = cultural_tasks.none()
-            operations_tasks = operations_tasks.none()
-            scientific_tasks = scientific_tasks.none()
-            lectures = lectures.none()
-            sharia_tasks_all = sharia_tasks_all.none()
-            family_competitions = family_competitions.none()
-            sports_tasks = sports_tasks.none()
-            matches = matches.none()
-            task_occurrences = {}
-        elif event_type_filter == 'operations_task':
-            # Keep only Operations Tasks
-            events = events.none()
-            activities = activities.none()
-            cultural_tasks = cultural_tasks.none()
-            task_sessions = task_sessions.none()
-            scientific_tasks = scientific_tasks.none()
-            lectures = lectures.none()
-            sharia_tasks_all = sharia_tasks_all.none()
-            family_competitions = family_competitions.none()
-            sports_tasks = sports_tasks.none()
-            matches = matches.none()
-            # Filter all_task_occurrences to only include operations tasks
-            for date in list(all_task_occurrences.keys()):
-                filtered_occurrences = []
-                for occ in all_task_occurrences[date]:
-                    if is_task_of_type(occ, 'operations_task'):
-                        filtered_occurrences.append(occ)
-                if filtered_occurrences:
-                    all_task_occurrences[date] = filtered_occurrences
-                else:
-                    del all_task_occurrences[date]
-        elif event_type_filter == 'scientific_task':
-            # Keep only Scientific Tasks
-            events = events.none()
-            activities = activities.none()
-            cultural_tasks = cultural_tasks.none()
-            task_sessions = task_sessions.none()
-            operations_tasks = operations_tasks.none()
-            lectures = lectures.none()
-            sharia_tasks_all = sharia_tasks_all.none()
-            family_competitions = family_competitions.none()
-            sports_tasks = sports_tasks.none()
-            matches = matches.none()
-            for date in list(all_task_occurrences.keys()):
-                filtered_occurrences = []
-                for occ in all_task_occurrences[date]:
-                    if is_task_of_type(occ, 'scientific_task'):
-                        filtered_occurrences.append(occ)
-                if filtered_occurrences:
-                    all_task_occurrences[date] = filtered_occurrences
-                else:
-                    del all_task_occurrences[date]
-        elif event_type_filter == 'lecture':
-            # Keep only Lectures
-            events = events.none()
-            activities = activities.none()
-            cultural_tasks = cultural_tasks.none()
-            task_sessions = task_sessions.none()
-            operations_tasks = operations_tasks.none()
-            scientific_tasks = scientific_tasks.none()
-            sharia_tasks_all = sharia_tasks_all.none()
-            family_competitions = family_competitions.none()
-            sports_tasks = sports_tasks.none()
-            matches = matches.none()
-            task_occurrences = {}
-        elif event_type_filter == 'sharia_task':
-            # Keep only Sharia Tasks
-            events = events.none()
-            activities = activities.none()
-            cultural_tasks = cultural_tasks.none()
-            task_sessions = task_sessions.none()
-            operations_tasks = operations_tasks.none()
-            scientific_tasks = scientific_tasks.none()
-            lectures = lectures.none()
-            family_competitions = family_competitions.none()
-            sports_tasks = sports_tasks.none()
-            matches = matches.none()
-            for date in list(all_task_occurrences.keys()):
-                filtered_occurrences = []
-                for occ in all_task_occurrences[date]:
-                    if is_task_of_type(occ, 'sharia_task'):
-                        filtered_occurrences.append(occ)
-                if filtered_occurrences:
-                    all_task_occurrences[date] = filtered_occurrences
-                else:
-                    del all_task_occurrences[date]
-        elif event_type_filter == 'family_competition':
-            # Keep only Family Competitions
-            events = events.none()
-            activities = activities.none()
-            cultural_tasks = cultural_tasks.none()
-            task_sessions = task_sessions.none()
-            operations_tasks = operations_tasks.none()
-            scientific_tasks = scientific_tasks.none()
-            lectures = lectures.none()
-            sharia_tasks_all = sharia_tasks_all.none()
-            sports_tasks = sports_tasks.none()
-            matches = matches.none()
-            task_occurrences = {}
-        elif event_type_filter == 'sports_task':
-            # Keep only Sports Tasks
-            events = events.none()
-            activities = activities.none()
-            cultural_tasks = cultural_tasks.none()
-            task_sessions = task_sessions.none()
-            operations_tasks = operations_tasks.none()
-            scientific_tasks = scientific_tasks.none()
-            lectures = lectures.none()
-            sharia_tasks_all = sharia_tasks_all.none()
-            family_competitions = family_competitions.none()
-            matches = matches.none()
-            for date in list(all_task_occurrences.keys()):
-                filtered_occurrences = []
-                for occ in all_task_occurrences[date]:
-                    if is_task_of_type(occ, 'sports_task'):
-                        filtered_occurrences.append(occ)
-                if filtered_occurrences:
-                    all_task_occurrences[date] = filtered_occurrences
-                else:
-                    del all_task_occurrences[date]
-        elif event_type_filter == 'match':
-            # Keep only Matches
-            events = events.none()
-            activities = activities.none()
-            cultural_tasks = cultural_tasks.none()
-            task_sessions = task_sessions.none()
-            operations_tasks = operations_tasks.none()
-            scientific_tasks = scientific_tasks.none()
-            lectures = lectures.none()
-            sharia_tasks_all = sharia_tasks_all.none()
-            family_competitions = family_competitions.none()
-            sports_tasks = sports_tasks.none()
-            task_occurrences = {}
-
-    # Filter by committee if supervisor
-    if user.role == 'committee_supervisor':
-        events = events.filter(Q(committee=committee) | Q(committee__isnull=True))
-        activities = activities.filter(Q(committee=committee) | Q(committee__isnull=True))
-        cultural_tasks = [ct for ct in cultural_tasks if ct.committee == committee]
-        task_sessions = task_sessions.filter(task__committee=committee)
-        operations_tasks = operations_tasks.filter(committee=committee)
-        scientific_tasks = scientific_tasks.filter(committee=committee)
-        lectures = lectures.filter(committee=committee)
-        sharia_tasks_all = [st for st in sharia_tasks_all if st.committee == committee]
-        family_competitions = family_competitions.filter(committee=committee)
-        sports_tasks = sports_tasks.filter(committee=committee)
-        matches = matches.filter(committee=committee)
-
-        # FIX: Also filter all_task_occurrences by committee
-        for date in list(all_task_occurrences.keys()):
-            filtered_occurrences = []
-            for occ in all_task_occurrences[date]:
-                # Use .get() for safe access
-                task_type = occ.get('type', '')
-
-                # Check if this task belongs to the supervisor's committee
-                task_committee = occ.get('task', {}).committee
-                if task_committee == committee:
-                    filtered_occurrences.append(occ)
-                # For tasks without type field, check based on task attributes
-                elif not task_type and 'task' in occ:
-                    task_obj = occ['task']
-                    # Check committee based on task type
-                    if hasattr(task_obj, 'committee') and task_obj.committee == committee:
-                        filtered_occurrences.append(occ)
-
-            if filtered_occurrences:
-                all_task_occurrences[date] = filtered_occurrences
-            else:
-                del all_task_occurrences[date]
+    month_names = [
+        'يناير', 'فبراير', 'مارس', 'أبريل', 'مايو', 'يونيو',
+        'يوليو', 'أغسطس', 'سبتمبر', 'أكتوبر', 'نوفمبر', 'ديسمبر'
+    ]
 
     if view_type == 'weekly':
         # Build week days
         week_days = []
         for i in range(7):
             day_date = week_start + timedelta(days=i)
-            day_events = events.filter(start_date=day_date)
-            day_task_occurrences = all_task_occurrences.get(day_date, [])
-            day_activities = activities.filter(date=day_date)
-            day_cultural_tasks = cultural_tasks_non_recurring.filter(due_date=day_date)
-            day_task_sessions = task_sessions.filter(date=day_date)
-            day_operations_tasks = operations_tasks.filter(due_date=day_date)
-            day_scientific_tasks = scientific_tasks.filter(due_date=day_date)
-            day_lectures = lectures.filter(date=day_date)
-            day_sharia_tasks = sharia_tasks_non_recurring.filter(due_date=day_date)
-            day_family_competitions = family_competitions.filter(
-                start_date__lte=day_date,
-                end_date__gte=day_date
-            )
-            day_sports_tasks = sports_tasks.filter(due_date=day_date)
-            day_matches = matches.filter(date=day_date)
-
-            total_count = (
-                    day_events.count() + len(day_task_occurrences) + day_activities.count() +
-                    day_cultural_tasks.count() + day_task_sessions.count() + day_operations_tasks.count() +
-                    day_scientific_tasks.count() + day_lectures.count() +
-                    day_sharia_tasks.count() + day_family_competitions.count() +
-                    day_sports_tasks.count() + day_matches.count()
-            )
-
-            week_days.append({
-                'date': day_date,
-                'day': day_date.day,
-                'is_today': day_date == now.date(),
-                'is_current_month': True,
-                'events': day_events,
-                'task_occurrences': day_task_occurrences,
-                'activities': day_activities,
-                'cultural_tasks': day_cultural_tasks,
-                'operations_tasks': day_operations_tasks,
-                'task_sessions': day_task_sessions,
-                'scientific_tasks': day_scientific_tasks,
-                'lectures': day_lectures,
-                'sharia_tasks': day_sharia_tasks,
-                'family_competitions': day_family_competitions,
-                'sports_tasks': day_sports_tasks,
-                'matches': day_matches,
-                'total_events': total_count,
-            })
+            week_days.append(build_calendar_day(
+                day_date, items_by_day.get(day_date, []),
+                is_today=day_date == now.date(),
+                is_current_month=True,
+            ))
 
         weeks = [week_days]
         calendar_data = [week_days]
 
-        month_names = [
-            'يناير', 'فبراير', 'مارس', 'أبريل', 'مايو', 'يونيو',
-            'يوليو', 'أغسطس', 'سبتمبر', 'أكتوبر', 'نوفمبر', 'ديسمبر'
-        ]
-
         context_extra = {
             'view_type': 'weekly',
             'week_number': week_number,
@@ -1117,299 +285,46 @@ def schedule_calendar(request, program_id=None):
             month_names[week_start.month - 1],
         }
 
-
-
     else:
-
         # Monthly view logic
-
         first_day = datetime(year, month, 1).date()
 
-        last_day = datetime(year, month, monthrange(year, month)[1]).date()
+        # Saturday is the first column: Sat(0), Sun(1), Mon(2), ... Fri(6)
+        # Python weekday: Mon(0), ..., Sat(5), Sun(6)
+        first_weekday = (first_day.weekday() + 2) % 7
 
+        # Six weeks of cells, padded with days from the previous and next month
+        grid_start = first_day - timedelta(days=first_weekday)
         cal_data = []
+        for i in range(42):
+            date = grid_start + timedelta(days=i)
+            if date.month != month:
+                cal_data.append(build_calendar_day(
+                    date, [],
+                    is_current_month=False,
+                    is_today=date == now.date(),
+                ))
+                continue
 
-        # Get weekday of first day (0=Monday, 6=Sunday in Python)
-
-        # But we want Saturday as first column (0=Saturday, 6=Friday)
-
-        first_weekday = first_day.weekday()  # Monday=0, Sunday=6
-
-        # Convert to our calendar where Saturday is first column (0)
-
-        # Python: Mon(0), Tue(1), Wed(2), Thu(3), Fri(4), Sat(5), Sun(6)
-
-        # We want: Sat(0), Sun(1), Mon(2), Tue(3), Wed(4), Thu(5), Fri(6)
-
-        if first_weekday == 5:  # Saturday
-
-            first_weekday = 0
-
-        elif first_weekday == 6:  # Sunday
-
-            first_weekday = 1
-
-        elif first_weekday == 0:  # Monday
-
-            first_weekday = 2
-
-        elif first_weekday == 1:  # Tuesday
-
-            first_weekday = 3
-
-        elif first_weekday == 2:  # Wednesday
-
-            first_weekday = 4
-
-        elif first_weekday == 3:  # Thursday
-
-            first_weekday = 5
-
-        elif first_weekday == 4:  # Friday
-
-            first_weekday = 6
-
-        # Add blank days from previous month
-
-        if first_weekday > 0:
-
-            prev_month_days = monthrange(prev_year, prev_month)[1]
-
-            for i in range(first_weekday):
-                day = prev_month_days - first_weekday + i + 1
-
-                date = datetime(prev_year, prev_month, day).date()
-
-                cal_data.append({
-
-                    'day': day,
-
-                    'date': date,
-
-                    'is_current_month': False,
-
-                    'is_today': date == now.date(),
-
-                    'events': [],
-
-                    'task_occurrences': [],
-
-                    'activities': [],
-
-                    'cultural_tasks': [],
-
-                    'operations_tasks': [],
-
-                    'scientific_tasks': [],
-
-                    'task_sessions': [],
-
-                    'lectures': [],
-
-                    'sharia_tasks': [],
-
-                    'family_competitions': [],
-
-                    'sports_tasks': [],
-
-                    'matches': [],
-
-                    'total_events': 0,
-
-                })
-
-        days_in_month = monthrange(year, month)[1]
-
-        for day in range(1, days_in_month + 1):
-
-            date = datetime(year, month, day).date()
-
-            # Determine if weekend (Friday = 4, Saturday = 5 in Python weekday)
-
-            # In our adjusted calendar: Saturday=0, Sunday=1, Friday=6
-
-            python_weekday = date.weekday()  # Monday=0, Sunday=6
-
-            is_weekend = False
-
-            if python_weekday == 4:  # Friday
-
-                is_weekend = True
-
-            elif python_weekday == 5:  # Saturday
-
-                is_weekend = True
-
-            day_events = events.filter(start_date=date)
-
-            day_task_occurrences = all_task_occurrences.get(date, [])
-
-            day_activities = activities.filter(date=date)
-
-            day_cultural_tasks = cultural_tasks_non_recurring.filter(due_date=date)
-
-            day_task_sessions = task_sessions.filter(date=date)
-
-            day_operations_tasks = operations_tasks.filter(due_date=date)
-
-            day_scientific_tasks = scientific_tasks.filter(due_date=date)
-
-            day_lectures = lectures.filter(date=date)
-
-            day_sharia_tasks = sharia_tasks_non_recurring.filter(due_date=date)
-
-            day_family_competitions = family_competitions.filter(
-
-                start_date__lte=date,
-
-                end_date__gte=date
-
-            )
-
-            day_sports_tasks = SportsTask.objects.filter(
-                committee__program=program,
-                is_recurring=False,  # Only non-recurring tasks
-                due_date=date
-            )
-            if committee_filter:
-                day_sports_tasks = day_sports_tasks.filter(committee_id=committee_filter)
-
-            day_matches = matches.filter(date=date)
-
-            total_count = (
-
-                    day_events.count() + len(day_task_occurrences) + day_activities.count() +
-
-                    day_cultural_tasks.count() + day_task_sessions.count() + day_operations_tasks.count() +
-
-                    day_scientific_tasks.count() + day_lectures.count() +
-
-                    day_sharia_tasks.count() + day_family_competitions.count() +
-
-                    day_sports_tasks.count() + day_matches.count()
-
-            )
-
-            cal_data.append({
-
-                'day': day,
-
-                'date': date,
-
-                'is_current_month': True,
-
-                'is_today': date == now.date(),
-
-                'is_weekend': is_weekend,
-
-                'events': day_events,
-
-                'task_occurrences': day_task_occurrences,
-
-                'activities': day_activities,
-
-                'cultural_tasks': day_cultural_tasks,
-
-                'operations_tasks': day_operations_tasks,
-
-                'scientific_tasks': day_scientific_tasks,
-
-                'task_sessions': day_task_sessions,
-
-                'lectures': day_lectures,
-
-                'sharia_tasks': day_sharia_tasks,
-
-                'family_competitions': day_family_competitions,
-
-                'sports_tasks': day_sports_tasks,
-
-                'matches': day_matches,
-
-                'total_events': total_count,
-
-            })
-
-        # Fill remaining cells
-
-        total_cells_needed = 42  # 6 weeks * 7 days
-
-        remaining = total_cells_needed - len(cal_data)
-
-        for day in range(1, remaining + 1):
-            date = datetime(next_year, next_month, day).date()
-
-            cal_data.append({
-
-                'day': day,
-
-                'date': date,
-
-                'is_current_month': False,
-
-                'is_today': date == now.date(),
-
-                'events': [],
-
-                'task_occurrences': [],
-
-                'activities': [],
-
-                'cultural_tasks': [],
-
-                'operations_tasks': [],
-
-                'scientific_tasks': [],
-
-                'task_sessions': [],
-
-                'lectures': [],
-
-                'sharia_tasks': [],
-
-                'family_competitions': [],
-
-                'sports_tasks': [],
-
-                'matches': [],
-
-                'total_events': 0,
-
-            })
+            cal_data.append(build_calendar_day(
+                date, items_by_day.get(date, []),
+                is_current_month=True,
+                is_today=date == now.date(),
+                # Friday and Saturday
+                is_weekend=date.weekday() in (4, 5),
+            ))
 
         # Split into weeks (7 days each)
-
-        weeks = []
-
-        for i in range(0, len(cal_data), 7):
-            weeks.append(cal_data[i:i + 7])
-
+        weeks = [cal_data[i:i + 7] for i in range(0, len(cal_data), 7)]
         calendar_data = weeks
 
-        month_names = [
-
-            'يناير', 'فبراير', 'مارس', 'أبريل', 'مايو', 'يونيو',
-
-            'يوليو', 'أغسطس', 'سبتمبر', 'أكتوبر', 'نوفمبر', 'ديسمبر'
-
-        ]
-
-        month_name = month_names[month - 1]
-
         context_extra = {
-
             'view_type': 'monthly',
-
-            'month_name': month_name,
-
+            'month_name': month_names[month - 1],
             'prev_year': prev_year,
-
             'prev_month': prev_month,
-
             'next_year': next_year,
-
             'next_month': next_month,
-
         }
 
     # Determine base template
@@ -1449,6 +364,9 @@ def schedule_calendar(request, program_id=None):
         'month': month,
         'today': now.date(),
         'base_template': base_template,
+        'calendar_feed_url': request.build_absolute_uri(
+            reverse('calendar_feed_ics', args=[program.id])
+        ) + f'?token={get_feed_token(user, program)}',
     }
     context.update(context_extra)
 
@@ -1468,166 +386,22 @@ def day_events(request, program_id, year, month, day):
 
     date = datetime(year, month, day).date()
 
-    # Get all events for this day
-    events = ScheduleEvent.objects.filter(
-        program=program,
-        start_date=date
-    ).select_related('committee', 'created_by').order_by('start_time')
-
-    # Get ALL tasks (including recurring ones)
-    all_tasks = Task.objects.filter(program=program).select_related('committee')
-
-    all_cultural_tasks = CulturalTask.objects.filter(
-        committee__program=program
-    ).select_related('committee')
-
-    all_sports_tasks = SportsTask.objects.filter(
-        committee__program=program
-    ).select_related('committee')
-
-    all_sharia_tasks = ShariaTask.objects.filter(
-        committee__program=program
-    ).select_related('committee')
-
-    all_scientific_tasks = ScientificTask.objects.filter(
-        committee__program=program
-    ).select_related('committee')
-
-    all_operations_tasks = OperationsTask.objects.filter(
-        committee__program=program
-    ).select_related('committee')
-
-    # Filter tasks that occur on this date
-    tasks_for_day = []
-    for task in all_tasks:
-        if task.is_recurring:
-            # Check if this date is in the task's occurrence dates
-            occurrences = task.get_occurrence_dates(date, date)
-            if date in occurrences:
-                tasks_for_day.append({
-                    'task': task,
-                    'type': 'regular_task'
-                })
-        else:
-            # Regular task - check if due_date matches
-            if task.due_date == date:
-                tasks_for_day.append({
-                    'task': task,
-                    'type': 'regular_task'
-                })
-
-    # Filter cultural tasks that occur on this date
-    cultural_tasks_for_day = []
-    for cultural_task in all_cultural_tasks:
-        if cultural_task.is_recurring:
-            # Check if this date is in the task's occurrence dates
-            occurrences = cultural_task.get_occurrence_dates(date, date)
-            if date in occurrences:
-                cultural_tasks_for_day.append(cultural_task)
-        else:
-            # Non-recurring cultural task - check if due_date matches
-            if cultural_task.due_date == date:
-                cultural_tasks_for_day.append(cultural_task)
-
-    # Filter sports tasks that occur on this date
-    sports_tasks_for_day = []
-    for sports_task in all_sports_tasks:
-        if sports_task.is_recurring:
-            # Check if this date is in the task's occurrence dates
-            occurrences = sports_task.get_occurrence_dates(date, date)
-            if date in occurrences:
-                sports_tasks_for_day.append(sports_task)
-        else:
-            # Non-recurring sports task - check if due_date matches
-            if sports_task.due_date == date:
-                sports_tasks_for_day.append(sports_task)
-
-    sharia_tasks_for_day = []
-    for sharia_task in all_sharia_tasks:
-        if sharia_task.is_recurring:
-            # Check if this date is in the task's occurrence dates
-            occurrences = sharia_task.get_occurrence_dates(date, date)
-            if date in occurrences:
-                sharia_tasks_for_day.append(sharia_task)
-        else:
-            # Non-recurring sharia task - check if due_date matches
-            if sharia_task.due_date == date:
-                sharia_tasks_for_day.append(sharia_task)
-
-    scientific_tasks_for_day = []
-    for scientific_task in all_scientific_tasks:
-        if scientific_task.is_recurring:
-            # Check if this date is in the task's occurrence dates
-            occurrences = scientific_task.get_occurrence_dates(date, date)
-            if date in occurrences:
-                scientific_tasks_for_day.append(scientific_task)
-        else:
-            # Non-recurring scientific task - check if due_date matches
-            if scientific_task.due_date == date:
-                scientific_tasks_for_day.append(scientific_task)
-
-    operations_tasks_for_day = []
-    for operations_task in all_operations_tasks:
-        if operations_task.is_recurring:
-            occurrences = operations_task.get_occurrence_dates(date, date)
-            if date in occurrences:
-                operations_tasks_for_day.append(operations_task)
-        else:
-            if operations_task.due_date == date:
-                operations_tasks_for_day.append(operations_task)
-
-    # Convert to queryset-like behavior for template
-    tasks = [item['task'] for item in tasks_for_day if item['type'] == 'regular_task']
-    cultural_tasks = cultural_tasks_for_day
-    sharia_tasks = sharia_tasks_for_day
-    sports_tasks = sports_tasks_for_day
-    scientific_tasks = scientific_tasks_for_day
-    operations_tasks = operations_tasks_for_day
-
-    activities = Activity.objects.filter(
-        program=program,
-        date=date
-    ).select_related('committee', 'created_by')
-
-    task_sessions = TaskSession.objects.filter(
-        task__committee__program=program,
-        date=date
-    ).select_related('task', 'task__committee')
-
-    lectures = Lecture.objects.filter(
-        committee__program=program,
-        date=date
-    ).select_related('committee', 'created_by')
-
-    family_competitions = FamilyCompetition.objects.filter(
-        committee__program=program,
-        start_date__lte=date,
-        end_date__gte=date
-    ).select_related('committee')
-
-    matches = Match.objects.filter(
-        committee__program=program,
-        date=date
-    ).select_related('committee', 'created_by')
-
-    # Filter by committee if supervisor
-    if user.role == 'committee_supervisor':
-        try:
-            committee = Committee.objects.get(supervisor=user)
-            events = events.filter(Q(committee=committee) | Q(committee__isnull=True))
-            tasks = [t for t in tasks if t.committee == committee or t.committee is None]
-            activities = activities.filter(Q(committee=committee) | Q(committee__isnull=True))
-            cultural_tasks = [ct for ct in cultural_tasks if ct.committee == committee]
-            sports_tasks = [st for st in sports_tasks if st.committee == committee]
-            task_sessions = task_sessions.filter(task__committee=committee)
-            operations_tasks = [ot for ot in operations_tasks if ot.committee == committee]
-            scientific_tasks = [st for st in scientific_tasks if st.committee == committee]
-            lectures = lectures.filter(committee=committee)
-            sharia_tasks = [st for st in sharia_tasks if st.committee == committee]
-            family_competitions = family_competitions.filter(committee=committee)
-            matches = matches.filter(committee=committee)
-        except Committee.DoesNotExist:
-            pass
+    # Everything on this day comes from one feed query, then full rows per type for the details
+    feed = CalendarFeed(program, date, date, user=user)
+    instances = feed.instances_by_type()
+
+    events = instances['schedule_event']
+    tasks = instances['regular_task']
+    cultural_tasks = instances['cultural_task']
+    sharia_tasks = instances['sharia_task']
+    sports_tasks = instances['sports_task']
+    scientific_tasks = instances['scientific_task']
+    operations_tasks = instances['operations_task']
+    activities = instances['activity']
+    task_sessions = instances['task_session']
+    lectures = instances['lecture']
+    family_competitions = instances['family_competition']
+    matches = instances['match']
 
     # Determine base template
     if user.role == 'director':
@@ -1650,6 +424,7 @@ def day_events(request, program_id, year, month, day):
     context = {
         'program': program,
         'date': date,
+        'total_count': len(feed.items()),
         'events': events,
         'tasks': tasks,
         'tasks_count': len(tasks),
@@ -1680,11 +455,8 @@ def has_permission_for_program(user, program):
     elif user.role == 'program_manager':
         return program.manager == user
     elif user.role == 'committee_supervisor':
-        try:
-            committee = Committee.objects.get(supervisor=user)
-            return committee.program == program
-        except Committee.DoesNotExist:
-            return False
+        committee = get_user_scope(user).committee
+        return committee is not None and committee.program_id == program.id
     return False
 
 @login_required
@@ -1738,18 +510,17 @@ def event_detail(request, event_id):
     if user.role == 'director':
         pass  # Can view all
     elif user.role == 'program_manager':
-        if event.program.manager != user:
+        if event.program.manager_id != user.id:
             messages.error(request, 'ليس لديك صلاحية للوصول إلى هذا الحدث')
             return redirect('home')
     elif user.role == 'committee_supervisor':
-        try:
-            committee = Committee.objects.get(supervisor=user)
-            if event.program != committee.program:
-                messages.error(request, 'ليس لديك صلاحية للوصول إلى هذا الحدث')
-                return redirect('home')
-        except Committee.DoesNotExist:
+        committee = get_user_scope(user).committee
+        if committee is None:
             messages.error(request, 'لم يتم تعيين لجنة لك بعد')
             return redirect('home')
+        if event.program_id != committee.program_id:
+            messages.error(request, 'ليس لديك صلاحية للوصول إلى هذا الحدث')
+            return redirect('home')
 
     attendances = event.attendances.select_related('user', 'recorded_by').all()
 
@@ -1773,18 +544,16 @@ def add_event(request, program_id=None):
             return redirect('home')
         program = get_object_or_404(Program, id=program_id)
     elif user.role == 'program_manager':
-        try:
-            program = Program.objects.get(manager=user)
-        except Program.DoesNotExist:
+        program = get_user_scope(user).program
+        if program is None:
             messages.error(request, 'لم يتم تعيين برنامج لك بعد')
             return redirect('home')
     elif user.role == 'committee_supervisor':
-        try:
-            committee = Committee.objects.get(supervisor=user)
-            program = committee.program
-        except Committee.DoesNotExist:
+        committee = get_user_scope(user).committee
+        if committee is None:
             messages.error(request, 'لم يتم تعيين لجنة لك بعد')
             return redirect('home')
+        program = committee.program
     else:
         messages.error(request, 'ليس لديك صلاحية لإضافة أحداث')
         return redirect('home')
@@ -1798,11 +567,7 @@ def add_event(request, program_id=None):
             event.save()
 
 
-            UserActivity.objects.create(
-                user=user,
-                action=f'إضافة حدث جدولة: {event.title}',
-                ip_address=get_client_ip(request)
-            )
+            log_activity(request, f'إضافة حدث جدولة: {event.title}', user=user)
 
             messages.success(request, 'تم إضافة الحدث بنجاح!')
             return redirect('schedule_calendar', program_id=program.id)
@@ -1834,11 +599,7 @@ def edit_event(request, event_id):
         if form.is_valid():
             event = form.save()
 
-            UserActivity.objects.create(
-                user=user,
-                action=f'تعديل حدث جدولة: {event.title}',
-                ip_address=get_client_ip(request)
-            )
+            log_activity(request, f'تعديل حدث جدولة: {event.title}', user=user)
 
             messages.success(request, 'تم تعديل الحدث بنجاح!')
             return redirect('event_detail', event_id=event.id)
@@ -1871,11 +632,7 @@ def delete_event(request, event_id):
         event_title = event.title
         event.delete()
 
-        UserActivity.objects.create(
-            user=user,
-            action=f'حذف حدث جدولة: {event_title}',
-            ip_address=get_client_ip(request)
-        )
+        log_activity(request, f'حذف حدث جدولة: {event_title}', user=user)
 
         messages.success(request, 'تم حذف الحدث بنجاح!')
         return redirect('schedule_calendar', program_id=program_id)
@@ -1975,11 +732,8 @@ def has_permission_for_object(user, obj):
         committee = get_object_committee(obj)
 
         if program:
-            try:
-                user_committee = Committee.objects.get(supervisor=user)
-                return user_committee.program == program
-            except Committee.DoesNotExist:
-                return False
+            user_committee = get_user_scope(user).committee
+            return user_committee is not None and user_committee.program_id == program.id
 
         if committee:
             return committee.supervisor == user
@@ -2105,13 +859,17 @@ def get_template_name(object_type):
 
 from django.shortcuts import render, get_object_or_404
 from django.core.paginator import Paginator
+from django.db.models import Count
 from director_dashboard.models import DirectorAlbum, AlbumPhoto
 
 
+@cache_public_page
 def public_albums(request):
     """Public albums page for non-authenticated users"""
     # Get only active albums
-    albums = DirectorAlbum.objects.filter(is_active=True).prefetch_related('photos').order_by('-created_at')
+    albums = DirectorAlbum.objects.filter(is_active=True).annotate(
+        photo_count=Count('photos')
+    ).order_by('-created_at')
 
     # Pagination
     paginator = Paginator(albums, 9)  # Show 9 albums per page
@@ -2120,11 +878,12 @@ def public_albums(request):
 
     context = {
         'albums': page_obj,
-        'total_albums': albums.count(),
+        'total_albums': paginator.count,
     }
     return render(request, 'main/albums.html', context)
 
 
+@cache_public_page
 def public_album_detail(request, album_id):
     """Public album detail page showing all photos"""
     album = get_object_or_404(DirectorAlbum, id=album_id, is_active=True)
@@ -2138,12 +897,14 @@ def public_album_detail(request, album_id):
     context = {
         'album': album,
         'photos': page_obj,
-        'total_photos': photos.count(),
+        'total_photos': paginator.count,
     }
     return render(request, 'main/album_detail.html', context)
 
 
-from django.http import HttpResponse
+from django.http import HttpResponse, HttpResponseForbidden, StreamingHttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
 from datetime import datetime, timedelta
 import csv
 from io import BytesIO
@@ -2161,13 +922,19 @@ try:
 except ImportError:
     REPORTLAB_AVAILABLE = False
 
-try:
-    import openpyxl
-    from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
+from .exports import EXPORT_CHUNK_SIZE, OPENPYXL_AVAILABLE, ExcelSheet, excel_response
 
-    OPENPYXL_AVAILABLE = True
-except ImportError:
-    OPENPYXL_AVAILABLE = False
+
+def get_export_date_range(view_type, year, month, week):
+    """Date range of a calendar export: a week, a month or (view=yearly) a whole year"""
+    if view_type == 'weekly':
+        jan_1 = datetime(year, 1, 1).date()
+        start_date = jan_1 + timedelta(weeks=week - 1)
+        start_date = start_date - timedelta(days=(start_date.weekday() + 1) % 7)
+        return start_date, start_date + timedelta(days=6)
+    if view_type == 'yearly':
+        return datetime(year, 1, 1).date(), datetime(year, 12, 31).date()
+    return datetime(year, month, 1).date(), datetime(year, month, monthrange(year, month)[1]).date()
 
 
 @login_required
@@ -2186,69 +953,53 @@ def export_calendar_ics(request):
         messages.error(request, 'ليس لديك صلاحية للوصول إلى هذا التقويم')
         return redirect('home')
 
-    # Get date range
-    if view_type == 'weekly':
-        jan_1 = datetime(year, 1, 1).date()
-        start_date = jan_1 + timedelta(weeks=week - 1)
-        start_date = start_date - timedelta(days=(start_date.weekday() + 1) % 7)
-        end_date = start_date + timedelta(days=6)
-    else:
-        start_date = datetime(year, month, 1).date()
-        end_date = datetime(year, month, monthrange(year, month)[1]).date()
+    start_date, end_date = get_export_date_range(view_type, year, month, week)
 
-    # Get all events
-    events = ScheduleEvent.objects.filter(
-        program=program,
-        start_date__gte=start_date,
-        start_date__lte=end_date
-    ).select_related('committee', 'created_by')
+    feed = CalendarFeed(program, start_date, end_date, filters=request.GET, user=request.user,
+                        with_description=True)
 
-    # Filter by committee if supervisor
-    if request.user.role == 'committee_supervisor':
-        try:
-            committee = Committee.objects.get(supervisor=request.user)
-            events = events.filter(Q(committee=committee) | Q(committee__isnull=True))
-        except Committee.DoesNotExist:
-            pass
+    # Task occurrences are exported day by day; other items may span several days
+    dtstamp = format_utc(timezone.now())
+    events = (
+        item_event(item, f"{item.type}-{item.id}-{item.date.strftime('%Y%m%d')}@{program.name}", dtstamp)
+        for item in feed.items()
+    )
 
-    # Create ICS content
-    response = HttpResponse(content_type='text/calendar; charset=utf-8')
+    response = StreamingHttpResponse(stream_calendar(program.name, events),
+                                     content_type='text/calendar; charset=utf-8')
     response['Content-Disposition'] = f'attachment; filename="calendar_{program.name}_{year}_{month}.ics"'
+    return response
 
-    ics_content = ["BEGIN:VCALENDAR"]
-    ics_content.append("VERSION:2.0")
-    ics_content.append(f"PRODID:-//{program.name}//Calendar//AR")
-    ics_content.append("CALSCALE:GREGORIAN")
-    ics_content.append("METHOD:PUBLISH")
-
-    for event in events:
-        ics_content.append("BEGIN:VEVENT")
-
-        # Format dates
-        dtstart = event.start_date.strftime('%Y%m%d')
-        if event.start_time:
-            dtstart += f"T{event.start_time.strftime('%H%M%S')}"
-        ics_content.append(f"DTSTART:{dtstart}")
-
-        if event.end_date:
-            dtend = event.end_date.strftime('%Y%m%d')
-            if event.end_time:
-                dtend += f"T{event.end_time.strftime('%H%M%S')}"
-            ics_content.append(f"DTEND:{dtend}")
-
-        ics_content.append(f"SUMMARY:{event.title}")
-        ics_content.append(f"DESCRIPTION:{event.description}")
-
-        if event.location:
-            ics_content.append(f"LOCATION:{event.location}")
-
-        ics_content.append(f"UID:{event.id}@{program.name}")
-        ics_content.append(f"DTSTAMP:{timezone.now().strftime('%Y%m%dT%H%M%SZ')}")
-        ics_content.append("END:VEVENT")
 
-    ics_content.append("END:VCALENDAR")
+def calendar_feed_ics(request, program_id):
+    """
+    Subscribable iCalendar feed of a whole program.
+    Calendar apps poll it without a session, so the signed token shown on the
+    calendar page is accepted instead of a login. Unchanged feeds get a 304.
+    """
+    program = get_object_or_404(Program, id=program_id)
 
-    response.write('\r\n'.join(ics_content))
+    token = request.GET.get('token')
+    user = get_feed_user(token, program) if token else request.user
+    if user is None or not user.is_authenticated or not has_permission_for_program(user, program):
+        return HttpResponseForbidden()
+
+    feed = get_subscription_feed(program, user, filters=request.GET)
+    etag, last_modified = get_feed_state(feed)
+    etag = quote_etag(etag)
+    last_modified = int(last_modified.timestamp()) if last_modified else None
+
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        response = StreamingHttpResponse(stream_calendar(program.name, feed_events(feed, request.get_host())),
+                                         content_type='text/calendar; charset=utf-8')
+        response['Content-Disposition'] = f'inline; filename="calendar_{program.pk}.ics"'
+
+    response['ETag'] = etag
+    if last_modified:
+        response['Last-Modified'] = http_date(last_modified)
+    # Always revalidate: the validators make that a cheap 304
+    patch_cache_control(response, private=True, no_cache=True)
     return response
 
 
@@ -2272,120 +1023,29 @@ def export_calendar_excel(request):
         messages.error(request, 'ليس لديك صلاحية للوصول إلى هذا التقويم')
         return redirect('home')
 
-    # Get date range
-    if view_type == 'weekly':
-        jan_1 = datetime(year, 1, 1).date()
-        start_date = jan_1 + timedelta(weeks=week - 1)
-        start_date = start_date - timedelta(days=(start_date.weekday() + 1) % 7)
-        end_date = start_date + timedelta(days=6)
-    else:
-        start_date = datetime(year, month, 1).date()
-        end_date = datetime(year, month, monthrange(year, month)[1]).date()
-
-    # Get all events
-    events = ScheduleEvent.objects.filter(
-        program=program,
-        start_date__gte=start_date,
-        start_date__lte=end_date
-    ).select_related('committee', 'created_by').order_by('start_date', 'start_time')
-
-    tasks = Task.objects.filter(
-        program=program,
-        due_date__gte=start_date,
-        due_date__lte=end_date
-    ).select_related('committee').order_by('due_date')
-
-    activities = Activity.objects.filter(
-        program=program,
-        date__gte=start_date,
-        date__lte=end_date
-    ).select_related('committee').order_by('date')
-
-    # Filter by committee if supervisor
-    if request.user.role == 'committee_supervisor':
-        try:
-            committee = Committee.objects.get(supervisor=request.user)
-            events = events.filter(Q(committee=committee) | Q(committee__isnull=True))
-            tasks = tasks.filter(Q(committee=committee) | Q(committee__isnull=True))
-            activities = activities.filter(Q(committee=committee) | Q(committee__isnull=True))
-        except Committee.DoesNotExist:
-            pass
-
-    # Create Excel workbook
-    wb = openpyxl.Workbook()
-    ws = wb.active
-    ws.title = "التقويم"
-    ws.right_to_left = True
-
-    # Styles
-    header_fill = PatternFill(start_color="0084AB", end_color="0084AB", fill_type="solid")
-    header_font = Font(bold=True, color="FFFFFF", size=12)
-    header_alignment = Alignment(horizontal="center", vertical="center")
-    border = Border(
-        left=Side(style='thin'),
-        right=Side(style='thin'),
-        top=Side(style='thin'),
-        bottom=Side(style='thin')
+    start_date, end_date = get_export_date_range(view_type, year, month, week)
+
+    feed = CalendarFeed(program, start_date, end_date, filters=request.GET, user=request.user,
+                        with_description=True)
+
+    # One row per calendar item, read from the database while the file is streamed
+    rows = (
+        (
+            item.date.strftime('%Y-%m-%d'),
+            item.get_type_display(),
+            item.title,
+            item.description,
+            item.time.strftime('%H:%M') if item.time else '',
+            item.location,
+            item.committee_name or '',
+            item.get_status_display(),
+        )
+        for item in feed.iterator(chunk_size=EXPORT_CHUNK_SIZE)
     )
-
-    # Headers
     headers = ["التاريخ", "النوع", "العنوان", "الوصف", "الوقت", "المكان", "اللجنة", "الحالة"]
-    for col_num, header in enumerate(headers, 1):
-        cell = ws.cell(row=1, column=col_num, value=header)
-        cell.fill = header_fill
-        cell.font = header_font
-        cell.alignment = header_alignment
-        cell.border = border
-
-    # Add events
-    row = 2
-    for event in events:
-        ws.cell(row=row, column=1, value=event.start_date.strftime('%Y-%m-%d')).border = border
-        ws.cell(row=row, column=2, value=event.get_event_type_display()).border = border
-        ws.cell(row=row, column=3, value=event.title).border = border
-        ws.cell(row=row, column=4, value=event.description).border = border
-        ws.cell(row=row, column=5, value=event.start_time.strftime('%H:%M') if event.start_time else '').border = border
-        ws.cell(row=row, column=6, value=event.location or '').border = border
-        ws.cell(row=row, column=7, value=event.committee.name if event.committee else '').border = border
-        ws.cell(row=row, column=8, value=event.get_status_display()).border = border
-        row += 1
-
-    # Add tasks
-    for task in tasks:
-        ws.cell(row=row, column=1, value=task.due_date.strftime('%Y-%m-%d')).border = border
-        ws.cell(row=row, column=2, value='مهمة').border = border
-        ws.cell(row=row, column=3, value=task.title).border = border
-        ws.cell(row=row, column=4, value=task.description).border = border
-        ws.cell(row=row, column=5, value='').border = border
-        ws.cell(row=row, column=6, value='').border = border
-        ws.cell(row=row, column=7, value=task.committee.name if task.committee else '').border = border
-        ws.cell(row=row, column=8, value=task.get_status_display()).border = border
-        row += 1
-
-    # Add activities
-    for activity in activities:
-        ws.cell(row=row, column=1, value=activity.date.strftime('%Y-%m-%d')).border = border
-        ws.cell(row=row, column=2, value='نشاط').border = border
-        ws.cell(row=row, column=3, value=activity.name).border = border
-        ws.cell(row=row, column=4, value=activity.description or '').border = border
-        ws.cell(row=row, column=5, value=activity.time.strftime('%H:%M') if activity.time else '').border = border
-        ws.cell(row=row, column=6, value=activity.location or '').border = border
-        ws.cell(row=row, column=7, value=activity.committee.name if activity.committee else '').border = border
-        ws.cell(row=row, column=8, value='').border = border
-        row += 1
-
-    # Adjust column widths
-    for col in range(1, 9):
-        ws.column_dimensions[openpyxl.utils.get_column_letter(col)].width = 20
-
-    # Save to response
-    response = HttpResponse(
-        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-    )
-    response['Content-Disposition'] = f'attachment; filename="calendar_{program.name}_{year}_{month}.xlsx"'
 
-    wb.save(response)
-    return response
+    return excel_response(f'calendar_{program.name}_{year}_{month}.xlsx',
+                          [ExcelSheet("التقويم", headers, rows)])
 
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
@@ -2435,19 +1095,17 @@ def calendar_list_view(request):
             program = get_object_or_404(Program, id=program_id)
 
     elif user.role == 'program_manager':
-        try:
-            program = Program.objects.get(manager=user)
-        except Program.DoesNotExist:
+        program = get_user_scope(user).program
+        if program is None:
             messages.error(request, 'لم يتم تعيين برنامج لك بعد')
             return redirect('home')
 
     elif user.role == 'committee_supervisor':
-        try:
-            committee = Committee.objects.get(supervisor=user)
-            program = committee.program
-        except Committee.DoesNotExist:
+        committee = get_user_scope(user).committee
+        if committee is None:
             messages.error(request, 'لم يتم تعيين لجنة لك بعد')
             return redirect('home')
+        program = committee.program
     else:
         messages.error(request, 'ليس لديك صلاحية للوصول إلى هذه الصفحة')
         return redirect('home')
@@ -2480,482 +1138,59 @@ def calendar_list_view(request):
         else:
             date_to = today.replace(month=today.month + 1, day=1) - timedelta(days=1)
 
-    # ==================== GET ALL TASKS WITH RECURRING SUPPORT ====================
-
-    # Get regular tasks with recurring support
-    tasks = Task.objects.filter(program=program).select_related('committee')
-
-    # Process recurring tasks (same logic as schedule_calendar)
-    task_occurrences = {}
-    all_program_tasks = []  # For list view display
+    # ==================== EVERYTHING IN THE RANGE FROM THE CALENDAR FEED ====================
 
-    for task in tasks:
-        if task.is_recurring:
-            task_start = task.start_date or task.due_date
-            if task_start > date_to:
-                continue
-
-            if task.recurrence_end_date and task.recurrence_end_date < date_from:
-                continue
-
-            groups = task.get_consecutive_day_groups(date_from, date_to)
-            for group_idx, (group_start, group_end) in enumerate(groups):
-                group_id = f"task_{task.id}_group_{group_idx}"
-
-                current = group_start
-                while current <= group_end:
-                    if date_from <= current <= date_to:
-                        if current not in task_occurrences:
-                            task_occurrences[current] = []
-
-                        task_occurrences[current].append({
-                            'task': task,
-                            'is_start': current == group_start,
-                            'is_end': current == group_end,
-                            'group_id': group_id,
-                            'group_start': group_start,
-                            'group_end': group_end,
-                            'span_days': (group_end - group_start).days + 1,
-                            'type': 'regular_task',
-                            'date': current,  # Add date for list view
-                            'is_recurring': True
-                        })
-
-                        # Add to list view items
-                        if current == group_start:  # Only add once per group
-                            all_program_tasks.append({
-                                'task': task,
-                                'date': current,
-                                'is_recurring': True,
-                                'group_start': group_start,
-                                'group_end': group_end,
-                                'type': 'regular_task'
-                            })
-                    current += timedelta(days=1)
-        else:
-            # Non-recurring task
-            if date_from <= task.due_date <= date_to:
-                if task.due_date not in task_occurrences:
-                    task_occurrences[task.due_date] = []
-                task_occurrences[task.due_date].append({
-                    'task': task,
-                    'is_start': True,
-                    'is_end': True,
-                    'group_id': f"task_{task.id}_single",
-                    'group_start': task.due_date,
-                    'group_end': task.due_date,
-                    'span_days': 1,
-                    'type': 'regular_task',
-                    'date': task.due_date,
-                    'is_recurring': False
-                })
-
-                all_program_tasks.append({
-                    'task': task,
-                    'date': task.due_date,
-                    'is_recurring': False,
-                    'type': 'regular_task'
-                })
-
-    # Get cultural tasks with recurring support
-    cultural_tasks = CulturalTask.objects.filter(
-        committee__program=program
-    ).select_related('committee')
-
-    cultural_task_occurrences = {}
-    all_cultural_tasks = []
-
-    for cultural_task in cultural_tasks:
-        if cultural_task.is_recurring:
-            cultural_task_start = cultural_task.start_date or cultural_task.due_date
-            if cultural_task_start > date_to:
-                continue
-
-            if cultural_task.recurrence_end_date and cultural_task.recurrence_end_date < date_from:
-                continue
-
-            groups = cultural_task.get_consecutive_day_groups(date_from, date_to)
-            for group_idx, (group_start, group_end) in enumerate(groups):
-                group_id = f"cultural_task_{cultural_task.id}_group_{group_idx}"
-
-                current = group_start
-                while current <= group_end:
-                    if date_from <= current <= date_to:
-                        if current not in cultural_task_occurrences:
-                            cultural_task_occurrences[current] = []
-
-                        cultural_task_occurrences[current].append({
-                            'task': cultural_task,
-                            'is_start': current == group_start,
-                            'is_end': current == group_end,
-                            'group_id': group_id,
-                            'group_start': group_start,
-                            'group_end': group_end,
-                            'span_days': (group_end - group_start).days + 1,
-                            'type': 'cultural_task',
-                            'date': current,
-                            'is_recurring': True
-                        })
-
-                        if current == group_start:
-                            all_cultural_tasks.append({
-                                'task': cultural_task,
-                                'date': current,
-                                'is_recurring': True,
-                                'group_start': group_start,
-                                'group_end': group_end,
-                                'type': 'cultural_task'
-                            })
-                    current += timedelta(days=1)
-        else:
-            # Non-recurring cultural task
-            if date_from <= cultural_task.due_date <= date_to:
-                if cultural_task.due_date not in cultural_task_occurrences:
-                    cultural_task_occurrences[cultural_task.due_date] = []
-                cultural_task_occurrences[cultural_task.due_date].append({
-                    'task': cultural_task,
-                    'is_start': True,
-                    'is_end': True,
-                    'group_id': f"cultural_task_{cultural_task.id}_single",
-                    'group_start': cultural_task.due_date,
-                    'group_end': cultural_task.due_date,
-                    'span_days': 1,
-                    'type': 'cultural_task',
-                    'date': cultural_task.due_date,
-                    'is_recurring': False
-                })
-
-                all_cultural_tasks.append({
-                    'task': cultural_task,
-                    'date': cultural_task.due_date,
-                    'is_recurring': False,
-                    'type': 'cultural_task'
-                })
-
-    # Get sports tasks with recurring support
-    sports_tasks = SportsTask.objects.filter(
-        committee__program=program
-    ).select_related('committee')
-
-    sports_task_occurrences = {}
-    all_sports_tasks = []
-
-    for sports_task in sports_tasks:
-        if sports_task.is_recurring:
-            sports_task_start = sports_task.start_date or sports_task.due_date
-            if sports_task_start > date_to:
-                continue
-
-            if sports_task.recurrence_end_date and sports_task.recurrence_end_date < date_from:
-                continue
-
-            groups = sports_task.get_consecutive_day_groups(date_from, date_to)
-            for group_idx, (group_start, group_end) in enumerate(groups):
-                group_id = f"sports_task_{sports_task.id}_group_{group_idx}"
-
-                current = group_start
-                while current <= group_end:
-                    if date_from <= current <= date_to:
-                        if current not in sports_task_occurrences:
-                            sports_task_occurrences[current] = []
-
-                        sports_task_occurrences[current].append({
-                            'task': sports_task,
-                            'is_start': current == group_start,
-                            'is_end': current == group_end,
-                            'group_id': group_id,
-                            'group_start': group_start,
-                            'group_end': group_end,
-                            'span_days': (group_end - group_start).days + 1,
-                            'type': 'sports_task',
-                            'date': current,
-                            'is_recurring': True
-                        })
-
-                        if current == group_start:
-                            all_sports_tasks.append({
-                                'task': sports_task,
-                                'date': current,
-                                'is_recurring': True,
-                                'group_start': group_start,
-                                'group_end': group_end,
-                                'type': 'sports_task'
-                            })
-                    current += timedelta(days=1)
-        else:
-            # Non-recurring sports task
-            if date_from <= sports_task.due_date <= date_to:
-                if sports_task.due_date not in sports_task_occurrences:
-                    sports_task_occurrences[sports_task.due_date] = []
-                sports_task_occurrences[sports_task.due_date].append({
-                    'task': sports_task,
-                    'is_start': True,
-                    'is_end': True,
-                    'group_id': f"sports_task_{sports_task.id}_single",
-                    'group_start': sports_task.due_date,
-                    'group_end': sports_task.due_date,
-                    'span_days': 1,
-                    'type': 'sports_task',
-                    'date': sports_task.due_date,
-                    'is_recurring': False
-                })
-
-                all_sports_tasks.append({
-                    'task': sports_task,
-                    'date': sports_task.due_date,
-                    'is_recurring': False,
-                    'type': 'sports_task'
-                })
-
-    # Combine all task occurrences
-    all_task_occurrences = {}
-    for date, occurrences in task_occurrences.items():
-        if date not in all_task_occurrences:
-            all_task_occurrences[date] = []
-        all_task_occurrences[date].extend(occurrences)
-
-    for date, occurrences in cultural_task_occurrences.items():
-        if date not in all_task_occurrences:
-            all_task_occurrences[date] = []
-        all_task_occurrences[date].extend(occurrences)
-
-    for date, occurrences in sports_task_occurrences.items():
-        if date not in all_task_occurrences:
-            all_task_occurrences[date] = []
-        all_task_occurrences[date].extend(occurrences)
-
-    # Get activities
-    activities = Activity.objects.filter(
-        program=program,
-        date__gte=date_from,
-        date__lte=date_to
-    ).select_related('committee', 'created_by').order_by('-date')
-
-    # Get non-recurring cultural tasks separately for compatibility
-    cultural_tasks_non_recurring = CulturalTask.objects.filter(
-        committee__program=program,
-        is_recurring=False,
-        due_date__gte=date_from,
-        due_date__lte=date_to
-    ).select_related('committee').order_by('-due_date')
-
-    # Get task sessions
-    task_sessions = TaskSession.objects.filter(
-        task__committee__program=program,
-        date__gte=date_from,
-        date__lte=date_to
-    ).select_related('task', 'task__committee').order_by('-date')
-
-    # Get operations tasks
-    operations_tasks = OperationsTask.objects.filter(
-        committee__program=program,
-        due_date__gte=date_from,
-        due_date__lte=date_to
-    ).select_related('committee').order_by('-due_date')
-
-    # Get scientific tasks
-    scientific_tasks = ScientificTask.objects.filter(
-        committee__program=program,
-        due_date__gte=date_from,
-        due_date__lte=date_to
-    ).select_related('committee').order_by('-due_date')
-
-    # Get lectures
-    lectures = Lecture.objects.filter(
-        committee__program=program,
-        date__gte=date_from,
-        date__lte=date_to
-    ).select_related('committee', 'created_by').order_by('-date')
-
-    # Get sharia tasks
-    sharia_tasks = ShariaTask.objects.filter(
-        committee__program=program,
-        due_date__gte=date_from,
-        due_date__lte=date_to
-    ).select_related('committee').order_by('-due_date')
-
-    # Get family competitions
-    family_competitions = FamilyCompetition.objects.filter(
-        committee__program=program,
-        start_date__lte=date_to,
-        end_date__gte=date_from
-    ).select_related('committee').order_by('-start_date')
-
-    # Get matches
-    matches = Match.objects.filter(
-        committee__program=program,
-        date__gte=date_from,
-        date__lte=date_to
-    ).select_related('committee', 'created_by').order_by('-date')
-
-    # Apply permission filters based on user role
-    if user.role == 'committee_supervisor':
-        try:
-            committee = Committee.objects.get(supervisor=user)
-
-            # Filter all by committee
-            activities = activities.filter(committee=committee)
-            cultural_tasks_non_recurring = cultural_tasks_non_recurring.filter(committee=committee)
-            task_sessions = task_sessions.filter(task__committee=committee)
-            operations_tasks = operations_tasks.filter(committee=committee)
-            scientific_tasks = scientific_tasks.filter(committee=committee)
-            lectures = lectures.filter(committee=committee)
-            sharia_tasks = sharia_tasks.filter(committee=committee)
-            family_competitions = family_competitions.filter(committee=committee)
-            matches = matches.filter(committee=committee)
-
-            # Filter program tasks by committee with safety checks
-            all_program_tasks = [
-                item for item in all_program_tasks
-                if item.get('task') and item['task'].committee == committee
-            ]
-
-            # Filter based on supervisor type with safety checks
-            if user.supervisor_type == 'cultural':
-                all_cultural_tasks = [
-                    item for item in all_cultural_tasks
-                    if item.get('task') and item['task'].committee == committee
-                ]
-                all_sports_tasks = []
-                operations_tasks = OperationsTask.objects.none()
-                scientific_tasks = ScientificTask.objects.none()
-                lectures = Lecture.objects.none()
-                sharia_tasks = ShariaTask.objects.none()
-                family_competitions = FamilyCompetition.objects.none()
-                matches = Match.objects.none()
-            elif user.supervisor_type == 'scientific':
-                scientific_tasks = scientific_tasks.filter(committee=committee)
-                lectures = lectures.filter(committee=committee)
-                all_cultural_tasks = []
-                all_sports_tasks = []
-                operations_tasks = OperationsTask.objects.none()
-                sharia_tasks = ShariaTask.objects.none()
-                family_competitions = FamilyCompetition.objects.none()
-                matches = Match.objects.none()
-            elif user.supervisor_type == 'operations':
-                operations_tasks = operations_tasks.filter(committee=committee)
-                all_cultural_tasks = []
-                all_sports_tasks = []
-                scientific_tasks = ScientificTask.objects.none()
-                lectures = Lecture.objects.none()
-                sharia_tasks = ShariaTask.objects.none()
-                family_competitions = FamilyCompetition.objects.none()
-                matches = Match.objects.none()
-            elif user.supervisor_type == 'sharia':
-                sharia_tasks = sharia_tasks.filter(committee=committee)
-                family_competitions = family_competitions.filter(committee=committee)
-                all_cultural_tasks = []
-                all_sports_tasks = []
-                operations_tasks = OperationsTask.objects.none()
-                scientific_tasks = ScientificTask.objects.none()
-                lectures = Lecture.objects.none()
-                matches = Match.objects.none()
-            elif user.supervisor_type == 'sports':
-                all_sports_tasks = [
-                    item for item in all_sports_tasks
-                    if item.get('task') and item['task'].committee == committee
-                ]
-                matches = matches.filter(committee=committee)
-                all_cultural_tasks = []
-                operations_tasks = OperationsTask.objects.none()
-                scientific_tasks = ScientificTask.objects.none()
-                lectures = Lecture.objects.none()
-                sharia_tasks = ShariaTask.objects.none()
-                family_competitions = FamilyCompetition.objects.none()
-        except Exception as e:
-            # Log the error but continue
-            print(f"Error in committee supervisor filtering: {e}")
-            all_cultural_tasks = []
-            all_sports_tasks = []
-            operations_tasks = OperationsTask.objects.none()
-            scientific_tasks = ScientificTask.objects.none()
-            lectures = Lecture.objects.none()
-            sharia_tasks = ShariaTask.objects.none()
-            family_competitions = FamilyCompetition.objects.none()
-            matches = Match.objects.none()
-
-    # Calculate statistics with safety checks
-    total_tasks = (
-        len(all_program_tasks or []) +
-        len(all_cultural_tasks or []) +
-        len(all_sports_tasks or []) +
-        (operations_tasks.count() if operations_tasks else 0) +
-        (scientific_tasks.count() if scientific_tasks else 0) +
-        (sharia_tasks.count() if sharia_tasks else 0)
-    )
-
-    # Completed tasks - need to check each task in the lists
-    completed_count = 0
-    for item in (all_program_tasks or []):
-        task = item.get('task')
-        if task and task.status == 'completed':
-            completed_count += 1
-    for item in (all_cultural_tasks or []):
-        task = item.get('task')
-        if task and task.status == 'completed':
-            completed_count += 1
-    for item in (all_sports_tasks or []):
-        task = item.get('task')
-        if task and task.status == 'completed':
-            completed_count += 1
-
-    completed_tasks = (
-        completed_count +
-        (operations_tasks.filter(status='completed').count() if operations_tasks else 0) +
-        (scientific_tasks.filter(status='completed').count() if scientific_tasks else 0) +
-        (sharia_tasks.filter(status='completed').count() if sharia_tasks else 0)
-    )
-
-    # Pending/In Progress tasks
-    pending_count = 0
-    for item in (all_program_tasks or []):
-        task = item.get('task')
-        if task and task.status in ['pending', 'in_progress']:
-            pending_count += 1
-    for item in (all_cultural_tasks or []):
-        task = item.get('task')
-        if task and task.status in ['pending', 'in_progress']:
-            pending_count += 1
-    for item in (all_sports_tasks or []):
-        task = item.get('task')
-        if task and task.status in ['pending', 'in_progress']:
-            pending_count += 1
-
-    pending_tasks = (
-        pending_count +
-        (operations_tasks.filter(Q(status='pending') | Q(status='in_progress')).count() if operations_tasks else 0) +
-        (scientific_tasks.filter(Q(status='pending') | Q(status='in_progress')).count() if scientific_tasks else 0) +
-        (sharia_tasks.filter(Q(status='pending') | Q(status='in_progress')).count() if sharia_tasks else 0)
+    feed = CalendarFeed(
+        program, date_from, date_to,
+        user=user,
+        committee=committee if user.role == 'committee_supervisor' else None,
     )
-
-    # Overdue tasks
-    overdue_count = 0
-    for item in (all_program_tasks or []):
-        task = item.get('task')
-        if task:
-            task_date = item.get('group_end', task.due_date) if item.get('is_recurring') else task.due_date
-            if task_date and task_date < today and task.status in ['pending', 'in_progress']:
-                overdue_count += 1
-
-    for item in (all_cultural_tasks or []):
-        task = item.get('task')
-        if task:
-            task_date = item.get('group_end', task.due_date) if item.get('is_recurring') else task.due_date
-            if task_date and task_date < today and task.status in ['pending', 'in_progress']:
-                overdue_count += 1
-
-    for item in (all_sports_tasks or []):
-        task = item.get('task')
-        if task:
-            task_date = item.get('group_end', task.due_date) if item.get('is_recurring') else task.due_date
-            if task_date and task_date < today and task.status in ['pending', 'in_progress']:
-                overdue_count += 1
-
-    overdue_tasks = (
-        overdue_count +
-        (operations_tasks.filter(due_date__lt=today, status__in=['pending', 'in_progress']).count() if operations_tasks else 0) +
-        (scientific_tasks.filter(due_date__lt=today, status__in=['pending', 'in_progress']).count() if scientific_tasks else 0) +
-        (sharia_tasks.filter(due_date__lt=today, status__in=['pending', 'in_progress']).count() if sharia_tasks else 0)
+    loaded = feed.instances()
+    instances = feed.instances_by_type()
+
+    # Recurring task types list each occurrence group once, on its first day in the range
+    list_items = {'regular_task': [], 'cultural_task': [], 'sports_task': []}
+    for item in feed.items():
+        if item.type not in list_items or not (item.is_start or item.date == date_from):
+            continue
+        list_item = {
+            'task': loaded[item.type][item.id],
+            'date': item.date,
+            'is_recurring': item.is_recurring,
+            'type': item.type,
+        }
+        if item.is_recurring:
+            list_item['group_start'] = item.span_start
+            list_item['group_end'] = item.span_end
+        list_items[item.type].append(list_item)
+
+    all_program_tasks = list_items['regular_task']
+    all_cultural_tasks = list_items['cultural_task']
+    all_sports_tasks = list_items['sports_task']
+
+    # The other lists show the latest items first
+    activities = instances['activity'][::-1]
+    task_sessions = instances['task_session'][::-1]
+    operations_tasks = instances['operations_task'][::-1]
+    scientific_tasks = instances['scientific_task'][::-1]
+    lectures = instances['lecture'][::-1]
+    sharia_tasks = instances['sharia_task'][::-1]
+    family_competitions = instances['family_competition'][::-1]
+    matches = instances['match'][::-1]
+
+    # Statistics: recurring tasks count once per occurrence group and are due at its last day
+    task_rows = [
+        (item['task'], item.get('group_end') or item['task'].due_date)
+        for item in all_program_tasks + all_cultural_tasks + all_sports_tasks
+    ]
+    task_rows += [(task, task.due_date) for task in operations_tasks + scientific_tasks + sharia_tasks]
+
+    total_tasks = len(task_rows)
+    completed_tasks = sum(1 for task, _ in task_rows if task.status == 'completed')
+    pending_tasks = sum(1 for task, _ in task_rows if task.status in ['pending', 'in_progress'])
+    overdue_tasks = sum(
+        1 for task, last_day in task_rows
+        if last_day < today and task.status in ['pending', 'in_progress']
     )
 
     # Determine base template
@@ -2977,9 +1212,6 @@ def calendar_list_view(request):
         base_template = 'base.html'
 
     context = {
-        # Task occurrences (for compatibility with calendar view)
-        'all_task_occurrences': all_task_occurrences or {},
-
         # List view items (tasks with their dates)
         'program_tasks': all_program_tasks or [],
         'cultural_tasks': all_cultural_tasks or [],
@@ -2987,7 +1219,6 @@ def calendar_list_view(request):
 
         # Other items
         'activities': activities,
-        'cultural_tasks_non_recurring': cultural_tasks_non_recurring,
         'task_sessions': task_sessions,
         'operations_tasks': operations_tasks,
         'scientific_tasks': scientific_tasks,
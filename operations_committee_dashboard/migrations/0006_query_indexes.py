@@ -0,0 +1,33 @@
+# Generated by Django 5.2.6 on 2026-10-18 13:49
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cultural_committee_dashboard', '0009_query_indexes'),
+        ('director_dashboard', '0006_query_indexes'),
+        ('operations_committee_dashboard', '0005_operationstask_is_recurring_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='operationsnotification',
+            index=models.Index(fields=['user', '-created_at'], name='opsnotif_user_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='operationsnotification',
+            index=models.Index(condition=models.Q(('is_read', False)), fields=['user'], name='opsnotif_unread_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='operationstask',
+            index=models.Index(fields=['committee', 'status', 'due_date'], name='opstask_comm_status_due_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='operationstask',
+            index=models.Index(fields=['committee', '-created_at'], name='opstask_comm_created_idx'),
+        ),
+    ]
@@ -2,55 +2,33 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.db.models import Count, Avg, Q
-from django.utils import timezone
 from datetime import timedelta
-from director_dashboard.models import Committee
 from accounts.models import User, UserActivity
+from accounts.activity import log_activity
+from main.notifications import dispatch as dispatch_notifications
+from main.rollups import get_committee_rollup
+from main.scope import committee_required
 from .models import (OperationsTask, OperationsTeamMember, LogisticsResource,
                      OperationsFileLibrary, OperationsWeeklyReport, OperationsNotification)
 from .forms import (OperationsTaskForm, OperationsTeamMemberForm, LogisticsResourceForm,
                     OperationsFileLibraryForm, OperationsWeeklyReportForm)
 
 
-def get_client_ip(request):
-    x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
-    if x_forwarded_for:
-        ip = x_forwarded_for.split(',')[0]
-    else:
-        ip = request.META.get('REMOTE_ADDR')
-    return ip
-
-
-from cultural_committee_dashboard.models import DailyPhrase
 @login_required
+@committee_required('operations')
 def operations_dashboard(request):
-    if request.user.role != 'committee_supervisor' or request.user.supervisor_type != 'operations':
-        messages.error(request, 'ليس لديك صلاحية للوصول إلى هذه الصفحة')
-        return redirect('home')
-
-    try:
-        committee = Committee.objects.get(supervisor=request.user)
-    except Committee.DoesNotExist:
-        messages.error(request, 'لم يتم تعيين لجنة لك بعد')
-        return redirect('home')
-
-    # Update overdue tasks
-    OperationsTask.objects.filter(
-        committee=committee,
-        due_date__lt=timezone.now().date(),
-        status__in=['not_started', 'in_progress']
-    ).update(status='overdue')
+    committee = request.committee
 
     # Statistics
-    total_members = OperationsTeamMember.objects.filter(committee=committee, is_active=True).count()
-    total_tasks = OperationsTask.objects.filter(committee=committee).count()
-    completed_tasks = OperationsTask.objects.filter(committee=committee, status='completed').count()
-    pending_tasks = OperationsTask.objects.filter(committee=committee,
-                                                  status__in=['not_started', 'in_progress']).count()
-    overdue_tasks = OperationsTask.objects.filter(committee=committee, status='overdue').count()
+    rollup = get_committee_rollup(committee, 'operations')
+    total_members = rollup.member_count
+    total_tasks = rollup.task_count
+    completed_tasks = rollup.completed_count
+    pending_tasks = rollup.pending_count
+    overdue_tasks = rollup.overdue_count
 
     # Completion rate
-    completion_rate = (completed_tasks / total_tasks * 100) if total_tasks > 0 else 0
+    completion_rate = rollup.completion_rate
 
     # Recent tasks
     recent_tasks = OperationsTask.objects.filter(committee=committee).order_by('-created_at')[:5]
@@ -70,26 +48,6 @@ def operations_dashboard(request):
     total_resources = LogisticsResource.objects.filter(committee=committee).count()
     available_resources = LogisticsResource.objects.filter(committee=committee, status='available').count()
 
-    try:
-        # Get the program that the current committee belongs to
-        program = committee.program
-
-        # Find cultural committee in the same program
-        cultural_committee = Committee.objects.filter(
-            program=program,
-            supervisor__supervisor_type='cultural'
-        ).first()
-
-        # Get today's phrase from the cultural committee
-        if cultural_committee:
-            daily_phrase = DailyPhrase.get_today_phrase()
-        else:
-            daily_phrase = None
-
-    except Exception as e:
-        print(f"Error getting daily phrase: {e}")
-        daily_phrase = None
-
     context = {
         'committee': committee,
         'total_members': total_members,
@@ -103,22 +61,14 @@ def operations_dashboard(request):
         'task_distribution': task_distribution,
         'total_resources': total_resources,
         'available_resources': available_resources,
-        'daily_phrase': daily_phrase,
     }
     return render(request, 'operations_committee/dashboard.html', context)
 
 
 @login_required
+@committee_required('operations')
 def committee_info(request):
-    if request.user.role != 'committee_supervisor' or request.user.supervisor_type != 'operations':
-        messages.error(request, 'ليس لديك صلاحية للوصول إلى هذه الصفحة')
-        return redirect('home')
-
-    try:
-        committee = Committee.objects.get(supervisor=request.user)
-    except Committee.DoesNotExist:
-        messages.error(request, 'لم يتم تعيين لجنة لك بعد')
-        return redirect('home')
+    committee = request.committee
 
     members = OperationsTeamMember.objects.filter(committee=committee)
     active_members = members.filter(is_active=True).count()
@@ -139,16 +89,9 @@ def committee_info(request):
 
 
 @login_required
+@committee_required('operations')
 def task_management(request):
-    if request.user.role != 'committee_supervisor' or request.user.supervisor_type != 'operations':
-        messages.error(request, 'ليس لديك صلاحية للوصول إلى هذه الصفحة')
-        return redirect('home')
-
-    try:
-        committee = Committee.objects.get(supervisor=request.user)
-    except Committee.DoesNotExist:
-        messages.error(request, 'لم يتم تعيين لجنة لك بعد')
-        return redirect('home')
+    committee = request.committee
 
     tasks = OperationsTask.objects.filter(committee=committee).order_by('-created_at')
 
@@ -172,16 +115,9 @@ def task_management(request):
 
 
 @login_required
+@committee_required('operations')
 def add_task(request):
-    if request.user.role != 'committee_supervisor' or request.user.supervisor_type != 'operations':
-        messages.error(request, 'ليس لديك صلاحية للوصول إلى هذه الصفحة')
-        return redirect('home')
-
-    try:
-        committee = Committee.objects.get(supervisor=request.user)
-    except Committee.DoesNotExist:
-        messages.error(request, 'لم يتم تعيين لجنة لك بعد')
-        return redirect('home')
+    committee = request.committee
 
     if request.method == 'POST':
         form = OperationsTaskForm(request.POST, committee=committee)
@@ -203,25 +139,21 @@ def add_task(request):
 
             # Create notification
             members = OperationsTeamMember.objects.filter(committee=committee, is_active=True)
-            for member in members:
-                OperationsNotification.objects.create(
-                    user=member.user,  # Send to each member individually
-                    committee=committee,
-                    notification_type='task_added',
-                    title='مهمة جديدة',
-                    message=f'تم إضافة مهمة جديدة: {task.title}' + (
-                        f' للمسؤول: {task.assigned_to_name}' if task.assigned_to_name else '') +
-                            (f' ({task.get_recurrence_pattern_display()})' if task.is_recurring else ''),
-                    related_task=task
-                )
-
-            UserActivity.objects.create(
-                user=request.user,
-                action=f'إضافة مهمة تشغيلية: {task.title}' +
-                       (f' ({task.get_recurrence_pattern_display()})' if task.is_recurring else ''),
-                ip_address=get_client_ip(request)
+            dispatch_notifications(
+                members.values_list('user_id', flat=True),
+                model=OperationsNotification,
+                committee=committee,
+                notification_type='task_added',
+                title='مهمة جديدة',
+                message=f'تم إضافة مهمة جديدة: {task.title}' + (
+                    f' للمسؤول: {task.assigned_to_name}' if task.assigned_to_name else '') +
+                        (f' ({task.get_recurrence_pattern_display()})' if task.is_recurring else ''),
+                related_task=task
             )
 
+            log_activity(request, f'إضافة مهمة تشغيلية: {task.title}' +
+                         (f' ({task.get_recurrence_pattern_display()})' if task.is_recurring else ''))
+
             if task.is_recurring:
                 messages.success(request,
                                  f'تم إضافة المهمة المتكررة بنجاح! ({task.get_recurrence_pattern_display()})')
@@ -240,16 +172,9 @@ def add_task(request):
 
 
 @login_required
+@committee_required('operations')
 def edit_task(request, task_id):
-    if request.user.role != 'committee_supervisor' or request.user.supervisor_type != 'operations':
-        messages.error(request, 'ليس لديك صلاحية للوصول إلى هذه الصفحة')
-        return redirect('home')
-
-    try:
-        committee = Committee.objects.get(supervisor=request.user)
-    except Committee.DoesNotExist:
-        messages.error(request, 'لم يتم تعيين لجنة لك بعد')
-        return redirect('home')
+    committee = request.committee
 
     task = get_object_or_404(OperationsTask, id=task_id, committee=committee)
 
@@ -268,25 +193,21 @@ def edit_task(request, task_id):
             task.save()
 
             members = OperationsTeamMember.objects.filter(committee=committee, is_active=True)
-            for member in members:
-                OperationsNotification.objects.create(
-                    user=member.user,
-                    committee=committee,
-                    notification_type='task_updated',
-                    title='تعديل مهمة',
-                    message=f'تم تعديل المهمة: {task.title}' + (
-                        f' للمسؤول: {task.assigned_to_name}' if task.assigned_to_name else '') +
-                            (f' ({task.get_recurrence_pattern_display()})' if task.is_recurring else ''),
-                    related_task=task
-                )
-
-            UserActivity.objects.create(
-                user=request.user,
-                action=f'تعديل مهمة تشغيلية: {task.title}' +
-                       (f' ({task.get_recurrence_pattern_display()})' if task.is_recurring else ''),
-                ip_address=get_client_ip(request)
+            dispatch_notifications(
+                members.values_list('user_id', flat=True),
+                model=OperationsNotification,
+                committee=committee,
+                notification_type='task_updated',
+                title='تعديل مهمة',
+                message=f'تم تعديل المهمة: {task.title}' + (
+                    f' للمسؤول: {task.assigned_to_name}' if task.assigned_to_name else '') +
+                        (f' ({task.get_recurrence_pattern_display()})' if task.is_recurring else ''),
+                related_task=task
             )
 
+            log_activity(request, f'تعديل مهمة تشغيلية: {task.title}' +
+                         (f' ({task.get_recurrence_pattern_display()})' if task.is_recurring else ''))
+
             if task.is_recurring:
                 messages.success(request,
                                  f'تم تعديل المهمة المتكررة بنجاح! ({task.get_recurrence_pattern_display()})')
@@ -311,16 +232,9 @@ def edit_task(request, task_id):
 
 
 @login_required
+@committee_required('operations')
 def delete_task(request, task_id):
-    if request.user.role != 'committee_supervisor' or request.user.supervisor_type != 'operations':
-        messages.error(request, 'ليس لديك صلاحية للوصول إلى هذه الصفحة')
-        return redirect('home')
-
-    try:
-        committee = Committee.objects.get(supervisor=request.user)
-    except Committee.DoesNotExist:
-        messages.error(request, 'لم يتم تعيين لجنة لك بعد')
-        return redirect('home')
+    committee = request.committee
 
     task = get_object_or_404(OperationsTask, id=task_id, committee=committee)
 
@@ -331,12 +245,8 @@ def delete_task(request, task_id):
 
         task.delete()
 
-        UserActivity.objects.create(
-            user=request.user,
-            action=f'حذف مهمة تشغيلية: {task_title}' +
-                   (f' ({recurrence_pattern})' if is_recurring else ''),
-            ip_address=get_client_ip(request)
-        )
+        log_activity(request, f'حذف مهمة تشغيلية: {task_title}' +
+                     (f' ({recurrence_pattern})' if is_recurring else ''))
 
         if is_recurring:
             messages.success(request, f'تم حذف المهمة المتكررة بنجاح! ({recurrence_pattern})')
@@ -354,16 +264,9 @@ def delete_task(request, task_id):
 
 
 @login_required
+@committee_required('operations')
 def member_management(request):
-    if request.user.role != 'committee_supervisor' or request.user.supervisor_type != 'operations':
-        messages.error(request, 'ليس لديك صلاحية للوصول إلى هذه الصفحة')
-        return redirect('home')
-
-    try:
-        committee = Committee.objects.get(supervisor=request.user)
-    except Committee.DoesNotExist:
-        messages.error(request, 'لم يتم تعيين لجنة لك بعد')
-        return redirect('home')
+    committee = request.committee
 
     members = OperationsTeamMember.objects.filter(committee=committee).select_related('user').order_by('-participation_score')
 
@@ -375,16 +278,9 @@ def member_management(request):
 
 
 @login_required
+@committee_required('operations')
 def add_member(request):
-    if request.user.role != 'committee_supervisor' or request.user.supervisor_type != 'operations':
-        messages.error(request, 'ليس لديك صلاحية للوصول إلى هذه الصفحة')
-        return redirect('home')
-
-    try:
-        committee = Committee.objects.get(supervisor=request.user)
-    except Committee.DoesNotExist:
-        messages.error(request, 'لم يتم تعيين لجنة لك بعد')
-        return redirect('home')
+    committee = request.committee
 
     if request.method == 'POST':
         form = OperationsTeamMemberForm(request.POST, committee=committee)
@@ -407,16 +303,9 @@ def add_member(request):
 
 
 @login_required
+@committee_required('operations')
 def logistics_management(request):
-    if request.user.role != 'committee_supervisor' or request.user.supervisor_type != 'operations':
-        messages.error(request, 'ليس لديك صلاحية للوصول إلى هذه الصفحة')
-        return redirect('home')
-
-    try:
-        committee = Committee.objects.get(supervisor=request.user)
-    except Committee.DoesNotExist:
-        messages.error(request, 'لم يتم تعيين لجنة لك بعد')
-        return redirect('home')
+    committee = request.committee
 
     resources = LogisticsResource.objects.filter(committee=committee).order_by('-created_at')
 
@@ -440,16 +329,9 @@ def logistics_management(request):
 
 
 @login_required
+@committee_required('operations')
 def add_resource(request):
-    if request.user.role != 'committee_supervisor' or request.user.supervisor_type != 'operations':
-        messages.error(request, 'ليس لديك صلاحية للوصول إلى هذه الصفحة')
-        return redirect('home')
-
-    try:
-        committee = Committee.objects.get(supervisor=request.user)
-    except Committee.DoesNotExist:
-        messages.error(request, 'لم يتم تعيين لجنة لك بعد')
-        return redirect('home')
+    committee = request.committee
 
     if request.method == 'POST':
         form = LogisticsResourceForm(request.POST)
@@ -461,22 +343,18 @@ def add_resource(request):
 
             # Notify members
             members = OperationsTeamMember.objects.filter(committee=committee, is_active=True)
-            for member in members:
-                OperationsNotification.objects.create(
-                    user=member.user,
-                    committee=committee,
-                    notification_type='resource_added',
-                    title='مورد جديد',
-                    message=f'تم إضافة مورد جديد: {resource.name}',
-                    related_resource=resource
-                )
-
-            UserActivity.objects.create(
-                user=request.user,
-                action=f'إضافة مورد لوجستي: {resource.name}',
-                ip_address=get_client_ip(request)
+            dispatch_notifications(
+                members.values_list('user_id', flat=True),
+                model=OperationsNotification,
+                committee=committee,
+                notification_type='resource_added',
+                title='مورد جديد',
+                message=f'تم إضافة مورد جديد: {resource.name}',
+                related_resource=resource
             )
 
+            log_activity(request, f'إضافة مورد لوجستي: {resource.name}')
+
             messages.success(request, 'تم إضافة المورد بنجاح!')
             return redirect('operations_logistics_management')
     else:
@@ -491,16 +369,9 @@ def add_resource(request):
 
 
 @login_required
+@committee_required('operations')
 def edit_resource(request, resource_id):
-    if request.user.role != 'committee_supervisor' or request.user.supervisor_type != 'operations':
-        messages.error(request, 'ليس لديك صلاحية للوصول إلى هذه الصفحة')
-        return redirect('home')
-
-    try:
-        committee = Committee.objects.get(supervisor=request.user)
-    except Committee.DoesNotExist:
-        messages.error(request, 'لم يتم تعيين لجنة لك بعد')
-        return redirect('home')
+    committee = request.committee
 
     resource = get_object_or_404(LogisticsResource, id=resource_id, committee=committee)
 
@@ -509,11 +380,7 @@ def edit_resource(request, resource_id):
         if form.is_valid():
             resource = form.save()
 
-            UserActivity.objects.create(
-                user=request.user,
-                action=f'تعديل مورد لوجستي: {resource.name}',
-                ip_address=get_client_ip(request)
-            )
+            log_activity(request, f'تعديل مورد لوجستي: {resource.name}')
 
             messages.success(request, 'تم تعديل المورد بنجاح!')
             return redirect('operations_logistics_management')
@@ -530,16 +397,9 @@ def edit_resource(request, resource_id):
 
 
 @login_required
+@committee_required('operations')
 def delete_resource(request, resource_id):
-    if request.user.role != 'committee_supervisor' or request.user.supervisor_type != 'operations':
-        messages.error(request, 'ليس لديك صلاحية للوصول إلى هذه الصفحة')
-        return redirect('home')
-
-    try:
-        committee = Committee.objects.get(supervisor=request.user)
-    except Committee.DoesNotExist:
-        messages.error(request, 'لم يتم تعيين لجنة لك بعد')
-        return redirect('home')
+    committee = request.committee
 
     resource = get_object_or_404(LogisticsResource, id=resource_id, committee=committee)
 
@@ -547,11 +407,7 @@ def delete_resource(request, resource_id):
         resource_name = resource.name
         resource.delete()
 
-        UserActivity.objects.create(
-            user=request.user,
-            action=f'حذف مورد لوجستي: {resource_name}',
-            ip_address=get_client_ip(request)
-        )
+        log_activity(request, f'حذف مورد لوجستي: {resource_name}')
 
         messages.success(request, 'تم حذف المورد بنجاح!')
         return redirect('operations_logistics_management')
@@ -565,16 +421,9 @@ def delete_resource(request, resource_id):
 
 
 @login_required
+@committee_required('operations')
 def file_library(request):
-    if request.user.role != 'committee_supervisor' or request.user.supervisor_type != 'operations':
-        messages.error(request, 'ليس لديك صلاحية للوصول إلى هذه الصفحة')
-        return redirect('home')
-
-    try:
-        committee = Committee.objects.get(supervisor=request.user)
-    except Committee.DoesNotExist:
-        messages.error(request, 'لم يتم تعيين لجنة لك بعد')
-        return redirect('home')
+    committee = request.committee
 
     files = OperationsFileLibrary.objects.filter(committee=committee).order_by('-uploaded_at')
 
@@ -592,16 +441,9 @@ def file_library(request):
 
 
 @login_required
+@committee_required('operations')
 def upload_file(request):
-    if request.user.role != 'committee_supervisor' or request.user.supervisor_type != 'operations':
-        messages.error(request, 'ليس لديك صلاحية للوصول إلى هذه الصفحة')
-        return redirect('home')
-
-    try:
-        committee = Committee.objects.get(supervisor=request.user)
-    except Committee.DoesNotExist:
-        messages.error(request, 'لم يتم تعيين لجنة لك بعد')
-        return redirect('home')
+    committee = request.committee
 
     if request.method == 'POST':
         form = OperationsFileLibraryForm(request.POST, request.FILES)
@@ -611,11 +453,7 @@ def upload_file(request):
             file_obj.uploaded_by = request.user
             file_obj.save()
 
-            UserActivity.objects.create(
-                user=request.user,
-                action=f'رفع ملف تشغيلي: {file_obj.title}',
-                ip_address=get_client_ip(request)
-            )
+            log_activity(request, f'رفع ملف تشغيلي: {file_obj.title}')
 
             messages.success(request, 'تم رفع الملف بنجاح!')
             return redirect('operations_file_library')
@@ -631,16 +469,9 @@ def upload_file(request):
 
 
 @login_required
+@committee_required('operations')
 def delete_file(request, file_id):
-    if request.user.role != 'committee_supervisor' or request.user.supervisor_type != 'operations':
-        messages.error(request, 'ليس لديك صلاحية للوصول إلى هذه الصفحة')
-        return redirect('home')
-
-    try:
-        committee = Committee.objects.get(supervisor=request.user)
-    except Committee.DoesNotExist:
-        messages.error(request, 'لم يتم تعيين لجنة لك بعد')
-        return redirect('home')
+    committee = request.committee
 
     file_obj = get_object_or_404(OperationsFileLibrary, id=file_id, committee=committee)
 
@@ -661,16 +492,9 @@ def delete_file(request, file_id):
 
 
 @login_required
+@committee_required('operations')
 def reports(request):
-    if request.user.role != 'committee_supervisor' or request.user.supervisor_type != 'operations':
-        messages.error(request, 'ليس لديك صلاحية للوصول إلى هذه الصفحة')
-        return redirect('home')
-
-    try:
-        committee = Committee.objects.get(supervisor=request.user)
-    except Committee.DoesNotExist:
-        messages.error(request, 'لم يتم تعيين لجنة لك بعد')
-        return redirect('home')
+    committee = request.committee
 
     # Get all weekly reports
     weekly_reports = OperationsWeeklyReport.objects.filter(committee=committee).order_by('-week_start_date')
@@ -698,16 +522,9 @@ def reports(request):
 
 
 @login_required
+@committee_required('operations')
 def add_report(request):
-    if request.user.role != 'committee_supervisor' or request.user.supervisor_type != 'operations':
-        messages.error(request, 'ليس لديك صلاحية للوصول إلى هذه الصفحة')
-        return redirect('home')
-
-    try:
-        committee = Committee.objects.get(supervisor=request.user)
-    except Committee.DoesNotExist:
-        messages.error(request, 'لم يتم تعيين لجنة لك بعد')
-        return redirect('home')
+    committee = request.committee
 
     if request.method == 'POST':
         form = OperationsWeeklyReportForm(request.POST)
@@ -719,21 +536,17 @@ def add_report(request):
 
             # Notify members
             members = OperationsTeamMember.objects.filter(committee=committee, is_active=True)
-            for member in members:
-                OperationsNotification.objects.create(
-                    user=member.user,
-                    committee=committee,
-                    notification_type='report_uploaded',
-                    title='تقرير جديد',
-                    message=f'تم رفع تقرير أسبوعي جديد: {report.week_start_date} - {report.week_end_date}'
-                )
-
-            UserActivity.objects.create(
-                user=request.user,
-                action=f'إضافة تقرير أسبوعي: {report.week_start_date}',
-                ip_address=get_client_ip(request)
+            dispatch_notifications(
+                members.values_list('user_id', flat=True),
+                model=OperationsNotification,
+                committee=committee,
+                notification_type='report_uploaded',
+                title='تقرير جديد',
+                message=f'تم رفع تقرير أسبوعي جديد: {report.week_start_date} - {report.week_end_date}'
             )
 
+            log_activity(request, f'إضافة تقرير أسبوعي: {report.week_start_date}')
+
             messages.success(request, 'تم إضافة التقرير بنجاح!')
             return redirect('operations_reports')
     else:
@@ -748,16 +561,9 @@ def add_report(request):
 
 
 @login_required
+@committee_required('operations')
 def notifications(request):
-    if request.user.role != 'committee_supervisor' or request.user.supervisor_type != 'operations':
-        messages.error(request, 'ليس لديك صلاحية للوصول إلى هذه الصفحة')
-        return redirect('home')
-
-    try:
-        committee = Committee.objects.get(supervisor=request.user)
-    except Committee.DoesNotExist:
-        messages.error(request, 'لم يتم تعيين لجنة لك بعد')
-        return redirect('home')
+    committee = request.committee
 
     notifications = OperationsNotification.objects.filter(
         user=request.user
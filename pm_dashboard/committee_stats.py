@@ -0,0 +1,142 @@
+from django.apps import apps
+from django.db.models import Avg, Case, Count, F, IntegerField, Q, Value, When
+
+
+class StatsSource:
+    """
+    Where the members, tasks and files of one supervisor type live.
+    pending/overdue: task statuses counted as pending/overdue for that model.
+    """
+
+    def __init__(self, task_model, member_model, member_score, pending, overdue, completion=None, file_model=None):
+        self.task_model = task_model
+        self.member_model = member_model
+        self.file_model = file_model
+        self.member_score = member_score
+        self.pending = pending
+        self.overdue = overdue
+        # Expression of a task's completion percentage (the generic Task computes it from its status)
+        self.completion = completion if completion is not None else F('completion_percentage')
+
+    def get_task_model(self):
+        return apps.get_model(self.task_model)
+
+    def get_member_model(self):
+        return apps.get_model(self.member_model)
+
+    def get_file_model(self):
+        return apps.get_model(self.file_model) if self.file_model else None
+
+
+# Committees without a (known) supervisor type fall back to the generic tasks and students
+GENERIC_SOURCE = StatsSource(
+    'pm_dashboard.Task', 'director_dashboard.Student', 'progress',
+    pending=('pending',), overdue=('overdue',),
+    completion=Case(
+        When(status='completed', then=Value(100)),
+        When(status='pending', then=Value(50)),
+        default=Value(0),
+        output_field=IntegerField(),
+    ),
+)
+
+STATS_SOURCES = {
+    'cultural': StatsSource('cultural_committee_dashboard.CulturalTask',
+                            'cultural_committee_dashboard.CommitteeMember', 'participation_score',
+                            pending=('pending',), overdue=(),
+                            file_model='cultural_committee_dashboard.FileLibrary'),
+    'sports': StatsSource('sports_committee_dashboard.SportsTask',
+                          'sports_committee_dashboard.SportsMember', 'participation_score',
+                          pending=('pending',), overdue=('overdue',),
+                          file_model='sports_committee_dashboard.SportsFile'),
+    'sharia': StatsSource('sharia_committee_dashboard.ShariaTask',
+                          'sharia_committee_dashboard.ShariaMember', 'participation_score',
+                          pending=('pending',), overdue=(),
+                          file_model='sharia_committee_dashboard.ShariaFile'),
+    'scientific': StatsSource('scientific_committee_dashboard.ScientificTask',
+                              'scientific_committee_dashboard.ScientificMember', 'participation_score',
+                              pending=('pending',), overdue=(),
+                              file_model='scientific_committee_dashboard.ScientificFile'),
+    'operations': StatsSource('operations_committee_dashboard.OperationsTask',
+                              'operations_committee_dashboard.OperationsTeamMember', 'participation_score',
+                              pending=('not_started', 'in_progress'), overdue=('overdue',),
+                              file_model='operations_committee_dashboard.OperationsFileLibrary'),
+}
+
+
+def get_stats_source(committee):
+    supervisor = committee.supervisor
+    return STATS_SOURCES.get(supervisor.supervisor_type if supervisor else None, GENERIC_SOURCE)
+
+
+class CommitteeStat:
+    """Figures of one committee"""
+
+    def __init__(self):
+        self.total_members = 0
+        self.avg_participation = 0
+        self.total_tasks = 0
+        self.completed_tasks = 0
+        self.pending_tasks = 0
+        self.overdue_tasks = 0
+        self.avg_completion = 0
+
+    @property
+    def task_completion_percentage(self):
+        if not self.total_tasks:
+            return 0
+        return round((self.completed_tasks / self.total_tasks) * 100, 1)
+
+
+class CommitteeStats:
+    """
+    Member and task figures of many committees at once.
+    One grouped aggregate per member model and per task model involved, whatever
+    the number of committees. Pass committees with select_related('supervisor').
+    """
+
+    def __init__(self, committees):
+        self.stats = {}
+        committee_ids_by_source = {}
+        for committee in committees:
+            self.stats[committee.pk] = CommitteeStat()
+            committee_ids_by_source.setdefault(get_stats_source(committee), []).append(committee.pk)
+
+        for source, committee_ids in committee_ids_by_source.items():
+            self._add_members(source, committee_ids)
+            self._add_tasks(source, committee_ids)
+
+    def __getitem__(self, committee_id):
+        return self.stats[committee_id]
+
+    def _add_members(self, source, committee_ids):
+        rows = source.get_member_model().objects.filter(committee__in=committee_ids).order_by().values(
+            'committee'
+        ).annotate(total=Count('id'), avg_score=Avg(source.member_score))
+        for row in rows:
+            stat = self.stats[row['committee']]
+            stat.total_members = row['total']
+            stat.avg_participation = round(row['avg_score'] or 0, 1)
+
+    def _add_tasks(self, source, committee_ids):
+        counts = {
+            'total': Count('id'),
+            'completed': Count('id', filter=Q(status='completed')),
+            'avg_completion': Avg(source.completion),
+        }
+        # Models without such statuses keep the default of 0
+        if source.pending:
+            counts['pending'] = Count('id', filter=Q(status__in=source.pending))
+        if source.overdue:
+            counts['overdue'] = Count('id', filter=Q(status__in=source.overdue))
+
+        rows = source.get_task_model().objects.filter(committee__in=committee_ids).order_by().values(
+            'committee'
+        ).annotate(**counts)
+        for row in rows:
+            stat = self.stats[row['committee']]
+            stat.total_tasks = row['total']
+            stat.completed_tasks = row['completed']
+            stat.pending_tasks = row.get('pending', 0)
+            stat.overdue_tasks = row.get('overdue', 0)
+            stat.avg_completion = round(row['avg_completion'] or 0, 1)
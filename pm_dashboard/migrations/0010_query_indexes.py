@@ -0,0 +1,41 @@
+# Generated by Django 5.2.6 on 2026-10-18 13:49
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cultural_committee_dashboard', '0009_query_indexes'),
+        ('director_dashboard', '0006_query_indexes'),
+        ('operations_committee_dashboard', '0006_query_indexes'),
+        ('pm_dashboard', '0009_activity_updated_at'),
+        ('scientific_committee_dashboard', '0008_query_indexes'),
+        ('sharia_committee_dashboard', '0008_query_indexes'),
+        ('sports_committee_dashboard', '0011_query_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='activity',
+            index=models.Index(fields=['program', 'date'], name='activity_prog_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['user', '-created_at'], name='pmnotif_user_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(condition=models.Q(('is_read', False)), fields=['user'], name='pmnotif_unread_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['program', 'status', 'due_date'], name='task_prog_status_due_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['committee', 'status', 'due_date'], name='task_comm_status_due_idx'),
+        ),
+    ]
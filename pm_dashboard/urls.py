@@ -11,6 +11,7 @@ urlpatterns = [
     # Committee Management
     path('committees/', views.committee_management, name='pm_committee_management'),
     path('committees/detail/<int:committee_id>/', views.committee_detail, name='pm_committee_detail'),
+    path('committees/detail/<int:committee_id>/<str:section>/', views.committee_section, name='pm_committee_section'),
     path('committees/add/', views.add_committee, name='pm_add_committee'),
     path('committees/edit/<int:committee_id>/', views.edit_committee, name='pm_edit_committee'),
     path('committees/delete/<int:committee_id>/', views.delete_committee, name='pm_delete_committee'),
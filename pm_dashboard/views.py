@@ -1,36 +1,27 @@
 from django.shortcuts import render, redirect, get_object_or_404
+from django.http import Http404
+from django.urls import reverse
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.db.models import Count, Avg, Q
+from django.db.models import Count, Avg, Prefetch, Q
 from django.utils import timezone
 from datetime import datetime, timedelta
 from director_dashboard.models import Program, Committee, Student
 from accounts.models import User, UserActivity
+from accounts.activity import log_activity
+from cultural_committee_dashboard.models import TaskSession
+from main.notifications import dispatch as dispatch_notifications
+from main.pagination import keyset_page
+from main.scope import program_required
+from .committee_stats import GENERIC_SOURCE, STATS_SOURCES, CommitteeStats, get_stats_source
 from .models import Task, Activity, StudentAttendance, Notification
 from .forms import CommitteeForm, TaskForm, ActivityForm, AttendanceForm
 
 
-def get_client_ip(request):
-    x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
-    if x_forwarded_for:
-        ip = x_forwarded_for.split(',')[0]
-    else:
-        ip = request.META.get('REMOTE_ADDR')
-    return ip
-
-
 @login_required
+@program_required
 def pm_dashboard(request):
-    if request.user.role != 'program_manager':
-        messages.error(request, 'ليس لديك صلاحية للوصول إلى هذه الصفحة')
-        return redirect('home')
-
-    # Get user's program
-    try:
-        program = Program.objects.get(manager=request.user)
-    except Program.DoesNotExist:
-        messages.error(request, 'لم يتم تعيين برنامج لك بعد')
-        return redirect('home')
+    program = request.program
 
     # Statistics
     total_committees = Committee.objects.filter(program=program).count()
@@ -41,20 +32,12 @@ def pm_dashboard(request):
     # Recent activities
     recent_activities = Activity.objects.filter(program=program).order_by('-created_at')[:5]
 
-    # Overdue tasks
+    # Overdue tasks (sweep_overdue switches their status; count the ones it hasn't reached yet too)
     overdue_tasks = Task.objects.filter(
+        Q(status='overdue') | Q(status='pending', due_date__lt=timezone.localdate()),
         program=program,
-        due_date__lt=timezone.now().date(),
-        status='pending'
     ).count()
 
-    # Update overdue tasks status
-    Task.objects.filter(
-        program=program,
-        due_date__lt=timezone.now().date(),
-        status='pending'
-    ).update(status='overdue')
-
     # Unread notifications
     unread_notifications = Notification.objects.filter(user=request.user, is_read=False).count()
 
@@ -64,11 +47,6 @@ def pm_dashboard(request):
         avg_progress=Avg('student__progress')
     )
 
-    from cultural_committee_dashboard.models import DailyPhrase
-
-    today = timezone.now().date()
-    daily_phrase = DailyPhrase.get_today_phrase()
-
     context = {
         'program': program,
         'total_committees': total_committees,
@@ -79,22 +57,14 @@ def pm_dashboard(request):
         'recent_activities': recent_activities,
         'unread_notifications': unread_notifications,
         'committees': committees,
-        'daily_phrase': daily_phrase,
     }
     return render(request, 'program_manager/dashboard.html', context)
 
 
 @login_required
+@program_required
 def program_info(request):
-    if request.user.role != 'program_manager':
-        messages.error(request, 'ليس لديك صلاحية للوصول إلى هذه الصفحة')
-        return redirect('home')
-
-    try:
-        program = Program.objects.get(manager=request.user)
-    except Program.DoesNotExist:
-        messages.error(request, 'لم يتم تعيين برنامج لك بعد')
-        return redirect('home')
+    program = request.program
 
     # Program statistics
     total_committees = Committee.objects.filter(program=program).count()
@@ -111,178 +81,23 @@ def program_info(request):
 
 
 @login_required
+@program_required
 def committee_management(request):
-    if request.user.role != 'program_manager':
-        messages.error(request, 'ليس لديك صلاحية للوصول إلى هذه الصفحة')
-        return redirect('home')
-
-    try:
-        program = Program.objects.get(manager=request.user)
-    except Program.DoesNotExist:
-        messages.error(request, 'لم يتم تعيين برنامج لك بعد')
-        return redirect('home')
+    program = request.program
 
-    # Get committees with basic info
     committees = Committee.objects.filter(program=program).select_related('supervisor')
 
     # Convert to list so we can add custom attributes
-    committees_list = []
-
-    for committee in committees:
-        supervisor = committee.supervisor
-
-        # Initialize committee stats
-        total_members = 0
-        avg_participation = 0
-        total_tasks = 0
-        completed_tasks = 0
-        task_completion_percentage = 0
-
-        # Query based on supervisor type
-        if supervisor and supervisor.supervisor_type:
-            if supervisor.supervisor_type == 'cultural':
-                from cultural_committee_dashboard.models import CulturalTask, CommitteeMember
-
-                # Get members count
-                total_members = CommitteeMember.objects.filter(committee=committee).count()
-
-                # Get tasks
-                tasks = CulturalTask.objects.filter(committee=committee)
-                total_tasks = tasks.count()
-                completed_tasks = tasks.filter(status='completed').count()
-
-                # Calculate average participation
-                members = CommitteeMember.objects.filter(committee=committee)
-                if members.exists():
-                    avg_participation = round(sum(member.participation_score for member in members) / total_members, 1)
-
-                # Calculate task completion percentage
-                if total_tasks > 0:
-                    task_completion_percentage = round((completed_tasks / total_tasks) * 100, 1)
-
-            elif supervisor.supervisor_type == 'sports':
-                from sports_committee_dashboard.models import SportsTask, SportsMember
-
-                # Get members count
-                total_members = SportsMember.objects.filter(committee=committee).count()
-
-                # Get tasks
-                tasks = SportsTask.objects.filter(committee=committee)
-                total_tasks = tasks.count()
-                completed_tasks = tasks.filter(status='completed').count()
-
-                # Calculate average participation
-                members = SportsMember.objects.filter(committee=committee)
-                if members.exists():
-                    avg_participation = round(sum(member.participation_score for member in members) / total_members, 1)
-
-                # Calculate task completion percentage
-                if total_tasks > 0:
-                    task_completion_percentage = round((completed_tasks / total_tasks) * 100, 1)
-
-            elif supervisor.supervisor_type == 'sharia':
-                from sharia_committee_dashboard.models import ShariaTask, ShariaMember
-
-                # Get members count
-                total_members = ShariaMember.objects.filter(committee=committee).count()
-
-                # Get tasks
-                tasks = ShariaTask.objects.filter(committee=committee)
-                total_tasks = tasks.count()
-                completed_tasks = tasks.filter(status='completed').count()
-
-                # Calculate average participation
-                members = ShariaMember.objects.filter(committee=committee)
-                if members.exists():
-                    avg_participation = round(sum(member.participation_score for member in members) / total_members, 1)
-
-                # Calculate task completion percentage
-                if total_tasks > 0:
-                    task_completion_percentage = round((completed_tasks / total_tasks) * 100, 1)
-
-            elif supervisor.supervisor_type == 'scientific':
-                from scientific_committee_dashboard.models import ScientificTask, ScientificMember
-
-                # Get members count
-                total_members = ScientificMember.objects.filter(committee=committee).count()
-
-                # Get tasks
-                tasks = ScientificTask.objects.filter(committee=committee)
-                total_tasks = tasks.count()
-                completed_tasks = tasks.filter(status='completed').count()
-
-                # Calculate average participation
-                members = ScientificMember.objects.filter(committee=committee)
-                if members.exists():
-                    avg_participation = round(sum(member.participation_score for member in members) / total_members, 1)
-
-                # Calculate task completion percentage
-                if total_tasks > 0:
-                    task_completion_percentage = round((completed_tasks / total_tasks) * 100, 1)
-
-            elif supervisor.supervisor_type == 'operations':
-                from operations_committee_dashboard.models import OperationsTask, OperationsTeamMember
-
-                # Get members count
-                total_members = OperationsTeamMember.objects.filter(committee=committee).count()
-
-                # Get tasks
-                tasks = OperationsTask.objects.filter(committee=committee)
-                total_tasks = tasks.count()
-                completed_tasks = tasks.filter(status='completed').count()
-
-                # Calculate average participation
-                members = OperationsTeamMember.objects.filter(committee=committee)
-                if members.exists():
-                    avg_participation = round(sum(member.participation_score for member in members) / total_members, 1)
-
-                # Calculate task completion percentage
-                if total_tasks > 0:
-                    task_completion_percentage = round((completed_tasks / total_tasks) * 100, 1)
-
-            else:
-                # Fallback to generic models
-                total_members = Student.objects.filter(committee=committee).count()
-
-                # Get student progress as participation
-                students = Student.objects.filter(committee=committee)
-                if students.exists():
-                    avg_participation = round(sum(student.progress for student in students) / total_members, 1)
-
-                # Get generic tasks
-                tasks = Task.objects.filter(committee=committee)
-                total_tasks = tasks.count()
-                completed_tasks = tasks.filter(status='completed').count()
-
-                # Calculate task completion percentage
-                if total_tasks > 0:
-                    task_completion_percentage = round((completed_tasks / total_tasks) * 100, 1)
-        else:
-            # No supervisor or supervisor type
-            total_members = Student.objects.filter(committee=committee).count()
-
-            # Get student progress as participation
-            students = Student.objects.filter(committee=committee)
-            if students.exists():
-                avg_participation = round(sum(student.progress for student in students) / total_members, 1)
-
-            # Get generic tasks
-            tasks = Task.objects.filter(committee=committee)
-            total_tasks = tasks.count()
-            completed_tasks = tasks.filter(status='completed').count()
-
-            # Calculate task completion percentage
-            if total_tasks > 0:
-                task_completion_percentage = round((completed_tasks / total_tasks) * 100, 1)
-
-        # Add custom attributes to committee object
-        committee.student_count = total_members
-        committee.avg_progress = avg_participation
-        committee.total_tasks = total_tasks
-        committee.completed_tasks = completed_tasks
-        committee.task_completion_percentage = task_completion_percentage
+    committees_list = list(committees)
+    stats = CommitteeStats(committees_list)
 
-        committees_list.append(committee)
+    for committee in committees_list:
+        committee_stats = stats[committee.pk]
+        committee.student_count = committee_stats.total_members
+        committee.avg_progress = committee_stats.avg_participation
+        committee.total_tasks = committee_stats.total_tasks
+        committee.completed_tasks = committee_stats.completed_tasks
+        committee.task_completion_percentage = committee_stats.task_completion_percentage
 
     context = {
         'program': program,
@@ -292,278 +107,25 @@ def committee_management(request):
 
 
 @login_required
+@program_required
 def committee_detail(request, committee_id):
-    if request.user.role != 'program_manager':
-        messages.error(request, 'ليس لديك صلاحية للوصول إلى هذه الصفحة')
-        return redirect('home')
-
-    try:
-        program = Program.objects.get(manager=request.user)
-    except Program.DoesNotExist:
-        messages.error(request, 'لم يتم تعيين برنامج لك بعد')
-        return redirect('home')
-
-    committee = get_object_or_404(Committee, id=committee_id, program=program)
+    """Summary of a committee; the tasks, sessions, members and files tabs load from committee_section"""
+    program = request.program
 
-    # Get supervisor details
+    committee = get_object_or_404(Committee.objects.select_related('supervisor'), id=committee_id, program=program)
     supervisor = committee.supervisor
 
-    # Initialize variables
-    total_tasks = 0
-    completed_tasks = 0
-    pending_tasks = 0
-    overdue_tasks = 0
-    recent_tasks = []
-    members = []
-    committee_content = []
-    cultural_sessions = []
-    total_members = 0
-    avg_completion_percentage = 0
-
-    # Query based on supervisor type
-    if supervisor and supervisor.supervisor_type:
-        if supervisor.supervisor_type == 'cultural':
-            from cultural_committee_dashboard.models import CulturalTask, CommitteeMember, FileLibrary, TaskSession
-
-            # Get tasks
-            tasks = CulturalTask.objects.filter(committee=committee)
-            total_tasks = tasks.count()
-            completed_tasks = tasks.filter(status='completed').count()
-            pending_tasks = tasks.filter(status='pending').count()
-            overdue_tasks = 0  # Cultural tasks don't have overdue status
-
-            # Calculate average completion percentage
-            if tasks.exists():
-                avg_completion_percentage = round(sum(task.completion_percentage for task in tasks) / total_tasks, 1)
-
-            recent_tasks = tasks.order_by('-created_at')[:10]
-
-            # Get sessions for cultural tasks
-            cultural_sessions = TaskSession.objects.filter(task__committee=committee).order_by('-date', '-time')
-
-            # Get members
-            members_query = CommitteeMember.objects.filter(committee=committee).select_related('user')
-            total_members = members_query.count()
-
-            # Calculate average participation score for members
-            if members_query.exists():
-                avg_participation = round(sum(member.participation_score for member in members_query) / total_members,
-                                          1)
-            else:
-                avg_participation = 0
-
-            members = members_query
-
-            # Get files
-            committee_content = FileLibrary.objects.filter(committee=committee).order_by('-uploaded_at')
-
-        elif supervisor.supervisor_type == 'sports':
-            from sports_committee_dashboard.models import SportsTask, SportsMember, SportsFile
-
-            # Get tasks
-            tasks = SportsTask.objects.filter(committee=committee)
-            total_tasks = tasks.count()
-            completed_tasks = tasks.filter(status='completed').count()
-            pending_tasks = tasks.filter(status='pending').count()
-            overdue_tasks = tasks.filter(status='overdue').count()
-
-            # Calculate average completion percentage
-            if tasks.exists():
-                avg_completion_percentage = round(sum(task.completion_percentage for task in tasks) / total_tasks, 1)
-
-            recent_tasks = tasks.order_by('-created_at')[:10]
-
-            # Get members
-            members_query = SportsMember.objects.filter(committee=committee).select_related('user')
-            total_members = members_query.count()
-
-            # Calculate average participation score for members
-            if members_query.exists():
-                avg_participation = round(sum(member.participation_score for member in members_query) / total_members,
-                                          1)
-            else:
-                avg_participation = 0
-
-            members = members_query
-
-            # Get files
-            committee_content = SportsFile.objects.filter(committee=committee).order_by('-uploaded_at')
-
-        elif supervisor.supervisor_type == 'sharia':
-            from sharia_committee_dashboard.models import ShariaTask, ShariaMember, ShariaFile
-
-            # Get tasks
-            tasks = ShariaTask.objects.filter(committee=committee)
-            total_tasks = tasks.count()
-            completed_tasks = tasks.filter(status='completed').count()
-            pending_tasks = tasks.filter(status='pending').count()
-            overdue_tasks = 0  # Sharia tasks don't have overdue status
-
-            # Calculate average completion percentage
-            if tasks.exists():
-                avg_completion_percentage = round(sum(task.completion_percentage for task in tasks) / total_tasks, 1)
-
-            recent_tasks = tasks.order_by('-created_at')[:10]
-
-            # Get members
-            members_query = ShariaMember.objects.filter(committee=committee).select_related('user')
-            total_members = members_query.count()
-
-            # Calculate average participation score for members
-            if members_query.exists():
-                avg_participation = round(sum(member.participation_score for member in members_query) / total_members,
-                                          1)
-            else:
-                avg_participation = 0
-
-            members = members_query
-
-            # Get files
-            committee_content = ShariaFile.objects.filter(committee=committee).order_by('-uploaded_at')
-
-        elif supervisor.supervisor_type == 'scientific':
-            from scientific_committee_dashboard.models import ScientificTask, ScientificMember, ScientificFile
-
-            # Get tasks
-            tasks = ScientificTask.objects.filter(committee=committee)
-            total_tasks = tasks.count()
-            completed_tasks = tasks.filter(status='completed').count()
-            pending_tasks = tasks.filter(status='pending').count()
-            overdue_tasks = 0  # Scientific tasks don't have overdue status
-
-            # Calculate average completion percentage
-            if tasks.exists():
-                avg_completion_percentage = round(sum(task.completion_percentage for task in tasks) / total_tasks, 1)
-
-            recent_tasks = tasks.order_by('-created_at')[:10]
-
-            # Get members
-            members_query = ScientificMember.objects.filter(committee=committee).select_related('user')
-            total_members = members_query.count()
-
-            # Calculate average participation score for members
-            if members_query.exists():
-                avg_participation = round(sum(member.participation_score for member in members_query) / total_members,
-                                          1)
-            else:
-                avg_participation = 0
-
-            members = members_query
-
-            # Get files
-            committee_content = ScientificFile.objects.filter(committee=committee).order_by('-uploaded_at')
-
-        elif supervisor.supervisor_type == 'operations':
-            from operations_committee_dashboard.models import OperationsTask, OperationsTeamMember, \
-                OperationsFileLibrary
-
-            # Get tasks
-            tasks = OperationsTask.objects.filter(committee=committee)
-            total_tasks = tasks.count()
-            completed_tasks = tasks.filter(status='completed').count()
-            pending_tasks = tasks.filter(status__in=['not_started', 'in_progress']).count()
-            overdue_tasks = tasks.filter(status='overdue').count()
-
-            # Calculate average completion percentage
-            if tasks.exists():
-                avg_completion_percentage = round(sum(task.completion_percentage for task in tasks) / total_tasks, 1)
-
-            recent_tasks = tasks.order_by('-created_at')[:10]
-
-            # Get members
-            members_query = OperationsTeamMember.objects.filter(committee=committee).select_related('user')
-            total_members = members_query.count()
-
-            # Calculate average participation score for members
-            if members_query.exists():
-                avg_participation = round(sum(member.participation_score for member in members_query) / total_members,
-                                          1)
-            else:
-                avg_participation = 0
-
-            members = members_query
-
-            # Get files
-            committee_content = OperationsFileLibrary.objects.filter(committee=committee).order_by('-uploaded_at')
-
-        else:
-            # Fallback to generic models
-            tasks = Task.objects.filter(committee=committee)
-            total_tasks = tasks.count()
-            completed_tasks = tasks.filter(status='completed').count()
-            pending_tasks = tasks.filter(status='pending').count()
-            overdue_tasks = tasks.filter(status='overdue').count()
-
-            # Calculate average completion percentage
-            if tasks.exists():
-                avg_completion_percentage = round(sum(task.completion_percentage for task in tasks) / total_tasks, 1)
-
-            recent_tasks = tasks.order_by('-created_at')[:10]
-
-            # Get members (students)
-            members_query = Student.objects.filter(committee=committee).select_related('user')
-            total_members = members_query.count()
-
-            # Calculate average progress for students
-            if members_query.exists():
-                avg_participation = round(sum(member.progress for member in members_query) / total_members, 1)
-            else:
-                avg_participation = 0
-
-            members = members_query
-
-            # Get files (if available)
-            try:
-                from .models import File  # Your generic File model
-                committee_content = File.objects.filter(committee=committee).order_by('-uploaded_at')
-            except:
-                committee_content = []
-    else:
-        # No supervisor or supervisor type - use generic models
-        tasks = Task.objects.filter(committee=committee)
-        total_tasks = tasks.count()
-        completed_tasks = tasks.filter(status='completed').count()
-        pending_tasks = tasks.filter(status='pending').count()
-        overdue_tasks = tasks.filter(status='overdue').count()
-
-        # Calculate average completion percentage
-        if tasks.exists():
-            avg_completion_percentage = round(sum(task.completion_percentage for task in tasks) / total_tasks, 1)
-
-        recent_tasks = tasks.order_by('-created_at')[:10]
-
-        # Get members (students)
-        members_query = Student.objects.filter(committee=committee).select_related('user')
-        total_members = members_query.count()
-
-        # Calculate average progress for students
-        if members_query.exists():
-            avg_participation = round(sum(member.progress for member in members_query) / total_members, 1)
-        else:
-            avg_participation = 0
-
-        members = members_query
-
-        # Get files
-        try:
-            from .models import File  # Your generic File model
-            committee_content = File.objects.filter(committee=committee).order_by('-uploaded_at')
-        except:
-            committee_content = []
-
-    # Calculate completion rate
-    completion_rate = round((completed_tasks / total_tasks * 100) if total_tasks > 0 else 0, 1)
-
-    # Committee stats
+    # Counts and averages come from grouped aggregates, whatever the committee's size
+    stats = CommitteeStats([committee])[committee.pk]
     committee_stats = {
-        'student_count': total_members,  # Changed from student_count to total_members
-        'avg_progress': avg_participation,  # Changed from avg_progress to avg_participation
-        'total_tasks': total_tasks,
-        'completed_tasks': completed_tasks,
-        'pending_tasks': pending_tasks,
-        'overdue_tasks': overdue_tasks,
-        'completion_rate': completion_rate,
-        'avg_completion_percentage': avg_completion_percentage,  # Added this for reference
+        'student_count': stats.total_members,
+        'avg_progress': stats.avg_participation,
+        'total_tasks': stats.total_tasks,
+        'completed_tasks': stats.completed_tasks,
+        'pending_tasks': stats.pending_tasks,
+        'overdue_tasks': stats.overdue_tasks,
+        'completion_rate': stats.task_completion_percentage,
+        'avg_completion_percentage': stats.avg_completion,
     }
 
     # Get activities
@@ -574,27 +136,76 @@ def committee_detail(request, committee_id):
         'committee': committee,
         'supervisor': supervisor,
         'committee_stats': committee_stats,
-        'recent_tasks': recent_tasks,
-        'members': members,
-        'committee_content': committee_content,
         'activities': activities,
-        'cultural_sessions': cultural_sessions if supervisor and supervisor.supervisor_type == 'cultural' else [],
     }
 
     return render(request, 'program_manager/committee_detail.html', context)
 
 
+# Keyset order of each lazily loaded section of committee_detail
+COMMITTEE_SECTION_ORDERING = {
+    'tasks': ('-created_at', '-id'),
+    'sessions': ('-date', '-time', '-id'),
+    'members': ('id',),
+    'files': ('-uploaded_at', '-id'),
+}
+
+
+def get_committee_section_rows(committee, section):
+    """Queryset of one committee_detail section, or None when the committee has nothing of the kind"""
+    source = get_stats_source(committee)
+    is_cultural = source is STATS_SOURCES['cultural']
+
+    if section == 'tasks':
+        tasks = source.get_task_model().objects.filter(committee=committee)
+        if source is GENERIC_SOURCE:
+            return tasks.select_related('assigned_to')
+        if is_cultural:
+            # Each task lists its first three sessions
+            return tasks.prefetch_related(Prefetch('sessions', queryset=TaskSession.objects.all()[:3], to_attr='first_sessions'))
+        return tasks
+    if section == 'sessions':
+        return TaskSession.objects.filter(task__committee=committee).select_related('task') if is_cultural else None
+    if section == 'members':
+        return source.get_member_model().objects.filter(committee=committee).select_related('user')
+    if section == 'files':
+        file_model = source.get_file_model()
+        return file_model.objects.filter(committee=committee) if file_model else None
+
+
 @login_required
-def add_committee(request):
-    if request.user.role != 'program_manager':
-        messages.error(request, 'ليس لديك صلاحية للوصول إلى هذه الصفحة')
-        return redirect('home')
+@program_required
+def committee_section(request, committee_id, section):
+    """One page of a committee_detail tab as an HTML fragment, with a link to the next page"""
+    if section not in COMMITTEE_SECTION_ORDERING:
+        raise Http404
+
+    committee = get_object_or_404(Committee.objects.select_related('supervisor'), id=committee_id,
+                                  program=request.program)
+    rows = get_committee_section_rows(committee, section)
+    cursor = request.GET.get('cursor')
+    items, next_cursor = [], None
+    if rows is not None:
+        items, next_cursor = keyset_page(rows, COMMITTEE_SECTION_ORDERING[section], cursor)
+
+    next_url = None
+    if next_cursor:
+        next_url = f"{reverse('pm_committee_section', args=[committee.id, section])}?cursor={next_cursor}"
 
-    try:
-        program = Program.objects.get(manager=request.user)
-    except Program.DoesNotExist:
-        messages.error(request, 'لم يتم تعيين برنامج لك بعد')
-        return redirect('home')
+    context = {
+        'committee': committee,
+        'supervisor': committee.supervisor,
+        'items': items,
+        'cursor': cursor,
+        'next_url': next_url,
+    }
+    return render(request, f'program_manager/committee_sections/{section}.html', context)
+
+
+@login_required
+@program_required
+def add_committee(request):
+    program = request.program
 
     if request.method == 'POST':
         form = CommitteeForm(request.POST, program=program)
@@ -603,11 +214,7 @@ def add_committee(request):
             committee.program = program
             committee.save()
 
-            UserActivity.objects.create(
-                user=request.user,
-                action=f'إضافة لجنة جديدة: {committee.name}',
-                ip_address=get_client_ip(request)
-            )
+            log_activity(request, f'إضافة لجنة جديدة: {committee.name}')
 
             messages.success(request, 'تم إضافة اللجنة بنجاح!')
             return redirect('pm_committee_management')
@@ -623,16 +230,9 @@ def add_committee(request):
 
 
 @login_required
+@program_required
 def edit_committee(request, committee_id):
-    if request.user.role != 'program_manager':
-        messages.error(request, 'ليس لديك صلاحية للوصول إلى هذه الصفحة')
-        return redirect('home')
-
-    try:
-        program = Program.objects.get(manager=request.user)
-    except Program.DoesNotExist:
-        messages.error(request, 'لم يتم تعيين برنامج لك بعد')
-        return redirect('home')
+    program = request.program
 
     committee = get_object_or_404(Committee, id=committee_id, program=program)
 
@@ -641,11 +241,7 @@ def edit_committee(request, committee_id):
         if form.is_valid():
             committee = form.save()
 
-            UserActivity.objects.create(
-                user=request.user,
-                action=f'تعديل اللجنة: {committee.name}',
-                ip_address=get_client_ip(request)
-            )
+            log_activity(request, f'تعديل اللجنة: {committee.name}')
 
             messages.success(request, 'تم تعديل اللجنة بنجاح!')
             return redirect('pm_committee_management')
@@ -662,16 +258,9 @@ def edit_committee(request, committee_id):
 
 
 @login_required
+@program_required
 def delete_committee(request, committee_id):
-    if request.user.role != 'program_manager':
-        messages.error(request, 'ليس لديك صلاحية للوصول إلى هذه الصفحة')
-        return redirect('home')
-
-    try:
-        program = Program.objects.get(manager=request.user)
-    except Program.DoesNotExist:
-        messages.error(request, 'لم يتم تعيين برنامج لك بعد')
-        return redirect('home')
+    program = request.program
 
     committee = get_object_or_404(Committee, id=committee_id, program=program)
 
@@ -679,11 +268,7 @@ def delete_committee(request, committee_id):
         committee_name = committee.name
         committee.delete()
 
-        UserActivity.objects.create(
-            user=request.user,
-            action=f'حذف اللجنة: {committee_name}',
-            ip_address=get_client_ip(request)
-        )
+        log_activity(request, f'حذف اللجنة: {committee_name}')
 
         messages.success(request, 'تم حذف اللجنة بنجاح!')
         return redirect('pm_committee_management')
@@ -697,23 +282,9 @@ def delete_committee(request, committee_id):
 
 
 @login_required
+@program_required
 def task_management(request):
-    if request.user.role != 'program_manager':
-        messages.error(request, 'ليس لديك صلاحية للوصول إلى هذه الصفحة')
-        return redirect('home')
-
-    try:
-        program = Program.objects.get(manager=request.user)
-    except Program.DoesNotExist:
-        messages.error(request, 'لم يتم تعيين برنامج لك بعد')
-        return redirect('home')
-
-    # Update overdue tasks
-    Task.objects.filter(
-        program=program,
-        due_date__lt=timezone.now().date(),
-        status='pending'
-    ).update(status='overdue')
+    program = request.program
 
     tasks = Task.objects.filter(program=program).select_related('committee', 'assigned_to').order_by('-created_at')
 
@@ -737,16 +308,9 @@ from cultural_committee_dashboard.models import CulturalNotification,CulturalTas
 from operations_committee_dashboard.models import OperationsTask,OperationsNotification
 
 @login_required
+@program_required
 def add_task(request):
-    if request.user.role != 'program_manager':
-        messages.error(request, 'ليس لديك صلاحية للوصول إلى هذه الصفحة')
-        return redirect('home')
-
-    try:
-        program = Program.objects.get(manager=request.user)
-    except Program.DoesNotExist:
-        messages.error(request, 'لم يتم تعيين برنامج لك بعد')
-        return redirect('home')
+    program = request.program
 
     if request.method == 'POST':
         form = TaskForm(request.POST, program=program)
@@ -804,8 +368,9 @@ def add_task(request):
                 task.save()
 
                 # Create notification
-                ScientificNotification.objects.create(
-                    user=assigned_to,
+                dispatch_notifications(
+                    [assigned_to],
+                    model=ScientificNotification,
                     committee=committee,
                     notification_type='task_added',
                     title='مهمة جديدة من مدير البرنامج',
@@ -813,11 +378,7 @@ def add_task(request):
                     related_task=scientific_task
                 )
 
-                UserActivity.objects.create(
-                    user=request.user,
-                    action=f'إضافة مهمة علمية: {task.title}',
-                    ip_address=get_client_ip(request)
-                )
+                log_activity(request, f'إضافة مهمة علمية: {task.title}')
 
                 messages.success(request, 'تم إضافة المهمة العلمية بنجاح!')
 
@@ -847,8 +408,9 @@ def add_task(request):
                 task.save()
 
                 # Create notification
-                CulturalNotification.objects.create(
-                    user=assigned_to,
+                dispatch_notifications(
+                    [assigned_to],
+                    model=CulturalNotification,
                     committee=committee,
                     notification_type='task_added',
                     title='مهمة جديدة من مدير البرنامج',
@@ -856,11 +418,7 @@ def add_task(request):
                     related_task=cultural_task
                 )
 
-                UserActivity.objects.create(
-                    user=request.user,
-                    action=f'إضافة مهمة ثقافية: {task.title}',
-                    ip_address=get_client_ip(request)
-                )
+                log_activity(request, f'إضافة مهمة ثقافية: {task.title}')
 
                 messages.success(request, 'تم إضافة المهمة الثقافية بنجاح!')
 
@@ -890,8 +448,9 @@ def add_task(request):
                 task.save()
 
                 # Create notification
-                SportsNotification.objects.create(
-                    user=assigned_to,
+                dispatch_notifications(
+                    [assigned_to],
+                    model=SportsNotification,
                     committee=committee,
                     notification_type='task_added',
                     title='مهمة جديدة من مدير البرنامج',
@@ -899,11 +458,7 @@ def add_task(request):
                     related_task=sports_task
                 )
 
-                UserActivity.objects.create(
-                    user=request.user,
-                    action=f'إضافة مهمة رياضية: {task.title}',
-                    ip_address=get_client_ip(request)
-                )
+                log_activity(request, f'إضافة مهمة رياضية: {task.title}')
 
                 messages.success(request, 'تم إضافة المهمة الرياضية بنجاح!')
 
@@ -934,8 +489,9 @@ def add_task(request):
                 task.save()
 
                 # Create notification
-                OperationsNotification.objects.create(
-                    user=assigned_to,
+                dispatch_notifications(
+                    [assigned_to],
+                    model=OperationsNotification,
                     committee=committee,
                     notification_type='task_added',
                     title='مهمة جديدة من مدير البرنامج',
@@ -943,11 +499,7 @@ def add_task(request):
                     related_task=operations_task
                 )
 
-                UserActivity.objects.create(
-                    user=request.user,
-                    action=f'إضافة مهمة تشغيلية: {task.title}',
-                    ip_address=get_client_ip(request)
-                )
+                log_activity(request, f'إضافة مهمة تشغيلية: {task.title}')
 
                 messages.success(request, 'تم إضافة المهمة التشغيلية بنجاح!')
 
@@ -977,8 +529,9 @@ def add_task(request):
                 task.save()
 
                 # Create notification
-                ShariaNotification.objects.create(
-                    user=assigned_to,
+                dispatch_notifications(
+                    [assigned_to],
+                    model=ShariaNotification,
                     committee=committee,
                     notification_type='task_added',
                     title='مهمة جديدة من مدير البرنامج',
@@ -986,11 +539,7 @@ def add_task(request):
                     related_task=sharia_task
                 )
 
-                UserActivity.objects.create(
-                    user=request.user,
-                    action=f'إضافة مهمة شرعية: {task.title}',
-                    ip_address=get_client_ip(request)
-                )
+                log_activity(request, f'إضافة مهمة شرعية: {task.title}')
 
                 messages.success(request, 'تم إضافة المهمة الشرعية بنجاح!')
 
@@ -999,19 +548,16 @@ def add_task(request):
                         is_operations_committee, is_sharia_committee]):
                 # Create notification for regular task
                 if task.assigned_to:
-                    Notification.objects.create(
-                        user=task.assigned_to,
+                    dispatch_notifications(
+                        [task.assigned_to],
+                        model=Notification,
                         notification_type='task_added',
                         title='مهمة جديدة',
                         message=f'تم تعيين مهمة جديدة لك: {task.title}',
                         related_task=task
                     )
 
-                UserActivity.objects.create(
-                    user=request.user,
-                    action=f'إضافة مهمة جديدة: {task.title}',
-                    ip_address=get_client_ip(request)
-                )
+                log_activity(request, f'إضافة مهمة جديدة: {task.title}')
 
                 if task.is_recurring:
                     messages.success(request,
@@ -1032,16 +578,9 @@ def add_task(request):
 
 
 @login_required
+@program_required
 def edit_task(request, task_id):
-    if request.user.role != 'program_manager':
-        messages.error(request, 'ليس لديك صلاحية للوصول إلى هذه الصفحة')
-        return redirect('home')
-
-    try:
-        program = Program.objects.get(manager=request.user)
-    except Program.DoesNotExist:
-        messages.error(request, 'لم يتم تعيين برنامج لك بعد')
-        return redirect('home')
+    program = request.program
 
     task = get_object_or_404(Task, id=task_id, program=program)
 
@@ -1168,11 +707,7 @@ def edit_task(request, task_id):
                     related_task=task
                 )
 
-            UserActivity.objects.create(
-                user=request.user,
-                action=f'تعديل المهمة: {task.title}',
-                ip_address=get_client_ip(request)
-            )
+            log_activity(request, f'تعديل المهمة: {task.title}')
 
             if task.is_recurring:
                 messages.success(request, f'تم تعديل المهمة المتكررة بنجاح! ({task.get_recurrence_pattern_display()})')
@@ -1198,16 +733,9 @@ def edit_task(request, task_id):
 
 
 @login_required
+@program_required
 def delete_task(request, task_id):
-    if request.user.role != 'program_manager':
-        messages.error(request, 'ليس لديك صلاحية للوصول إلى هذه الصفحة')
-        return redirect('home')
-
-    try:
-        program = Program.objects.get(manager=request.user)
-    except Program.DoesNotExist:
-        messages.error(request, 'لم يتم تعيين برنامج لك بعد')
-        return redirect('home')
+    program = request.program
 
     task = get_object_or_404(Task, id=task_id, program=program)
 
@@ -1299,11 +827,7 @@ def delete_task(request, task_id):
         # Delete the main task
         task.delete()
 
-        UserActivity.objects.create(
-            user=request.user,
-            action=f'حذف المهمة: {task_title}' + (f' ({recurrence_pattern})' if is_recurring else ''),
-            ip_address=get_client_ip(request)
-        )
+        log_activity(request, f'حذف المهمة: {task_title}' + (f' ({recurrence_pattern})' if is_recurring else ''))
 
         if is_recurring:
             messages.success(request, f'تم حذف المهمة المتكررة بنجاح! ({recurrence_pattern})')
@@ -1322,16 +846,9 @@ def delete_task(request, task_id):
 
 
 @login_required
+@program_required
 def activity_management(request):
-    if request.user.role != 'program_manager':
-        messages.error(request, 'ليس لديك صلاحية للوصول إلى هذه الصفحة')
-        return redirect('home')
-
-    try:
-        program = Program.objects.get(manager=request.user)
-    except Program.DoesNotExist:
-        messages.error(request, 'لم يتم تعيين برنامج لك بعد')
-        return redirect('home')
+    program = request.program
 
     activities = Activity.objects.filter(program=program).select_related('committee').order_by('-date', '-time')
 
@@ -1343,16 +860,9 @@ def activity_management(request):
 
 
 @login_required
+@program_required
 def add_activity(request):
-    if request.user.role != 'program_manager':
-        messages.error(request, 'ليس لديك صلاحية للوصول إلى هذه الصفحة')
-        return redirect('home')
-
-    try:
-        program = Program.objects.get(manager=request.user)
-    except Program.DoesNotExist:
-        messages.error(request, 'لم يتم تعيين برنامج لك بعد')
-        return redirect('home')
+    program = request.program
 
     if request.method == 'POST':
         form = ActivityForm(request.POST, program=program)
@@ -1362,11 +872,7 @@ def add_activity(request):
             activity.created_by = request.user
             activity.save()
 
-            UserActivity.objects.create(
-                user=request.user,
-                action=f'إضافة نشاط جديد: {activity.name}',
-                ip_address=get_client_ip(request)
-            )
+            log_activity(request, f'إضافة نشاط جديد: {activity.name}')
 
             messages.success(request, 'تم إضافة النشاط بنجاح!')
             return redirect('pm_activity_management')
@@ -1382,16 +888,9 @@ def add_activity(request):
 
 
 @login_required
+@program_required
 def reports(request):
-    if request.user.role != 'program_manager':
-        messages.error(request, 'ليس لديك صلاحية للوصول إلى هذه الصفحة')
-        return redirect('home')
-
-    try:
-        program = Program.objects.get(manager=request.user)
-    except Program.DoesNotExist:
-        messages.error(request, 'لم يتم تعيين برنامج لك بعد')
-        return redirect('home')
+    program = request.program
 
     # Committee statistics with task counts and completion percentages
     committees = Committee.objects.filter(program=program).annotate(
@@ -1400,93 +899,16 @@ def reports(request):
 
     # Convert to list so we can modify the objects
     committees_list = list(committees)
+    stats = CommitteeStats(committees_list)
 
-    # Calculate statistics for each committee based on supervisor type
     for committee in committees_list:
-        supervisor = committee.supervisor
-
-        # Default values
-        committee.task_count = 0
-        committee.completed_tasks = 0
-        committee.pending_tasks = 0
-        committee.overdue_tasks = 0
-        committee.avg_progress = 0
-
-        if supervisor and supervisor.supervisor_type:
-            # Query the appropriate task model based on supervisor type
-            if supervisor.supervisor_type == 'cultural':
-                from cultural_committee_dashboard.models import CulturalTask
-                tasks = CulturalTask.objects.filter(committee=committee)
-                committee.task_count = tasks.count()
-                committee.completed_tasks = tasks.filter(status='completed').count()
-                committee.pending_tasks = tasks.filter(status='pending').count()
-                committee.overdue_tasks = 0  # Cultural tasks don't have overdue status
-
-            elif supervisor.supervisor_type == 'sports':
-                from sports_committee_dashboard.models import SportsTask
-                tasks = SportsTask.objects.filter(committee=committee)
-                committee.task_count = tasks.count()
-                committee.completed_tasks = tasks.filter(status='completed').count()
-                committee.pending_tasks = tasks.filter(status='pending').count()
-                committee.overdue_tasks = tasks.filter(status='overdue').count()
-
-            elif supervisor.supervisor_type == 'sharia':
-                from sharia_committee_dashboard.models import ShariaTask
-                tasks = ShariaTask.objects.filter(committee=committee)
-                committee.task_count = tasks.count()
-                committee.completed_tasks = tasks.filter(status='completed').count()
-                committee.pending_tasks = tasks.filter(status='pending').count()
-                committee.overdue_tasks = 0  # Sharia tasks don't have overdue status
-
-            elif supervisor.supervisor_type == 'scientific':
-                from scientific_committee_dashboard.models import ScientificTask
-                tasks = ScientificTask.objects.filter(committee=committee)
-                committee.task_count = tasks.count()
-                committee.completed_tasks = tasks.filter(status='completed').count()
-                committee.pending_tasks = tasks.filter(status='pending').count()
-                committee.overdue_tasks = 0  # Scientific tasks don't have overdue status
-
-            elif supervisor.supervisor_type == 'operations':
-                from operations_committee_dashboard.models import OperationsTask
-                tasks = OperationsTask.objects.filter(committee=committee)
-                committee.task_count = tasks.count()
-                committee.completed_tasks = tasks.filter(status='completed').count()
-                committee.pending_tasks = tasks.filter(status__in=['not_started', 'in_progress']).count()
-                committee.overdue_tasks = tasks.filter(status='overdue').count()
-            else:
-                # Fallback to generic Task model
-                tasks = Task.objects.filter(committee=committee)
-                committee.task_count = tasks.count()
-                committee.completed_tasks = tasks.filter(status='completed').count()
-                committee.pending_tasks = tasks.filter(status='pending').count()
-                committee.overdue_tasks = tasks.filter(status='overdue').count()
-
-            # Calculate average progress based on completion_percentage
-            if tasks.exists():
-                total_completion = sum(task.completion_percentage for task in tasks)
-                committee.avg_progress = round(total_completion / tasks.count(), 1)
-            else:
-                # If no tasks, calculate based on completed vs total
-                if committee.task_count > 0:
-                    committee.avg_progress = round((committee.completed_tasks / committee.task_count) * 100, 1)
-                else:
-                    committee.avg_progress = 0
-        else:
-            # No supervisor or supervisor type - use generic Task model
-            tasks = Task.objects.filter(committee=committee)
-            committee.task_count = tasks.count()
-            committee.completed_tasks = tasks.filter(status='completed').count()
-            committee.pending_tasks = tasks.filter(status='pending').count()
-            committee.overdue_tasks = tasks.filter(status='overdue').count()
-
-            if tasks.exists():
-                total_completion = sum(task.completion_percentage for task in tasks)
-                committee.avg_progress = round(total_completion / tasks.count(), 1)
-            else:
-                if committee.task_count > 0:
-                    committee.avg_progress = round((committee.completed_tasks / committee.task_count) * 100, 1)
-                else:
-                    committee.avg_progress = 0
+        committee_stats = stats[committee.pk]
+        committee.task_count = committee_stats.total_tasks
+        committee.completed_tasks = committee_stats.completed_tasks
+        committee.pending_tasks = committee_stats.pending_tasks
+        committee.overdue_tasks = committee_stats.overdue_tasks
+        # Average completion_percentage of the committee's tasks
+        committee.avg_progress = committee_stats.avg_completion
 
     # Weekly/Monthly data - need to count all task types
     today = timezone.now().date()
@@ -1542,16 +964,9 @@ def reports(request):
 
 
 @login_required
+@program_required
 def committee_detail_report(request, committee_id):
-    if request.user.role != 'program_manager':
-        messages.error(request, 'ليس لديك صلاحية للوصول إلى هذه الصفحة')
-        return redirect('home')
-
-    try:
-        program = Program.objects.get(manager=request.user)
-    except Program.DoesNotExist:
-        messages.error(request, 'لم يتم تعيين برنامج لك بعد')
-        return redirect('home')
+    program = request.program
 
     committee = get_object_or_404(Committee, id=committee_id, program=program)
     supervisor = committee.supervisor
@@ -1670,16 +1085,9 @@ def committee_detail_report(request, committee_id):
 
 
 @login_required
+@program_required
 def notifications(request):
-    if request.user.role != 'program_manager':
-        messages.error(request, 'ليس لديك صلاحية للوصول إلى هذه الصفحة')
-        return redirect('home')
-
-    try:
-        program = Program.objects.get(manager=request.user)
-    except Program.DoesNotExist:
-        messages.error(request, 'لم يتم تعيين برنامج لك بعد')
-        return redirect('home')
+    program = request.program
 
     notifications = Notification.objects.filter(user=request.user).order_by('-created_at')
 
@@ -1713,17 +1121,10 @@ def mark_all_read(request):
 from accounts.models import ProgramSupervisor
 from .forms import AddSupervisorForm
 @login_required
+@program_required
 def supervisor_management(request):
     """Display all supervisors in card layout"""
-    if request.user.role != 'program_manager':
-        messages.error(request, 'ليس لديك صلاحية للوصول إلى هذه الصفحة')
-        return redirect('home')
-
-    try:
-        program = Program.objects.get(manager=request.user)
-    except Program.DoesNotExist:
-        messages.error(request, 'لم يتم تعيين برنامج لك بعد')
-        return redirect('home')
+    program = request.program
 
     # Get supervisors for this program
     supervisors = User.objects.filter(
@@ -1739,17 +1140,10 @@ def supervisor_management(request):
 
 
 @login_required
+@program_required
 def supervisor_detail(request, supervisor_id):
     """Display detailed information about a supervisor and their committees"""
-    if request.user.role != 'program_manager':
-        messages.error(request, 'ليس لديك صلاحية للوصول إلى هذه الصفحة')
-        return redirect('home')
-
-    try:
-        program = Program.objects.get(manager=request.user)
-    except Program.DoesNotExist:
-        messages.error(request, 'لم يتم تعيين برنامج لك بعد')
-        return redirect('home')
+    program = request.program
 
     # Get supervisor
     supervisor = get_object_or_404(User, id=supervisor_id, role='committee_supervisor')
@@ -1844,16 +1238,9 @@ def supervisor_detail(request, supervisor_id):
 
 from django.db import IntegrityError
 @login_required
+@program_required
 def add_supervisor(request):
-    if request.user.role != 'program_manager':
-        messages.error(request, 'ليس لديك صلاحية للوصول إلى هذه الصفحة')
-        return redirect('home')
-
-    try:
-        program = Program.objects.get(manager=request.user)
-    except Program.DoesNotExist:
-        messages.error(request, 'لم يتم تعيين برنامج لك بعد')
-        return redirect('home')
+    program = request.program
 
     if request.method == 'POST':
         form = AddSupervisorForm(request.POST)
@@ -1871,11 +1258,7 @@ def add_supervisor(request):
                     created_by=request.user
                 )
 
-                UserActivity.objects.create(
-                    user=request.user,
-                    action=f'إضافة مشرف جديد: {supervisor.get_full_name()}',
-                    ip_address=get_client_ip(request)
-                )
+                log_activity(request, f'إضافة مشرف جديد: {supervisor.get_full_name()}')
 
                 messages.success(request, 'تم إضافة المشرف بنجاح! كلمة المرور الافتراضية: 123456')
                 return redirect('pm_supervisor_management')
@@ -1896,16 +1279,9 @@ def add_supervisor(request):
 
 
 @login_required
+@program_required
 def delete_supervisor(request, supervisor_id):
-    if request.user.role != 'program_manager':
-        messages.error(request, 'ليس لديك صلاحية للوصول إلى هذه الصفحة')
-        return redirect('home')
-
-    try:
-        program = Program.objects.get(manager=request.user)
-    except Program.DoesNotExist:
-        messages.error(request, 'لم يتم تعيين برنامج لك بعد')
-        return redirect('home')
+    program = request.program
 
     supervisor = get_object_or_404(User, id=supervisor_id, role='committee_supervisor')
 
@@ -1918,11 +1294,7 @@ def delete_supervisor(request, supervisor_id):
         # Delete the supervisor user completely
         supervisor.delete()
 
-        UserActivity.objects.create(
-            user=request.user,
-            action=f'حذف المشرف: {supervisor_name}',
-            ip_address=get_client_ip(request)
-        )
+        log_activity(request, f'حذف المشرف: {supervisor_name}')
 
         messages.success(request, 'تم حذف المشرف بنجاح!')
         return redirect('pm_supervisor_management')
@@ -4,57 +4,28 @@ from django.contrib import messages
 from django.db.models import Count, Avg, Q
 from django.utils import timezone
 from datetime import timedelta
-from director_dashboard.models import Committee
 from accounts.models import User, UserActivity
+from accounts.activity import log_activity
+from main.notifications import dispatch as dispatch_notifications
+from main.rollups import get_committee_rollup
+from main.scope import committee_required
 from .models import (ScientificTask, ScientificMember, ScientificFile,
                      Lecture, LectureAttendance, ScientificReport, ScientificNotification)
 from .forms import (ScientificTaskForm, ScientificMemberForm, ScientificFileForm,
                     LectureForm, LectureAttendanceForm, ScientificReportForm)
 
 
-def get_client_ip(request):
-    x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
-    if x_forwarded_for:
-        ip = x_forwarded_for.split(',')[0]
-    else:
-        ip = request.META.get('REMOTE_ADDR')
-    return ip
-
-
-from cultural_committee_dashboard.models import DailyPhrase
 @login_required
+@committee_required('scientific')
 def scientific_dashboard(request):
-    if request.user.role != 'committee_supervisor' or request.user.supervisor_type != 'scientific':
-        messages.error(request, 'ليس لديك صلاحية للوصول إلى هذه الصفحة')
-        return redirect('home')
-
-    try:
-        committee = Committee.objects.get(supervisor=request.user)
-    except Committee.DoesNotExist:
-        messages.error(request, 'لم يتم تعيين لجنة لك بعد')
-        return redirect('home')
-
-    # الحصول على البرنامج الذي تنتمي إليه اللجنة
-    program = committee.program
-
-    # الحصول على اللجنة الثقافية لنفس البرنامج
-    try:
-        cultural_committee = Committee.objects.get(
-            program=program,
-            supervisor__supervisor_type='cultural'
-        )
-
-        # الحصول على عبارة اليوم للجنة الثقافية
-        today = timezone.now().date()
-        daily_phrase = DailyPhrase.get_today_phrase()
-    except Committee.DoesNotExist:
-        daily_phrase = None
+    committee = request.committee
 
     # Statistics
-    total_members = ScientificMember.objects.filter(committee=committee, is_active=True).count()
-    total_tasks = ScientificTask.objects.filter(committee=committee).count()
-    completed_tasks = ScientificTask.objects.filter(committee=committee, status='completed').count()
-    pending_tasks = ScientificTask.objects.filter(committee=committee, status='pending').count()
+    rollup = get_committee_rollup(committee, 'scientific')
+    total_members = rollup.member_count
+    total_tasks = rollup.task_count
+    completed_tasks = rollup.completed_count
+    pending_tasks = rollup.pending_count
 
     # Lectures statistics
     upcoming_lectures = Lecture.objects.filter(
@@ -64,7 +35,7 @@ def scientific_dashboard(request):
     ).count()
 
     # Completion rate
-    completion_rate = (completed_tasks / total_tasks * 100) if total_tasks > 0 else 0
+    completion_rate = rollup.completion_rate
 
     # Recent data
     recent_tasks = ScientificTask.objects.filter(committee=committee).order_by('-created_at')[:5]
@@ -104,22 +75,14 @@ def scientific_dashboard(request):
         'unread_notifications': unread_notifications,
         'top_members': top_members,
         'task_distribution': task_distribution,
-        'daily_phrase': daily_phrase,
     }
     return render(request, 'scientific_committee/dashboard.html', context)
 
 
 @login_required
+@committee_required('scientific')
 def committee_info(request):
-    if request.user.role != 'committee_supervisor' or request.user.supervisor_type != 'scientific':
-        messages.error(request, 'ليس لديك صلاحية للوصول إلى هذه الصفحة')
-        return redirect('home')
-
-    try:
-        committee = Committee.objects.get(supervisor=request.user)
-    except Committee.DoesNotExist:
-        messages.error(request, 'لم يتم تعيين لجنة لك بعد')
-        return redirect('home')
+    committee = request.committee
 
     members = ScientificMember.objects.filter(committee=committee)
     active_members = members.filter(is_active=True).count()
@@ -140,16 +103,9 @@ def committee_info(request):
 
 # Task Management
 @login_required
+@committee_required('scientific')
 def task_management(request):
-    if request.user.role != 'committee_supervisor' or request.user.supervisor_type != 'scientific':
-        messages.error(request, 'ليس لديك صلاحية للوصول إلى هذه الصفحة')
-        return redirect('home')
-
-    try:
-        committee = Committee.objects.get(supervisor=request.user)
-    except Committee.DoesNotExist:
-        messages.error(request, 'لم يتم تعيين لجنة لك بعد')
-        return redirect('home')
+    committee = request.committee
 
     tasks = ScientificTask.objects.filter(committee=committee).order_by('-created_at')
 
@@ -172,16 +128,9 @@ def task_management(request):
 
 
 @login_required
+@committee_required('scientific')
 def add_task(request):
-    if request.user.role != 'committee_supervisor' or request.user.supervisor_type != 'scientific':
-        messages.error(request, 'ليس لديك صلاحية للوصول إلى هذه الصفحة')
-        return redirect('home')
-
-    try:
-        committee = Committee.objects.get(supervisor=request.user)
-    except Committee.DoesNotExist:
-        messages.error(request, 'لم يتم تعيين لجنة لك بعد')
-        return redirect('home')
+    committee = request.committee
 
     if request.method == 'POST':
         form = ScientificTaskForm(request.POST, committee=committee)
@@ -204,23 +153,19 @@ def add_task(request):
             task.save()
 
             members = ScientificMember.objects.filter(committee=committee, is_active=True)
-            for member in members:
-                ScientificNotification.objects.create(
-                    user=member.user,  # Send to each member individually
-                    committee=committee,
-                    notification_type='task_added',
-                    title='مهمة جديدة',
-                    message=f'تم إضافة مهمة جديدة: {task.title}' + (
-                        f' للمسؤول: {task.assigned_to_name}' if task.assigned_to_name else ''),
-                    related_task=task
-                )
-
-            UserActivity.objects.create(
-                user=request.user,
-                action=f'إضافة مهمة علمية: {task.title}',
-                ip_address=get_client_ip(request)
+            dispatch_notifications(
+                members.values_list('user_id', flat=True),
+                model=ScientificNotification,
+                committee=committee,
+                notification_type='task_added',
+                title='مهمة جديدة',
+                message=f'تم إضافة مهمة جديدة: {task.title}' + (
+                    f' للمسؤول: {task.assigned_to_name}' if task.assigned_to_name else ''),
+                related_task=task
             )
 
+            log_activity(request, f'إضافة مهمة علمية: {task.title}')
+
             if task.is_recurring:
                 messages.success(request, f'تم إضافة المهمة المتكررة بنجاح! ({task.get_recurrence_pattern_display()})')
             else:
@@ -238,16 +183,9 @@ def add_task(request):
 
 
 @login_required
+@committee_required('scientific')
 def edit_task(request, task_id):
-    if request.user.role != 'committee_supervisor' or request.user.supervisor_type != 'scientific':
-        messages.error(request, 'ليس لديك صلاحية للوصول إلى هذه الصفحة')
-        return redirect('home')
-
-    try:
-        committee = Committee.objects.get(supervisor=request.user)
-    except Committee.DoesNotExist:
-        messages.error(request, 'لم يتم تعيين لجنة لك بعد')
-        return redirect('home')
+    committee = request.committee
 
     task = get_object_or_404(ScientificTask, id=task_id, committee=committee)
 
@@ -270,23 +208,19 @@ def edit_task(request, task_id):
             task.save()
 
             members = ScientificMember.objects.filter(committee=committee, is_active=True)
-            for member in members:
-                ScientificNotification.objects.create(
-                    user=member.user,
-                    committee=committee,
-                    notification_type='task_updated',
-                    title='تعديل مهمة',
-                    message=f'تم تعديل المهمة: {task.title}' + (
-                        f' للمسؤول: {task.assigned_to_name}' if task.assigned_to_name else ''),
-                    related_task=task
-                )
-
-            UserActivity.objects.create(
-                user=request.user,
-                action=f'تعديل مهمة علمية: {task.title}',
-                ip_address=get_client_ip(request)
+            dispatch_notifications(
+                members.values_list('user_id', flat=True),
+                model=ScientificNotification,
+                committee=committee,
+                notification_type='task_updated',
+                title='تعديل مهمة',
+                message=f'تم تعديل المهمة: {task.title}' + (
+                    f' للمسؤول: {task.assigned_to_name}' if task.assigned_to_name else ''),
+                related_task=task
             )
 
+            log_activity(request, f'تعديل مهمة علمية: {task.title}')
+
             if task.is_recurring:
                 messages.success(request, f'تم تعديل المهمة المتكررة بنجاح! ({task.get_recurrence_pattern_display()})')
             else:
@@ -310,16 +244,9 @@ def edit_task(request, task_id):
 
 
 @login_required
+@committee_required('scientific')
 def delete_task(request, task_id):
-    if request.user.role != 'committee_supervisor' or request.user.supervisor_type != 'scientific':
-        messages.error(request, 'ليس لديك صلاحية للوصول إلى هذه الصفحة')
-        return redirect('home')
-
-    try:
-        committee = Committee.objects.get(supervisor=request.user)
-    except Committee.DoesNotExist:
-        messages.error(request, 'لم يتم تعيين لجنة لك بعد')
-        return redirect('home')
+    committee = request.committee
 
     task = get_object_or_404(ScientificTask, id=task_id, committee=committee)
 
@@ -329,11 +256,7 @@ def delete_task(request, task_id):
         recurrence_pattern = task.get_recurrence_pattern_display() if task.is_recurring else None
         task.delete()
 
-        UserActivity.objects.create(
-            user=request.user,
-            action=f'حذف مهمة علمية: {task_title}' + (f' ({recurrence_pattern})' if is_recurring else ''),
-            ip_address=get_client_ip(request)
-        )
+        log_activity(request, f'حذف مهمة علمية: {task_title}' + (f' ({recurrence_pattern})' if is_recurring else ''))
 
         if is_recurring:
             messages.success(request, f'تم حذف المهمة المتكررة بنجاح! ({recurrence_pattern})')
@@ -352,16 +275,9 @@ def delete_task(request, task_id):
 
 # Member Management
 @login_required
+@committee_required('scientific')
 def member_management(request):
-    if request.user.role != 'committee_supervisor' or request.user.supervisor_type != 'scientific':
-        messages.error(request, 'ليس لديك صلاحية للوصول إلى هذه الصفحة')
-        return redirect('home')
-
-    try:
-        committee = Committee.objects.get(supervisor=request.user)
-    except Committee.DoesNotExist:
-        messages.error(request, 'لم يتم تعيين لجنة لك بعد')
-        return redirect('home')
+    committee = request.committee
 
     members = ScientificMember.objects.filter(committee=committee).select_related('user').order_by(
         '-participation_score')
@@ -382,16 +298,9 @@ def member_management(request):
 
 
 @login_required
+@committee_required('scientific')
 def view_member(request, member_id):
-    if request.user.role != 'committee_supervisor' or request.user.supervisor_type != 'scientific':
-        messages.error(request, 'ليس لديك صلاحية للوصول إلى هذه الصفحة')
-        return redirect('home')
-
-    try:
-        committee = Committee.objects.get(supervisor=request.user)
-    except Committee.DoesNotExist:
-        messages.error(request, 'لم يتم تعيين لجنة لك بعد')
-        return redirect('home')
+    committee = request.committee
 
     member = get_object_or_404(ScientificMember, id=member_id, committee=committee)
 
@@ -423,16 +332,9 @@ def view_member(request, member_id):
 
 
 @login_required
+@committee_required('scientific')
 def edit_member(request, member_id):
-    if request.user.role != 'committee_supervisor' or request.user.supervisor_type != 'scientific':
-        messages.error(request, 'ليس لديك صلاحية للوصول إلى هذه الصفحة')
-        return redirect('home')
-
-    try:
-        committee = Committee.objects.get(supervisor=request.user)
-    except Committee.DoesNotExist:
-        messages.error(request, 'لم يتم تعيين لجنة لك بعد')
-        return redirect('home')
+    committee = request.committee
 
     member = get_object_or_404(ScientificMember, id=member_id, committee=committee)
 
@@ -445,11 +347,7 @@ def edit_member(request, member_id):
             updated_member.user = member.user
             updated_member.save()
 
-            UserActivity.objects.create(
-                user=request.user,
-                action=f'تعديل عضو: {member.user.get_full_name()}',
-                ip_address=get_client_ip(request)
-            )
+            log_activity(request, f'تعديل عضو: {member.user.get_full_name()}')
 
             messages.success(request, 'تم تعديل بيانات العضو بنجاح!')
             return redirect('scientific_member_management')
@@ -466,16 +364,9 @@ def edit_member(request, member_id):
 
 
 @login_required
+@committee_required('scientific')
 def delete_member(request, member_id):
-    if request.user.role != 'committee_supervisor' or request.user.supervisor_type != 'scientific':
-        messages.error(request, 'ليس لديك صلاحية للوصول إلى هذه الصفحة')
-        return redirect('home')
-
-    try:
-        committee = Committee.objects.get(supervisor=request.user)
-    except Committee.DoesNotExist:
-        messages.error(request, 'لم يتم تعيين لجنة لك بعد')
-        return redirect('home')
+    committee = request.committee
 
     member = get_object_or_404(ScientificMember, id=member_id, committee=committee)
 
@@ -483,11 +374,7 @@ def delete_member(request, member_id):
         member_name = member.user.get_full_name()
         member.delete()
 
-        UserActivity.objects.create(
-            user=request.user,
-            action=f'حذف عضو: {member_name}',
-            ip_address=get_client_ip(request)
-        )
+        log_activity(request, f'حذف عضو: {member_name}')
 
         messages.success(request, 'تم حذف العضو بنجاح!')
         return redirect('scientific_member_management')
@@ -502,16 +389,9 @@ def delete_member(request, member_id):
 
 
 @login_required
+@committee_required('scientific')
 def add_member(request):
-    if request.user.role != 'committee_supervisor' or request.user.supervisor_type != 'scientific':
-        messages.error(request, 'ليس لديك صلاحية للوصول إلى هذه الصفحة')
-        return redirect('home')
-
-    try:
-        committee = Committee.objects.get(supervisor=request.user)
-    except Committee.DoesNotExist:
-        messages.error(request, 'لم يتم تعيين لجنة لك بعد')
-        return redirect('home')
+    committee = request.committee
 
     if request.method == 'POST':
         form = ScientificMemberForm(request.POST, committee=committee)
@@ -535,16 +415,9 @@ def add_member(request):
 
 # File Library
 @login_required
+@committee_required('scientific')
 def file_library(request):
-    if request.user.role != 'committee_supervisor' or request.user.supervisor_type != 'scientific':
-        messages.error(request, 'ليس لديك صلاحية للوصول إلى هذه الصفحة')
-        return redirect('home')
-
-    try:
-        committee = Committee.objects.get(supervisor=request.user)
-    except Committee.DoesNotExist:
-        messages.error(request, 'لم يتم تعيين لجنة لك بعد')
-        return redirect('home')
+    committee = request.committee
 
     files = ScientificFile.objects.filter(committee=committee).order_by('-uploaded_at')
 
@@ -562,16 +435,9 @@ def file_library(request):
 
 
 @login_required
+@committee_required('scientific')
 def upload_file(request):
-    if request.user.role != 'committee_supervisor' or request.user.supervisor_type != 'scientific':
-        messages.error(request, 'ليس لديك صلاحية للوصول إلى هذه الصفحة')
-        return redirect('home')
-
-    try:
-        committee = Committee.objects.get(supervisor=request.user)
-    except Committee.DoesNotExist:
-        messages.error(request, 'لم يتم تعيين لجنة لك بعد')
-        return redirect('home')
+    committee = request.committee
 
     if request.method == 'POST':
         form = ScientificFileForm(request.POST, request.FILES)
@@ -583,22 +449,18 @@ def upload_file(request):
 
             # Notify all committee members
             members = ScientificMember.objects.filter(committee=committee, is_active=True)
-            for member in members:
-                ScientificNotification.objects.create(
-                    user=member.user,
-                    committee=committee,
-                    notification_type='file_uploaded',
-                    title='ملف جديد',
-                    message=f'تم رفع ملف جديد: {file_obj.title}',
-                    related_file=file_obj
-                )
-
-            UserActivity.objects.create(
-                user=request.user,
-                action=f'رفع ملف علمي: {file_obj.title}',
-                ip_address=get_client_ip(request)
+            dispatch_notifications(
+                members.values_list('user_id', flat=True),
+                model=ScientificNotification,
+                committee=committee,
+                notification_type='file_uploaded',
+                title='ملف جديد',
+                message=f'تم رفع ملف جديد: {file_obj.title}',
+                related_file=file_obj
             )
 
+            log_activity(request, f'رفع ملف علمي: {file_obj.title}')
+
             messages.success(request, 'تم رفع الملف بنجاح!')
             return redirect('scientific_file_library')
     else:
@@ -613,16 +475,9 @@ def upload_file(request):
 
 
 @login_required
+@committee_required('scientific')
 def delete_file(request, file_id):
-    if request.user.role != 'committee_supervisor' or request.user.supervisor_type != 'scientific':
-        messages.error(request, 'ليس لديك صلاحية للوصول إلى هذه الصفحة')
-        return redirect('home')
-
-    try:
-        committee = Committee.objects.get(supervisor=request.user)
-    except Committee.DoesNotExist:
-        messages.error(request, 'لم يتم تعيين لجنة لك بعد')
-        return redirect('home')
+    committee = request.committee
 
     file_obj = get_object_or_404(ScientificFile, id=file_id, committee=committee)
 
@@ -644,16 +499,9 @@ def delete_file(request, file_id):
 
 # Lecture Management
 @login_required
+@committee_required('scientific')
 def lecture_management(request):
-    if request.user.role != 'committee_supervisor' or request.user.supervisor_type != 'scientific':
-        messages.error(request, 'ليس لديك صلاحية للوصول إلى هذه الصفحة')
-        return redirect('home')
-
-    try:
-        committee = Committee.objects.get(supervisor=request.user)
-    except Committee.DoesNotExist:
-        messages.error(request, 'لم يتم تعيين لجنة لك بعد')
-        return redirect('home')
+    committee = request.committee
 
     lectures = Lecture.objects.filter(committee=committee).order_by('-date', '-time')
 
@@ -676,16 +524,9 @@ def lecture_management(request):
 
 
 @login_required
+@committee_required('scientific')
 def add_lecture(request):
-    if request.user.role != 'committee_supervisor' or request.user.supervisor_type != 'scientific':
-        messages.error(request, 'ليس لديك صلاحية للوصول إلى هذه الصفحة')
-        return redirect('home')
-
-    try:
-        committee = Committee.objects.get(supervisor=request.user)
-    except Committee.DoesNotExist:
-        messages.error(request, 'لم يتم تعيين لجنة لك بعد')
-        return redirect('home')
+    committee = request.committee
 
     if request.method == 'POST':
         form = LectureForm(request.POST, committee=committee)
@@ -697,22 +538,18 @@ def add_lecture(request):
 
             # Notify all members about the lecture
             members = ScientificMember.objects.filter(committee=committee, is_active=True)
-            for member in members:
-                ScientificNotification.objects.create(
-                    user=member.user,
-                    committee=committee,
-                    notification_type='lecture_scheduled',
-                    title='محاضرة جديدة',
-                    message=f'محاضرة مجدولة: {lecture.title} - {lecture.date} {lecture.time}',
-                    related_lecture=lecture
-                )
-
-            UserActivity.objects.create(
-                user=request.user,
-                action=f'إضافة محاضرة: {lecture.title}',
-                ip_address=get_client_ip(request)
+            dispatch_notifications(
+                members.values_list('user_id', flat=True),
+                model=ScientificNotification,
+                committee=committee,
+                notification_type='lecture_scheduled',
+                title='محاضرة جديدة',
+                message=f'محاضرة مجدولة: {lecture.title} - {lecture.date} {lecture.time}',
+                related_lecture=lecture
             )
 
+            log_activity(request, f'إضافة محاضرة: {lecture.title}')
+
             messages.success(request, 'تم إضافة المحاضرة بنجاح!')
             return redirect('scientific_lecture_management')
     else:
@@ -727,16 +564,9 @@ def add_lecture(request):
 
 
 @login_required
+@committee_required('scientific')
 def edit_lecture(request, lecture_id):
-    if request.user.role != 'committee_supervisor' or request.user.supervisor_type != 'scientific':
-        messages.error(request, 'ليس لديك صلاحية للوصول إلى هذه الصفحة')
-        return redirect('home')
-
-    try:
-        committee = Committee.objects.get(supervisor=request.user)
-    except Committee.DoesNotExist:
-        messages.error(request, 'لم يتم تعيين لجنة لك بعد')
-        return redirect('home')
+    committee = request.committee
 
     lecture = get_object_or_404(Lecture, id=lecture_id, committee=committee)
 
@@ -745,11 +575,7 @@ def edit_lecture(request, lecture_id):
         if form.is_valid():
             lecture = form.save()
 
-            UserActivity.objects.create(
-                user=request.user,
-                action=f'تعديل محاضرة: {lecture.title}',
-                ip_address=get_client_ip(request)
-            )
+            log_activity(request, f'تعديل محاضرة: {lecture.title}')
 
             messages.success(request, 'تم تعديل المحاضرة بنجاح!')
             return redirect('scientific_lecture_management')
@@ -766,16 +592,9 @@ def edit_lecture(request, lecture_id):
 
 
 @login_required
+@committee_required('scientific')
 def delete_lecture(request, lecture_id):
-    if request.user.role != 'committee_supervisor' or request.user.supervisor_type != 'scientific':
-        messages.error(request, 'ليس لديك صلاحية للوصول إلى هذه الصفحة')
-        return redirect('home')
-
-    try:
-        committee = Committee.objects.get(supervisor=request.user)
-    except Committee.DoesNotExist:
-        messages.error(request, 'لم يتم تعيين لجنة لك بعد')
-        return redirect('home')
+    committee = request.committee
 
     lecture = get_object_or_404(Lecture, id=lecture_id, committee=committee)
 
@@ -783,11 +602,7 @@ def delete_lecture(request, lecture_id):
         lecture_title = lecture.title
         lecture.delete()
 
-        UserActivity.objects.create(
-            user=request.user,
-            action=f'حذف محاضرة: {lecture_title}',
-            ip_address=get_client_ip(request)
-        )
+        log_activity(request, f'حذف محاضرة: {lecture_title}')
 
         messages.success(request, 'تم حذف المحاضرة بنجاح!')
         return redirect('scientific_lecture_management')
@@ -801,16 +616,9 @@ def delete_lecture(request, lecture_id):
 
 
 @login_required
+@committee_required('scientific')
 def lecture_attendance(request, lecture_id):
-    if request.user.role != 'committee_supervisor' or request.user.supervisor_type != 'scientific':
-        messages.error(request, 'ليس لديك صلاحية للوصول إلى هذه الصفحة')
-        return redirect('home')
-
-    try:
-        committee = Committee.objects.get(supervisor=request.user)
-    except Committee.DoesNotExist:
-        messages.error(request, 'لم يتم تعيين لجنة لك بعد')
-        return redirect('home')
+    committee = request.committee
 
     lecture = get_object_or_404(Lecture, id=lecture_id, committee=committee)
     attendances = LectureAttendance.objects.filter(lecture=lecture).select_related('user')
@@ -831,16 +639,9 @@ def lecture_attendance(request, lecture_id):
 
 # Reports
 @login_required
+@committee_required('scientific')
 def reports(request):
-    if request.user.role != 'committee_supervisor' or request.user.supervisor_type != 'scientific':
-        messages.error(request, 'ليس لديك صلاحية للوصول إلى هذه الصفحة')
-        return redirect('home')
-
-    try:
-        committee = Committee.objects.get(supervisor=request.user)
-    except Committee.DoesNotExist:
-        messages.error(request, 'لم يتم تعيين لجنة لك بعد')
-        return redirect('home')
+    committee = request.committee
 
     # Task completion stats
     total_tasks = ScientificTask.objects.filter(committee=committee).count()
@@ -888,16 +689,9 @@ def reports(request):
 
 
 @login_required
+@committee_required('scientific')
 def add_report(request):
-    if request.user.role != 'committee_supervisor' or request.user.supervisor_type != 'scientific':
-        messages.error(request, 'ليس لديك صلاحية للوصول إلى هذه الصفحة')
-        return redirect('home')
-
-    try:
-        committee = Committee.objects.get(supervisor=request.user)
-    except Committee.DoesNotExist:
-        messages.error(request, 'لم يتم تعيين لجنة لك بعد')
-        return redirect('home')
+    committee = request.committee
 
     if request.method == 'POST':
         form = ScientificReportForm(request.POST, request.FILES)
@@ -909,22 +703,18 @@ def add_report(request):
 
             # Notify members
             members = ScientificMember.objects.filter(committee=committee, is_active=True)
-            for member in members:
-                ScientificNotification.objects.create(
-                    user=member.user,
-                    committee=committee,
-                    notification_type='report_uploaded',
-                    title='تقرير جديد',
-                    message=f'تم رفع تقرير جديد: {report.title}',
-                    related_report=report
-                )
-
-            UserActivity.objects.create(
-                user=request.user,
-                action=f'إضافة تقرير علمي: {report.title}',
-                ip_address=get_client_ip(request)
+            dispatch_notifications(
+                members.values_list('user_id', flat=True),
+                model=ScientificNotification,
+                committee=committee,
+                notification_type='report_uploaded',
+                title='تقرير جديد',
+                message=f'تم رفع تقرير جديد: {report.title}',
+                related_report=report
             )
 
+            log_activity(request, f'إضافة تقرير علمي: {report.title}')
+
             messages.success(request, 'تم إضافة التقرير بنجاح!')
             return redirect('scientific_reports')
     else:
@@ -940,16 +730,9 @@ def add_report(request):
 
 # Notifications
 @login_required
+@committee_required('scientific')
 def notifications(request):
-    if request.user.role != 'committee_supervisor' or request.user.supervisor_type != 'scientific':
-        messages.error(request, 'ليس لديك صلاحية للوصول إلى هذه الصفحة')
-        return redirect('home')
-
-    try:
-        committee = Committee.objects.get(supervisor=request.user)
-    except Committee.DoesNotExist:
-        messages.error(request, 'لم يتم تعيين لجنة لك بعد')
-        return redirect('home')
+    committee = request.committee
 
     notifications = ScientificNotification.objects.filter(
         user=request.user
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.6 on 2026-10-18 14:02
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def copy_created_at(apps, schema_editor):
+    """Best available guess for rows created before the field existed"""
+    Model = apps.get_model('sharia_committee_dashboard', 'familycompetition')
+    Model.objects.update(updated_at=models.F('created_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sharia_committee_dashboard', '0006_shariatask_priority'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='familycompetition',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.RunPython(copy_created_at, migrations.RunPython.noop),
+    ]
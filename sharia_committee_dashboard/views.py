@@ -4,60 +4,32 @@ from django.contrib import messages
 from django.db.models import Count, Avg, Q
 from django.utils import timezone
 from datetime import timedelta
-from director_dashboard.models import Committee
 from accounts.models import User, UserActivity
+from accounts.activity import log_activity
+from main.notifications import dispatch as dispatch_notifications
+from main.rollups import get_committee_rollup
+from main.scope import committee_required
 from .models import (ShariaTask, ShariaMember, ShariaFile, DailyMessage,
                      FamilyCompetition, YouthBook, ShariaReport, ShariaNotification)
 from .forms import (ShariaTaskForm, ShariaMemberForm, ShariaFileForm, DailyMessageForm,
                     FamilyCompetitionForm, YouthBookForm, ShariaReportForm)
 
 
-def get_client_ip(request):
-    x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
-    if x_forwarded_for:
-        ip = x_forwarded_for.split(',')[0]
-    else:
-        ip = request.META.get('REMOTE_ADDR')
-    return ip
-
-
 @login_required
+@committee_required('sharia')
 def sharia_dashboard(request):
-    if request.user.role != 'committee_supervisor' or request.user.supervisor_type != 'sharia':
-        messages.error(request, 'ليس لديك صلاحية للوصول إلى هذه الصفحة')
-        return redirect('home')
-
-    try:
-        committee = Committee.objects.get(supervisor=request.user)
-    except Committee.DoesNotExist:
-        messages.error(request, 'لم يتم تعيين لجنة لك بعد')
-        return redirect('home')
-
-    from cultural_committee_dashboard.models import DailyPhrase
-    from django.utils import timezone
-
-    try:
-        # Get the cultural committee in the same program
-        cultural_committee = Committee.objects.filter(
-            program=committee.program,
-        ).first()
-
-        if cultural_committee:
-            daily_phrase = DailyPhrase.get_today_phrase()
-        else:
-            daily_phrase = None
-    except Exception as e:
-        daily_phrase = None
+    committee = request.committee
 
     # Statistics
-    total_members = ShariaMember.objects.filter(committee=committee, is_active=True).count()
-    total_tasks = ShariaTask.objects.filter(committee=committee).count()
-    completed_tasks = ShariaTask.objects.filter(committee=committee, status='completed').count()
-    pending_tasks = ShariaTask.objects.filter(committee=committee, status='pending').count()
+    rollup = get_committee_rollup(committee, 'sharia')
+    total_members = rollup.member_count
+    total_tasks = rollup.task_count
+    completed_tasks = rollup.completed_count
+    pending_tasks = rollup.pending_count
     active_competitions = FamilyCompetition.objects.filter(committee=committee, status='active').count()
     pending_messages = DailyMessage.objects.filter(committee=committee, is_sent=False, scheduled_date__gte=timezone.now().date()).count()
     books_in_progress = YouthBook.objects.filter(committee=committee, status='reading').count()
-    completion_rate = (completed_tasks / total_tasks * 100) if total_tasks > 0 else 0
+    completion_rate = rollup.completion_rate
 
     # Recent data
     recent_tasks = ShariaTask.objects.filter(committee=committee).order_by('-created_at')[:5]
@@ -83,22 +55,14 @@ def sharia_dashboard(request):
         'unread_notifications': unread_notifications,
         'top_members': top_members,
         'task_distribution': task_distribution,
-        'daily_phrase': daily_phrase,
     }
     return render(request, 'sharia_committee/dashboard.html', context)
 
 
 @login_required
+@committee_required('sharia')
 def committee_info(request):
-    if request.user.role != 'committee_supervisor' or request.user.supervisor_type != 'sharia':
-        messages.error(request, 'ليس لديك صلاحية للوصول إلى هذه الصفحة')
-        return redirect('home')
-
-    try:
-        committee = Committee.objects.get(supervisor=request.user)
-    except Committee.DoesNotExist:
-        messages.error(request, 'لم يتم تعيين لجنة لك بعد')
-        return redirect('home')
+    committee = request.committee
 
     members = ShariaMember.objects.filter(committee=committee)
     active_members = members.filter(is_active=True).count()
@@ -115,16 +79,9 @@ def committee_info(request):
 
 # Task Management
 @login_required
+@committee_required('sharia')
 def task_management(request):
-    if request.user.role != 'committee_supervisor' or request.user.supervisor_type != 'sharia':
-        messages.error(request, 'ليس لديك صلاحية للوصول إلى هذه الصفحة')
-        return redirect('home')
-
-    try:
-        committee = Committee.objects.get(supervisor=request.user)
-    except Committee.DoesNotExist:
-        messages.error(request, 'لم يتم تعيين لجنة لك بعد')
-        return redirect('home')
+    committee = request.committee
 
     tasks = ShariaTask.objects.filter(committee=committee).order_by('-created_at')
 
@@ -146,16 +103,9 @@ def task_management(request):
 
 
 @login_required
+@committee_required('sharia')
 def add_task(request):
-    if request.user.role != 'committee_supervisor' or request.user.supervisor_type != 'sharia':
-        messages.error(request, 'ليس لديك صلاحية للوصول إلى هذه الصلفة')
-        return redirect('home')
-
-    try:
-        committee = Committee.objects.get(supervisor=request.user)
-    except Committee.DoesNotExist:
-        messages.error(request, 'لم يتم تعيين لجنة لك بعد')
-        return redirect('home')
+    committee = request.committee
 
     if request.method == 'POST':
         form = ShariaTaskForm(request.POST, committee=committee)
@@ -178,23 +128,19 @@ def add_task(request):
             task.save()
 
             members = ShariaMember.objects.filter(committee=committee, is_active=True)
-            for member in members:
-                ShariaNotification.objects.create(
-                    user=member.user,  # Send to each member individually
-                    committee=committee,
-                    notification_type='task_added',
-                    title='مهمة جديدة',
-                    message=f'تم إضافة مهمة جديدة: {task.title}' + (
-                        f' للمسؤول: {task.assigned_to_name}' if task.assigned_to_name else ''),
-                    related_task=task
-                )
-
-            UserActivity.objects.create(
-                user=request.user,
-                action=f'إضافة مهمة شرعية: {task.title}' + (' (متكررة)' if task.is_recurring else ''),
-                ip_address=get_client_ip(request)
+            dispatch_notifications(
+                members.values_list('user_id', flat=True),
+                model=ShariaNotification,
+                committee=committee,
+                notification_type='task_added',
+                title='مهمة جديدة',
+                message=f'تم إضافة مهمة جديدة: {task.title}' + (
+                    f' للمسؤول: {task.assigned_to_name}' if task.assigned_to_name else ''),
+                related_task=task
             )
 
+            log_activity(request, f'إضافة مهمة شرعية: {task.title}' + (' (متكررة)' if task.is_recurring else ''))
+
             if task.is_recurring:
                 messages.success(request, f'تم إضافة المهمة المتكررة بنجاح! ({task.get_recurrence_pattern_display()})')
             else:
@@ -213,16 +159,9 @@ def add_task(request):
 
 
 @login_required
+@committee_required('sharia')
 def edit_task(request, task_id):
-    if request.user.role != 'committee_supervisor' or request.user.supervisor_type != 'sharia':
-        messages.error(request, 'ليس لديك صلاحية للوصول إلى هذه الصفحة')
-        return redirect('home')
-
-    try:
-        committee = Committee.objects.get(supervisor=request.user)
-    except Committee.DoesNotExist:
-        messages.error(request, 'لم يتم تعيين لجنة لك بعد')
-        return redirect('home')
+    committee = request.committee
 
     task = get_object_or_404(ShariaTask, id=task_id, committee=committee)
 
@@ -245,23 +184,19 @@ def edit_task(request, task_id):
             task.save()
 
             members = ShariaMember.objects.filter(committee=committee, is_active=True)
-            for member in members:
-                ShariaNotification.objects.create(
-                    user=member.user,
-                    committee=committee,
-                    notification_type='task_updated',
-                    title='تعديل مهمة',
-                    message=f'تم تعديل المهمة: {task.title}' + (
-                        f' للمسؤول: {task.assigned_to_name}' if task.assigned_to_name else ''),
-                    related_task=task
-                )
-
-            UserActivity.objects.create(
-                user=request.user,
-                action=f'تعديل مهمة شرعية: {task.title}' + (' (متكررة)' if task.is_recurring else ''),
-                ip_address=get_client_ip(request)
+            dispatch_notifications(
+                members.values_list('user_id', flat=True),
+                model=ShariaNotification,
+                committee=committee,
+                notification_type='task_updated',
+                title='تعديل مهمة',
+                message=f'تم تعديل المهمة: {task.title}' + (
+                    f' للمسؤول: {task.assigned_to_name}' if task.assigned_to_name else ''),
+                related_task=task
             )
 
+            log_activity(request, f'تعديل مهمة شرعية: {task.title}' + (' (متكررة)' if task.is_recurring else ''))
+
             if task.is_recurring:
                 messages.success(request, f'تم تعديل المهمة المتكررة بنجاح! ({task.get_recurrence_pattern_display()})')
             else:
@@ -286,16 +221,9 @@ def edit_task(request, task_id):
 
 
 @login_required
+@committee_required('sharia')
 def delete_task(request, task_id):
-    if request.user.role != 'committee_supervisor' or request.user.supervisor_type != 'sharia':
-        messages.error(request, 'ليس لديك صلاحية للوصول إلى هذه الصفحة')
-        return redirect('home')
-
-    try:
-        committee = Committee.objects.get(supervisor=request.user)
-    except Committee.DoesNotExist:
-        messages.error(request, 'لم يتم تعيين لجنة لك بعد')
-        return redirect('home')
+    committee = request.committee
 
     task = get_object_or_404(ShariaTask, id=task_id, committee=committee)
 
@@ -306,22 +234,18 @@ def delete_task(request, task_id):
 
         # Send notifications to members before deletion
         members = ShariaMember.objects.filter(committee=committee, is_active=True)
-        for member in members:
-            ShariaNotification.objects.create(
-                user=member.user,
-                committee=committee,
-                notification_type='task_updated',
-                title='تم حذف المهمة',
-                message=f'تم حذف المهمة: {task_title}'
-            )
+        dispatch_notifications(
+            members.values_list('user_id', flat=True),
+            model=ShariaNotification,
+            committee=committee,
+            notification_type='task_updated',
+            title='تم حذف المهمة',
+            message=f'تم حذف المهمة: {task_title}'
+        )
 
         task.delete()
 
-        UserActivity.objects.create(
-            user=request.user,
-            action=f'حذف مهمة شرعية: {task_title}' + (f' ({recurrence_pattern})' if is_recurring else ''),
-            ip_address=get_client_ip(request)
-        )
+        log_activity(request, f'حذف مهمة شرعية: {task_title}' + (f' ({recurrence_pattern})' if is_recurring else ''))
 
         if is_recurring:
             messages.success(request, f'تم حذف المهمة المتكررة بنجاح! ({recurrence_pattern})')
@@ -341,16 +265,9 @@ def delete_task(request, task_id):
 
 # Member Management
 @login_required
+@committee_required('sharia')
 def member_management(request):
-    if request.user.role != 'committee_supervisor' or request.user.supervisor_type != 'sharia':
-        messages.error(request, 'ليس لديك صلاحية للوصول إلى هذه الصفحة')
-        return redirect('home')
-
-    try:
-        committee = Committee.objects.get(supervisor=request.user)
-    except Committee.DoesNotExist:
-        messages.error(request, 'لم يتم تعيين لجنة لك بعد')
-        return redirect('home')
+    committee = request.committee
 
     members = ShariaMember.objects.filter(committee=committee).select_related('user').order_by('-participation_score')
 
@@ -362,16 +279,9 @@ def member_management(request):
 
 
 @login_required
+@committee_required('sharia')
 def view_member(request, member_id):
-    if request.user.role != 'committee_supervisor' or request.user.supervisor_type != 'sharia':
-        messages.error(request, 'ليس لديك صلاحية للوصول إلى هذه الصفحة')
-        return redirect('home')
-
-    try:
-        committee = Committee.objects.get(supervisor=request.user)
-    except Committee.DoesNotExist:
-        messages.error(request, 'لم يتم تعيين لجنة لك بعد')
-        return redirect('home')
+    committee = request.committee
 
     member = get_object_or_404(ShariaMember, id=member_id, committee=committee)
 
@@ -394,16 +304,9 @@ def view_member(request, member_id):
 
 
 @login_required
+@committee_required('sharia')
 def edit_member(request, member_id):
-    if request.user.role != 'committee_supervisor' or request.user.supervisor_type != 'sharia':
-        messages.error(request, 'ليس لديك صلاحية للوصول إلى هذه الصفحة')
-        return redirect('home')
-
-    try:
-        committee = Committee.objects.get(supervisor=request.user)
-    except Committee.DoesNotExist:
-        messages.error(request, 'لم يتم تعيين لجنة لك بعد')
-        return redirect('home')
+    committee = request.committee
 
     member = get_object_or_404(ShariaMember, id=member_id, committee=committee)
 
@@ -417,11 +320,7 @@ def edit_member(request, member_id):
         if form.is_valid():
             form.save()
 
-            UserActivity.objects.create(
-                user=request.user,
-                action=f'تعديل عضو: {member.user.get_full_name()}',
-                ip_address=get_client_ip(request)
-            )
+            log_activity(request, f'تعديل عضو: {member.user.get_full_name()}')
 
             messages.success(request, 'تم تعديل بيانات العضو بنجاح!')
             return redirect('sharia_member_management')
@@ -438,16 +337,9 @@ def edit_member(request, member_id):
 
 
 @login_required
+@committee_required('sharia')
 def delete_member(request, member_id):
-    if request.user.role != 'committee_supervisor' or request.user.supervisor_type != 'sharia':
-        messages.error(request, 'ليس لديك صلاحية للوصول إلى هذه الصفحة')
-        return redirect('home')
-
-    try:
-        committee = Committee.objects.get(supervisor=request.user)
-    except Committee.DoesNotExist:
-        messages.error(request, 'لم يتم تعيين لجنة لك بعد')
-        return redirect('home')
+    committee = request.committee
 
     member = get_object_or_404(ShariaMember, id=member_id, committee=committee)
 
@@ -455,11 +347,7 @@ def delete_member(request, member_id):
         member_name = member.user.get_full_name()
         member.delete()
 
-        UserActivity.objects.create(
-            user=request.user,
-            action=f'حذف عضو: {member_name}',
-            ip_address=get_client_ip(request)
-        )
+        log_activity(request, f'حذف عضو: {member_name}')
 
         messages.success(request, 'تم حذف العضو بنجاح!')
         return redirect('sharia_member_management')
@@ -474,16 +362,9 @@ def delete_member(request, member_id):
 
 
 @login_required
+@committee_required('sharia')
 def add_member(request):
-    if request.user.role != 'committee_supervisor' or request.user.supervisor_type != 'sharia':
-        messages.error(request, 'ليس لديك صلاحية للوصول إلى هذه الصفحة')
-        return redirect('home')
-
-    try:
-        committee = Committee.objects.get(supervisor=request.user)
-    except Committee.DoesNotExist:
-        messages.error(request, 'لم يتم تعيين لجنة لك بعد')
-        return redirect('home')
+    committee = request.committee
 
     if request.method == 'POST':
         form = ShariaMemberForm(request.POST, committee=committee)
@@ -507,16 +388,9 @@ def add_member(request):
 
 # File Library
 @login_required
+@committee_required('sharia')
 def file_library(request):
-    if request.user.role != 'committee_supervisor' or request.user.supervisor_type != 'sharia':
-        messages.error(request, 'ليس لديك صلاحية للوصول إلى هذه الصفحة')
-        return redirect('home')
-
-    try:
-        committee = Committee.objects.get(supervisor=request.user)
-    except Committee.DoesNotExist:
-        messages.error(request, 'لم يتم تعيين لجنة لك بعد')
-        return redirect('home')
+    committee = request.committee
 
     files = ShariaFile.objects.filter(committee=committee).order_by('-uploaded_at')
 
@@ -533,16 +407,9 @@ def file_library(request):
 
 
 @login_required
+@committee_required('sharia')
 def upload_file(request):
-    if request.user.role != 'committee_supervisor' or request.user.supervisor_type != 'sharia':
-        messages.error(request, 'ليس لديك صلاحية للوصول إلى هذه الصفحة')
-        return redirect('home')
-
-    try:
-        committee = Committee.objects.get(supervisor=request.user)
-    except Committee.DoesNotExist:
-        messages.error(request, 'لم يتم تعيين لجنة لك بعد')
-        return redirect('home')
+    committee = request.committee
 
     if request.method == 'POST':
         form = ShariaFileForm(request.POST, request.FILES)
@@ -553,21 +420,17 @@ def upload_file(request):
             file_obj.save()
 
             members = ShariaMember.objects.filter(committee=committee, is_active=True)
-            for member in members:
-                ShariaNotification.objects.create(
-                    user=member.user,
-                    committee=committee,
-                    notification_type='lesson_scheduled',
-                    title='ملف جديد',
-                    message=f'تم رفع ملف جديد: {file_obj.title}'
-                )
-
-            UserActivity.objects.create(
-                user=request.user,
-                action=f'رفع ملف شرعي: {file_obj.title}',
-                ip_address=get_client_ip(request)
+            dispatch_notifications(
+                members.values_list('user_id', flat=True),
+                model=ShariaNotification,
+                committee=committee,
+                notification_type='lesson_scheduled',
+                title='ملف جديد',
+                message=f'تم رفع ملف جديد: {file_obj.title}'
             )
 
+            log_activity(request, f'رفع ملف شرعي: {file_obj.title}')
+
             messages.success(request, 'تم رفع الملف بنجاح!')
             return redirect('sharia_file_library')
     else:
@@ -582,16 +445,9 @@ def upload_file(request):
 
 
 @login_required
+@committee_required('sharia')
 def delete_file(request, file_id):
-    if request.user.role != 'committee_supervisor' or request.user.supervisor_type != 'sharia':
-        messages.error(request, 'ليس لديك صلاحية للوصول إلى هذه الصفحة')
-        return redirect('home')
-
-    try:
-        committee = Committee.objects.get(supervisor=request.user)
-    except Committee.DoesNotExist:
-        messages.error(request, 'لم يتم تعيين لجنة لك بعد')
-        return redirect('home')
+    committee = request.committee
 
     file_obj = get_object_or_404(ShariaFile, id=file_id, committee=committee)
 
@@ -621,14 +477,10 @@ def message_management(request):
             return redirect('home')
 
         # Get committee for the current user
-        try:
-            committee = Committee.objects.get(supervisor=request.user)
-        except Committee.DoesNotExist:
+        committee = request.scope.committee
+        if committee is None:
             messages.error(request, 'لم يتم تعيين لجنة لك بعد')
             return redirect('home')
-        except Committee.MultipleObjectsReturned:
-            messages.error(request, 'تم تعيين أكثر من لجنة لك. يرجى التواصل مع الإدارة')
-            return redirect('home')
 
         # Get messages for the committee
         try:
@@ -651,16 +503,9 @@ def message_management(request):
 
 
 @login_required
+@committee_required('sharia')
 def add_message(request):
-    if request.user.role != 'committee_supervisor' or request.user.supervisor_type != 'sharia':
-        messages.error(request, 'ليس لديك صلاحية للوصول إلى هذه الصفحة')
-        return redirect('home')
-
-    try:
-        committee = Committee.objects.get(supervisor=request.user)
-    except Committee.DoesNotExist:
-        messages.error(request, 'لم يتم تعيين لجنة لك بعد')
-        return redirect('home')
+    committee = request.committee
 
     if request.method == 'POST':
         form = DailyMessageForm(request.POST)
@@ -671,21 +516,17 @@ def add_message(request):
             message.save()
 
             members = ShariaMember.objects.filter(committee=committee, is_active=True)
-            for member in members:
-                ShariaNotification.objects.create(
-                    user=member.user,
-                    committee=committee,
-                    notification_type='message_sent',
-                    title='رسالة جديدة',
-                    message=f'تم جدولة رسالة جديدة: {message.title}'
-                )
-
-            UserActivity.objects.create(
-                user=request.user,
-                action=f'إضافة رسالة: {message.title}',
-                ip_address=get_client_ip(request)
+            dispatch_notifications(
+                members.values_list('user_id', flat=True),
+                model=ShariaNotification,
+                committee=committee,
+                notification_type='message_sent',
+                title='رسالة جديدة',
+                message=f'تم جدولة رسالة جديدة: {message.title}'
             )
 
+            log_activity(request, f'إضافة رسالة: {message.title}')
+
             messages.success(request, 'تم إضافة الرسالة بنجاح!')
             return redirect('sharia_message_management')
     else:
@@ -699,16 +540,9 @@ def add_message(request):
     return render(request, 'sharia_committee/message_form.html', context)
 
 @login_required
+@committee_required('sharia')
 def view_message(request, message_id):
-    if request.user.role != 'committee_supervisor' or request.user.supervisor_type != 'sharia':
-        messages.error(request, 'ليس لديك صلاحية للوصول إلى هذه الصفحة')
-        return redirect('home')
-
-    try:
-        committee = Committee.objects.get(supervisor=request.user)
-    except Committee.DoesNotExist:
-        messages.error(request, 'لم يتم تعيين لجنة لك بعد')
-        return redirect('home')
+    committee = request.committee
 
     message = get_object_or_404(DailyMessage, id=message_id, committee=committee)
 
@@ -720,16 +554,9 @@ def view_message(request, message_id):
 
 
 @login_required
+@committee_required('sharia')
 def edit_message(request, message_id):
-    if request.user.role != 'committee_supervisor' or request.user.supervisor_type != 'sharia':
-        messages.error(request, 'ليس لديك صلاحية للوصول إلى هذه الصفحة')
-        return redirect('home')
-
-    try:
-        committee = Committee.objects.get(supervisor=request.user)
-    except Committee.DoesNotExist:
-        messages.error(request, 'لم يتم تعيين لجنة لك بعد')
-        return redirect('home')
+    committee = request.committee
 
     message = get_object_or_404(DailyMessage, id=message_id, committee=committee)
 
@@ -740,21 +567,17 @@ def edit_message(request, message_id):
 
             # Send notifications to members
             members = ShariaMember.objects.filter(committee=committee, is_active=True)
-            for member in members:
-                ShariaNotification.objects.create(
-                    user=member.user,
-                    committee=committee,
-                    notification_type='message_sent',
-                    title='تم تعديل رسالة',
-                    message=f'تم تعديل الرسالة: {message.title}'
-                )
-
-            UserActivity.objects.create(
-                user=request.user,
-                action=f'تعديل رسالة: {message.title}',
-                ip_address=get_client_ip(request)
+            dispatch_notifications(
+                members.values_list('user_id', flat=True),
+                model=ShariaNotification,
+                committee=committee,
+                notification_type='message_sent',
+                title='تم تعديل رسالة',
+                message=f'تم تعديل الرسالة: {message.title}'
             )
 
+            log_activity(request, f'تعديل رسالة: {message.title}')
+
             messages.success(request, 'تم تعديل الرسالة بنجاح!')
             return redirect('sharia_message_management')
     else:
@@ -770,16 +593,9 @@ def edit_message(request, message_id):
 
 
 @login_required
+@committee_required('sharia')
 def delete_message(request, message_id):
-    if request.user.role != 'committee_supervisor' or request.user.supervisor_type != 'sharia':
-        messages.error(request, 'ليس لديك صلاحية للوصول إلى هذه الصفحة')
-        return redirect('home')
-
-    try:
-        committee = Committee.objects.get(supervisor=request.user)
-    except Committee.DoesNotExist:
-        messages.error(request, 'لم يتم تعيين لجنة لك بعد')
-        return redirect('home')
+    committee = request.committee
 
     message = get_object_or_404(DailyMessage, id=message_id, committee=committee)
 
@@ -787,11 +603,7 @@ def delete_message(request, message_id):
         message_title = message.title
         message.delete()
 
-        UserActivity.objects.create(
-            user=request.user,
-            action=f'حذف رسالة: {message_title}',
-            ip_address=get_client_ip(request)
-        )
+        log_activity(request, f'حذف رسالة: {message_title}')
 
         messages.success(request, 'تم حذف الرسالة بنجاح!')
         return redirect('sharia_message_management')
@@ -805,16 +617,9 @@ def delete_message(request, message_id):
     return render(request, 'sharia_committee/confirm_delete.html', context)
 # Family Competitions
 @login_required
+@committee_required('sharia')
 def competition_management(request):
-    if request.user.role != 'committee_supervisor' or request.user.supervisor_type != 'sharia':
-        messages.error(request, 'ليس لديك صلاحية للوصول إلى هذه الصفحة')
-        return redirect('home')
-
-    try:
-        committee = Committee.objects.get(supervisor=request.user)
-    except Committee.DoesNotExist:
-        messages.error(request, 'لم يتم تعيين لجنة لك بعد')
-        return redirect('home')
+    committee = request.committee
 
     competitions = FamilyCompetition.objects.filter(committee=committee).order_by('-created_at')
 
@@ -825,16 +630,9 @@ def competition_management(request):
     return render(request, 'sharia_committee/competition_management.html', context)
 
 @login_required
+@committee_required('sharia')
 def view_competition(request, competition_id):
-    if request.user.role != 'committee_supervisor' or request.user.supervisor_type != 'sharia':
-        messages.error(request, 'ليس لديك صلاحية للوصول إلى هذه الصفحة')
-        return redirect('home')
-
-    try:
-        committee = Committee.objects.get(supervisor=request.user)
-    except Committee.DoesNotExist:
-        messages.error(request, 'لم يتم تعيين لجنة لك بعد')
-        return redirect('home')
+    committee = request.committee
 
     competition = get_object_or_404(FamilyCompetition, id=competition_id, committee=committee)
 
@@ -846,16 +644,9 @@ def view_competition(request, competition_id):
 
 
 @login_required
+@committee_required('sharia')
 def edit_competition(request, competition_id):
-    if request.user.role != 'committee_supervisor' or request.user.supervisor_type != 'sharia':
-        messages.error(request, 'ليس لديك صلاحية للوصول إلى هذه الصفحة')
-        return redirect('home')
-
-    try:
-        committee = Committee.objects.get(supervisor=request.user)
-    except Committee.DoesNotExist:
-        messages.error(request, 'لم يتم تعيين لجنة لك بعد')
-        return redirect('home')
+    committee = request.committee
 
     competition = get_object_or_404(FamilyCompetition, id=competition_id, committee=committee)
 
@@ -866,22 +657,18 @@ def edit_competition(request, competition_id):
 
             # Send notifications to members
             members = ShariaMember.objects.filter(committee=committee, is_active=True)
-            for member in members:
-                ShariaNotification.objects.create(
-                    user=member.user,
-                    committee=committee,
-                    notification_type='competition_uploaded',
-                    title='تم تعديل مسابقة',
-                    message=f'تم تعديل المسابقة: {competition.title}',
-                    related_competition=competition
-                )
-
-            UserActivity.objects.create(
-                user=request.user,
-                action=f'تعديل مسابقة: {competition.title}',
-                ip_address=get_client_ip(request)
+            dispatch_notifications(
+                members.values_list('user_id', flat=True),
+                model=ShariaNotification,
+                committee=committee,
+                notification_type='competition_uploaded',
+                title='تم تعديل مسابقة',
+                message=f'تم تعديل المسابقة: {competition.title}',
+                related_competition=competition
             )
 
+            log_activity(request, f'تعديل مسابقة: {competition.title}')
+
             messages.success(request, 'تم تعديل المسابقة بنجاح!')
             return redirect('sharia_competition_management')
     else:
@@ -897,16 +684,9 @@ def edit_competition(request, competition_id):
 
 
 @login_required
+@committee_required('sharia')
 def delete_competition(request, competition_id):
-    if request.user.role != 'committee_supervisor' or request.user.supervisor_type != 'sharia':
-        messages.error(request, 'ليس لديك صلاحية للوصول إلى هذه الصفحة')
-        return redirect('home')
-
-    try:
-        committee = Committee.objects.get(supervisor=request.user)
-    except Committee.DoesNotExist:
-        messages.error(request, 'لم يتم تعيين لجنة لك بعد')
-        return redirect('home')
+    committee = request.committee
 
     competition = get_object_or_404(FamilyCompetition, id=competition_id, committee=committee)
 
@@ -914,11 +694,7 @@ def delete_competition(request, competition_id):
         competition_title = competition.title
         competition.delete()
 
-        UserActivity.objects.create(
-            user=request.user,
-            action=f'حذف مسابقة: {competition_title}',
-            ip_address=get_client_ip(request)
-        )
+        log_activity(request, f'حذف مسابقة: {competition_title}')
 
         messages.success(request, 'تم حذف المسابقة بنجاح!')
         return redirect('sharia_competition_management')
@@ -932,16 +708,9 @@ def delete_competition(request, competition_id):
     return render(request, 'sharia_committee/confirm_delete.html', context)
 
 @login_required
+@committee_required('sharia')
 def add_competition(request):
-    if request.user.role != 'committee_supervisor' or request.user.supervisor_type != 'sharia':
-        messages.error(request, 'ليس لديك صلاحية للوصول إلى هذه الصفحة')
-        return redirect('home')
-
-    try:
-        committee = Committee.objects.get(supervisor=request.user)
-    except Committee.DoesNotExist:
-        messages.error(request, 'لم يتم تعيين لجنة لك بعد')
-        return redirect('home')
+    committee = request.committee
 
     if request.method == 'POST':
         form = FamilyCompetitionForm(request.POST, request.FILES)
@@ -952,22 +721,18 @@ def add_competition(request):
             competition.save()
 
             members = ShariaMember.objects.filter(committee=committee, is_active=True)
-            for member in members:
-                ShariaNotification.objects.create(
-                    user=member.user,
-                    committee=committee,
-                    notification_type='competition_uploaded',
-                    title='مسابقة جديدة',
-                    message=f'تم رفع مسابقة جديدة: {competition.title}',
-                    related_competition=competition
-                )
-
-            UserActivity.objects.create(
-                user=request.user,
-                action=f'إضافة مسابقة: {competition.title}',
-                ip_address=get_client_ip(request)
+            dispatch_notifications(
+                members.values_list('user_id', flat=True),
+                model=ShariaNotification,
+                committee=committee,
+                notification_type='competition_uploaded',
+                title='مسابقة جديدة',
+                message=f'تم رفع مسابقة جديدة: {competition.title}',
+                related_competition=competition
             )
 
+            log_activity(request, f'إضافة مسابقة: {competition.title}')
+
             messages.success(request, 'تم إضافة المسابقة بنجاح!')
             return redirect('sharia_competition_management')
     else:
@@ -991,14 +756,10 @@ def book_management(request):
             return redirect('home')
 
         # Get committee for the current user
-        try:
-            committee = Committee.objects.get(supervisor=request.user)
-        except Committee.DoesNotExist:
+        committee = request.scope.committee
+        if committee is None:
             messages.error(request, 'لم يتم تعيين لجنة لك بعد')
             return redirect('home')
-        except Committee.MultipleObjectsReturned:
-            messages.error(request, 'تم تعيين أكثر من لجنة لك. يرجى التواصل مع الإدارة')
-            return redirect('home')
 
         # Get books for the committee
         try:
@@ -1021,16 +782,9 @@ def book_management(request):
 
 
 @login_required
+@committee_required('sharia')
 def add_book(request):
-    if request.user.role != 'committee_supervisor' or request.user.supervisor_type != 'sharia':
-        messages.error(request, 'ليس لديك صلاحية للوصول إلى هذه الصفحة')
-        return redirect('home')
-
-    try:
-        committee = Committee.objects.get(supervisor=request.user)
-    except Committee.DoesNotExist:
-        messages.error(request, 'لم يتم تعيين لجنة لك بعد')
-        return redirect('home')
+    committee = request.committee
 
     if request.method == 'POST':
         form = YouthBookForm(request.POST, committee=committee)
@@ -1040,11 +794,7 @@ def add_book(request):
             book.created_by = request.user
             book.save()
 
-            UserActivity.objects.create(
-                user=request.user,
-                action=f'إضافة كتاب: {book.title}',
-                ip_address=get_client_ip(request)
-            )
+            log_activity(request, f'إضافة كتاب: {book.title}')
 
             messages.success(request, 'تم إضافة الكتاب بنجاح!')
             return redirect('sharia_book_management')
@@ -1059,16 +809,9 @@ def add_book(request):
     return render(request, 'sharia_committee/book_form.html', context)
 
 @login_required
+@committee_required('sharia')
 def view_book(request, book_id):
-    if request.user.role != 'committee_supervisor' or request.user.supervisor_type != 'sharia':
-        messages.error(request, 'ليس لديك صلاحية للوصول إلى هذه الصفحة')
-        return redirect('home')
-
-    try:
-        committee = Committee.objects.get(supervisor=request.user)
-    except Committee.DoesNotExist:
-        messages.error(request, 'لم يتم تعيين لجنة لك بعد')
-        return redirect('home')
+    committee = request.committee
 
     book = get_object_or_404(YouthBook, id=book_id, committee=committee)
 
@@ -1080,16 +823,9 @@ def view_book(request, book_id):
 
 
 @login_required
+@committee_required('sharia')
 def edit_book(request, book_id):
-    if request.user.role != 'committee_supervisor' or request.user.supervisor_type != 'sharia':
-        messages.error(request, 'ليس لديك صلاحية للوصول إلى هذه الصفحة')
-        return redirect('home')
-
-    try:
-        committee = Committee.objects.get(supervisor=request.user)
-    except Committee.DoesNotExist:
-        messages.error(request, 'لم يتم تعيين لجنة لك بعد')
-        return redirect('home')
+    committee = request.committee
 
     book = get_object_or_404(YouthBook, id=book_id, committee=committee)
 
@@ -1098,11 +834,7 @@ def edit_book(request, book_id):
         if form.is_valid():
             form.save()
 
-            UserActivity.objects.create(
-                user=request.user,
-                action=f'تعديل كتاب: {book.title}',
-                ip_address=get_client_ip(request)
-            )
+            log_activity(request, f'تعديل كتاب: {book.title}')
 
             messages.success(request, 'تم تعديل الكتاب بنجاح!')
             return redirect('sharia_book_management')
@@ -1119,16 +851,9 @@ def edit_book(request, book_id):
 
 
 @login_required
+@committee_required('sharia')
 def delete_book(request, book_id):
-    if request.user.role != 'committee_supervisor' or request.user.supervisor_type != 'sharia':
-        messages.error(request, 'ليس لديك صلاحية للوصول إلى هذه الصفحة')
-        return redirect('home')
-
-    try:
-        committee = Committee.objects.get(supervisor=request.user)
-    except Committee.DoesNotExist:
-        messages.error(request, 'لم يتم تعيين لجنة لك بعد')
-        return redirect('home')
+    committee = request.committee
 
     book = get_object_or_404(YouthBook, id=book_id, committee=committee)
 
@@ -1136,11 +861,7 @@ def delete_book(request, book_id):
         book_title = book.title
         book.delete()
 
-        UserActivity.objects.create(
-            user=request.user,
-            action=f'حذف كتاب: {book_title}',
-            ip_address=get_client_ip(request)
-        )
+        log_activity(request, f'حذف كتاب: {book_title}')
 
         messages.success(request, 'تم حذف الكتاب بنجاح!')
         return redirect('sharia_book_management')
@@ -1155,16 +876,9 @@ def delete_book(request, book_id):
 
 # Reports
 @login_required
+@committee_required('sharia')
 def reports(request):
-    if request.user.role != 'committee_supervisor' or request.user.supervisor_type != 'sharia':
-        messages.error(request, 'ليس لديك صلاحية للوصول إلى هذه الصفحة')
-        return redirect('home')
-
-    try:
-        committee = Committee.objects.get(supervisor=request.user)
-    except Committee.DoesNotExist:
-        messages.error(request, 'لم يتم تعيين لجنة لك بعد')
-        return redirect('home')
+    committee = request.committee
 
     total_tasks = ShariaTask.objects.filter(committee=committee).count()
     completed_tasks = ShariaTask.objects.filter(committee=committee, status='completed').count()
@@ -1191,16 +905,9 @@ def reports(request):
 
 
 @login_required
+@committee_required('sharia')
 def add_report(request):
-    if request.user.role != 'committee_supervisor' or request.user.supervisor_type != 'sharia':
-        messages.error(request, 'ليس لديك صلاحية للوصول إلى هذه الصفحة')
-        return redirect('home')
-
-    try:
-        committee = Committee.objects.get(supervisor=request.user)
-    except Committee.DoesNotExist:
-        messages.error(request, 'لم يتم تعيين لجنة لك بعد')
-        return redirect('home')
+    committee = request.committee
 
     if request.method == 'POST':
         form = ShariaReportForm(request.POST, request.FILES)
@@ -1211,22 +918,18 @@ def add_report(request):
             report.save()
 
             members = ShariaMember.objects.filter(committee=committee, is_active=True)
-            for member in members:
-                ShariaNotification.objects.create(
-                    user=member.user,
-                    committee=committee,
-                    notification_type='report_uploaded',
-                    title='تقرير جديد',
-                    message=f'تم رفع تقرير جديد: {report.title}',
-                    related_report=report
-                )
-
-            UserActivity.objects.create(
-                user=request.user,
-                action=f'إضافة تقرير شرعي: {report.title}',
-                ip_address=get_client_ip(request)
+            dispatch_notifications(
+                members.values_list('user_id', flat=True),
+                model=ShariaNotification,
+                committee=committee,
+                notification_type='report_uploaded',
+                title='تقرير جديد',
+                message=f'تم رفع تقرير جديد: {report.title}',
+                related_report=report
             )
 
+            log_activity(request, f'إضافة تقرير شرعي: {report.title}')
+
             messages.success(request, 'تم إضافة التقرير بنجاح!')
             return redirect('sharia_reports')
     else:
@@ -1242,16 +945,9 @@ def add_report(request):
 
 # Notifications
 @login_required
+@committee_required('sharia')
 def notifications(request):
-    if request.user.role != 'committee_supervisor' or request.user.supervisor_type != 'sharia':
-        messages.error(request, 'ليس لديك صلاحية للوصول إلى هذه الصفحة')
-        return redirect('home')
-
-    try:
-        committee = Committee.objects.get(supervisor=request.user)
-    except Committee.DoesNotExist:
-        messages.error(request, 'لم يتم تعيين لجنة لك بعد')
-        return redirect('home')
+    committee = request.committee
 
     notifications = ShariaNotification.objects.filter(user=request.user).order_by('-created_at')
 
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.6 on 2026-10-18 13:49
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cultural_committee_dashboard', '0009_query_indexes'),
+        ('director_dashboard', '0006_query_indexes'),
+        ('sports_committee_dashboard', '0010_match_updated_at'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='sportsnotification',
+            index=models.Index(fields=['user', '-created_at'], name='sportnotif_user_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='sportsnotification',
+            index=models.Index(condition=models.Q(('is_read', False)), fields=['user'], name='sportnotif_unread_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='sportstask',
+            index=models.Index(fields=['committee', 'status', 'due_date'], name='sportask_comm_status_due_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='sportstask',
+            index=models.Index(fields=['committee', '-created_at'], name='sportask_comm_created_idx'),
+        ),
+    ]
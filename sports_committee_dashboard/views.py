@@ -4,38 +4,26 @@ from django.contrib import messages
 from django.db.models import Count, Avg, Q
 from django.utils import timezone
 from datetime import timedelta
-from director_dashboard.models import Committee
 from accounts.models import User, UserActivity
+from accounts.activity import log_activity
+from main.notifications import dispatch as dispatch_notifications
+from main.rollups import get_committee_rollup
+from main.scope import committee_required
 from .models import (SportsTask, SportsMember, SportsFile, Match, SportsReport, SportsNotification)
 from .forms import (SportsTaskForm, SportsMemberForm, SportsFileForm, MatchForm, SportsReportForm)
 
 
-def get_client_ip(request):
-    x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
-    if x_forwarded_for:
-        ip = x_forwarded_for.split(',')[0]
-    else:
-        ip = request.META.get('REMOTE_ADDR')
-    return ip
-
-from cultural_committee_dashboard.models import DailyPhrase
 @login_required
+@committee_required('sports')
 def sports_dashboard(request):
-    if request.user.role != 'committee_supervisor' or request.user.supervisor_type != 'sports':
-        messages.error(request, 'ليس لديك صلاحية للوصول إلى هذه الصفحة')
-        return redirect('home')
-
-    try:
-        committee = Committee.objects.get(supervisor=request.user)
-    except Committee.DoesNotExist:
-        messages.error(request, 'لم يتم تعيين لجنة لك بعد')
-        return redirect('home')
+    committee = request.committee
 
     # Statistics
-    total_members = SportsMember.objects.filter(committee=committee, is_active=True).count()
-    total_tasks = SportsTask.objects.filter(committee=committee).count()
-    completed_tasks = SportsTask.objects.filter(committee=committee, status='completed').count()
-    pending_tasks = SportsTask.objects.filter(committee=committee, status='pending').count()
+    rollup = get_committee_rollup(committee, 'sports')
+    total_members = rollup.member_count
+    total_tasks = rollup.task_count
+    completed_tasks = rollup.completed_count
+    pending_tasks = rollup.pending_count
 
     # Matches statistics
     upcoming_matches = Match.objects.filter(
@@ -45,7 +33,7 @@ def sports_dashboard(request):
     ).count()
 
     # Completion rate
-    completion_rate = (completed_tasks / total_tasks * 100) if total_tasks > 0 else 0
+    completion_rate = rollup.completion_rate
 
     # Recent tasks
     recent_tasks = SportsTask.objects.filter(committee=committee).order_by('-created_at')[:5]
@@ -63,19 +51,6 @@ def sports_dashboard(request):
         is_read=False
     ).count()
 
-    # Get daily phrase from cultural committee in the same program
-    try:
-        cultural_committee = Committee.objects.filter(
-            program=committee.program,
-        ).first()
-
-        if cultural_committee:
-            daily_phrase = DailyPhrase.get_today_phrase()
-        else:
-            daily_phrase = None
-    except:
-        daily_phrase = None
-
     context = {
         'committee': committee,
         'total_members': total_members,
@@ -87,22 +62,14 @@ def sports_dashboard(request):
         'recent_tasks': recent_tasks,
         'next_matches': next_matches,
         'unread_notifications': unread_notifications,
-        'daily_phrase': daily_phrase,
     }
     return render(request, 'sports_committee/dashboard.html', context)
 
 
 @login_required
+@committee_required('sports')
 def committee_info(request):
-    if request.user.role != 'committee_supervisor' or request.user.supervisor_type != 'sports':
-        messages.error(request, 'ليس لديك صلاحية للوصول إلى هذه الصفحة')
-        return redirect('home')
-
-    try:
-        committee = Committee.objects.get(supervisor=request.user)
-    except Committee.DoesNotExist:
-        messages.error(request, 'لم يتم تعيين لجنة لك بعد')
-        return redirect('home')
+    committee = request.committee
 
     members = SportsMember.objects.filter(committee=committee)
     active_members = members.filter(is_active=True).count()
@@ -122,16 +89,9 @@ def committee_info(request):
 
 
 @login_required
+@committee_required('sports')
 def task_management(request):
-    if request.user.role != 'committee_supervisor' or request.user.supervisor_type != 'sports':
-        messages.error(request, 'ليس لديك صلاحية للوصول إلى هذه الصفحة')
-        return redirect('home')
-
-    try:
-        committee = Committee.objects.get(supervisor=request.user)
-    except Committee.DoesNotExist:
-        messages.error(request, 'لم يتم تعيين لجنة لك بعد')
-        return redirect('home')
+    committee = request.committee
 
     tasks = SportsTask.objects.filter(committee=committee).order_by('-created_at')
 
@@ -154,16 +114,9 @@ def task_management(request):
 
 
 @login_required
+@committee_required('sports')
 def add_task(request):
-    if request.user.role != 'committee_supervisor' or request.user.supervisor_type != 'sports':
-        messages.error(request, 'ليس لديك صلاحية للوصول إلى هذه الصفحة')
-        return redirect('home')
-
-    try:
-        committee = Committee.objects.get(supervisor=request.user)
-    except Committee.DoesNotExist:
-        messages.error(request, 'لم يتم تعيين لجنة لك بعد')
-        return redirect('home')
+    committee = request.committee
 
     if request.method == 'POST':
         form = SportsTaskForm(request.POST, committee=committee)
@@ -189,25 +142,21 @@ def add_task(request):
 
             # Create notifications for committee members
             members = SportsMember.objects.filter(committee=committee, is_active=True)
-            for member in members:
-                SportsNotification.objects.create(
-                    user=member.user,
-                    committee=committee,
-                    notification_type='task_added',
-                    title='مهمة جديدة',
-                    message=f'تم إضافة مهمة جديدة: {task.title}' + (
-                        f' ({task.get_recurrence_pattern_display()})' if task.is_recurring else '') +
-                            (f' للمسؤول: {task.assigned_to_name}' if task.assigned_to_name else ''),
-                    related_task=task
-                )
-
-            UserActivity.objects.create(
-                user=request.user,
-                action=f'إضافة مهمة رياضية: {task.title}' +
-                       (f' ({task.get_recurrence_pattern_display()})' if task.is_recurring else ''),
-                ip_address=get_client_ip(request)
+            dispatch_notifications(
+                members.values_list('user_id', flat=True),
+                model=SportsNotification,
+                committee=committee,
+                notification_type='task_added',
+                title='مهمة جديدة',
+                message=f'تم إضافة مهمة جديدة: {task.title}' + (
+                    f' ({task.get_recurrence_pattern_display()})' if task.is_recurring else '') +
+                        (f' للمسؤول: {task.assigned_to_name}' if task.assigned_to_name else ''),
+                related_task=task
             )
 
+            log_activity(request, f'إضافة مهمة رياضية: {task.title}' +
+                         (f' ({task.get_recurrence_pattern_display()})' if task.is_recurring else ''))
+
             if task.is_recurring:
                 messages.success(request,
                                  f'تم إضافة المهمة المتكررة بنجاح! ({task.get_recurrence_pattern_display()})')
@@ -231,16 +180,9 @@ def add_task(request):
 
 
 @login_required
+@committee_required('sports')
 def edit_task(request, task_id):
-    if request.user.role != 'committee_supervisor' or request.user.supervisor_type != 'sports':
-        messages.error(request, 'ليس لديك صلاحية للوصول إلى هذه الصفحة')
-        return redirect('home')
-
-    try:
-        committee = Committee.objects.get(supervisor=request.user)
-    except Committee.DoesNotExist:
-        messages.error(request, 'لم يتم تعيين لجنة لك بعد')
-        return redirect('home')
+    committee = request.committee
 
     task = get_object_or_404(SportsTask, id=task_id, committee=committee)
 
@@ -264,25 +206,21 @@ def edit_task(request, task_id):
 
             # Create notifications for committee members
             members = SportsMember.objects.filter(committee=committee, is_active=True)
-            for member in members:
-                SportsNotification.objects.create(
-                    user=member.user,
-                    committee=committee,
-                    notification_type='task_updated',
-                    title='تعديل مهمة',
-                    message=f'تم تعديل المهمة: {task.title}' + (
-                        f' ({task.get_recurrence_pattern_display()})' if task.is_recurring else '') +
-                            (f' للمسؤول: {task.assigned_to_name}' if task.assigned_to_name else ''),
-                    related_task=task
-                )
-
-            UserActivity.objects.create(
-                user=request.user,
-                action=f'تعديل مهمة رياضية: {task.title}' +
-                       (f' ({task.get_recurrence_pattern_display()})' if task.is_recurring else ''),
-                ip_address=get_client_ip(request)
+            dispatch_notifications(
+                members.values_list('user_id', flat=True),
+                model=SportsNotification,
+                committee=committee,
+                notification_type='task_updated',
+                title='تعديل مهمة',
+                message=f'تم تعديل المهمة: {task.title}' + (
+                    f' ({task.get_recurrence_pattern_display()})' if task.is_recurring else '') +
+                        (f' للمسؤول: {task.assigned_to_name}' if task.assigned_to_name else ''),
+                related_task=task
             )
 
+            log_activity(request, f'تعديل مهمة رياضية: {task.title}' +
+                         (f' ({task.get_recurrence_pattern_display()})' if task.is_recurring else ''))
+
             if task.is_recurring:
                 messages.success(request,
                                  f'تم تعديل المهمة المتكررة بنجاح! ({task.get_recurrence_pattern_display()})')
@@ -311,16 +249,9 @@ def edit_task(request, task_id):
 
 
 @login_required
+@committee_required('sports')
 def delete_task(request, task_id):
-    if request.user.role != 'committee_supervisor' or request.user.supervisor_type != 'sports':
-        messages.error(request, 'ليس لديك صلاحية للوصول إلى هذه الصفحة')
-        return redirect('home')
-
-    try:
-        committee = Committee.objects.get(supervisor=request.user)
-    except Committee.DoesNotExist:
-        messages.error(request, 'لم يتم تعيين لجنة لك بعد')
-        return redirect('home')
+    committee = request.committee
 
     task = get_object_or_404(SportsTask, id=task_id, committee=committee)
 
@@ -331,12 +262,8 @@ def delete_task(request, task_id):
 
         task.delete()
 
-        UserActivity.objects.create(
-            user=request.user,
-            action=f'حذف مهمة رياضية: {task_title}' +
-                   (f' ({recurrence_pattern})' if is_recurring else ''),
-            ip_address=get_client_ip(request)
-        )
+        log_activity(request, f'حذف مهمة رياضية: {task_title}' +
+                     (f' ({recurrence_pattern})' if is_recurring else ''))
 
         if is_recurring:
             messages.success(request,
@@ -356,16 +283,9 @@ def delete_task(request, task_id):
 
 
 @login_required
+@committee_required('sports')
 def member_management(request):
-    if request.user.role != 'committee_supervisor' or request.user.supervisor_type != 'sports':
-        messages.error(request, 'ليس لديك صلاحية للوصول إلى هذه الصفحة')
-        return redirect('home')
-
-    try:
-        committee = Committee.objects.get(supervisor=request.user)
-    except Committee.DoesNotExist:
-        messages.error(request, 'لم يتم تعيين لجنة لك بعد')
-        return redirect('home')
+    committee = request.committee
 
     members = SportsMember.objects.filter(committee=committee).select_related('user').order_by('-participation_score')
 
@@ -377,16 +297,9 @@ def member_management(request):
 
 
 @login_required
+@committee_required('sports')
 def add_member(request):
-    if request.user.role != 'committee_supervisor' or request.user.supervisor_type != 'sports':
-        messages.error(request, 'ليس لديك صلاحية للوصول إلى هذه الصفحة')
-        return redirect('home')
-
-    try:
-        committee = Committee.objects.get(supervisor=request.user)
-    except Committee.DoesNotExist:
-        messages.error(request, 'لم يتم تعيين لجنة لك بعد')
-        return redirect('home')
+    committee = request.committee
 
     if request.method == 'POST':
         form = SportsMemberForm(request.POST, committee=committee)
@@ -409,16 +322,9 @@ def add_member(request):
 
 
 @login_required
+@committee_required('sports')
 def file_library(request):
-    if request.user.role != 'committee_supervisor' or request.user.supervisor_type != 'sports':
-        messages.error(request, 'ليس لديك صلاحية للوصول إلى هذه الصفحة')
-        return redirect('home')
-
-    try:
-        committee = Committee.objects.get(supervisor=request.user)
-    except Committee.DoesNotExist:
-        messages.error(request, 'لم يتم تعيين لجنة لك بعد')
-        return redirect('home')
+    committee = request.committee
 
     files = SportsFile.objects.filter(committee=committee).order_by('-uploaded_at')
 
@@ -436,16 +342,9 @@ def file_library(request):
 
 
 @login_required
+@committee_required('sports')
 def upload_file(request):
-    if request.user.role != 'committee_supervisor' or request.user.supervisor_type != 'sports':
-        messages.error(request, 'ليس لديك صلاحية للوصول إلى هذه الصفحة')
-        return redirect('home')
-
-    try:
-        committee = Committee.objects.get(supervisor=request.user)
-    except Committee.DoesNotExist:
-        messages.error(request, 'لم يتم تعيين لجنة لك بعد')
-        return redirect('home')
+    committee = request.committee
 
     if request.method == 'POST':
         form = SportsFileForm(request.POST, request.FILES)
@@ -457,21 +356,17 @@ def upload_file(request):
 
             # Notify all committee members
             members = SportsMember.objects.filter(committee=committee, is_active=True)
-            for member in members:
-                SportsNotification.objects.create(
-                    user=member.user,
-                    committee=committee,
-                    notification_type='results_uploaded',
-                    title='ملف جديد',
-                    message=f'تم رفع ملف جديد: {file_obj.title}'
-                )
-
-            UserActivity.objects.create(
-                user=request.user,
-                action=f'رفع ملف رياضي: {file_obj.title}',
-                ip_address=get_client_ip(request)
+            dispatch_notifications(
+                members.values_list('user_id', flat=True),
+                model=SportsNotification,
+                committee=committee,
+                notification_type='results_uploaded',
+                title='ملف جديد',
+                message=f'تم رفع ملف جديد: {file_obj.title}'
             )
 
+            log_activity(request, f'رفع ملف رياضي: {file_obj.title}')
+
             messages.success(request, 'تم رفع الملف بنجاح!')
             return redirect('sports_file_library')
     else:
@@ -486,16 +381,9 @@ def upload_file(request):
 
 
 @login_required
+@committee_required('sports')
 def delete_file(request, file_id):
-    if request.user.role != 'committee_supervisor' or request.user.supervisor_type != 'sports':
-        messages.error(request, 'ليس لديك صلاحية للوصول إلى هذه الصفحة')
-        return redirect('home')
-
-    try:
-        committee = Committee.objects.get(supervisor=request.user)
-    except Committee.DoesNotExist:
-        messages.error(request, 'لم يتم تعيين لجنة لك بعد')
-        return redirect('home')
+    committee = request.committee
 
     file_obj = get_object_or_404(SportsFile, id=file_id, committee=committee)
 
@@ -516,16 +404,9 @@ def delete_file(request, file_id):
 
 
 @login_required
+@committee_required('sports')
 def match_management(request):
-    if request.user.role != 'committee_supervisor' or request.user.supervisor_type != 'sports':
-        messages.error(request, 'ليس لديك صلاحية للوصول إلى هذه الصفحة')
-        return redirect('home')
-
-    try:
-        committee = Committee.objects.get(supervisor=request.user)
-    except Committee.DoesNotExist:
-        messages.error(request, 'لم يتم تعيين لجنة لك بعد')
-        return redirect('home')
+    committee = request.committee
 
     matches = Match.objects.filter(committee=committee).order_by('-date', '-time')
 
@@ -548,16 +429,9 @@ def match_management(request):
 
 
 @login_required
+@committee_required('sports')
 def add_match(request):
-    if request.user.role != 'committee_supervisor' or request.user.supervisor_type != 'sports':
-        messages.error(request, 'ليس لديك صلاحية للوصول إلى هذه الصفحة')
-        return redirect('home')
-
-    try:
-        committee = Committee.objects.get(supervisor=request.user)
-    except Committee.DoesNotExist:
-        messages.error(request, 'لم يتم تعيين لجنة لك بعد')
-        return redirect('home')
+    committee = request.committee
 
     if request.method == 'POST':
         form = MatchForm(request.POST, committee=committee)
@@ -569,22 +443,18 @@ def add_match(request):
 
             # Notify all members about the match
             members = SportsMember.objects.filter(committee=committee, is_active=True)
-            for member in members:
-                SportsNotification.objects.create(
-                    user=member.user,
-                    committee=committee,
-                    notification_type='match_scheduled',
-                    title='مباراة جديدة',
-                    message=f'مباراة مجدولة: {match.title} - {match.date} {match.time}',
-                    related_match=match
-                )
-
-            UserActivity.objects.create(
-                user=request.user,
-                action=f'إضافة مباراة: {match.title}',
-                ip_address=get_client_ip(request)
+            dispatch_notifications(
+                members.values_list('user_id', flat=True),
+                model=SportsNotification,
+                committee=committee,
+                notification_type='match_scheduled',
+                title='مباراة جديدة',
+                message=f'مباراة مجدولة: {match.title} - {match.date} {match.time}',
+                related_match=match
             )
 
+            log_activity(request, f'إضافة مباراة: {match.title}')
+
             messages.success(request, 'تم إضافة المباراة بنجاح!')
             return redirect('sports_match_management')
     else:
@@ -599,16 +469,9 @@ def add_match(request):
 
 
 @login_required
+@committee_required('sports')
 def edit_match(request, match_id):
-    if request.user.role != 'committee_supervisor' or request.user.supervisor_type != 'sports':
-        messages.error(request, 'ليس لديك صلاحية للوصول إلى هذه الصفحة')
-        return redirect('home')
-
-    try:
-        committee = Committee.objects.get(supervisor=request.user)
-    except Committee.DoesNotExist:
-        messages.error(request, 'لم يتم تعيين لجنة لك بعد')
-        return redirect('home')
+    committee = request.committee
 
     match = get_object_or_404(Match, id=match_id, committee=committee)
 
@@ -620,21 +483,17 @@ def edit_match(request, match_id):
             # Notify about results if scores are added
             if match.team1_score is not None and match.team2_score is not None:
                 members = SportsMember.objects.filter(committee=committee, is_active=True)
-                for member in members:
-                    SportsNotification.objects.create(
-                        user=member.user,
-                        committee=committee,
-                        notification_type='results_uploaded',
-                        title='نتائج المباراة',
-                        message=f'نتيجة {match.title}: {match.team1} {match.team1_score} - {match.team2_score} {match.team2}',
-                        related_match=match
-                    )
-
-            UserActivity.objects.create(
-                user=request.user,
-                action=f'تعديل مباراة: {match.title}',
-                ip_address=get_client_ip(request)
-            )
+                dispatch_notifications(
+                    members.values_list('user_id', flat=True),
+                    model=SportsNotification,
+                    committee=committee,
+                    notification_type='results_uploaded',
+                    title='نتائج المباراة',
+                    message=f'نتيجة {match.title}: {match.team1} {match.team1_score} - {match.team2_score} {match.team2}',
+                    related_match=match
+                )
+
+            log_activity(request, f'تعديل مباراة: {match.title}')
 
             messages.success(request, 'تم تعديل المباراة بنجاح!')
             return redirect('sports_match_management')
@@ -651,16 +510,9 @@ def edit_match(request, match_id):
 
 
 @login_required
+@committee_required('sports')
 def delete_match(request, match_id):
-    if request.user.role != 'committee_supervisor' or request.user.supervisor_type != 'sports':
-        messages.error(request, 'ليس لديك صلاحية للوصول إلى هذه الصفحة')
-        return redirect('home')
-
-    try:
-        committee = Committee.objects.get(supervisor=request.user)
-    except Committee.DoesNotExist:
-        messages.error(request, 'لم يتم تعيين لجنة لك بعد')
-        return redirect('home')
+    committee = request.committee
 
     match = get_object_or_404(Match, id=match_id, committee=committee)
 
@@ -668,11 +520,7 @@ def delete_match(request, match_id):
         match_title = match.title
         match.delete()
 
-        UserActivity.objects.create(
-            user=request.user,
-            action=f'حذف مباراة: {match_title}',
-            ip_address=get_client_ip(request)
-        )
+        log_activity(request, f'حذف مباراة: {match_title}')
 
         messages.success(request, 'تم حذف المباراة بنجاح!')
         return redirect('sports_match_management')
@@ -686,16 +534,9 @@ def delete_match(request, match_id):
 
 
 @login_required
+@committee_required('sports')
 def reports(request):
-    if request.user.role != 'committee_supervisor' or request.user.supervisor_type != 'sports':
-        messages.error(request, 'ليس لديك صلاحية للوصول إلى هذه الصفحة')
-        return redirect('home')
-
-    try:
-        committee = Committee.objects.get(supervisor=request.user)
-    except Committee.DoesNotExist:
-        messages.error(request, 'لم يتم تعيين لجنة لك بعد')
-        return redirect('home')
+    committee = request.committee
 
     # Task completion stats
     total_tasks = SportsTask.objects.filter(committee=committee).count()
@@ -743,16 +584,9 @@ def reports(request):
 
 
 @login_required
+@committee_required('sports')
 def add_report(request):
-    if request.user.role != 'committee_supervisor' or request.user.supervisor_type != 'sports':
-        messages.error(request, 'ليس لديك صلاحية للوصول إلى هذه الصفحة')
-        return redirect('home')
-
-    try:
-        committee = Committee.objects.get(supervisor=request.user)
-    except Committee.DoesNotExist:
-        messages.error(request, 'لم يتم تعيين لجنة لك بعد')
-        return redirect('home')
+    committee = request.committee
 
     if request.method == 'POST':
         form = SportsReportForm(request.POST, request.FILES)
@@ -764,22 +598,18 @@ def add_report(request):
 
             # Notify members
             members = SportsMember.objects.filter(committee=committee, is_active=True)
-            for member in members:
-                SportsNotification.objects.create(
-                    user=member.user,
-                    committee=committee,
-                    notification_type='report_uploaded',
-                    title='تقرير جديد',
-                    message=f'تم رفع تقرير جديد: {report.title}',
-                    related_report=report
-                )
-
-            UserActivity.objects.create(
-                user=request.user,
-                action=f'إضافة تقرير رياضي: {report.title}',
-                ip_address=get_client_ip(request)
+            dispatch_notifications(
+                members.values_list('user_id', flat=True),
+                model=SportsNotification,
+                committee=committee,
+                notification_type='report_uploaded',
+                title='تقرير جديد',
+                message=f'تم رفع تقرير جديد: {report.title}',
+                related_report=report
             )
 
+            log_activity(request, f'إضافة تقرير رياضي: {report.title}')
+
             messages.success(request, 'تم إضافة التقرير بنجاح!')
             return redirect('sports_reports')
     else:
@@ -794,16 +624,9 @@ def add_report(request):
 
 
 @login_required
+@committee_required('sports')
 def notifications(request):
-    if request.user.role != 'committee_supervisor' or request.user.supervisor_type != 'sports':
-        messages.error(request, 'ليس لديك صلاحية للوصول إلى هذه الصفحة')
-        return redirect('home')
-
-    try:
-        committee = Committee.objects.get(supervisor=request.user)
-    except Committee.DoesNotExist:
-        messages.error(request, 'لم يتم تعيين لجنة لك بعد')
-        return redirect('home')
+    committee = request.committee
 
     notifications = SportsNotification.objects.filter(
         user=request.user
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.6 on 2026-10-18 13:49
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('takwin', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='takwin',
+            index=models.Index(fields=['aspect', '-created_at'], name='takwin_aspect_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='usertakwin',
+            index=models.Index(fields=['user', 'is_done'], name='usertakwin_user_done_idx'),
+        ),
+    ]
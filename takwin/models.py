@@ -105,6 +105,9 @@ class Takwin(models.Model):
     class Meta:
         verbose_name = "تكوين"
         verbose_name_plural = "التكوين"
+        indexes = [
+            models.Index(fields=["aspect", "-created_at"], name="takwin_aspect_created_idx"),
+        ]
 
     def __str__(self):
         return self.title
@@ -124,6 +127,9 @@ class UserTakwin(models.Model):
     class Meta:
         verbose_name = "تكوين المستخدم"
         verbose_name_plural = "تكوين المستخدمين"
+        indexes = [
+            models.Index(fields=["user", "is_done"], name="usertakwin_user_done_idx"),
+        ]
 
     def __str__(self):
         status = 'منجز' if self.is_done else 'غير منجز'
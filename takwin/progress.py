@@ -0,0 +1,85 @@
+from django.core.cache import cache
+from django.db.models import Count, Exists, OuterRef, Q
+
+from main.shared_cache import bump_version, cap_timeout, get_version
+
+from .models import ASPECT_CHOICES, Takwin, UserTakwin
+
+
+# Seconds a user's progress stays cached (toggling or editing content drops it earlier,
+# in every process as long as the cache is shared - see CACHE_BACKEND)
+PROGRESS_CACHE_TIMEOUT = 24 * 60 * 60
+
+CONTENT_VERSION_KEY = 'takwin:version'
+
+
+def get_content_version():
+    """
+    Generation number of the takwin library, part of every progress key:
+    adding, moving or deleting a takwin changes everyone's totals at once.
+    """
+    return get_version(CONTENT_VERSION_KEY)
+
+
+def invalidate_takwin_content():
+    bump_version(CONTENT_VERSION_KEY)
+
+
+def get_progress_cache_key(user_id):
+    return f'takwin:progress:{user_id}:v{get_content_version()}'
+
+
+def invalidate_user_progress(user_id):
+    cache.delete(get_progress_cache_key(user_id))
+
+
+def percentage(done, total):
+    return round((done / total) * 100) if total > 0 else 0
+
+
+def done_by(user):
+    """Exists() of a done UserTakwin of user, for Takwin querysets"""
+    return Exists(UserTakwin.objects.filter(user=user, takwin=OuterRef('pk'), is_done=True))
+
+
+def with_is_done(queryset, user):
+    """Takwin queryset whose rows carry is_done for user, without a query per row"""
+    return queryset.annotate(is_done=done_by(user))
+
+
+class TakwinProgress:
+    """
+    Totals and done counts of a user per aspect, from one grouped query.
+    progress['tarbawiu'] -> {'total', 'done', 'percentage'}; total/done/percentage cover all aspects.
+    """
+
+    def __init__(self, counts):
+        self.aspects = {}
+        for aspect, _ in ASPECT_CHOICES:
+            total, done = counts.get(aspect, (0, 0))
+            self.aspects[aspect] = {'total': total, 'done': done, 'percentage': percentage(done, total)}
+        self.total = sum(values['total'] for values in self.aspects.values())
+        self.done = sum(values['done'] for values in self.aspects.values())
+        self.percentage = percentage(self.done, self.total)
+
+    def __getitem__(self, aspect):
+        return self.aspects[aspect]
+
+    @classmethod
+    def compute(cls, user):
+        rows = with_is_done(Takwin.objects.order_by(), user).values('aspect').annotate(
+            total=Count('id'),
+            done=Count('id', filter=Q(is_done=True)),
+        )
+        return cls({row['aspect']: (row['total'], row['done']) for row in rows})
+
+    @classmethod
+    def for_user(cls, user):
+        key = get_progress_cache_key(user.pk)
+        counts = cache.get(key)
+        if counts is None:
+            progress = cls.compute(user)
+            cache.set(key, {aspect: (values['total'], values['done'])
+                            for aspect, values in progress.aspects.items()}, cap_timeout(PROGRESS_CACHE_TIMEOUT))
+            return progress
+        return cls(counts)
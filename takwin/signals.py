@@ -0,0 +1,15 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Takwin, UserTakwin
+from .progress import invalidate_takwin_content, invalidate_user_progress
+
+
+@receiver([post_save, post_delete], sender=Takwin, dispatch_uid='takwin_content_changed')
+def takwin_changed(sender, instance, **kwargs):
+    invalidate_takwin_content()
+
+
+@receiver([post_save, post_delete], sender=UserTakwin, dispatch_uid='user_takwin_changed')
+def user_takwin_changed(sender, instance, **kwargs):
+    invalidate_user_progress(instance.user_id)
@@ -3,45 +3,17 @@ from django.contrib.auth.decorators import login_required
 from .models import Takwin, UserTakwin
 from django.http import FileResponse, Http404
 from accounts.models import UserActivity  # استخدام UserActivity من accounts
+from accounts.activity import log_activity
+from main.media import serve_file
+from .progress import TakwinProgress, with_is_done
 import os
 import mimetypes
 
 
-def get_client_ip(request):
-    """دالة مساعدة للحصول على IP"""
-    x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
-    if x_forwarded_for:
-        ip = x_forwarded_for.split(',')[0]
-    else:
-        ip = request.META.get('REMOTE_ADDR')
-    return ip
-
-
 @login_required(login_url="/accounts/login/")
 def takwin(request):
     user = request.user
-    def calc_percentage(done, total):
-        return round((done / total) * 100) if total > 0 else 0
-
-    num_tarbawiu = Takwin.objects.filter(aspect='tarbawiu').order_by('-created_at').count()
-    num_done_tarbawiu = UserTakwin.objects.filter(user=request.user, takwin__aspect='tarbawiu', is_done=True).count()
-    progress_tarbawiu = calc_percentage(num_done_tarbawiu, num_tarbawiu)
-
-    num_shareiu = Takwin.objects.filter(aspect='shareiu').order_by('-created_at').count()
-    num_done_shareiu = UserTakwin.objects.filter(user=request.user, takwin__aspect='shareiu', is_done=True).count()
-    progress_shareiu = calc_percentage(num_done_shareiu, num_shareiu)
-
-    num_mhari = Takwin.objects.filter(aspect='mhari').order_by('-created_at').count()
-    num_done_mhari = UserTakwin.objects.filter(user=request.user, takwin__aspect='mhari', is_done=True).count()
-    progress_mhari = calc_percentage(num_done_mhari, num_mhari)
-
-    num_medad = Takwin.objects.filter(aspect='medad').order_by('-created_at').count()
-    num_done_medad = UserTakwin.objects.filter(user=request.user, takwin__aspect='medad', is_done=True).count()
-    progress_medad = calc_percentage(num_done_medad, num_medad)
-
-    num_takwins = num_tarbawiu + num_shareiu + num_mhari + num_medad
-    num_done_takwins = num_done_tarbawiu + num_done_shareiu + num_done_mhari + num_done_medad
-    progress_takwins = calc_percentage(num_done_takwins, num_takwins)
+    progress = TakwinProgress.for_user(user)
 
     if user.role == 'director':
         base_template = 'director_base.html'
@@ -60,23 +32,21 @@ def takwin(request):
     else:
         base_template = 'base.html'
 
-    return render(request, 'takwin/takwin.html', {
-        "num_takwins": num_takwins, "num_done_takwins": num_done_takwins, "progress_takwins": progress_takwins,
-        "num_tarbawiu": num_tarbawiu, "num_done_tarbawiu": num_done_tarbawiu, "progress_tarbawiu": progress_tarbawiu,
-        "num_shareiu": num_shareiu, "num_done_shareiu": num_done_shareiu, "progress_shareiu": progress_shareiu,
-        "num_mhari": num_mhari, "num_done_mhari": num_done_mhari, "progress_mhari": progress_mhari,
-        "num_medad": num_medad, "num_done_medad": num_done_medad, "progress_medad": progress_medad,'base_template': base_template,
-    })
+    context = {
+        "num_takwins": progress.total, "num_done_takwins": progress.done, "progress_takwins": progress.percentage,
+        'base_template': base_template,
+    }
+    for aspect, values in progress.aspects.items():
+        context[f"num_{aspect}"] = values['total']
+        context[f"num_done_{aspect}"] = values['done']
+        context[f"progress_{aspect}"] = values['percentage']
+    return render(request, 'takwin/takwin.html', context)
 
 
 @login_required(login_url="/accounts/login/")
 def tarbawiu(request):
     user = request.user
-    takwin_list = Takwin.objects.filter(aspect='tarbawiu').order_by('-created_at')
-
-    for t in takwin_list:
-        user_takwin = UserTakwin.objects.filter(user=request.user, takwin=t).first()
-        t.is_done = user_takwin.is_done if user_takwin else False
+    takwin_list = with_is_done(Takwin.objects.filter(aspect='tarbawiu').order_by('-created_at'), user)
 
     if user.role == 'director':
         base_template = 'director_base.html'
@@ -104,11 +74,7 @@ def tarbawiu(request):
 @login_required(login_url="/accounts/login/")
 def shareiu(request):
     user = request.user
-    takwin_list = Takwin.objects.filter(aspect='shareiu').order_by('-created_at')
-
-    for t in takwin_list:
-        user_takwin = UserTakwin.objects.filter(user=request.user, takwin=t).first()
-        t.is_done = user_takwin.is_done if user_takwin else False
+    takwin_list = with_is_done(Takwin.objects.filter(aspect='shareiu').order_by('-created_at'), user)
 
     if user.role == 'director':
         base_template = 'director_base.html'
@@ -136,11 +102,7 @@ def shareiu(request):
 @login_required(login_url="/accounts/login/")
 def mhari(request):
     user = request.user
-    takwin_list = Takwin.objects.filter(aspect='mhari').order_by('-created_at')
-
-    for t in takwin_list:
-        user_takwin = UserTakwin.objects.filter(user=request.user, takwin=t).first()
-        t.is_done = user_takwin.is_done if user_takwin else False
+    takwin_list = with_is_done(Takwin.objects.filter(aspect='mhari').order_by('-created_at'), user)
 
     if user.role == 'director':
         base_template = 'director_base.html'
@@ -168,11 +130,7 @@ def mhari(request):
 @login_required(login_url="/accounts/login/")
 def medad(request):
     user = request.user
-    takwin_list = Takwin.objects.filter(aspect='medad').order_by('-created_at')
-
-    for t in takwin_list:
-        user_takwin = UserTakwin.objects.filter(user=request.user, takwin=t).first()
-        t.is_done = user_takwin.is_done if user_takwin else False
+    takwin_list = with_is_done(Takwin.objects.filter(aspect='medad').order_by('-created_at'), user)
 
     if user.role == 'director':
         base_template = 'director_base.html'
@@ -214,11 +172,7 @@ def toggle_takwin(request, takwin_id):
 
     # تسجيل النشاط
     action = 'تعليم تكوين كمنجز' if user_takwin.is_done else 'إلغاء إنجاز تكوين'
-    UserActivity.objects.create(
-        user=request.user,
-        action=f'{action}: {takwin.title}',
-        ip_address=get_client_ip(request)
-    )
+    log_activity(request, f'{action}: {takwin.title}')
 
     # رجّع المستخدم للصفحة السابقة أو للصفحة الرئيسية إذا لم يكن هناك Referer
     return redirect(request.META.get('HTTP_REFERER', 'takwin'))
@@ -237,59 +191,40 @@ def pdf_file_view_takwin(request, takwin_id):
     if not takwin.pdf:
         raise Http404("File not found")
 
-    try:
-        file_path = takwin.pdf.path
-        if os.path.exists(file_path):
-            # اكتشاف نوع الملف من الامتداد
-            file_extension = os.path.splitext(file_path)[1].lower()
-
-            # تحديد content_type بناءً على نوع الملف
-            content_type_map = {
-                '.pdf': 'application/pdf',
-                '.jpg': 'image/jpeg',
-                '.jpeg': 'image/jpeg',
-                '.png': 'image/png',
-                '.gif': 'image/gif',
-                '.webp': 'image/webp',
-                '.doc': 'application/msword',
-                '.docx': 'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
-                '.xls': 'application/vnd.ms-excel',
-                '.xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
-                '.ppt': 'application/vnd.ms-powerpoint',
-                '.pptx': 'application/vnd.openxmlformats-officedocument.presentationml.presentation',
-                '.txt': 'text/plain',
-                '.zip': 'application/zip',
-                '.rar': 'application/x-rar-compressed',
-            }
-
-            content_type = content_type_map.get(file_extension)
-
-            # إذا لم نجد نوع محدد، استخدم mimetypes
-            if not content_type:
-                content_type, _ = mimetypes.guess_type(file_path)
-                if not content_type:
-                    content_type = 'application/octet-stream'
-
-            response = FileResponse(
-                open(file_path, 'rb'),
-                content_type=content_type
-            )
-            response['Content-Disposition'] = f'inline; filename="{os.path.basename(file_path)}"'
-            response['X-Content-Type-Options'] = 'nosniff'
-            response['Access-Control-Allow-Origin'] = '*'
+    file_path = takwin.pdf.path
+    # اكتشاف نوع الملف من الامتداد
+    file_extension = os.path.splitext(file_path)[1].lower()
+
+    # تحديد content_type بناءً على نوع الملف
+    content_type_map = {
+        '.pdf': 'application/pdf',
+        '.jpg': 'image/jpeg',
+        '.jpeg': 'image/jpeg',
+        '.png': 'image/png',
+        '.gif': 'image/gif',
+        '.webp': 'image/webp',
+        '.doc': 'application/msword',
+        '.docx': 'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
+        '.xls': 'application/vnd.ms-excel',
+        '.xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+        '.ppt': 'application/vnd.ms-powerpoint',
+        '.pptx': 'application/vnd.openxmlformats-officedocument.presentationml.presentation',
+        '.txt': 'text/plain',
+        '.zip': 'application/zip',
+        '.rar': 'application/x-rar-compressed',
+    }
 
-            # تسجيل النشاط
-            UserActivity.objects.create(
-                user=request.user,
-                action=f'عرض ملف: {takwin.title}',
-                ip_address=get_client_ip(request)
-            )
+    # إذا لم نجد نوع محدد، يستخدم serve_file مكتبة mimetypes
+    # الخادم الأمامي يرسل الملف إن كان مهيأً لذلك، وإلا يُرسل على أجزاء مع دعم Range
+    response = serve_file(request, file_path, content_type=content_type_map.get(file_extension))
+    response['X-Content-Type-Options'] = 'nosniff'
+    response['Access-Control-Allow-Origin'] = '*'
+
+    # تسجيل النشاط مرة واحدة لكل عرض، لا لكل جزء يطلبه عارض PDF
+    if request.method == 'GET' and request.META.get('HTTP_RANGE', 'bytes=0-').startswith('bytes=0-'):
+        log_activity(request, f'عرض ملف: {takwin.title}')
 
-            return response
-        else:
-            raise Http404("File not found on disk")
-    except Exception as e:
-        raise Http404(f"Error loading file: {str(e)}")
+    return response
 
 
 from django.shortcuts import render, get_object_or_404, redirect
@@ -339,11 +274,7 @@ def add_takwin(request):
             takwin = form.save()
 
             # تسجيل النشاط
-            UserActivity.objects.create(
-                user=request.user,
-                action=f'إضافة تكوين جديد: {takwin.title}',
-                ip_address=get_client_ip(request)
-            )
+            log_activity(request, f'إضافة تكوين جديد: {takwin.title}')
 
             messages.success(request, 'تم إضافة التكوين بنجاح!')
             return redirect('takwin_management')
@@ -365,11 +296,7 @@ def edit_takwin(request, takwin_id):
             updated_takwin = form.save()
 
             # تسجيل النشاط
-            UserActivity.objects.create(
-                user=request.user,
-                action=f'تعديل تكوين: {updated_takwin.title}',
-                ip_address=get_client_ip(request)
-            )
+            log_activity(request, f'تعديل تكوين: {updated_takwin.title}')
 
             messages.success(request, 'تم تحديث التكوين بنجاح!')
             return redirect('takwin_management')
@@ -400,11 +327,7 @@ def delete_takwin(request, takwin_id):
         takwin.delete()
 
         # تسجيل النشاط
-        UserActivity.objects.create(
-            user=request.user,
-            action=f'حذف تكوين: {title}',
-            ip_address=get_client_ip(request)
-        )
+        log_activity(request, f'حذف تكوين: {title}')
 
         messages.success(request, 'تم حذف التكوين بنجاح!')
         return redirect('takwin_management')